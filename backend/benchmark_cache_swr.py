@@ -0,0 +1,110 @@
+"""
+Latencia de los endpoints cacheados cuando vence la entrada: TTL solo
+(obtener, antes) vs stale-while-revalidate (obtener_swr, después).
+
+- 16 clientes concurrentes piden 3 keys (ranking, top semanal, dashboard)
+  durante varios vencimientos seguidos
+- La "query" tarda 60 ms y el pool de la base tiene 5 conexiones: con el
+  caché vencido, los requests esperan la query (o la conexión)
+- Se informa p50 / p95 / p99 / máximo por request y cuántas queries fueron
+  a la base
+
+Uso:
+    python benchmark_cache_swr.py
+"""
+import sys
+import os
+import random
+import threading
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.utils.cache import CacheLRU
+
+CLIENTES = 16
+DURACION = 4.0
+TTL = 0.5
+STALE = 30
+QUERY_SEGUNDOS = 0.06
+POOL = 5
+KEYS = ["ranking:100:0:None", "top_weekly:5", "dashboard_top:"]
+
+
+class BaseSimulada:
+    def __init__(self):
+        self.pool = threading.BoundedSemaphore(POOL)
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def consultar(self, key):
+        with self.pool:
+            with self._lock:
+                self.queries += 1
+            time.sleep(QUERY_SEGUNDOS)
+            return [key] * 10
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * p), len(ordenados) - 1)]
+
+
+def correr(modo):
+    cache = CacheLRU()
+    base = BaseSimulada()
+    latencias = []
+    lock = threading.Lock()
+    parar = threading.Event()
+
+    def pedir(key):
+        calcular = lambda: base.consultar(key)  # noqa: E731
+        if modo == "swr":
+            return cache.obtener_swr(key, calcular, TTL, STALE)
+        return cache.obtener(key, calcular, TTL)
+
+    for key in KEYS:
+        pedir(key)  # Caché caliente al empezar
+
+    def cliente(semilla):
+        rnd = random.Random(semilla)
+        propias = []
+        while not parar.is_set():
+            key = rnd.choice(KEYS)
+            inicio = time.perf_counter()
+            pedir(key)
+            propias.append(time.perf_counter() - inicio)
+            time.sleep(rnd.uniform(0.001, 0.005))
+        with lock:
+            latencias.extend(propias)
+
+    threads = [threading.Thread(target=cliente, args=(i,)) for i in range(CLIENTES)]
+    for t in threads:
+        t.start()
+    time.sleep(DURACION)
+    parar.set()
+    for t in threads:
+        t.join()
+    while cache._refrescando:
+        time.sleep(0.01)
+    return latencias, base.queries
+
+
+def main():
+    print(f"{CLIENTES} clientes, {len(KEYS)} keys, TTL {TTL}s, query {QUERY_SEGUNDOS * 1000:.0f} ms, "
+          f"pool de {POOL}, {DURACION:.0f}s por modo\n")
+    print(f"{'modo':<26}{'requests':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'máx':>10}{'queries':>9}")
+    resultados = {}
+    for modo, nombre in (("ttl", "TTL (antes)"), ("swr", "stale-while-revalidate")):
+        latencias, queries = correr(modo)
+        resultados[modo] = latencias
+        fila = [percentil(latencias, p) * 1000 for p in (0.5, 0.95, 0.99)] + [max(latencias) * 1000]
+        print(f"{nombre:<26}{len(latencias):>9}" + "".join(f"{v:>8.2f}ms" for v in fila) + f"{queries:>9}")
+
+    # Con TTL, cada vencimiento deja a los requests de esa key esperando la query
+    assert percentil(resultados["swr"], 0.99) < percentil(resultados["ttl"], 0.99)
+    assert max(resultados["swr"]) < QUERY_SEGUNDOS
+    print("\n✅ Stale-while-revalidate: ningún request espera la query al vencer el caché")
+
+
+if __name__ == "__main__":
+    main()
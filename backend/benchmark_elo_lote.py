@@ -0,0 +1,53 @@
+"""
+Benchmark: EloService.calculate_match_ratings de a uno vs elo_lote
+100k partidos sintéticos (mismo generador que test_elo_lote.py); verifica
+que los ratings nuevos sean idénticos.
+
+Uso:
+    python benchmark_elo_lote.py [cantidad_de_partidos]
+"""
+import sys
+import os
+import random
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.elo_service import EloService
+from src.services.elo_lote import JUGADORES, LoteElo, calcular_lote
+from test_elo_lote import partido_al_azar
+
+
+def main(cantidad: int):
+    rnd = random.Random(100)
+    partidos = [partido_al_azar(rnd, jugador_id=i * 4) for i in range(cantidad)]
+    service = EloService()
+
+    inicio = time.perf_counter()
+    escalar = [service.calculate_match_ratings(**p) for p in partidos]
+    t_escalar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    lote = LoteElo()
+    for partido in partidos:
+        lote.agregar(**partido)
+    t_armado = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultado = calcular_lote(lote, service)
+    t_lote = time.perf_counter() - inicio
+
+    for i, r in enumerate(escalar):
+        nuevos = [j["new_rating"] for j in r["team_a"]["players"] + r["team_b"]["players"]]
+        assert nuevos == [resultado.nuevo[c][i] for c in range(JUGADORES)], i
+
+    print(f"\n{cantidad} partidos sintéticos")
+    print(f"  calculate_match_ratings de a uno: {t_escalar:7.3f} s ({cantidad / t_escalar:,.0f} partidos/s)")
+    print(f"  LoteElo.agregar:                  {t_armado:7.3f} s")
+    print(f"  calcular_lote:                    {t_lote:7.3f} s ({cantidad / t_lote:,.0f} partidos/s)")
+    print(f"  aceleración del cálculo: x{t_escalar / t_lote:.1f}"
+          f" (x{t_escalar / (t_armado + t_lote):.1f} con el armado del lote)")
+    print("  ratings nuevos idénticos ✅")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,63 @@
+"""
+Benchmark: greedy vs modo óptimo (greedy + búsqueda local)
+Compara partidos sin programar y tiempo en formas de torneo típicas.
+
+Uso:
+    python benchmark_fixture_optimizer.py [segundos_por_categoria]
+"""
+import sys
+import os
+import time
+from datetime import date
+sys.path.insert(0, os.path.dirname(__file__))
+
+from test_fixture_scheduler import generar_torneo, generar_slots
+from test_fixture_optimizer import asignar_torneo, verificar, programados
+
+
+# (nombre, parejas, categorías, tamaño de zona, días, canchas, prob. restricción)
+ESCENARIOS = [
+    ("Club chico, 1 día, 4 canchas", 32, 2, 4, 1, 4, 0.7),
+    ("Fin de semana largo, 4 canchas", 64, 4, 4, 3, 4, 0.9),
+    ("Torneo grande, 3 días, 6 canchas", 120, 6, 4, 3, 6, 0.9),
+    ("Torneo 200 parejas, 4 días, 8 canchas", 200, 8, 4, 4, 8, 0.9),
+    ("Torneo 200 parejas justo de canchas, 3 días", 200, 8, 4, 3, 8, 0.9),
+]
+
+
+def escenario(nombre, parejas, num_categorias, tam_zona, dias, num_canchas, prob_restriccion, segundos):
+    categorias, jugadores, disponibilidad = generar_torneo(
+        num_parejas=parejas, num_categorias=num_categorias, tam_zona=tam_zona,
+        prob_restriccion=prob_restriccion
+    )
+    slots = generar_slots(date(2026, 3, 5), dias)
+    cancha_ids = list(range(1, num_canchas + 1))
+    total = sum(len(p) for p in categorias.values())
+
+    inicio = time.perf_counter()
+    greedy = asignar_torneo(categorias, jugadores, disponibilidad, slots, cancha_ids)
+    t_greedy = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    optimo = asignar_torneo(
+        categorias, jugadores, disponibilidad, slots, cancha_ids,
+        optimo=True, max_iteraciones=None, tiempo_limite=segundos
+    )
+    t_optimo = time.perf_counter() - inicio
+    verificar(optimo, jugadores, disponibilidad, slots)
+
+    print(f"\n{nombre}")
+    print(f"{parejas} parejas, {total} partidos, {len(slots)} slots, {num_canchas} canchas")
+    print(f"Greedy:  {total - programados(greedy):4d} sin programar  {t_greedy * 1000:8.1f} ms")
+    print(f"Óptimo:  {total - programados(optimo):4d} sin programar  {t_optimo * 1000:8.1f} ms")
+
+
+def main():
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    print(f"Presupuesto del modo óptimo: {segundos}s por categoría")
+    for datos in ESCENARIOS:
+        escenario(*datos, segundos)
+
+
+if __name__ == "__main__":
+    main()
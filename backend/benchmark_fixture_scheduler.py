@@ -0,0 +1,59 @@
+"""
+Benchmark: greedy original vs FixtureScheduler indexado
+Torneo sintético de 200 parejas, 8 categorías, 4 días y 12 canchas.
+
+Uso:
+    python benchmark_fixture_scheduler.py
+"""
+import sys
+import os
+import time
+from datetime import date
+sys.path.insert(0, os.path.dirname(__file__))
+
+from test_fixture_scheduler import (
+    generar_torneo, generar_slots, generar_torneo_completo,
+    asignar_legacy, asignar_indexado
+)
+
+
+def medir(asignar, *args, repeticiones=3):
+    mejor = None
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = generar_torneo_completo(asignar, *args)
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+
+def escenario(nombre, dias, num_canchas, prob_restriccion):
+    categorias, jugadores, disponibilidad = generar_torneo(
+        num_parejas=200, num_categorias=8, tam_zona=4, prob_restriccion=prob_restriccion
+    )
+    slots = generar_slots(date(2026, 3, 5), dias)
+    cancha_ids = list(range(1, num_canchas + 1))
+    total_partidos = sum(len(p) for p in categorias.values())
+
+    print(f"\n{nombre}")
+    print(f"200 parejas, {total_partidos} partidos, {len(slots)} slots, {len(cancha_ids)} canchas")
+
+    t_legacy, r_legacy = medir(asignar_legacy, categorias, jugadores, disponibilidad, slots, cancha_ids)
+    t_indexado, r_indexado = medir(asignar_indexado, categorias, jugadores, disponibilidad, slots, cancha_ids)
+
+    programados = sum(1 for _, _, a in r_indexado if a)
+    print(f"Greedy original:   {t_legacy * 1000:8.1f} ms")
+    print(f"Motor indexado:    {t_indexado * 1000:8.1f} ms")
+    print(f"Speedup:           {t_legacy / t_indexado:8.1f}x")
+    print(f"Programados:       {programados}/{total_partidos}")
+    print(f"Resultado idéntico: {'✅' if r_legacy == r_indexado else '❌'}")
+
+
+def main():
+    escenario("Torneo holgado (4 días, 12 canchas)", dias=4, num_canchas=12, prob_restriccion=0.6)
+    escenario("Torneo saturado (2 días, 4 canchas)", dias=2, num_canchas=4, prob_restriccion=0.9)
+
+
+if __name__ == "__main__":
+    main()
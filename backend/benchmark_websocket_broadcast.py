@@ -0,0 +1,127 @@
+"""
+Prueba de carga: broadcast a 5.000 WebSockets simulados.
+
+- Fan-out secuencial original (un await por socket) vs enviar_a_todos
+  (asyncio.gather + timeout por envío)
+- Clientes móviles lentos (latencia 0-20 ms), algunos colgados y algunos
+  con la conexión rota
+- 4 workers con BusPostgres sobre un canal NOTIFY simulado: cada socket
+  recibe cada mensaje una sola vez sin importar en qué worker está
+
+Uso:
+    python benchmark_websocket_broadcast.py
+"""
+import sys
+import os
+import asyncio
+import random
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.bus_broadcast import BusPostgres, enviar_a_todos
+from test_bus_websocket import PostgresFalso
+
+SOCKETS = 5000
+WORKERS = 4
+MENSAJES = 5
+TIMEOUT = 1.0
+
+
+class SocketMovil:
+    def __init__(self, rng):
+        tipo = rng.random()
+        self.colgado = tipo < 0.002
+        self.roto = 0.002 <= tipo < 0.004
+        self.latencia = rng.uniform(0, 0.02)
+        self.recibidos = []
+
+    async def send_json(self, mensaje):
+        if self.roto:
+            raise ConnectionResetError("cliente desconectado")
+        await asyncio.sleep(3600 if self.colgado else self.latencia)
+        self.recibidos.append(mensaje["n"])
+
+
+async def fanout_secuencial(conexiones, mensaje):
+    """broadcast_to_sala original (sin timeout: se omiten los colgados para que termine)"""
+    fallidos = []
+    for conexion in conexiones:
+        if conexion.colgado:
+            continue
+        try:
+            await conexion.send_json(mensaje)
+        except Exception:
+            fallidos.append(conexion)
+    return fallidos
+
+
+async def comparar_fanout(rng):
+    print(f"\nFan-out a {SOCKETS} sockets de una sala (un worker)")
+    muestra = [SocketMovil(rng) for _ in range(300)]
+    inicio = time.perf_counter()
+    await fanout_secuencial(muestra, {"n": 0})
+    t_secuencial = (time.perf_counter() - inicio) * SOCKETS / len(muestra)
+    print(f"Secuencial original: {t_secuencial:8.2f} s (estimado con {len(muestra)} sockets, sin los colgados)")
+
+    conexiones = [SocketMovil(rng) for _ in range(SOCKETS)]
+    inicio = time.perf_counter()
+    fallidos = await enviar_a_todos(conexiones, {"n": 0}, timeout=TIMEOUT)
+    t_gather = time.perf_counter() - inicio
+    sanos = [c for c in conexiones if not c.colgado and not c.roto]
+    print(f"Concurrente (gather): {t_gather:8.2f} s (cota: timeout {TIMEOUT} s por los colgados)")
+    print(f"Desconectados:        {len(fallidos):8d} (colgados + rotos = {SOCKETS - len(sanos)})")
+    assert len(fallidos) == SOCKETS - len(sanos)
+    assert all(c.recibidos == [0] for c in sanos)
+    assert t_gather < TIMEOUT + 1.0
+
+
+async def multi_worker(rng):
+    print(f"\n{SOCKETS} sockets en {WORKERS} workers, {MENSAJES} mensajes publicados desde workers distintos")
+    postgres = PostgresFalso()
+    salas = [dict() for _ in range(WORKERS)]
+    buses = []
+    conexiones = []
+    for worker in range(WORKERS):
+        bus = BusPostgres("postgresql://falso/db")
+        bus._publicacion = postgres.conexion()
+
+        async def entregar(sala, mensaje, worker=worker):
+            vivas = salas[worker].get(sala, [])
+            for caida in await enviar_a_todos(vivas, mensaje, timeout=TIMEOUT):
+                vivas.remove(caida)
+
+        bus._entregar = entregar
+        postgres.oyentes.append(bus._al_notificar)
+        buses.append(bus)
+
+    for i in range(SOCKETS):
+        conexion = SocketMovil(rng)
+        conexion.colgado = conexion.roto = False
+        salas[i % WORKERS].setdefault("torneo:1", []).append(conexion)
+        conexiones.append(conexion)
+
+    inicio = time.perf_counter()
+    for n in range(MENSAJES):
+        await buses[n % WORKERS].publicar("torneo:1", {"n": n})
+    # Los NOTIFY de otros workers se entregan en tareas aparte
+    while any(len(c.recibidos) < MENSAJES for c in conexiones) and time.perf_counter() - inicio < 10:
+        await asyncio.sleep(0.01)
+    duracion = time.perf_counter() - inicio
+
+    completos = sum(1 for c in conexiones if sorted(c.recibidos) == list(range(MENSAJES)))
+    print(f"Entregados:           {completos}/{SOCKETS} sockets con los {MENSAJES} mensajes, sin duplicados")
+    print(f"Tiempo total:         {duracion:8.2f} s")
+    print(f"NOTIFY enviados:      {len(postgres.notificados):8d}")
+    assert completos == SOCKETS
+    assert len(postgres.notificados) == MENSAJES
+
+
+async def main():
+    rng = random.Random(0)
+    await comparar_fanout(rng)
+    await multi_worker(rng)
+    print("\n✅ Broadcast a 5.000 sockets: concurrente, acotado por timeout y entregado en todos los workers")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
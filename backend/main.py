@@ -36,6 +36,8 @@ from src.controllers.admin_controller import router as admin_router
 from src.controllers.categoria_maintenance_controller import router as categoria_maintenance_router
 from src.controllers.circuito_controller import router as circuito_router
 from src.controllers.dashboard_controller import router as dashboard_router
+from src.controllers.trabajo_controller import router as trabajo_router
+from src.controllers.websocket_controller import router as websocket_router
 
 
 # ---- Lifespan (startup/shutdown) ----
@@ -68,6 +70,52 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Error al configurar tareas programadas: {e}")
 
+    # Bus de broadcast de WebSockets (WS_BUS=postgres para varios workers)
+    try:
+        from src.services.bus_broadcast import crear_bus
+        from src.websocket.connection_manager import manager
+        await manager.iniciar_bus(crear_bus())
+        logger.info(f"✅ Bus WebSocket: {manager.bus.stats()['tipo']}")
+    except Exception as e:
+        logger.error(f"❌ Error al iniciar bus WebSocket: {e}")
+
+    # Progreso de trabajos en segundo plano por WebSocket
+    try:
+        import asyncio
+        from src.services.trabajos import trabajos, notificador_websocket
+        from src.websocket.connection_manager import manager
+        trabajos.notificar = notificador_websocket(asyncio.get_running_loop(), manager)
+    except Exception as e:
+        logger.error(f"❌ Error al configurar notificación de trabajos: {e}")
+
+    # Cambios en vivo de torneos (/ws/torneos/{id})
+    try:
+        import asyncio
+        from src.services.eventos_torneo import eventos, notificador_websocket as notificador_eventos
+        from src.websocket.connection_manager import manager
+        eventos.notificar = notificador_eventos(asyncio.get_running_loop(), manager)
+    except Exception as e:
+        logger.error(f"❌ Error al configurar eventos en vivo de torneos: {e}")
+
+    # Caché (CACHE_BACKEND=sqlite|redis para compartirlo entre workers)
+    try:
+        from src.utils.cache import cache
+        logger.info(f"✅ Caché: {cache.stats()['backend']}")
+    except Exception as e:
+        logger.error(f"❌ Error al consultar el caché: {e}")
+
+    # Índice de ranking en memoria (posición / vecinos / páginas sin ir a la base)
+    try:
+        from src.database.config import SessionLocal
+        from src.services.ranking_indice_service import cargar_indice
+        db = SessionLocal()
+        try:
+            logger.info(f"✅ Índice de ranking: {cargar_indice(db)} jugadores")
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"❌ Error al cargar índice de ranking: {e}")
+
     yield
 
     # Shutdown
@@ -78,6 +126,23 @@ async def lifespan(app: FastAPI):
         logger.info("✅ Tareas programadas detenidas")
     except Exception as e:
         logger.error(f"❌ Error al detener tareas programadas: {e}")
+    try:
+        from src.websocket.connection_manager import manager
+        await manager.cerrar_bus()
+    except Exception as e:
+        logger.error(f"❌ Error al cerrar bus WebSocket: {e}")
+    try:
+        from src.services.eventos_torneo import eventos
+        eventos.notificar = None
+    except Exception as e:
+        logger.error(f"❌ Error al detener eventos en vivo de torneos: {e}")
+    try:
+        from src.services.trabajos import trabajos
+        trabajos.notificar = None
+        trabajos.apagar()
+        logger.info("✅ Trabajos en segundo plano detenidos")
+    except Exception as e:
+        logger.error(f"❌ Error al detener trabajos en segundo plano: {e}")
 
 
 # ---- Crear app ----
@@ -139,6 +204,8 @@ app.include_router(admin_router)
 app.include_router(categoria_maintenance_router)
 app.include_router(circuito_router)
 app.include_router(dashboard_router)
+app.include_router(trabajo_router)
+app.include_router(websocket_router)
 
 # ---- Endpoints básicos ----
 @app.get("/")
@@ -0,0 +1,32 @@
+-- Migración: vínculo de cada partido de playoff con el partido al que pasa su ganador
+-- (avanzar un ganador pasa a ser un UPDATE por primary key)
+
+ALTER TABLE partidos ADD COLUMN IF NOT EXISTS siguiente_partido_id BIGINT
+    REFERENCES partidos(id_partido) ON DELETE SET NULL;
+ALTER TABLE partidos ADD COLUMN IF NOT EXISTS slot_siguiente SMALLINT
+    CHECK (slot_siguiente IN (1, 2));
+
+CREATE INDEX IF NOT EXISTS idx_partidos_siguiente ON partidos(siguiente_partido_id)
+    WHERE siguiente_partido_id IS NOT NULL;
+
+-- Brackets ya generados: mismo criterio que usaba avanzar_ganador
+-- (partido N de una fase → partido (N+1)/2 de la fase siguiente, impar → slot 1)
+UPDATE partidos AS p
+SET siguiente_partido_id = s.id_partido,
+    slot_siguiente = CASE WHEN p.numero_partido % 2 = 1 THEN 1 ELSE 2 END
+FROM partidos s
+WHERE p.siguiente_partido_id IS NULL
+  AND p.fase IN ('32avos', '16avos', '8vos', '4tos', 'cuartos', 'semis', 'semifinal')
+  AND s.id_torneo = p.id_torneo
+  AND s.categoria_id IS NOT DISTINCT FROM p.categoria_id
+  AND s.numero_partido = (p.numero_partido + 1) / 2
+  AND s.fase = CASE p.fase
+      WHEN '32avos' THEN '16avos'
+      WHEN '16avos' THEN '8vos'
+      WHEN '8vos' THEN '4tos'
+      WHEN '4tos' THEN 'semis'
+      WHEN 'cuartos' THEN 'semis'
+      ELSE 'final'
+  END;
+
+SELECT 'Vínculos de bracket agregados a partidos' as info;
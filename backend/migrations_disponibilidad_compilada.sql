@@ -0,0 +1,14 @@
+-- Migración: restricciones horarias compiladas de parejas
+-- Fecha: 2026-10-18
+
+-- Bitmaps por día (resolución 5 minutos) calculados al guardar
+-- disponibilidad_horaria. Formato:
+-- {
+--   "version": 1,
+--   "resolucion": 5,
+--   "dias": {"viernes": "<bitmap en hex>"}
+-- }
+-- Las filas existentes quedan en NULL y se compilan al leerlas
+-- (utils/disponibilidad.py: mapa_de_pareja) hasta que se vuelvan a guardar.
+ALTER TABLE torneos_parejas
+ADD COLUMN IF NOT EXISTS disponibilidad_compilada JSONB;
@@ -0,0 +1,25 @@
+-- Migración: fase '32avos' para brackets de hasta 64 parejas
+
+-- partidos_fase_check se recrea con los mismos valores que ya tiene más '32avos'
+-- (se toma la definición actual para no perder fases que existan en la base)
+DO $$
+DECLARE
+    definicion TEXT;
+BEGIN
+    SELECT pg_get_constraintdef(oid) INTO definicion
+    FROM pg_constraint
+    WHERE conname = 'partidos_fase_check' AND conrelid = 'partidos'::regclass;
+
+    IF definicion IS NOT NULL AND position('32avos' IN definicion) = 0 THEN
+        definicion := replace(
+            definicion,
+            '''16avos''::character varying',
+            '''32avos''::character varying, ''16avos''::character varying'
+        );
+        ALTER TABLE partidos DROP CONSTRAINT partidos_fase_check;
+        EXECUTE 'ALTER TABLE partidos ADD CONSTRAINT partidos_fase_check ' || definicion || ' NOT VALID';
+        ALTER TABLE partidos VALIDATE CONSTRAINT partidos_fase_check;
+    END IF;
+END $$;
+
+SELECT 'Fase 32avos agregada a partidos' as info;
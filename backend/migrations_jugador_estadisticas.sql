@@ -0,0 +1,35 @@
+-- Migración: estadísticas agregadas por jugador para el ranking
+-- Fecha: 2026-10-18
+
+-- GET /ranking/ deja de agrupar todo historial_rating en cada consulta:
+-- partidos jugados/ganados, últimos deltas (tendencia) y fecha del último
+-- partido se mantienen al escribir historial_rating (JugadorEstadisticasService)
+CREATE TABLE IF NOT EXISTS jugador_estadisticas (
+    id_usuario BIGINT PRIMARY KEY REFERENCES usuarios(id_usuario) ON DELETE CASCADE,
+    partidos_jugados INTEGER NOT NULL DEFAULT 0,
+    partidos_ganados INTEGER NOT NULL DEFAULT 0,
+    ultimos_deltas INTEGER[] NOT NULL DEFAULT '{}',  -- últimos 5, el más reciente primero
+    ultimo_partido TIMESTAMPTZ,
+    actualizado_en TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- El ranking ordena usuarios por rating (idx_usuarios_rating / idx_usuarios_sexo_rating)
+-- y trae las estadísticas por primary key
+CREATE INDEX IF NOT EXISTS idx_usuarios_rating ON usuarios(rating DESC);
+CREATE INDEX IF NOT EXISTS idx_usuarios_sexo_rating ON usuarios(sexo, rating DESC);
+
+-- Carga inicial desde el historial (misma consulta que JugadorEstadisticasService;
+-- para recalcular más adelante: python reconciliar_estadisticas_jugadores.py)
+INSERT INTO jugador_estadisticas
+    (id_usuario, partidos_jugados, partidos_ganados, ultimos_deltas, ultimo_partido)
+SELECT h.id_usuario,
+       COUNT(DISTINCT h.id_partido),
+       COUNT(*) FILTER (WHERE h.delta > 0),
+       (ARRAY_AGG(h.delta ORDER BY p.fecha DESC, h.id_partido DESC, h.id_historial DESC))[1:5],
+       MAX(p.fecha)
+FROM historial_rating h
+JOIN partidos p ON p.id_partido = h.id_partido
+GROUP BY h.id_usuario
+ON CONFLICT (id_usuario) DO NOTHING;
+
+SELECT 'Tabla jugador_estadisticas creada' as info;
@@ -0,0 +1,18 @@
+-- Migración: tablas de posiciones materializadas
+-- Fecha: 2026-10-18
+
+-- torneo_tabla_posiciones pasa a mantenerse al cargar/corregir resultados
+-- (TorneoTablaService). Las actualizaciones por diferencia buscan por
+-- (zona_id, pareja_id): índice único para las bases creadas sin el UNIQUE.
+DELETE FROM torneo_tabla_posiciones a
+USING torneo_tabla_posiciones b
+WHERE a.zona_id = b.zona_id
+  AND a.pareja_id = b.pareja_id
+  AND a.id > b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_torneo_tabla_zona_pareja
+ON torneo_tabla_posiciones(zona_id, pareja_id);
+
+-- Las zonas sin filas se calculan desde los partidos hasta su próximo
+-- resultado. Para materializar todo de una vez:
+--   python reconciliar_tablas_posiciones.py
@@ -0,0 +1,8 @@
+-- Migración: versión por torneo para ETag / GET condicional
+-- Fecha: 2026-10-18
+
+-- torneos.version se incrementa en cada commit que modifica el torneo o
+-- sus partidos, parejas, zonas y tablas (src/services/torneo_version.py).
+-- GET /torneos/{id}, /partidos, /zonas/tablas y /playoffs arman el ETag con
+-- ella y responden 304 si el cliente ya tiene esa versión.
+ALTER TABLE torneos ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
@@ -0,0 +1,15 @@
+-- Migración: contador de partidos pendientes por zona
+-- (la verificación de auto-playoffs deja de recorrer zonas y partidos en cada resultado)
+
+ALTER TABLE torneo_zonas ADD COLUMN IF NOT EXISTS partidos_pendientes INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_torneo_zonas_torneo ON torneo_zonas(torneo_id);
+
+-- Inicializar desde los partidos (NULL también sirve: se cuenta al primer resultado)
+UPDATE torneo_zonas z
+SET partidos_pendientes = (
+    SELECT COUNT(*) FROM partidos p
+    WHERE p.zona_id = z.id AND p.estado <> 'confirmado'
+);
+
+SELECT 'Contador de partidos pendientes agregado a torneo_zonas' as info;
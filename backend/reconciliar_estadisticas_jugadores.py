@@ -0,0 +1,42 @@
+"""
+Reconstruye las estadísticas agregadas del ranking (jugador_estadisticas)
+desde historial_rating y muestra los jugadores que estaban desincronizados.
+
+Uso:
+    python reconciliar_estadisticas_jugadores.py            # reconstruir
+    python reconciliar_estadisticas_jugadores.py --dry-run  # solo comparar
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.database.config import SessionLocal
+from src.services.jugador_estadisticas_service import JugadorEstadisticasService
+from src.utils.cache import invalidate_ranking_cache
+
+
+def main():
+    dry_run = '--dry-run' in sys.argv
+
+    db = SessionLocal()
+    try:
+        resultado = JugadorEstadisticasService.reconciliar(db, aplicar=not dry_run)
+    finally:
+        db.close()
+
+    print(f"📊 Estadísticas de jugadores: {resultado['jugadores']} jugadores con historial")
+    for d in resultado['diferencias'][:100]:
+        print(f"   ⚠️  Usuario {d['id_usuario']}: {d['guardada']} -> {d['calculada']}")
+    if dry_run:
+        print(f"🔍 Dry-run: {resultado['filas_corregidas']} jugadores desincronizados (sin cambios)")
+    else:
+        invalidate_ranking_cache()
+        print(f"✅ Reconstruidas ({resultado['filas_corregidas']} jugadores corregidos)")
+
+
+if __name__ == "__main__":
+    main()
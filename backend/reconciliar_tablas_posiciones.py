@@ -0,0 +1,45 @@
+"""
+Reconstruye las tablas de posiciones materializadas (torneo_tabla_posiciones)
+desde los partidos de zona y muestra las filas que estaban desincronizadas.
+
+Uso:
+    python reconciliar_tablas_posiciones.py              # todos los torneos
+    python reconciliar_tablas_posiciones.py 45           # solo el torneo 45
+    python reconciliar_tablas_posiciones.py 45 --dry-run # solo comparar
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.database.config import SessionLocal
+from src.services.torneo_tabla_service import TorneoTablaService
+
+
+def main():
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    dry_run = '--dry-run' in sys.argv
+    torneo_id = int(argumentos[0]) if argumentos else None
+
+    db = SessionLocal()
+    try:
+        resultado = TorneoTablaService.reconciliar(db, torneo_id, aplicar=not dry_run)
+    finally:
+        db.close()
+
+    alcance = f"torneo {torneo_id}" if torneo_id else "todos los torneos"
+    print(f"📊 Tablas de posiciones ({alcance}): {resultado['zonas']} zonas, "
+          f"{resultado['zonas_sin_materializar']} sin materializar")
+    for d in resultado['diferencias']:
+        print(f"   ⚠️  Zona {d['zona_id']} pareja {d['pareja_id']}: {d['guardada']} -> {d['calculada']}")
+    if dry_run:
+        print(f"🔍 Dry-run: {resultado['filas_corregidas']} filas desincronizadas (sin cambios)")
+    else:
+        print(f"✅ Reconstruidas ({resultado['filas_corregidas']} filas corregidas)")
+
+
+if __name__ == "__main__":
+    main()
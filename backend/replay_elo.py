@@ -0,0 +1,59 @@
+"""
+Recalcula el ELO de toda la historia (partidos confirmados, en orden) y lo
+compara contra historial_rating y usuarios.rating. Reemplaza a los scripts
+de corrección puntuales (corregir_ratings_*, recalcular_elo_*).
+
+Uso:
+    python replay_elo.py                    # dry-run con EloService
+    python replay_elo.py --motor v2         # dry-run con EloServiceV2
+    python replay_elo.py --aplicar          # corrige historial y ratings
+    python replay_elo.py --muestras 200     # más diferencias de ejemplo
+"""
+import argparse
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.database.config import SessionLocal
+from src.services.elo_replay_service import MOTORES, EloReplayService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay determinista del ELO")
+    parser.add_argument('--motor', choices=sorted(MOTORES), default='v1')
+    parser.add_argument('--aplicar', action='store_true', help="Guardar las correcciones (sin esto es dry-run)")
+    parser.add_argument('--muestras', type=int, default=50)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        reporte = EloReplayService.ejecutar(db, args.motor, aplicar=args.aplicar, muestras=args.muestras)
+    finally:
+        db.close()
+
+    historial = reporte['historial']
+    print(f"🔁 Replay ELO ({reporte['motor']}): {reporte['partidos']} partidos en {reporte['segundos']}s, "
+          f"{reporte['omitidos']} omitidos")
+    for omitido in reporte['omitidos_muestra']:
+        print(f"   ⏭️  Partido {omitido['id_partido']}: {omitido['motivo']}")
+    print(f"📜 Historial: {historial['iguales']} iguales, {historial['distintas']} distintas, "
+          f"{historial['faltantes']} faltantes, {historial['duplicadas']} duplicadas, "
+          f"{historial['sobrantes']} sobrantes, {historial['sin_recalcular']} de partidos sin recalcular")
+    for m in historial['muestras']:
+        print(f"   ⚠️  Partido {m['id_partido']} usuario {m['id_usuario']}: {m['guardada']} -> {m['calculada']}")
+    print(f"👤 Usuarios con rating distinto: {reporte['usuarios_distintos']}")
+    for u in reporte['usuarios_muestra']:
+        print(f"   ⚠️  Usuario {u['id_usuario']}: rating {u['rating_actual']} -> {u['rating']}, "
+              f"partidos {u['partidos_actual']} -> {u['partidos']}")
+    if reporte['aplicado']:
+        print("✅ Historial y ratings corregidos")
+    else:
+        print("🔍 Dry-run: sin cambios (usar --aplicar para guardar)")
+
+
+if __name__ == "__main__":
+    main()
@@ -89,7 +89,8 @@ async def get_jugadores_por_categoria(
     db: Session = Depends(get_db)
 ):
     """Obtener todos los jugadores de una categoría específica filtrados por sexo"""
-    from ..models.driveplus_models import PerfilUsuario, Partido, HistorialRating
+    from ..models.driveplus_models import PerfilUsuario, JugadorEstadisticas
+    from ..services.jugador_estadisticas import tendencia
     from sqlalchemy import func, desc
     
     # Convertir sexo a letra para usuarios (M/F)
@@ -127,61 +128,22 @@ async def get_jugadores_por_categoria(
             detail=f"Categoría no encontrada para sexo {sexo}"
         )
     
-    # Subqueries para partidos jugados y ganados
-    partidos_jugados_subq = (
-        db.query(
-            HistorialRating.id_usuario,
-            func.count(func.distinct(HistorialRating.id_partido)).label("partidos_jugados_real")
-        )
-        .join(Partido, HistorialRating.id_partido == Partido.id_partido)
-        .filter(Partido.estado.in_(["finalizado", "confirmado"]))
-        .group_by(HistorialRating.id_usuario)
-        .subquery()
-    )
-    
-    partidos_ganados_subq = (
-        db.query(
-            HistorialRating.id_usuario,
-            func.count(HistorialRating.id_partido).label("partidos_ganados")
-        )
-        .join(Partido, HistorialRating.id_partido == Partido.id_partido)
-        .filter(
-            Partido.estado.in_(["finalizado", "confirmado"]),
-            HistorialRating.delta > 0
-        )
-        .group_by(HistorialRating.id_usuario)
-        .subquery()
-    )
-    
-    tendencia_subq = (
-        db.query(
-            HistorialRating.id_usuario,
-            func.sum(HistorialRating.delta).label("suma_deltas")
-        )
-        .join(Partido, HistorialRating.id_partido == Partido.id_partido)
-        .filter(Partido.estado.in_(["finalizado", "confirmado"]))
-        .group_by(HistorialRating.id_usuario)
-        .subquery()
-    )
-    
-    # Query base con JOINs a subqueries y perfil
+    # Partidos y tendencia precalculados (jugador_estadisticas, por primary key)
     query = (
         db.query(
             Usuario.id_usuario,
             Usuario.nombre_usuario,
             Usuario.rating,
             Usuario.sexo,
-            func.coalesce(partidos_jugados_subq.c.partidos_jugados_real, 0).label("partidos_jugados"),
-            func.coalesce(partidos_ganados_subq.c.partidos_ganados, 0).label("partidos_ganados"),
-            func.coalesce(tendencia_subq.c.suma_deltas, 0).label("suma_deltas"),
+            func.coalesce(JugadorEstadisticas.partidos_jugados, 0).label("partidos_jugados"),
+            func.coalesce(JugadorEstadisticas.partidos_ganados, 0).label("partidos_ganados"),
+            JugadorEstadisticas.ultimos_deltas,
             PerfilUsuario.nombre,
             PerfilUsuario.apellido,
             PerfilUsuario.url_avatar,
         )
         .join(PerfilUsuario, Usuario.id_usuario == PerfilUsuario.id_usuario, isouter=True)
-        .join(partidos_jugados_subq, Usuario.id_usuario == partidos_jugados_subq.c.id_usuario, isouter=True)
-        .join(partidos_ganados_subq, Usuario.id_usuario == partidos_ganados_subq.c.id_usuario, isouter=True)
-        .join(tendencia_subq, Usuario.id_usuario == tendencia_subq.c.id_usuario, isouter=True)
+        .join(JugadorEstadisticas, Usuario.id_usuario == JugadorEstadisticas.id_usuario, isouter=True)
         .filter(Usuario.sexo == sexo_usuario)
     )
     
@@ -203,16 +165,6 @@ async def get_jugadores_por_categoria(
     # Convertir a la respuesta esperada
     jugadores_response = []
     for j in jugadores:
-        suma_deltas = j.suma_deltas or 0
-        if suma_deltas > 10:
-            tendencia = "up"
-        elif suma_deltas < -10:
-            tendencia = "down"
-        elif suma_deltas != 0:
-            tendencia = "stable"
-        else:
-            tendencia = "neutral"
-        
         jugadores_response.append(JugadorCategoriaResponse(
             id_usuario=j.id_usuario,
             nombre_usuario=j.nombre_usuario,
@@ -223,7 +175,7 @@ async def get_jugadores_por_categoria(
             partidos_ganados=j.partidos_ganados,
             sexo=j.sexo,
             imagen_url=j.url_avatar,
-            tendencia=tendencia
+            tendencia=tendencia(j.ultimos_deltas)
         ))
     
     return JugadoresPorCategoriaResponse(
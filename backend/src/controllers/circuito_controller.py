@@ -11,6 +11,7 @@ from ..database.config import get_db
 from ..models.torneo_models import Circuito, Torneo, TorneoCategoria, CircuitoPuntosJugador, CircuitoPuntosFase
 from ..models.driveplus_models import Usuario, PerfilUsuario, Categoria, HistorialRating, Partido
 from ..auth.auth_utils import get_current_user
+from ..utils.cache import cached, CACHE_TTL, CACHE_STALE, invalidate_circuito_cache
 
 router = APIRouter(prefix="/circuitos", tags=["Circuitos"])
 
@@ -202,17 +203,22 @@ async def ranking_circuito(
     db: Session = Depends(get_db)
 ):
     """
-    Ranking de jugadores en un circuito.
+    Ranking de jugadores en un circuito (caché de 2 min, stale-while-revalidate).
     Una sola query SQL: suma puntos, cuenta torneos (incluyendo externos), y obtiene mejor fase.
     """
-    from sqlalchemy import text
     codigo = codigo.lower()
     
     circuito = db.query(Circuito).filter(Circuito.codigo == codigo).first()
     if not circuito:
         raise HTTPException(status_code=404, detail=f"Circuito '{codigo}' no encontrado")
     
-    params = {"cid": circuito.id, "lim": limit}
+    return _ranking_circuito_from_db(db, circuito.id, categoria, limit)
+
+
+@cached("circuito_ranking", ttl_seconds=CACHE_TTL["circuito_ranking"], stale_seconds=CACHE_STALE["circuito_ranking"])
+def _ranking_circuito_from_db(db: Session, circuito_id: int, categoria: Optional[str], limit: int) -> List[RankingCircuitoItem]:
+    from sqlalchemy import text
+    params = {"cid": circuito_id, "lim": limit}
     cat_filter = ""
     if categoria:
         cat_filter = "AND (tc.nombre = :cat OR cpj.categoria_nombre = :cat)"
@@ -294,6 +300,7 @@ async def asignar_puntos(
         DO UPDATE SET fase_alcanzada = EXCLUDED.fase_alcanzada, puntos = EXCLUDED.puntos
     """), {"cir": circuito.id, "tor": data.torneo_id, "cat": data.categoria_id, "usr": data.usuario_id, "fase": data.fase_alcanzada, "pts": puntos})
     db.commit()
+    invalidate_circuito_cache()
     
     return {"message": f"Puntos asignados: {puntos} pts ({data.fase_alcanzada}) al usuario {data.usuario_id}"}
 
@@ -323,6 +330,7 @@ async def eliminar_puntos(
         CircuitoPuntosJugador.usuario_id == usuario_id,
     ).delete()
     db.commit()
+    invalidate_circuito_cache()
     
     return {"message": f"{'Eliminado' if deleted else 'No encontrado'}"}
 
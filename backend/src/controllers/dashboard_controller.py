@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 from ..database.config import get_db
 from ..models.driveplus_models import Usuario, PerfilUsuario, Partido, PartidoJugador, ResultadoPartido, HistorialRating
 from ..auth.auth_utils import get_current_user
+from ..utils.cache import cached, CACHE_TTL, CACHE_STALE, TAG_RANKING
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
@@ -27,48 +28,8 @@ async def obtener_datos_dashboard(
     try:
         user_id = current_user.id_usuario
         
-        # QUERY 1: Top 5 masculino + Top 5 femenino en UNA SOLA QUERY
-        # Usar IN en lugar de UPPER para aprovechar índices
-        top_query = text("""
-            (
-                SELECT u.id_usuario, u.nombre_usuario, u.rating, u.sexo,
-                       p.nombre, p.apellido, 'M' as sexo_norm
-                FROM usuarios u
-                JOIN perfil_usuarios p ON u.id_usuario = p.id_usuario
-                WHERE u.sexo IN ('M', 'masculino', 'MASCULINO')
-                ORDER BY u.rating DESC
-                LIMIT 5
-            )
-            UNION ALL
-            (
-                SELECT u.id_usuario, u.nombre_usuario, u.rating, u.sexo,
-                       p.nombre, p.apellido, 'F' as sexo_norm
-                FROM usuarios u
-                JOIN perfil_usuarios p ON u.id_usuario = p.id_usuario
-                WHERE u.sexo IN ('F', 'femenino', 'FEMENINO')
-                ORDER BY u.rating DESC
-                LIMIT 5
-            )
-        """)
-        
-        top_result = db.execute(top_query).fetchall()
-        
-        top_masculino = []
-        top_femenino = []
-        
-        for row in top_result:
-            jugador = {
-                "id_usuario": row[0],
-                "nombre_usuario": row[1],
-                "nombre": row[4],
-                "apellido": row[5],
-                "rating": row[2] or 1200,
-                "sexo": row[3]
-            }
-            if row[6] == 'M':
-                top_masculino.append(jugador)
-            else:
-                top_femenino.append(jugador)
+        # QUERY 1: Top 5 masculino + Top 5 femenino (igual para todos: caché)
+        top = _top_dashboard(db)
         
         # QUERY 2: Contar TODOS los partidos del usuario (con resultado o historial)
         count_query = text("""
@@ -133,8 +94,8 @@ async def obtener_datos_dashboard(
         
         # Formatear respuesta
         return {
-            "top_masculino": top_masculino,
-            "top_femenino": top_femenino,
+            "top_masculino": top["top_masculino"],
+            "top_femenino": top["top_femenino"],
             "ultimos_partidos": partidos_data,
             "total_partidos": total_partidos,  # Agregar total de partidos
             "delta_semanal": delta_semanal
@@ -148,3 +109,51 @@ async def obtener_datos_dashboard(
             detail=f"Error al obtener datos del dashboard: {str(e)}"
         )
 
+
+# Se invalida junto con el ranking (tag); vencido, se sirve el anterior y se recalcula en segundo plano
+@cached("dashboard_top", ttl_seconds=CACHE_TTL["dashboard_top"], tags=(TAG_RANKING,), stale_seconds=CACHE_STALE["dashboard_top"])
+def _top_dashboard(db: Session) -> dict:
+    """Top 5 masculino + Top 5 femenino en UNA SOLA QUERY"""
+    # Usar IN en lugar de UPPER para aprovechar índices
+    top_query = text("""
+        (
+            SELECT u.id_usuario, u.nombre_usuario, u.rating, u.sexo,
+                   p.nombre, p.apellido, 'M' as sexo_norm
+            FROM usuarios u
+            JOIN perfil_usuarios p ON u.id_usuario = p.id_usuario
+            WHERE u.sexo IN ('M', 'masculino', 'MASCULINO')
+            ORDER BY u.rating DESC
+            LIMIT 5
+        )
+        UNION ALL
+        (
+            SELECT u.id_usuario, u.nombre_usuario, u.rating, u.sexo,
+                   p.nombre, p.apellido, 'F' as sexo_norm
+            FROM usuarios u
+            JOIN perfil_usuarios p ON u.id_usuario = p.id_usuario
+            WHERE u.sexo IN ('F', 'femenino', 'FEMENINO')
+            ORDER BY u.rating DESC
+            LIMIT 5
+        )
+    """)
+    
+    top_result = db.execute(top_query).fetchall()
+    
+    top_masculino = []
+    top_femenino = []
+    
+    for row in top_result:
+        jugador = {
+            "id_usuario": row[0],
+            "nombre_usuario": row[1],
+            "nombre": row[4],
+            "apellido": row[5],
+            "rating": row[2] or 1200,
+            "sexo": row[3]
+        }
+        if row[6] == 'M':
+            top_masculino.append(jugador)
+        else:
+            top_femenino.append(jugador)
+    
+    return {"top_masculino": top_masculino, "top_femenino": top_femenino}
@@ -53,7 +53,7 @@ async def db_health(db: Session = Depends(get_db)):
 
 @router.get("/cache")
 async def cache_health():
-    """Ver estado del caché en memoria"""
+    """Ver estado del caché en memoria (keys, límite y métricas por namespace)"""
     stats = cache.stats()
     return {
         "status": "ok",
@@ -71,5 +71,17 @@ async def clear_cache():
 @router.post("/cache/cleanup")
 async def cleanup_cache():
     """Limpiar entries expirados del caché"""
-    cache.cleanup_expired()
-    return {"status": "ok", "message": "Expired entries cleaned"}
+    eliminadas = cache.cleanup_expired()
+    return {"status": "ok", "message": "Expired entries cleaned", "eliminadas": eliminadas}
+
+
+@router.get("/websocket")
+async def websocket_health():
+    """Ver salas, sockets y bus de broadcast de este worker"""
+    from ..websocket.connection_manager import manager
+    return {
+        "status": "ok",
+        "salas": len(manager.active_connections),
+        "conexiones": sum(len(c) for c in manager.active_connections.values()),
+        "bus": manager.bus.stats()
+    }
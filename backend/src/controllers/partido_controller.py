@@ -9,6 +9,7 @@ from ..schemas.partido import PartidoCreate, PartidoResponse, PartidoCompleto, R
 from ..auth.auth_utils import get_current_user
 from ..services.elo_service import EloService
 from ..services.categoria_service import actualizar_categoria_usuario
+from ..services.jugador_estadisticas_service import JugadorEstadisticasService
 
 router = APIRouter(prefix="/partidos", tags=["Partidos"])
 
@@ -561,6 +562,7 @@ async def calcular_elo_partido(
         )
         
         # Actualizar ratings de todos los jugadores
+        historial_nuevo = []
         for jugador in jugadores_partido:
             usuario = jugadores_info[jugador.id_usuario]['usuario']
             equipo = jugador.equipo  # Corregido: usar jugador.equipo directamente
@@ -595,6 +597,13 @@ async def calcular_elo_partido(
                 rating_despues=int(rating_despues)
             )
             db.add(historial)
+            historial_nuevo.append({
+                'id_usuario': usuario.id_usuario,
+                'id_partido': partido_id,
+                'delta': int(delta)
+            })
+        
+        JugadorEstadisticasService.registrar(db, historial_nuevo, {partido_id: partido.fecha})
         
         db.commit()
         
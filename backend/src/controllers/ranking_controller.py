@@ -6,68 +6,23 @@ from datetime import datetime, timedelta
 
 from ..database.config import get_db
 from ..models.driveplus_models import Usuario, PerfilUsuario, Categoria
-from ..schemas.ranking import RankingResponse, TopWeeklyResponse
+from ..schemas.ranking import RankingResponse, TopWeeklyResponse, PosicionRankingResponse
 from ..auth.auth_utils import get_current_user
-from ..utils.cache import cache, CACHE_TTL
+from ..utils.cache import cached, CACHE_TTL, CACHE_STALE, TAG_RANKING, invalidate_ranking_cache
 
 router = APIRouter(prefix="/ranking", tags=["Ranking"])
 
 
-def _get_ranking_from_db(db: Session, limit: int, offset: int, sexo: Optional[str]) -> List[dict]:
-    """Lógica de ranking extraída para poder cachear - OPTIMIZADA"""
-    from ..models.driveplus_models import PartidoJugador, ResultadoPartido, Partido, HistorialRating
-    from ..models.torneo_models import TorneoPareja
-    from sqlalchemy import text
-    
-    # Subquery para calcular partidos JUGADOS desde historial_rating
-    partidos_jugados_subq = (
-        db.query(
-            HistorialRating.id_usuario,
-            func.count(func.distinct(HistorialRating.id_partido)).label("partidos_jugados_real")
-        )
-        .join(Partido, HistorialRating.id_partido == Partido.id_partido)
-        .filter(
-            Partido.estado.in_(["finalizado", "confirmado"])
-        )
-        .group_by(HistorialRating.id_usuario)
-        .subquery()
-    )
-    
-    # Subquery para calcular partidos ganados desde historial_rating
-    partidos_ganados_subq = (
-        db.query(
-            HistorialRating.id_usuario,
-            func.count(HistorialRating.id_partido).label("partidos_ganados")
-        )
-        .join(Partido, HistorialRating.id_partido == Partido.id_partido)
-        .filter(
-            Partido.estado.in_(["finalizado", "confirmado"]),
-            HistorialRating.delta > 0  # Delta positivo = victoria
-        )
-        .group_by(HistorialRating.id_usuario)
-        .subquery()
-    )
+def _consulta_jugadores(db: Session):
+    """Datos de jugador para el ranking: usuario, perfil, categoría y estadísticas (por primary key)"""
+    from ..models.driveplus_models import JugadorEstadisticas
     
-    # Subquery para calcular tendencia (últimos 5 partidos)
-    # Usamos una window function para obtener los últimos 5 partidos por usuario
-    tendencia_subq = (
-        db.query(
-            HistorialRating.id_usuario,
-            func.sum(HistorialRating.delta).label("suma_deltas")
-        )
-        .join(Partido, HistorialRating.id_partido == Partido.id_partido)
-        .filter(Partido.estado.in_(["finalizado", "confirmado"]))
-        .group_by(HistorialRating.id_usuario)
-        .subquery()
-    )
-    
-    # Query principal con JOIN a las subqueries
-    query = (
+    return (
         db.query(
             Usuario.id_usuario,
             Usuario.nombre_usuario,
             Usuario.rating,
-            func.coalesce(partidos_jugados_subq.c.partidos_jugados_real, 0).label("partidos_jugados"),
+            func.coalesce(JugadorEstadisticas.partidos_jugados, 0).label("partidos_jugados"),
             Usuario.sexo,
             PerfilUsuario.nombre,
             PerfilUsuario.apellido,
@@ -75,15 +30,65 @@ def _get_ranking_from_db(db: Session, limit: int, offset: int, sexo: Optional[st
             PerfilUsuario.pais,
             PerfilUsuario.url_avatar,
             Categoria.nombre.label("categoria_nombre"),
-            func.coalesce(partidos_ganados_subq.c.partidos_ganados, 0).label("partidos_ganados"),
-            func.coalesce(tendencia_subq.c.suma_deltas, 0).label("suma_deltas")
+            func.coalesce(JugadorEstadisticas.partidos_ganados, 0).label("partidos_ganados"),
+            JugadorEstadisticas.ultimos_deltas
         )
         .join(PerfilUsuario, Usuario.id_usuario == PerfilUsuario.id_usuario, isouter=True)
         .join(Categoria, Usuario.id_categoria == Categoria.id_categoria, isouter=True)
-        .join(partidos_jugados_subq, Usuario.id_usuario == partidos_jugados_subq.c.id_usuario, isouter=True)
-        .join(partidos_ganados_subq, Usuario.id_usuario == partidos_ganados_subq.c.id_usuario, isouter=True)
-        .join(tendencia_subq, Usuario.id_usuario == tendencia_subq.c.id_usuario, isouter=True)
+        .join(JugadorEstadisticas, Usuario.id_usuario == JugadorEstadisticas.id_usuario, isouter=True)
     )
+
+
+def _datos_jugador(u) -> dict:
+    from ..services.jugador_estadisticas import tendencia
+    
+    return {
+        "id_usuario": u.id_usuario,
+        "nombre_usuario": u.nombre_usuario,
+        "rating": u.rating,
+        "partidos_jugados": u.partidos_jugados,
+        "sexo": u.sexo,
+        "nombre": u.nombre,
+        "apellido": u.apellido,
+        "ciudad": u.ciudad,
+        "pais": u.pais,
+        "url_avatar": u.url_avatar,
+        "categoria_nombre": getattr(u, "categoria_nombre", None),
+        "partidos_ganados": u.partidos_ganados,
+        "tendencia": tendencia(u.ultimos_deltas)
+    }
+
+
+def _datos_por_id(db: Session, ids: List[int]) -> dict:
+    """{id_usuario: datos} de los jugadores pedidos (una query por primary key)"""
+    if not ids:
+        return {}
+    return {
+        u.id_usuario: _datos_jugador(u)
+        for u in _consulta_jugadores(db).filter(Usuario.id_usuario.in_(ids))
+    }
+
+
+@cached("ranking", ttl_seconds=CACHE_TTL["ranking"], stale_seconds=CACHE_STALE["ranking"])
+def _get_ranking_from_db(db: Session, limit: int, offset: int, sexo: Optional[str]) -> List[dict]:
+    """
+    Lógica de ranking extraída para poder cachear.
+
+    Con el índice en memoria (ranking_indice) la página sale en O(log n) y
+    solo se leen los jugadores de la página por primary key. Sin índice:
+    ORDER BY rating LIMIT sobre usuarios (idx_usuarios_rating /
+    idx_usuarios_sexo_rating). Partidos y tendencia salen de
+    jugador_estadisticas, sin recorrer historial_rating.
+    """
+    from ..services.ranking_indice import ranking, vista
+    from ..services.ranking_indice_service import asegurar_indice
+    
+    if asegurar_indice(db):
+        ids = [id_usuario for _, id_usuario, _ in ranking.pagina(vista(sexo), offset, limit)]
+        datos = _datos_por_id(db, ids)
+        return [datos[id_usuario] for id_usuario in ids if id_usuario in datos]
+    
+    query = _consulta_jugadores(db)
     
     # Filtrar por sexo si se especifica
     if sexo:
@@ -92,41 +97,29 @@ def _get_ranking_from_db(db: Session, limit: int, offset: int, sexo: Optional[st
         elif sexo in ['F', 'femenino']:
             query = query.filter(Usuario.sexo.in_(['F', 'femenino']))
     
-    # Ordenar y paginar
-    usuarios = query.order_by(desc(Usuario.rating)).offset(offset).limit(limit).all()
+    # Ordenar y paginar (empates por id, como el índice)
+    usuarios = query.order_by(desc(Usuario.rating), Usuario.id_usuario).offset(offset).limit(limit).all()
     
-    # Convertir a dict y calcular tendencia
-    result = []
-    for u in usuarios:
-        suma_deltas = u.suma_deltas or 0
-        
-        # Calcular tendencia basada en suma de deltas
-        if suma_deltas > 10:
-            tendencia = "up"
-        elif suma_deltas < -10:
-            tendencia = "down"
-        elif suma_deltas != 0:
-            tendencia = "stable"
-        else:
-            tendencia = "neutral"
-        
-        result.append({
-            "id_usuario": u.id_usuario,
-            "nombre_usuario": u.nombre_usuario,
-            "rating": u.rating,
-            "partidos_jugados": u.partidos_jugados,
-            "sexo": u.sexo,
-            "nombre": u.nombre,
-            "apellido": u.apellido,
-            "ciudad": u.ciudad,
-            "pais": u.pais,
-            "url_avatar": u.url_avatar,
-            "categoria_nombre": getattr(u, "categoria_nombre", None),
-            "partidos_ganados": u.partidos_ganados,
-            "tendencia": tendencia
-        })
-    
-    return result
+    return [_datos_jugador(u) for u in usuarios]
+
+
+def _respuesta_ranking(posicion: int, u: dict) -> RankingResponse:
+    return RankingResponse(
+        posicion=posicion,
+        id_usuario=u["id_usuario"],
+        nombre_usuario=u["nombre_usuario"],
+        nombre=u["nombre"] or "",
+        apellido=u["apellido"] or "",
+        ciudad=u["ciudad"] or "",
+        pais=u["pais"] or "",
+        rating=u["rating"],
+        partidos_jugados=u["partidos_jugados"],
+        partidos_ganados=u["partidos_ganados"],
+        categoria=u["categoria_nombre"],
+        sexo=u["sexo"],
+        imagen_url=u["url_avatar"],
+        tendencia=u.get("tendencia", "neutral")
+    )
 
 
 @router.get("/", response_model=List[RankingResponse])
@@ -136,62 +129,13 @@ async def get_ranking(
     sexo: Optional[str] = Query(None, description="Filtrar por sexo: M o F"),
     db: Session = Depends(get_db)
 ):
-    """Obtener el ranking general de jugadores (con caché de 60s)"""
+    """Obtener el ranking general de jugadores (caché de 60s, stale-while-revalidate)"""
     
     try:
-        # Generar cache key
-        cache_key = f"ranking:{limit}:{offset}:{sexo or 'all'}"
-        
-        # Intentar obtener del caché
-        cached_data = cache.get(cache_key)
-        if cached_data is not None:
-            ranking = []
-            for i, u in enumerate(cached_data):
-                ranking.append(RankingResponse(
-                    posicion=offset + i + 1,
-                    id_usuario=u["id_usuario"],
-                    nombre_usuario=u["nombre_usuario"],
-                    nombre=u["nombre"] or "",
-                    apellido=u["apellido"] or "",
-                    ciudad=u["ciudad"] or "",
-                    pais=u["pais"] or "",
-                    rating=u["rating"],
-                    partidos_jugados=u["partidos_jugados"],
-                    partidos_ganados=u["partidos_ganados"],
-                    categoria=u["categoria_nombre"],
-                    sexo=u["sexo"],
-                    imagen_url=u["url_avatar"],
-                    tendencia=u.get("tendencia", "neutral")
-                ))
-            return ranking
-        
-        # Cache miss - obtener de DB (ya incluye tendencia calculada)
+        # Vencido el TTL se responde con el anterior y se recalcula en segundo plano
         usuarios_data = _get_ranking_from_db(db, limit, offset, sexo)
         
-        # Guardar en caché
-        cache.set(cache_key, usuarios_data, CACHE_TTL["ranking"])
-        
-        # Formatear respuesta
-        ranking = []
-        for i, u in enumerate(usuarios_data):
-            ranking.append(RankingResponse(
-                posicion=offset + i + 1,
-                id_usuario=u["id_usuario"],
-                nombre_usuario=u["nombre_usuario"],
-                nombre=u["nombre"] or "",
-                apellido=u["apellido"] or "",
-                ciudad=u["ciudad"] or "",
-                pais=u["pais"] or "",
-                rating=u["rating"],
-                partidos_jugados=u["partidos_jugados"],
-                partidos_ganados=u["partidos_ganados"],
-                categoria=u["categoria_nombre"],
-                sexo=u["sexo"],
-                imagen_url=u["url_avatar"],
-                tendencia=u.get("tendencia", "neutral")
-            ))
-        
-        return ranking
+        return [_respuesta_ranking(offset + i + 1, u) for i, u in enumerate(usuarios_data)]
         
     except Exception as e:
         raise HTTPException(
@@ -200,56 +144,106 @@ async def get_ranking(
         )
 
 
+# Se invalida junto con el ranking (tag)
+@cached("top_weekly", ttl_seconds=120, tags=(TAG_RANKING,), stale_seconds=CACHE_STALE["top_weekly"])
+def _get_top_weekly_from_db(db: Session, limit: int) -> List[TopWeeklyResponse]:
+    # Obtener usuarios con mejor rating
+    usuarios = db.query(
+        Usuario.id_usuario,
+        Usuario.nombre_usuario,
+        Usuario.rating,
+        PerfilUsuario.nombre,
+        PerfilUsuario.apellido,
+        PerfilUsuario.ciudad,
+        PerfilUsuario.url_avatar
+    ).join(
+        PerfilUsuario, Usuario.id_usuario == PerfilUsuario.id_usuario, isouter=True
+    ).order_by(
+        desc(Usuario.rating)
+    ).limit(limit).all()
+    
+    top_weekly = []
+    for u in usuarios:
+        nombre_completo = f"{u.nombre or ''} {u.apellido or ''}".strip() or u.nombre_usuario
+        top_weekly.append(TopWeeklyResponse(
+            id=u.id_usuario,
+            nombre=nombre_completo,
+            ciudad=u.ciudad or "",
+            puntos=u.rating,
+            imagen_url=u.url_avatar,
+            rating=u.rating
+        ))
+    return top_weekly
+
+
 @router.get("/top-weekly", response_model=List[TopWeeklyResponse])
 async def get_top_weekly(
     limit: int = Query(5, description="Número de jugadores a retornar"),
     db: Session = Depends(get_db)
 ):
-    """Obtener los mejores jugadores de la semana (con caché de 2 min)"""
+    """Obtener los mejores jugadores de la semana (caché de 2 min, stale-while-revalidate)"""
     
     try:
-        cache_key = f"top_weekly:{limit}"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data is not None:
-            return cached_data
+        return _get_top_weekly_from_db(db, limit)
         
-        # Obtener usuarios con mejor rating
-        usuarios = db.query(
-            Usuario.id_usuario,
-            Usuario.nombre_usuario,
-            Usuario.rating,
-            PerfilUsuario.nombre,
-            PerfilUsuario.apellido,
-            PerfilUsuario.ciudad,
-            PerfilUsuario.url_avatar
-        ).join(
-            PerfilUsuario, Usuario.id_usuario == PerfilUsuario.id_usuario, isouter=True
-        ).order_by(
-            desc(Usuario.rating)
-        ).limit(limit).all()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener el ranking semanal: {str(e)}"
+        )
+
+
+@router.get("/posicion/{user_id}", response_model=PosicionRankingResponse)
+async def get_posicion_ranking(
+    user_id: int,
+    vecinos: int = Query(5, ge=0, le=50, description="Jugadores arriba y abajo a incluir"),
+    sexo: Optional[str] = Query(None, description="Ranking por sexo: M o F"),
+    categoria: Optional[int] = Query(None, description="Ranking de una categoría"),
+    db: Session = Depends(get_db)
+):
+    """Posición de un jugador (general, por sexo o por categoría) y los jugadores que tiene cerca"""
+    from ..services.ranking_indice import ranking, vista
+    from ..services.ranking_indice_service import asegurar_indice
+    
+    try:
+        if not asegurar_indice(db):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="El índice de ranking no está disponible"
+            )
         
-        top_weekly = []
-        for u in usuarios:
-            nombre_completo = f"{u.nombre or ''} {u.apellido or ''}".strip() or u.nombre_usuario
-            top_weekly.append(TopWeeklyResponse(
-                id=u.id_usuario,
-                nombre=nombre_completo,
-                ciudad=u.ciudad or "",
-                puntos=u.rating,
-                imagen_url=u.url_avatar,
-                rating=u.rating
-            ))
+        clave = vista(sexo, categoria)
+        posicion = ranking.posicion(user_id, clave)
+        if posicion is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="El jugador no está en este ranking"
+            )
         
-        # Cachear por 2 minutos
-        cache.set(cache_key, top_weekly, 120)
+        filas = ranking.vecinos(user_id, vecinos, clave)
+        datos = _datos_por_id(db, [id_usuario for _, id_usuario, _ in filas])
+        rating, sexo_jugador, id_categoria = ranking.jugador(user_id)
         
-        return top_weekly
+        return PosicionRankingResponse(
+            id_usuario=user_id,
+            posicion=posicion,
+            total=ranking.total(clave),
+            rating=rating,
+            sexo=sexo_jugador,
+            categoria_id=id_categoria,
+            vecinos=[
+                _respuesta_ranking(posicion_vecino, datos[id_usuario])
+                for posicion_vecino, id_usuario, _ in filas
+                if id_usuario in datos
+            ]
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al obtener el ranking semanal: {str(e)}"
+            detail=f"Error al obtener la posición en el ranking: {str(e)}"
         )
 
 
@@ -307,7 +301,7 @@ async def clear_ranking_cache(
         )
     
     try:
-        cache.delete_pattern("ranking")
+        invalidate_ranking_cache()
         return {"message": "Caché de rankings limpiado exitosamente"}
     except Exception as e:
         raise HTTPException(
@@ -1,14 +1,21 @@
 """
 Controller para endpoints de torneos
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
+import hashlib
 
 from ..database.config import get_db
+from ..database.bulk import insertar_filas
 from ..services.torneo_service import TorneoService
 from ..services.torneo_inscripcion_service import TorneoInscripcionService
+from ..services.torneo_version import marcar_modificado, version_torneo, publicar_evento
+from ..services.eventos_torneo import PARTIDO_REPROGRAMADO, datos_reprogramado
+from ..utils.etag import etag_debil, coincide_if_none_match, no_modificado_desde, formato_http
 from ..schemas.torneo_schemas import (
     TorneoCreate, TorneoUpdate, TorneoResponse,
     EstadisticasTorneoResponse,
@@ -28,6 +35,51 @@ class BajaParejaRequest(BaseModel):
     motivo: Optional[str] = None
 
 
+# ============================================
+# GET CONDICIONAL (ETag por versión del torneo)
+# ============================================
+
+def _get_condicional(
+    request: Request,
+    response: Response,
+    db: Session,
+    torneo_id: int,
+    *variante
+) -> Optional[Response]:
+    """
+    Compara If-None-Match / If-Modified-Since con la versión del torneo
+    (torneos.version, ver services/torneo_version.py) antes de consultar datos.
+    La versión se lee de la base por primary key en cada request: así un
+    commit de otro worker se ve enseguida y nunca se responde 304 con datos viejos.
+
+    Returns:
+        Response 304 si el cliente ya tiene esta versión. Si no, deja ETag y
+        Last-Modified en `response` y devuelve None (el endpoint sigue normal).
+    """
+    version = version_torneo(db, torneo_id)
+    if version is None:
+        return None  # Torneo inexistente: el endpoint responde como siempre
+    numero, modificado = version
+
+    cabeceras = {
+        "ETag": etag_debil("torneo", torneo_id, f"v{numero}", *variante),
+        "Cache-Control": "no-cache",  # Guardar pero revalidar siempre
+    }
+    if modificado is not None:
+        cabeceras["Last-Modified"] = formato_http(modificado)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        no_modificado = coincide_if_none_match(if_none_match, cabeceras["ETag"])
+    else:
+        no_modificado = no_modificado_desde(request.headers.get("if-modified-since"), modificado)
+
+    if no_modificado:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabeceras)
+    response.headers.update(cabeceras)
+    return None
+
+
 # ============================================
 # ENDPOINTS ESPECÍFICOS (DEBEN IR ANTES QUE LOS DINÁMICOS)
 # ============================================
@@ -433,13 +485,26 @@ async def obtener_mis_torneos(
 @router.get("/{torneo_id}")
 async def obtener_torneo(
     torneo_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: Optional[Usuario] = Depends(get_current_user_optional)
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
 ):
     """Obtiene un torneo por ID"""
     from ..models.torneo_models import TorneoPareja
     from ..services.torneo_zona_service import TorneoZonaService
     
+    # es_organizador depende del usuario: el ETag incluye un hash del token
+    # y el usuario se resuelve recién si hay que armar la respuesta
+    token = credentials.credentials if credentials else ""
+    variante = hashlib.sha256(token.encode()).hexdigest()[:12] if token else "anon"
+    response.headers["Vary"] = "Authorization"
+    no_modificado = _get_condicional(request, response, db, torneo_id, variante)
+    if no_modificado is not None:
+        no_modificado.headers["Vary"] = "Authorization"
+        return no_modificado
+    current_user = await get_current_user_optional(credentials, db)
+    
     torneo = TorneoService.obtener_torneo(db, torneo_id)
     if not torneo:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Torneo no encontrado")
@@ -857,6 +922,7 @@ def eliminar_categoria(
         TorneoCategoria.id == categoria_id,
         TorneoCategoria.torneo_id == torneo_id
     ).delete()
+    marcar_modificado(db, torneo_id)
     db.commit()
     
     return {"message": "Categoría eliminada"}
@@ -963,11 +1029,15 @@ async def actualizar_restricciones_pareja(
     torneo_id: int,
     pareja_id: int,
     restricciones: dict,  # {"disponibilidad_horaria": [{dias: [], horaInicio: "", horaFin: ""}]}
+    reprogramar: bool = Query(False, description="Mover solo los partidos de la pareja que quedan en conflicto"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
     Permite a los jugadores de una pareja actualizar sus restricciones horarias
+    
+    Con reprogramar=true los partidos pendientes que ahora caen en una
+    restricción se reubican sin tocar el resto del fixture.
     """
     from ..models.torneo_models import TorneoPareja
     
@@ -990,11 +1060,17 @@ async def actualizar_restricciones_pareja(
         pareja.disponibilidad_horaria = restricciones.get('disponibilidad_horaria')
         db.commit()
         
-        return {
+        response = {
             "mensaje": "Restricciones horarias actualizadas correctamente",
             "pareja_id": pareja_id,
             "disponibilidad_horaria": pareja.disponibilidad_horaria
         }
+        if reprogramar:
+            from ..services.torneo_fixture_incremental_service import TorneoFixtureIncrementalService
+            response["reprogramacion"] = TorneoFixtureIncrementalService.reprogramar(
+                db, torneo_id, [pareja_id]
+            )
+        return response
         
     except HTTPException:
         raise
@@ -1226,6 +1302,7 @@ async def dar_baja_pareja(
     torneo_id: int,
     pareja_id: int,
     data: BajaParejaRequest,
+    reprogramar: bool = Query(False, description="Quitar del fixture los partidos pendientes de la pareja"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -1234,12 +1311,19 @@ async def dar_baja_pareja(
     
     Puede ser realizado por uno de los jugadores o por un organizador.
     La pareja se elimina completamente, permitiendo que se vuelvan a inscribir.
+    Con reprogramar=true se eliminan sus partidos pendientes y el resto del
+    fixture queda como está (la respuesta incluye el diff).
     """
     from ..services.torneo_inscripcion_service import TorneoInscripcionService
     
     try:
         user_id = current_user.id_usuario
         resultado = TorneoInscripcionService.dar_baja_pareja(db, pareja_id, user_id, data.motivo)
+        if reprogramar:
+            from ..services.torneo_fixture_incremental_service import TorneoFixtureIncrementalService
+            resultado["reprogramacion"] = TorneoFixtureIncrementalService.reprogramar(
+                db, torneo_id, [pareja_id]
+            )
         return resultado
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
@@ -1437,8 +1521,11 @@ def eliminar_zonas(
         
         # Eliminar zonas
         db.query(TorneoZona).filter(TorneoZona.id.in_(zonas_ids)).delete(synchronize_session=False)
+        marcar_modificado(db, torneo_id)
         
         db.commit()
+        from ..services.intervalos import ocupaciones
+        ocupaciones.invalidar(torneo_id)
         
         return {
             "message": "Zonas eliminadas exitosamente",
@@ -1463,16 +1550,25 @@ def eliminar_zonas(
 @router.get("/{torneo_id}/zonas/tablas")
 def listar_zonas_con_tablas(
     torneo_id: int,
+    request: Request,
+    response: Response,
     categoria_id: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """
     Lista zonas con tablas OPTIMIZADO - carga todo en batch.
     Si categoria_id se pasa, solo zonas de esa categoría (más rápido).
+    Responde 304 si If-None-Match coincide con la versión del torneo.
     """
+    no_modificado = _get_condicional(request, response, db, torneo_id)
+    if no_modificado is not None:
+        return no_modificado
+
     from ..services.torneo_zona_service import TorneoZonaService
-    from ..models.driveplus_models import PerfilUsuario, Partido, Usuario
-    from ..models.torneo_models import TorneoZona, TorneoZonaPareja, TorneoPareja
+    from ..services.torneo_tabla_service import TorneoTablaService
+    from ..services.tabla_posiciones import CAMPOS as CAMPOS_TABLA
+    from ..models.driveplus_models import PerfilUsuario, Usuario
+    from ..models.torneo_models import TorneoPareja
 
     try:
         # 1. Obtener zonas
@@ -1487,150 +1583,33 @@ def listar_zonas_con_tablas(
 
         zonas_ids = [z["id"] for z in zonas]
 
-        # 2. Cargar TODAS las asignaciones de parejas a zonas en una sola query
-        asignaciones = db.query(TorneoZonaPareja).filter(
-            TorneoZonaPareja.zona_id.in_(zonas_ids)
-        ).all()
+        # 2. Tablas materializadas (asignaciones + torneo_tabla_posiciones en una query)
+        tablas_por_zona = TorneoTablaService.obtener_tablas(db, zonas_ids)
         
-        # Agrupar asignaciones por zona
-        asignaciones_por_zona = {}
-        parejas_ids = set()
-        for asig in asignaciones:
-            if asig.zona_id not in asignaciones_por_zona:
-                asignaciones_por_zona[asig.zona_id] = []
-            asignaciones_por_zona[asig.zona_id].append(asig)
-            parejas_ids.add(asig.pareja_id)
-
         # 3. Cargar TODAS las parejas en una sola query
+        parejas_ids = {f['pareja_id'] for filas in tablas_por_zona.values() for f in filas}
         parejas = db.query(TorneoPareja).filter(TorneoPareja.id.in_(parejas_ids)).all() if parejas_ids else []
         parejas_dict = {p.id: p for p in parejas}
 
-        # 4. Cargar TODOS los partidos confirmados o finalizados de estas zonas en una sola query
-        partidos = db.query(Partido).filter(
-            Partido.id_torneo == torneo_id,
-            Partido.zona_id.in_(zonas_ids),
-            Partido.estado.in_(['confirmado', 'finalizado'])
-        ).all()
-        
-        # Agrupar partidos por zona
-        partidos_por_zona = {}
-        jugadores_ids = set()
-        for partido in partidos:
-            if partido.zona_id not in partidos_por_zona:
-                partidos_por_zona[partido.zona_id] = []
-            partidos_por_zona[partido.zona_id].append(partido)
-
-        # 5. Construir tablas en memoria
+        # 4. Armar tablas (ya vienen ordenadas y con posición)
         tablas_result = []
+        jugadores_ids = set()
         for zona in zonas:
             zona_id = zona["id"]
             tabla = []
-            
-            # Inicializar tabla con parejas de esta zona
-            for asig in asignaciones_por_zona.get(zona_id, []):
-                pareja = parejas_dict.get(asig.pareja_id)
+            for fila in tablas_por_zona.get(zona_id, []):
+                pareja = parejas_dict.get(fila['pareja_id'])
                 if pareja:
                     jugadores_ids.add(pareja.jugador1_id)
                     jugadores_ids.add(pareja.jugador2_id)
-                    tabla.append({
-                        'pareja_id': pareja.id,
-                        'jugador1_id': pareja.jugador1_id,
-                        'jugador2_id': pareja.jugador2_id,
-                        'eliminada': False,
-                        'partidos_jugados': 0,
-                        'partidos_ganados': 0,
-                        'partidos_perdidos': 0,
-                        'sets_ganados': 0,
-                        'sets_perdidos': 0,
-                        'games_ganados': 0,
-                        'games_perdidos': 0,
-                        'puntos': 0
-                    })
-                else:
-                    # Pareja eliminada
-                    tabla.append({
-                        'pareja_id': asig.pareja_id,
-                        'jugador1_id': None,
-                        'jugador2_id': None,
-                        'eliminada': True,
-                        'partidos_jugados': 0,
-                        'partidos_ganados': 0,
-                        'partidos_perdidos': 0,
-                        'sets_ganados': 0,
-                        'sets_perdidos': 0,
-                        'games_ganados': 0,
-                        'games_perdidos': 0,
-                        'puntos': 0
-                    })
-            
-            # Calcular estadísticas con partidos de esta zona
-            for partido in partidos_por_zona.get(zona_id, []):
-                pareja_a_id = partido.pareja1_id
-                pareja_b_id = partido.pareja2_id
-                
-                if not pareja_a_id or not pareja_b_id:
-                    continue
-                
-                idx_a = next((i for i, p in enumerate(tabla) if p['pareja_id'] == pareja_a_id), None)
-                idx_b = next((i for i, p in enumerate(tabla) if p['pareja_id'] == pareja_b_id), None)
-                
-                if idx_a is None or idx_b is None:
-                    continue
-                
-                tabla[idx_a]['partidos_jugados'] += 1
-                tabla[idx_b]['partidos_jugados'] += 1
-                
-                if partido.resultado_padel:
-                    resultado = partido.resultado_padel
-                    sets = resultado.get('sets', [])
-                    
-                    sets_a = 0
-                    sets_b = 0
-                    games_a = 0
-                    games_b = 0
-                    
-                    for set_data in sets:
-                        if set_data.get('completado'):
-                            games_eq_a = set_data.get('gamesEquipoA', 0)
-                            games_eq_b = set_data.get('gamesEquipoB', 0)
-                            
-                            games_a += games_eq_a
-                            games_b += games_eq_b
-                            
-                            if set_data.get('ganador') == 'equipoA':
-                                sets_a += 1
-                            elif set_data.get('ganador') == 'equipoB':
-                                sets_b += 1
-                    
-                    tabla[idx_a]['sets_ganados'] += sets_a
-                    tabla[idx_a]['sets_perdidos'] += sets_b
-                    tabla[idx_a]['games_ganados'] += games_a
-                    tabla[idx_a]['games_perdidos'] += games_b
-                    
-                    tabla[idx_b]['sets_ganados'] += sets_b
-                    tabla[idx_b]['sets_perdidos'] += sets_a
-                    tabla[idx_b]['games_ganados'] += games_b
-                    tabla[idx_b]['games_perdidos'] += games_a
-                    
-                    if partido.ganador_pareja_id == pareja_a_id:
-                        tabla[idx_a]['partidos_ganados'] += 1
-                        tabla[idx_a]['puntos'] += 3
-                        tabla[idx_b]['partidos_perdidos'] += 1
-                    elif partido.ganador_pareja_id == pareja_b_id:
-                        tabla[idx_b]['partidos_ganados'] += 1
-                        tabla[idx_b]['puntos'] += 3
-                        tabla[idx_a]['partidos_perdidos'] += 1
-            
-            # Ordenar tabla
-            tabla.sort(key=lambda x: (
-                -x['puntos'],
-                -(x['sets_ganados'] - x['sets_perdidos']),
-                -(x['games_ganados'] - x['games_perdidos'])
-            ))
-            
-            # Agregar posición
-            for i, item in enumerate(tabla, 1):
-                item['posicion'] = i
+                tabla.append({
+                    'pareja_id': fila['pareja_id'],
+                    'jugador1_id': pareja.jugador1_id if pareja else None,
+                    'jugador2_id': pareja.jugador2_id if pareja else None,
+                    'eliminada': pareja is None,
+                    **{campo: fila[campo] for campo in CAMPOS_TABLA},
+                    'posicion': fila['posicion']
+                })
             
             tablas_result.append({
                 "zona_id": zona_id,
@@ -1639,7 +1618,7 @@ def listar_zonas_con_tablas(
                 "tabla": tabla,
             })
 
-        # 6. Cargar perfiles y usernames en una sola query
+        # 5. Cargar perfiles y usernames en una sola query
         usuarios = db.query(Usuario, PerfilUsuario).join(
             PerfilUsuario, Usuario.id_usuario == PerfilUsuario.id_usuario, isouter=True
         ).filter(
@@ -1654,7 +1633,7 @@ def listar_zonas_con_tablas(
                 'username': usuario.nombre_usuario
             }
 
-        # 7. Agregar nombres a las tablas
+        # 6. Agregar nombres a las tablas
         for t in tablas_result:
             for item in t["tabla"]:
                 if not item['eliminada']:
@@ -1679,6 +1658,33 @@ def listar_zonas_con_tablas(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@router.post("/{torneo_id}/zonas/tablas/reconciliar")
+def reconciliar_tablas_posiciones(
+    torneo_id: int,
+    aplicar: bool = Query(True, description="False = solo comparar contra los partidos"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Reconstruye las tablas de posiciones materializadas desde los partidos
+    y devuelve las filas que estaban desincronizadas.
+    
+    Solo organizadores.
+    """
+    from ..services.torneo_zona_service import TorneoZonaService
+    from ..services.torneo_tabla_service import TorneoTablaService
+    
+    try:
+        if not TorneoZonaService._es_organizador(db, torneo_id, current_user.id_usuario):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permisos")
+        return TorneoTablaService.reconciliar(db, torneo_id, aplicar)
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
 @router.get("/{torneo_id}/zonas/{zona_id}/tabla")
 def obtener_tabla_zona(
     torneo_id: int,
@@ -1734,6 +1740,7 @@ class CrearZonaRequest(BaseModel):
 def crear_zona_ultimo_momento(
     torneo_id: int,
     body: CrearZonaRequest,
+    reprogramar: bool = Query(False, description="Crear y programar los partidos de la zona sin mover el resto del fixture"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -1741,6 +1748,9 @@ def crear_zona_ultimo_momento(
     Crea una zona nueva en una categoría y asigna las parejas indicadas.
     Para zonas de último momento (parejas que se inscriben tarde).
     Solo organizadores. No disponible si ya se generaron playoffs.
+    
+    Con reprogramar=true genera los partidos de la zona y los ubica en los huecos
+    del fixture actual (reprogramación incremental); la respuesta incluye el diff.
     """
     from ..models.driveplus_models import Partido
     from ..models.torneo_models import Torneo
@@ -1764,10 +1774,18 @@ def crear_zona_ultimo_momento(
         zona = TorneoZonaService.crear_zona_ultimo_momento(
             db, torneo_id, body.categoria_id, body.nombre, body.pareja_ids, current_user.id_usuario
         )
-        return {
+        response = {
             "message": "Zona creada. Generá los partidos de esta zona desde Programación.",
             "zona": {"id": zona.id, "nombre": zona.nombre, "categoria_id": zona.categoria_id}
         }
+        if reprogramar:
+            from ..services.torneo_fixture_incremental_service import TorneoFixtureIncrementalService
+            TorneoFixtureIncrementalService.crear_partidos_zona(db, torneo, zona, current_user.id_usuario)
+            response["message"] = "Zona creada y partidos programados."
+            response["reprogramacion"] = TorneoFixtureIncrementalService.reprogramar(
+                db, torneo_id, body.pareja_ids
+            )
+        return response
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
@@ -1789,10 +1807,10 @@ def generar_partidos_zona(
     Solo organizadores.
     """
     from ..models.torneo_models import TorneoZona, TorneoZonaPareja, TorneoPareja, Torneo
-    from ..models.driveplus_models import Partido
 
     from ..services.torneo_zona_service import TorneoZonaService
     from ..services.torneo_fixture_global_service import TorneoFixtureGlobalService
+    from ..services.torneo_fixture_incremental_service import TorneoFixtureIncrementalService
 
     try:
         if not TorneoZonaService._es_organizador(db, torneo_id, current_user.id_usuario):
@@ -1809,32 +1827,9 @@ def generar_partidos_zona(
             return {"message": "La zona no tiene al menos 2 parejas", "partidos_creados": 0}
 
         torneo = db.query(Torneo).filter(Torneo.id == torneo_id).first()
-        # Batch: cargar partidos existentes de la zona (evitar N+1)
-        existentes = db.query(Partido.pareja1_id, Partido.pareja2_id).filter(
-            Partido.id_torneo == torneo_id,
-            Partido.zona_id == zona_id
-        ).all()
-        existentes_set = {(r.pareja1_id, r.pareja2_id) for r in existentes}
-        creados = 0
-        for p in partidos_dict:
-            key = (p['pareja1_id'], p['pareja2_id'])
-            if key in existentes_set:
-                continue
-            existentes_set.add(key)
-            partido = Partido(
-                id_torneo=torneo_id,
-                zona_id=zona_id,
-                categoria_id=zona.categoria_id,
-                fase='zona',
-                pareja1_id=p['pareja1_id'],
-                pareja2_id=p['pareja2_id'],
-                estado='pendiente',
-                tipo='torneo',
-                id_creador=torneo.creado_por if torneo else current_user.id_usuario,
-            )
-            db.add(partido)
-            creados += 1
-        db.commit()
+        creados = TorneoFixtureIncrementalService.crear_partidos_zona(
+            db, torneo, zona, current_user.id_usuario, partidos_dict
+        )
         return {"message": f"Partidos de la zona creados ({creados})", "partidos_creados": creados}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -1875,12 +1870,68 @@ def mover_pareja(
 # ENDPOINTS DE FIXTURE
 # ============================================
 
+def _lanzar_trabajo(
+    db: Session,
+    tipo: str,
+    torneo_id: int,
+    current_user: Usuario,
+    funcion,
+    parametros: dict,
+    idempotency_key: Optional[str]
+) -> JSONResponse:
+    """
+    Encola una operación pesada y responde 202 con el id del trabajo.
+    
+    - Mismo Idempotency-Key (por usuario y tipo) => mismo trabajo, no se genera dos veces
+    - Sin clave: si ya hay un trabajo igual pendiente o en curso, se devuelve ese
+    """
+    from ..services.torneo_zona_service import TorneoZonaService
+    from ..services.trabajos import trabajos
+    
+    if not TorneoZonaService._es_organizador(db, torneo_id, current_user.id_usuario):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permisos")
+    
+    clave_parametros = ":".join(f"{k}={parametros[k]}" for k in sorted(parametros))
+    trabajo, creado = trabajos.encolar(
+        tipo,
+        funcion,
+        torneo_id=torneo_id,
+        usuario_id=current_user.id_usuario,
+        parametros=parametros,
+        clave_idempotencia=f"{current_user.id_usuario}:{tipo}:{idempotency_key}" if idempotency_key else None,
+        clave_activa=f"{tipo}:{torneo_id}:{clave_parametros}"
+    )
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "message": "Trabajo encolado" if creado else "Trabajo ya existente",
+            "trabajo_id": trabajo.id,
+            "estado": trabajo.estado,
+            "url": f"/jobs/{trabajo.id}",
+            "websocket": f"/ws/trabajos/{trabajo.id}"
+        }
+    )
+
+
+def _respuesta_zonas(resultado: dict) -> dict:
+    return {
+        "message": "Zonas generadas con criterio de disponibilidad horaria",
+        "zonas_creadas": resultado["zonas_creadas"],
+        "zonas": resultado["zonas"],
+        "compatibilidad_promedio": f"{resultado['compatibilidad_promedio'] * 100:.1f}%"
+    }
+
+
 @router.post("/{torneo_id}/generar-zonas-inteligente")
 def generar_zonas_inteligente(
     torneo_id: int,
     num_zonas: Optional[int] = None,
     num_canchas: int = 3,
     categoria_id: Optional[int] = None,
+    refinar: bool = Query(False, description="Intercambiar parejas entre zonas para subir la compatibilidad"),
+    tiempo_limite: float = Query(1.0, gt=0, le=30, description="Segundos máximos para refinar"),
+    en_segundo_plano: bool = Query(False, description="Responder 202 con un trabajo en lugar de esperar"),
+    idempotency_key: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -1894,33 +1945,67 @@ def generar_zonas_inteligente(
     - num_zonas: Número de zonas (opcional, se calcula automáticamente)
     - num_canchas: Número de canchas disponibles (default: 3)
     - categoria_id: ID de categoría (opcional)
+    - refinar: Búsqueda local sobre el greedy (default: false)
+    - tiempo_limite: Segundos para refinar (default: 1)
+    - en_segundo_plano: Devuelve 202 + trabajo_id (ver GET /jobs/{id})
     
     Solo organizadores pueden generar zonas
     """
     from ..services.torneo_zona_horarios_service import TorneoZonaHorariosService
     
+    user_id = current_user.id_usuario
+    
+    if en_segundo_plano:
+        def trabajo(db_trabajo, progreso):
+            return _respuesta_zonas(TorneoZonaHorariosService.generar_zonas_con_horarios(
+                db_trabajo, torneo_id, user_id, num_zonas, num_canchas, categoria_id,
+                refinar=refinar, tiempo_limite=tiempo_limite
+            ))
+        return _lanzar_trabajo(
+            db, "zonas", torneo_id, current_user, trabajo,
+            {"categoria_id": categoria_id, "num_zonas": num_zonas}, idempotency_key
+        )
+    
     try:
-        user_id = current_user.id_usuario
         resultado = TorneoZonaHorariosService.generar_zonas_con_horarios(
-            db, torneo_id, user_id, num_zonas, num_canchas, categoria_id
+            db, torneo_id, user_id, num_zonas, num_canchas, categoria_id,
+            refinar=refinar, tiempo_limite=tiempo_limite
         )
-        return {
-            "message": "Zonas generadas con criterio de disponibilidad horaria",
-            "zonas_creadas": resultado["zonas_creadas"],
-            "zonas": resultado["zonas"],
-            "compatibilidad_promedio": f"{resultado['compatibilidad_promedio'] * 100:.1f}%"
-        }
+        return _respuesta_zonas(resultado)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+def _respuesta_fixture(resultado: dict, categoria_id: Optional[int], modo: str) -> dict:
+    response = {
+        "message": f"Fixture generado exitosamente{' para categoría ' + str(categoria_id) if categoria_id else ''}",
+        "partidos_generados": resultado["partidos_generados"],
+        "partidos_no_programados": resultado["partidos_no_programados"],
+        "zonas_procesadas": resultado["zonas_procesadas"],
+        "canchas_utilizadas": resultado["canchas_utilizadas"],
+        "slots_utilizados": resultado["slots_utilizados"],
+        "modo": modo
+    }
+    
+    # Incluir detalles de partidos no programados si existen
+    if resultado["partidos_sin_programar"]:
+        response["partidos_sin_programar"] = resultado["partidos_sin_programar"]
+        response["warning"] = f"⚠️ {resultado['partidos_no_programados']} partidos no pudieron programarse por incompatibilidad horaria"
+    
+    return response
+
+
 @router.post("/{torneo_id}/generar-fixture")
 @router.post("/{torneo_id}/generar-fixture/")
 def generar_fixture(
     torneo_id: int,
     categoria_id: Optional[int] = Query(None, description="ID de categoría para generar fixture solo de esa categoría"),
+    modo: str = Query("greedy", description="'greedy' (rápido) u 'optimo' (búsqueda local para programar más partidos)"),
+    tiempo_limite: Optional[float] = Query(None, gt=0, le=60, description="Segundos máximos para el modo óptimo"),
+    en_segundo_plano: bool = Query(False, description="Responder 202 con un trabajo en lugar de esperar"),
+    idempotency_key: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -1929,38 +2014,90 @@ def generar_fixture(
     
     Parámetros:
     - categoria_id (opcional): Si se especifica, solo genera fixture para esa categoría
+    - modo (opcional): 'optimo' intenta programar los partidos que el greedy deja
+      afuera, dentro de tiempo_limite segundos (default 5); si no mejora, queda el greedy
+    - en_segundo_plano (opcional): Devuelve 202 + trabajo_id; el progreso por
+      categoría se consulta en GET /jobs/{id} o por /ws/trabajos/{id}.
+      Con header Idempotency-Key los reintentos devuelven el mismo trabajo.
     
     Consideraciones:
     - Todas las zonas y categorías (o solo la especificada)
     - Disponibilidad horaria de parejas
     - Canchas disponibles (no más partidos simultáneos que canchas)
-    - Duración de partidos: 50 minutos
+    - Duración de partidos: reglas_json.duracion_partido_minutos (default 70)
     
     Solo organizadores pueden generar fixture
     """
     from ..services.torneo_fixture_global_service import TorneoFixtureGlobalService
     
+    user_id = current_user.id_usuario
+    
+    if en_segundo_plano:
+        def trabajo(db_trabajo, progreso):
+            resultado = TorneoFixtureGlobalService.generar_fixture_completo(
+                db_trabajo, torneo_id, user_id, categoria_id, modo, tiempo_limite, progreso=progreso
+            )
+            return _respuesta_fixture(resultado, categoria_id, modo)
+        return _lanzar_trabajo(
+            db, "fixture", torneo_id, current_user, trabajo,
+            {"categoria_id": categoria_id, "modo": modo}, idempotency_key
+        )
+    
     try:
-        user_id = current_user.id_usuario
         resultado = TorneoFixtureGlobalService.generar_fixture_completo(
-            db, torneo_id, user_id, categoria_id
+            db, torneo_id, user_id, categoria_id, modo, tiempo_limite
         )
-        
-        response = {
-            "message": f"Fixture generado exitosamente{' para categoría ' + str(categoria_id) if categoria_id else ''}",
-            "partidos_generados": resultado["partidos_generados"],
-            "partidos_no_programados": resultado["partidos_no_programados"],
-            "zonas_procesadas": resultado["zonas_procesadas"],
-            "canchas_utilizadas": resultado["canchas_utilizadas"],
-            "slots_utilizados": resultado["slots_utilizados"]
-        }
-        
-        # Incluir detalles de partidos no programados si existen
-        if resultado["partidos_sin_programar"]:
-            response["partidos_sin_programar"] = resultado["partidos_sin_programar"]
-            response["warning"] = f"⚠️ {resultado['partidos_no_programados']} partidos no pudieron programarse por incompatibilidad horaria"
-        
-        return response
+        return _respuesta_fixture(resultado, categoria_id, modo)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.post("/{torneo_id}/fixture/reprogramar")
+def reprogramar_fixture_incremental(
+    torneo_id: int,
+    pareja_ids: Optional[List[int]] = Query(None, description="Parejas afectadas por el cambio"),
+    aplicar: bool = Query(True, description="False = solo calcular el diff"),
+    modo: str = Query("greedy", description="'greedy' u 'optimo'"),
+    tiempo_limite: Optional[float] = Query(None, gt=0, le=60, description="Segundos máximos para el modo óptimo"),
+    en_segundo_plano: bool = Query(False, description="Responder 202 con un trabajo en lugar de esperar"),
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Reprogramación incremental del fixture de zonas
+    
+    Deja fijo el fixture actual y mueve solo los partidos que hace falta:
+    sin horario, en conflicto (restricción, cancha, descanso) o de parejas
+    dadas de baja (se eliminan). Devuelve el diff antes/después.
+    
+    Con en_segundo_plano=true devuelve 202 + trabajo_id (ver GET /jobs/{id}).
+    
+    Solo organizadores.
+    """
+    from ..services.torneo_zona_service import TorneoZonaService
+    from ..services.torneo_fixture_incremental_service import TorneoFixtureIncrementalService
+    
+    if en_segundo_plano:
+        def trabajo(db_trabajo, progreso):
+            return TorneoFixtureIncrementalService.reprogramar(
+                db_trabajo, torneo_id, pareja_ids, aplicar, modo, tiempo_limite
+            )
+        parametros = {"pareja_ids": ",".join(map(str, sorted(pareja_ids or []))), "aplicar": aplicar, "modo": modo}
+        return _lanzar_trabajo(
+            db, "reprogramacion", torneo_id, current_user, trabajo, parametros, idempotency_key
+        )
+    
+    try:
+        if not TorneoZonaService._es_organizador(db, torneo_id, current_user.id_usuario):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permisos")
+        return TorneoFixtureIncrementalService.reprogramar(
+            db, torneo_id, pareja_ids, aplicar, modo, tiempo_limite
+        )
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
@@ -2006,8 +2143,14 @@ def eliminar_fixture(
         
         # Eliminar partidos
         partidos_eliminados = query.delete(synchronize_session=False)
+        marcar_modificado(db, torneo_id)
+        
+        from ..services.torneo_tabla_service import TorneoTablaService
+        TorneoTablaService.invalidar(db, torneo_id=torneo_id)
         
         db.commit()
+        from ..services.intervalos import ocupaciones
+        ocupaciones.invalidar(torneo_id)
         
         mensaje = f"Fixture eliminado exitosamente"
         if categoria_id:
@@ -2032,15 +2175,21 @@ def verificar_solapamientos(
     """
     Verifica si hay solapamientos de horarios en los partidos programados del torneo.
     
+    Usa la duración de partido del torneo (reglas_json.duracion_partido_minutos)
+    y detecta también jugadores sin descanso mínimo entre categorías.
+    
     Retorna:
     - solapamientos: Lista de partidos que se solapan
     - total_solapamientos: Número total de solapamientos detectados
     
     Solo organizadores pueden verificar solapamientos.
     """
-    from ..models.torneo_models import Torneo
+    from ..models.torneo_models import Torneo, TorneoPareja
     from ..models.driveplus_models import Partido
-    from datetime import timedelta
+    from ..services.intervalos import (
+        detectar_solapamientos, partido_intervalo, duracion_partido_torneo, descanso_minimo_torneo,
+        CONFLICTO_CANCHA, CONFLICTO_PAREJA
+    )
     
     try:
         # Verificar permisos
@@ -2059,75 +2208,64 @@ def verificar_solapamientos(
         if not (es_creador or es_organizador):
             raise HTTPException(status_code=403, detail="No tienes permisos")
         
-        # Obtener todos los partidos programados del torneo
-        partidos = db.query(Partido).filter(
+        # Obtener todos los partidos programados del torneo (solo columnas)
+        partidos = db.query(
+            Partido.id_partido, Partido.fecha_hora, Partido.cancha_id,
+            Partido.pareja1_id, Partido.pareja2_id
+        ).filter(
             Partido.id_torneo == torneo_id,
             Partido.fecha_hora.isnot(None)
-        ).order_by(Partido.fecha_hora).all()
+        ).all()
+        por_id = {p.id_partido: p for p in partidos}
         
-        solapamientos = []
-        duracion_partido = timedelta(minutes=50)
+        # Jugadores por pareja (para el descanso entre categorías)
+        parejas = db.query(TorneoPareja.id, TorneoPareja.jugador1_id, TorneoPareja.jugador2_id).filter(
+            TorneoPareja.torneo_id == torneo_id
+        ).all()
+        jugadores_por_pareja = {p.id: (p.jugador1_id, p.jugador2_id) for p in parejas}
+        
+        duracion = duracion_partido_torneo(torneo)
+        descanso = descanso_minimo_torneo(torneo)
+        conflictos = detectar_solapamientos(
+            [partido_intervalo(p.id_partido, p.fecha_hora, p.cancha_id, p.pareja1_id, p.pareja2_id) for p in partidos],
+            jugadores_por_pareja,
+            duracion,
+            descanso
+        )
         
-        # Verificar solapamientos
-        for i, partido1 in enumerate(partidos):
-            fin_partido1 = partido1.fecha_hora + duracion_partido
-            
-            for partido2 in partidos[i+1:]:
-                inicio_partido2 = partido2.fecha_hora
-                fin_partido2 = inicio_partido2 + duracion_partido
-                
-                # Verificar si se solapan
-                if partido1.fecha_hora < fin_partido2 and inicio_partido2 < fin_partido1:
-                    # Verificar si comparten cancha
-                    if partido1.cancha_id and partido2.cancha_id and partido1.cancha_id == partido2.cancha_id:
-                        solapamientos.append({
-                            "tipo": "cancha",
-                            "partido1": {
-                                "id": partido1.id_partido,
-                                "fecha_hora": partido1.fecha_hora.isoformat(),
-                                "cancha_id": partido1.cancha_id,
-                                "pareja1": partido1.pareja1_id,
-                                "pareja2": partido1.pareja2_id
-                            },
-                            "partido2": {
-                                "id": partido2.id_partido,
-                                "fecha_hora": partido2.fecha_hora.isoformat(),
-                                "cancha_id": partido2.cancha_id,
-                                "pareja1": partido2.pareja1_id,
-                                "pareja2": partido2.pareja2_id
-                            },
-                            "mensaje": f"Misma cancha ({partido1.cancha_id}) en horarios solapados"
-                        })
-                    
-                    # Verificar si comparten parejas
-                    parejas1 = {partido1.pareja1_id, partido1.pareja2_id}
-                    parejas2 = {partido2.pareja1_id, partido2.pareja2_id}
-                    parejas_comunes = parejas1 & parejas2
-                    
-                    if parejas_comunes:
-                        solapamientos.append({
-                            "tipo": "pareja",
-                            "partido1": {
-                                "id": partido1.id_partido,
-                                "fecha_hora": partido1.fecha_hora.isoformat(),
-                                "cancha_id": partido1.cancha_id,
-                                "pareja1": partido1.pareja1_id,
-                                "pareja2": partido1.pareja2_id
-                            },
-                            "partido2": {
-                                "id": partido2.id_partido,
-                                "fecha_hora": partido2.fecha_hora.isoformat(),
-                                "cancha_id": partido2.cancha_id,
-                                "pareja1": partido2.pareja1_id,
-                                "pareja2": partido2.pareja2_id
-                            },
-                            "parejas_comunes": list(parejas_comunes),
-                            "mensaje": f"Pareja(s) {list(parejas_comunes)} juegan en horarios solapados"
-                        })
+        def datos_partido(partido_id):
+            p = por_id[partido_id]
+            return {
+                "id": p.id_partido,
+                "fecha_hora": p.fecha_hora.isoformat(),
+                "cancha_id": p.cancha_id,
+                "pareja1": p.pareja1_id,
+                "pareja2": p.pareja2_id
+            }
+        
+        solapamientos = []
+        for conflicto in conflictos:
+            item = {
+                "tipo": conflicto["tipo"],
+                "partido1": datos_partido(conflicto["partido1"].id),
+                "partido2": datos_partido(conflicto["partido2"].id),
+            }
+            claves = conflicto["claves"]
+            if conflicto["tipo"] == CONFLICTO_CANCHA:
+                item["mensaje"] = f"Misma cancha ({claves[0]}) en horarios solapados"
+            elif conflicto["tipo"] == CONFLICTO_PAREJA:
+                item["parejas_comunes"] = claves
+                item["mensaje"] = f"Pareja(s) {claves} juegan en horarios solapados"
+            else:
+                minutos = int(conflicto["partido2"].inicio - conflicto["partido1"].inicio)
+                item["jugadores_comunes"] = claves
+                item["mensaje"] = f"Jugador(es) {claves} con < {descanso // 60}h de descanso ({minutos} min)"
+            solapamientos.append(item)
         
         return {
             "total_solapamientos": len(solapamientos),
             "solapamientos": solapamientos,
+            "duracion_partido_minutos": duracion,
             "message": "✅ No se detectaron solapamientos" if len(solapamientos) == 0 else f"⚠️ Se detectaron {len(solapamientos)} solapamientos"
         }
     except HTTPException:
@@ -2139,6 +2277,8 @@ def verificar_solapamientos(
 @router.get("/{torneo_id}/partidos")
 def listar_partidos_torneo(
     torneo_id: int,
+    request: Request,
+    response: Response,
     zona_id: Optional[int] = None,
     categoria_id: Optional[int] = None,
     db: Session = Depends(get_db)
@@ -2148,7 +2288,13 @@ def listar_partidos_torneo(
     
     - **zona_id**: Filtrar por zona (opcional)
     - **categoria_id**: Filtrar por categoría (opcional)
+    
+    Responde 304 si If-None-Match coincide con la versión del torneo.
     """
+    no_modificado = _get_condicional(request, response, db, torneo_id)
+    if no_modificado is not None:
+        return no_modificado
+
     from ..models.driveplus_models import Partido, PerfilUsuario
     from ..models.torneo_models import TorneoPareja
     
@@ -2261,6 +2407,43 @@ def cargar_resultado_partido(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@router.post("/{torneo_id}/resultados/lote")
+def cargar_resultados_lote(
+    torneo_id: int,
+    datos: dict,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Carga muchos resultados de una vez (la planilla del día)
+
+    Body:
+    - {"resultados": [{"partido_id": 812, "sets": ["6-3", "4-6", "6-2"]}, ...]}
+    - o {"csv": "partido_id,set1,set2,set3\\n812,6-3,4-6,6-2\\n..."}
+
+    Los sets van desde el punto de vista de pareja1. Se aplican en orden
+    cronológico en una sola transacción; las filas con error no frenan al
+    resto y se informan una por una.
+
+    Solo organizadores pueden cargar resultados
+    """
+    from ..services.torneo_resultado_service import TorneoResultadoService
+    from ..services.resultados_lote import leer_csv, leer_json
+
+    try:
+        filas = leer_csv(datos["csv"]) if isinstance(datos.get("csv"), str) else leer_json(datos)
+        if not filas:
+            raise ValueError("El lote no tiene resultados")
+        return TorneoResultadoService.cargar_resultados_lote(
+            db, torneo_id, filas, current_user.id_usuario
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
 @router.put("/{torneo_id}/partidos/{partido_id}/resultado")
 def corregir_resultado_partido(
     torneo_id: int,
@@ -2360,11 +2543,30 @@ def verificar_zona_completa(
 # ENDPOINTS DE PLAYOFFS
 # ============================================
 
+def _respuesta_playoffs(partidos) -> dict:
+    return {
+        "message": "Playoffs generados exitosamente",
+        "total_partidos": len(partidos),
+        "partidos": [
+            {
+                "id": p.id_partido,
+                "fase": p.fase.value if hasattr(p.fase, 'value') else str(p.fase),
+                "numero_partido": p.numero_partido,
+                "pareja1_id": p.pareja1_id,
+                "pareja2_id": p.pareja2_id
+            }
+            for p in partidos
+        ]
+    }
+
+
 @router.post("/{torneo_id}/generar-playoffs")
 def generar_playoffs(
     torneo_id: int,
     clasificados_por_zona: int = 2,
     categoria_id: Optional[int] = None,
+    en_segundo_plano: bool = Query(False, description="Responder 202 con un trabajo en lugar de esperar"),
+    idempotency_key: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -2377,28 +2579,27 @@ def generar_playoffs(
     
     - **clasificados_por_zona**: Número de clasificados por zona (default: 2)
     - **categoria_id**: Si se pasa, solo genera playoffs para esa categoría
+    - **en_segundo_plano**: Devuelve 202 + trabajo_id (ver GET /jobs/{id})
     """
     from ..services.torneo_playoff_service import TorneoPlayoffService
     
+    user_id = current_user.id_usuario
+    
+    if en_segundo_plano:
+        def trabajo(db_trabajo, progreso):
+            return _respuesta_playoffs(TorneoPlayoffService.generar_playoffs(
+                db_trabajo, torneo_id, user_id, clasificados_por_zona, categoria_id, progreso=progreso
+            ))
+        return _lanzar_trabajo(
+            db, "playoffs", torneo_id, current_user, trabajo,
+            {"categoria_id": categoria_id, "clasificados_por_zona": clasificados_por_zona}, idempotency_key
+        )
+    
     try:
-        user_id = current_user.id_usuario
         partidos = TorneoPlayoffService.generar_playoffs(
             db, torneo_id, user_id, clasificados_por_zona, categoria_id
         )
-        return {
-            "message": "Playoffs generados exitosamente",
-            "total_partidos": len(partidos),
-            "partidos": [
-                {
-                    "id": p.id_partido,
-                    "fase": p.fase.value if hasattr(p.fase, 'value') else str(p.fase),
-                    "numero_partido": p.numero_partido,
-                    "pareja1_id": p.pareja1_id,
-                    "pareja2_id": p.pareja2_id
-                }
-                for p in partidos
-            ]
-        }
+        return _respuesta_playoffs(partidos)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
@@ -2457,6 +2658,7 @@ def intercambiar_parejas_playoff(
     Solo organizadores. Solo partidos pendientes (no confirmados ni BYE).
     """
     from ..services.torneo_playoff_service import TorneoPlayoffService
+    from ..services.bracket import FASES_PLAYOFF
     from ..models.driveplus_models import Partido
 
     if not TorneoPlayoffService._es_organizador(db, torneo_id, current_user.id_usuario):
@@ -2467,12 +2669,12 @@ def intercambiar_parejas_playoff(
     pa = db.query(Partido).filter(
         Partido.id_partido == body.partido_id_a,
         Partido.id_torneo == torneo_id,
-        Partido.fase.in_(['16avos', '8vos', '4tos', 'cuartos', 'semis', 'semifinal', 'final'])
+        Partido.fase.in_(FASES_PLAYOFF)
     ).first()
     pb = db.query(Partido).filter(
         Partido.id_partido == body.partido_id_b,
         Partido.id_torneo == torneo_id,
-        Partido.fase.in_(['16avos', '8vos', '4tos', 'cuartos', 'semis', 'semifinal', 'final'])
+        Partido.fase.in_(FASES_PLAYOFF)
     ).first()
     if not pa or not pb:
         raise HTTPException(status_code=404, detail="Uno o ambos partidos no existen o no son de playoff")
@@ -2503,10 +2705,11 @@ def intercambiar_partidos_playoff(
     current_user: Usuario = Depends(get_current_user)
 ):
     """
-    Intercambia las posiciones de dos partidos en el bracket (swap de numero_partido).
-    Así un cuadro completo sube o baja. Misma fase y misma categoría. Solo organizadores.
+    Intercambia las posiciones de dos partidos en el bracket (swap de numero_partido
+    y de su vínculo al partido siguiente). Así un cuadro completo sube o baja. Misma fase y misma categoría. Solo organizadores.
     """
     from ..services.torneo_playoff_service import TorneoPlayoffService
+    from ..services.bracket import FASES_PLAYOFF
     from ..models.driveplus_models import Partido
 
     if not TorneoPlayoffService._es_organizador(db, torneo_id, current_user.id_usuario):
@@ -2515,12 +2718,12 @@ def intercambiar_partidos_playoff(
     pa = db.query(Partido).filter(
         Partido.id_partido == body.partido_id_a,
         Partido.id_torneo == torneo_id,
-        Partido.fase.in_(['16avos', '8vos', '4tos', 'cuartos', 'semis', 'semifinal', 'final'])
+        Partido.fase.in_(FASES_PLAYOFF)
     ).first()
     pb = db.query(Partido).filter(
         Partido.id_partido == body.partido_id_b,
         Partido.id_torneo == torneo_id,
-        Partido.fase.in_(['16avos', '8vos', '4tos', 'cuartos', 'semis', 'semifinal', 'final'])
+        Partido.fase.in_(FASES_PLAYOFF)
     ).first()
     if not pa or not pb:
         raise HTTPException(status_code=404, detail="Uno o ambos partidos no existen o no son de playoff")
@@ -2529,9 +2732,7 @@ def intercambiar_partidos_playoff(
     if pa.categoria_id != pb.categoria_id:
         raise HTTPException(status_code=400, detail="Los partidos deben ser de la misma categoría")
 
-    na, nb = pa.numero_partido, pb.numero_partido
-    pa.numero_partido = nb
-    pb.numero_partido = na
+    TorneoPlayoffService.intercambiar_posiciones(db, pa, pb)
     db.commit()
     return {"message": "Posiciones de cuadros intercambiadas correctamente"}
 
@@ -2539,6 +2740,8 @@ def intercambiar_partidos_playoff(
 @router.get("/{torneo_id}/playoffs")
 def listar_partidos_playoffs(
     torneo_id: int,
+    request: Request,
+    response: Response,
     categoria_id: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
@@ -2547,8 +2750,13 @@ def listar_partidos_playoffs(
     
     - **categoria_id**: Filtrar por categoría específica (opcional)
     
-    Si no se especifica categoria_id, devuelve playoffs agrupados por categoría
+    Si no se especifica categoria_id, devuelve playoffs agrupados por categoría.
+    Responde 304 si If-None-Match coincide con la versión del torneo.
     """
+    no_modificado = _get_condicional(request, response, db, torneo_id)
+    if no_modificado is not None:
+        return no_modificado
+
     from ..services.torneo_playoff_service import TorneoPlayoffService
     from ..models.driveplus_models import PerfilUsuario
     from ..models.torneo_models import TorneoPareja, TorneoCategoria
@@ -2755,7 +2963,14 @@ def actualizar_horario_playoff(
     else:
         partido.fecha_hora = None
 
+    publicar_evento(db, torneo_id, PARTIDO_REPROGRAMADO, datos_reprogramado(partido))
     db.commit()
+    
+    from ..services.intervalos import ocupaciones
+    ocupaciones.mover(
+        torneo_id, partido_id, partido.fecha_hora, partido.cancha_id,
+        partido.pareja1_id, partido.pareja2_id
+    )
     return {"message": "Horario actualizado", "partido_id": partido_id, "fecha_hora": partido.fecha_hora.isoformat() if partido.fecha_hora else None}
 
 
@@ -2932,23 +3147,25 @@ def crear_slots(
         slots_existentes = {(r.cancha_id, r.fecha_hora_inicio) for r in existentes}
         
         slots_creados = 0
+        nuevos_slots = []
         while hora_actual + timedelta(minutes=duracion_minutos) <= hora_limite:
             for cancha in canchas:
                 if (cancha.id, hora_actual) in slots_existentes:
                     continue
                 slots_existentes.add((cancha.id, hora_actual))
-                slot = TorneoSlot(
+                nuevos_slots.append(dict(
                     torneo_id=torneo_id,
                     cancha_id=cancha.id,
                     fecha_hora_inicio=hora_actual,
                     fecha_hora_fin=hora_actual + timedelta(minutes=duracion_minutos),
                     ocupado=False
-                )
-                db.add(slot)
+                ))
                 slots_creados += 1
             
             hora_actual += timedelta(minutes=duracion_minutos)
         
+        # Un solo INSERT para todos los slots del día
+        insertar_filas(db, TorneoSlot, nuevos_slots)
         db.commit()
         
         return {
@@ -3062,8 +3279,11 @@ def limpiar_programacion(
         
         # Eliminar todos los slots
         db.query(TorneoSlot).filter(TorneoSlot.torneo_id == torneo_id).delete(synchronize_session=False)
+        marcar_modificado(db, torneo_id)
         
         db.commit()
+        from ..services.intervalos import ocupaciones
+        ocupaciones.invalidar(torneo_id)
         
         return {
             "message": "Programación limpiada exitosamente",
@@ -3190,14 +3410,13 @@ def programar_partidos_automatico(
                         
                         # Verificar en memoria si ya existe
                         if (cancha.id, inicio) not in slots_existentes_set:
-                            nuevo_slot = TorneoSlot(
+                            nuevos_slots.append(dict(
                                 torneo_id=torneo_id,
                                 cancha_id=cancha.id,
                                 fecha_hora_inicio=inicio,
                                 fecha_hora_fin=fin,
                                 ocupado=False
-                            )
-                            nuevos_slots.append(nuevo_slot)
+                            ))
                             slots_creados += 1
                     
                     # Avanzar al siguiente slot
@@ -3206,10 +3425,9 @@ def programar_partidos_automatico(
                 fecha_actual += timedelta(days=1)
             
             # Insertar todos los slots de una vez
+            # (INSERT multi-VALUES en un round trip, sin flush por objeto)
             if nuevos_slots:
-                for slot in nuevos_slots:
-                    db.add(slot)
-                db.flush()
+                insertar_filas(db, TorneoSlot, nuevos_slots)
         
         # Obtener partidos pendientes sin programar
         partidos = db.query(Partido).filter(
@@ -3365,6 +3583,8 @@ def programar_partidos_automatico(
                 })
         
         db.commit()
+        from ..services.intervalos import ocupaciones
+        ocupaciones.invalidar(torneo_id)
         
         # Construir mensaje
         mensaje = f"Se programaron {partidos_programados} partidos"
@@ -3472,8 +3692,15 @@ def reprogramar_partido(
         nuevo_slot.ocupado = True
         nuevo_slot.partido_id = partido_id
         
+        publicar_evento(db, torneo_id, PARTIDO_REPROGRAMADO, datos_reprogramado(partido))
         db.commit()
         
+        from ..services.intervalos import ocupaciones
+        ocupaciones.mover(
+            torneo_id, partido_id, partido.fecha_hora, partido.cancha_id,
+            partido.pareja1_id, partido.pareja2_id
+        )
+        
         return {
             "message": "Partido reprogramado",
             "partido_id": partido_id,
@@ -3624,6 +3851,42 @@ class CambiarHorarioRequest(BaseModel):
     cancha_id: int
 
 
+def _construir_ocupacion(db: Session, torneo_id: int):
+    """Carga completa de la ocupación del torneo (solo la primera vez, después queda cacheada)"""
+    from ..models.driveplus_models import Partido
+    from ..models.torneo_models import Torneo, TorneoPareja
+    from ..services.intervalos import (
+        OcupacionTorneo, partido_intervalo, duracion_partido_torneo, descanso_minimo_torneo
+    )
+    
+    torneo = db.query(Torneo).filter(Torneo.id == torneo_id).first()
+    
+    # Jugadores por pareja del torneo (una query, solo columnas)
+    parejas = db.query(TorneoPareja.id, TorneoPareja.jugador1_id, TorneoPareja.jugador2_id).filter(
+        TorneoPareja.torneo_id == torneo_id
+    ).all()
+    ocupacion = OcupacionTorneo(
+        duracion_partido_torneo(torneo),
+        descanso_minimo_torneo(torneo),
+        {p.id: (p.jugador1_id, p.jugador2_id) for p in parejas}
+    )
+    
+    # Todas las categorías, por cancha y por jugador
+    partidos = db.query(
+        Partido.id_partido, Partido.fecha_hora, Partido.cancha_id,
+        Partido.pareja1_id, Partido.pareja2_id
+    ).filter(
+        Partido.id_torneo == torneo_id,
+        Partido.fecha_hora.isnot(None)
+    ).all()
+    for p in partidos:
+        ocupacion.agregar(
+            partido_intervalo(p.id_partido, p.fecha_hora, p.cancha_id, p.pareja1_id, p.pareja2_id),
+            ocupacion.jugadores_de(p.pareja1_id, p.pareja2_id)
+        )
+    return ocupacion
+
+
 def _detectar_conflictos_horario(
     db: Session,
     torneo_id: int,
@@ -3634,62 +3897,59 @@ def _detectar_conflictos_horario(
 ) -> list:
     """
     Detecta conflictos de horario:
-    1. Solapamiento de cancha (< 90 min entre partidos en misma cancha)
-    2. Mismo jugador juega en < 3h (cross-categoría incluido)
+    1. Solapamiento de cancha (partidos en misma cancha a menos de la duración del torneo)
+    2. Mismo jugador juega con menos del descanso mínimo (cross-categoría incluido)
+    
+    Usa la ocupación cacheada del torneo: solo se consultan en la base el
+    partido a mover y, si hay conflictos, los datos para mostrarlos.
     """
     from ..models.driveplus_models import Partido
-    from ..models.torneo_models import TorneoPareja
-    from datetime import timedelta
-    
-    DURACION_PARTIDO = timedelta(minutes=90)
-    MIN_DESCANSO = timedelta(hours=3)
+    from ..services.intervalos import ocupaciones, datetime_a_minutos, CONFLICTO_CANCHA
     
-    fecha_hora_fin = fecha_hora_nueva + DURACION_PARTIDO
     conflictos = []
     
-    # Obtener parejas del partido actual para saber los jugadores
-    partido_actual = db.query(Partido).filter(Partido.id_partido == partido_id).first()
+    partido_actual = db.query(Partido.pareja1_id, Partido.pareja2_id).filter(
+        Partido.id_partido == partido_id
+    ).first()
     if not partido_actual:
         return conflictos
     
-    pareja1_actual = db.query(TorneoPareja).filter(TorneoPareja.id == partido_actual.pareja1_id).first()
-    pareja2_actual = db.query(TorneoPareja).filter(TorneoPareja.id == partido_actual.pareja2_id).first()
-    
-    jugadores_partido = set()
-    if pareja1_actual:
-        jugadores_partido.add(pareja1_actual.jugador1_id)
-        jugadores_partido.add(pareja1_actual.jugador2_id)
-    if pareja2_actual:
-        jugadores_partido.add(pareja2_actual.jugador1_id)
-        jugadores_partido.add(pareja2_actual.jugador2_id)
-    
-    # Traer TODOS los partidos del torneo (todas las categorías) en una sola query
-    todos_partidos = db.query(Partido).filter(
-        Partido.id_torneo == torneo_id,
-        Partido.id_partido != partido_id,
-        Partido.fecha_hora.isnot(None)
-    ).all()
+    def coincide(fila, indexado):
+        return (
+            fila is not None and indexado is not None and fila.fecha_hora is not None
+            and datetime_a_minutos(fila.fecha_hora) == indexado.inicio
+            and fila.cancha_id == indexado.cancha_id
+        )
     
-    # Pre-cargar parejas necesarias en batch
-    pareja_ids = set()
-    for p in todos_partidos:
-        if p.pareja1_id:
-            pareja_ids.add(p.pareja1_id)
-        if p.pareja2_id:
-            pareja_ids.add(p.pareja2_id)
-    
-    parejas_map = {}
-    if pareja_ids:
-        parejas = db.query(TorneoPareja).filter(TorneoPareja.id.in_(pareja_ids)).all()
-        for p in parejas:
-            parejas_map[p.id] = p
+    for _ in range(2):
+        ocupacion, encontrados = ocupaciones.conflictos(
+            torneo_id,
+            lambda: _construir_ocupacion(db, torneo_id),
+            partido_id, fecha_hora_nueva, cancha_id,
+            partido_actual.pareja1_id, partido_actual.pareja2_id
+        )
+        if not encontrados:
+            return conflictos
+        
+        en_conflicto = db.query(
+            Partido.id_partido, Partido.fecha_hora, Partido.cancha_id,
+            Partido.pareja1_id, Partido.pareja2_id, Partido.categoria_id
+        ).filter(
+            Partido.id_partido.in_([otro_id for _, otro_id, _, _ in encontrados])
+        ).all()
+        otros = {p.id_partido: p for p in en_conflicto}
+        
+        # Si la base no coincide con el índice (escritura de otro proceso), reconstruir una vez
+        if all(coincide(otros.get(otro_id), ocupacion.partidos.get(otro_id)) for _, otro_id, _, _ in encontrados):
+            break
+        ocupaciones.invalidar(torneo_id)
     
-    # Pre-cargar usuarios necesarios en batch
-    usuario_ids = set()
-    for p in parejas_map.values():
-        usuario_ids.add(p.jugador1_id)
-        usuario_ids.add(p.jugador2_id)
+    jugadores_por_pareja = ocupacion.parejas
+    jugadores_de = ocupacion.jugadores_de
     
+    usuario_ids = set(j for _, _, comunes, _ in encontrados for j in comunes)
+    for p in en_conflicto:
+        usuario_ids.update(jugadores_de(p.pareja1_id, p.pareja2_id))
     usuarios_map = {}
     if usuario_ids:
         from ..models.driveplus_models import PerfilUsuario
@@ -3698,15 +3958,15 @@ def _detectar_conflictos_horario(
             usuarios_map[p.id_usuario] = f"{p.nombre} {p.apellido}"
     
     def nombre_pareja(pareja_id):
-        p = parejas_map.get(pareja_id)
-        if not p:
+        jugadores = jugadores_por_pareja.get(pareja_id)
+        if not jugadores:
             return "Pareja desconocida"
-        n1 = usuarios_map.get(p.jugador1_id, "?")
-        n2 = usuarios_map.get(p.jugador2_id, "?")
+        n1 = usuarios_map.get(jugadores[0], "?")
+        n2 = usuarios_map.get(jugadores[1], "?")
         return f"{n1}/{n2}"
     
     # Pre-cargar categorías para mostrar nombre
-    cat_ids = set(p.categoria_id for p in todos_partidos if p.categoria_id)
+    cat_ids = set(p.categoria_id for p in en_conflicto if p.categoria_id)
     categorias_map = {}
     if cat_ids:
         from ..models.torneo_models import TorneoCategoria
@@ -3715,7 +3975,7 @@ def _detectar_conflictos_horario(
             categorias_map[cat.id] = cat.nombre
     
     # Pre-cargar canchas para mostrar nombre
-    cancha_ids = set(p.cancha_id for p in todos_partidos if p.cancha_id)
+    cancha_ids = set(p.cancha_id for p in en_conflicto if p.cancha_id)
     canchas_map = {}
     if cancha_ids:
         from ..models.torneo_models import TorneoCancha as TC2
@@ -3723,56 +3983,33 @@ def _detectar_conflictos_horario(
         for cc in ccs:
             canchas_map[cc.id] = cc.nombre
     
-    for otro in todos_partidos:
+    for tipo, otro_id, comunes, diff in encontrados:
+        otro = otros.get(otro_id)
+        if otro is None or otro.fecha_hora is None:
+            continue
         otro_inicio = otro.fecha_hora
         if otro_inicio.tzinfo is not None:
             otro_inicio = otro_inicio.replace(tzinfo=None)
-        otro_fin = otro_inicio + DURACION_PARTIDO
-        
-        cat_nombre = categorias_map.get(otro.categoria_id, "")
-        cancha_otro = canchas_map.get(otro.cancha_id, "?")
-        
-        # 1. Solapamiento de cancha
-        if otro.cancha_id == cancha_id:
-            if fecha_hora_nueva < otro_fin and otro_inicio < fecha_hora_fin:
-                conflictos.append({
-                    "tipo": "cancha",
-                    "partido_id": otro.id_partido,
-                    "pareja1": nombre_pareja(otro.pareja1_id),
-                    "pareja2": nombre_pareja(otro.pareja2_id),
-                    "fecha_hora": otro_inicio.strftime("%Y-%m-%d %H:%M"),
-                    "cancha": cancha_nombre,
-                    "categoria": cat_nombre,
-                    "mensaje": f"Solapamiento en {cancha_nombre}"
-                })
-                continue  # No duplicar si también tiene conflicto de jugador
-        
-        # 2. Mismo jugador con < 3h de diferencia
-        otro_p1 = parejas_map.get(otro.pareja1_id)
-        otro_p2 = parejas_map.get(otro.pareja2_id)
-        jugadores_otro = set()
-        if otro_p1:
-            jugadores_otro.add(otro_p1.jugador1_id)
-            jugadores_otro.add(otro_p1.jugador2_id)
-        if otro_p2:
-            jugadores_otro.add(otro_p2.jugador1_id)
-            jugadores_otro.add(otro_p2.jugador2_id)
-        
-        jugadores_comun = jugadores_partido & jugadores_otro
-        if jugadores_comun:
-            diff = abs((fecha_hora_nueva - otro_inicio).total_seconds()) / 60
-            if diff < 180:
-                nombres_comun = [usuarios_map.get(jid, "?") for jid in jugadores_comun]
-                conflictos.append({
-                    "tipo": "descanso",
-                    "partido_id": otro.id_partido,
-                    "pareja1": nombre_pareja(otro.pareja1_id),
-                    "pareja2": nombre_pareja(otro.pareja2_id),
-                    "fecha_hora": otro_inicio.strftime("%Y-%m-%d %H:%M"),
-                    "cancha": cancha_otro,
-                    "categoria": cat_nombre,
-                    "mensaje": f"Jugador(es) {', '.join(nombres_comun)} con < 3h de descanso ({int(diff)} min)"
-                })
+        
+        item = {
+            "tipo": tipo,
+            "partido_id": otro_id,
+            "pareja1": nombre_pareja(otro.pareja1_id),
+            "pareja2": nombre_pareja(otro.pareja2_id),
+            "fecha_hora": otro_inicio.strftime("%Y-%m-%d %H:%M"),
+            "categoria": categorias_map.get(otro.categoria_id, ""),
+        }
+        if tipo == CONFLICTO_CANCHA:
+            item["cancha"] = cancha_nombre
+            item["mensaje"] = f"Solapamiento en {cancha_nombre}"
+        else:
+            nombres_comun = [usuarios_map.get(jid, "?") for jid in comunes]
+            item["cancha"] = canchas_map.get(otro.cancha_id, "?")
+            item["mensaje"] = (
+                f"Jugador(es) {', '.join(nombres_comun)} con < {ocupacion.descanso // 60}h "
+                f"de descanso ({int(diff)} min)"
+            )
+        conflictos.append(item)
     
     return conflictos
 
@@ -3873,8 +4110,16 @@ def cambiar_horario_partido(
         partido.fecha_hora = fecha_hora_nueva
         partido.fecha = fecha_hora_nueva
         partido.cancha_id = request.cancha_id
+        publicar_evento(db, torneo_id, PARTIDO_REPROGRAMADO, datos_reprogramado(partido))
         db.commit()
         
+        # Actualizar la ocupación cacheada en el lugar (sin recargar el torneo)
+        from ..services.intervalos import ocupaciones
+        ocupaciones.mover(
+            torneo_id, partido_id, fecha_hora_nueva, request.cancha_id,
+            partido.pareja1_id, partido.pareja2_id
+        )
+        
         # Nombres para respuesta
         pareja1 = db.query(TorneoPareja).filter(TorneoPareja.id == partido.pareja1_id).first()
         pareja2 = db.query(TorneoPareja).filter(TorneoPareja.id == partido.pareja2_id).first()
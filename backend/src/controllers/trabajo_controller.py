@@ -0,0 +1,49 @@
+"""
+Controller para consultar trabajos en segundo plano
+(fixture, zonas, playoffs y reprogramación lanzados con en_segundo_plano=true)
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Optional
+
+from ..auth.auth_utils import get_current_user
+from ..models.driveplus_models import Usuario
+from ..services.trabajos import trabajos
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.get("/{trabajo_id}")
+def obtener_trabajo(
+    trabajo_id: str,
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Estado de un trabajo: pendiente, en_curso, completado o error.
+    Con estado completado trae el mismo resultado que la versión síncrona
+    del endpoint; con error, el mensaje y el código HTTP que habría devuelto.
+
+    Solo lo ve el usuario que lo lanzó. Los trabajos terminados expiran
+    (JOBS_TTL_SEGUNDOS, default 1 hora).
+    """
+    trabajo = trabajos.obtener(trabajo_id)
+    if not trabajo or trabajo.usuario_id != current_user.id_usuario:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trabajo no encontrado")
+
+    data = trabajo.to_dict()
+    data["codigo_error"] = trabajo.codigo_error
+    return data
+
+
+@router.get("")
+@router.get("/")
+def listar_trabajos(
+    torneo_id: Optional[int] = Query(None, description="Filtrar por torneo"),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """Trabajos vigentes del usuario, más nuevos primero (sin resultados)"""
+    return {
+        "trabajos": [
+            t.to_dict(incluir_resultado=False)
+            for t in trabajos.listar(torneo_id=torneo_id, usuario_id=current_user.id_usuario)
+        ]
+    }
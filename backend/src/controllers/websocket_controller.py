@@ -67,3 +67,96 @@ async def websocket_sala_endpoint(
     except Exception as e:
         logger.error(f"Error en WebSocket: {e}")
         manager.disconnect(websocket, sala_id_str)
+
+
+@router.websocket("/trabajos/{trabajo_id}")
+async def websocket_trabajo_endpoint(websocket: WebSocket, trabajo_id: str):
+    """
+    WebSocket endpoint para seguir el progreso de un trabajo en segundo plano
+
+    Eventos que se envían:
+    - trabajo_actualizado: Cambio de estado o de progreso (el primero es el estado actual)
+    """
+    from ..services.trabajos import trabajos
+
+    trabajo = trabajos.obtener(trabajo_id)
+    if not trabajo:
+        await websocket.close(code=4004, reason="Trabajo no encontrado")
+        return
+
+    canal = f"trabajo:{trabajo_id}"
+    await manager.connect(websocket, canal)
+
+    try:
+        # Estado actual (puede haber terminado antes de conectarse)
+        await manager.send_personal_message({
+            "type": "trabajo_actualizado",
+            "data": trabajo.to_dict(incluir_resultado=False)
+        }, websocket)
+
+        while True:
+            data = await websocket.receive_text()
+            if data == "ping":
+                await manager.send_personal_message({
+                    "type": "pong"
+                }, websocket)
+
+    except WebSocketDisconnect:
+        manager.disconnect(websocket, canal)
+    except Exception as e:
+        logger.error(f"Error en WebSocket: {e}")
+        manager.disconnect(websocket, canal)
+
+
+@router.websocket("/torneos/{torneo_id}")
+async def websocket_torneo_endpoint(
+    websocket: WebSocket,
+    torneo_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    WebSocket endpoint con los cambios en vivo de un torneo
+
+    Eventos que se envían (cada uno con la versión del torneo que dejó el cambio):
+    - connected: versión actual al conectarse
+    - resultado_cargado: Resultado cargado o corregido
+    - tabla_actualizada: Filas de la tabla de una zona que cambiaron
+    - ganador_avanzado: Ganador ubicado en el partido siguiente del cuadro
+    - partido_reprogramado: Nuevo horario / cancha de un partido
+    - trabajo_actualizado: Progreso de trabajos en segundo plano del torneo
+
+    Si llega una versión que no es la siguiente a la última vista, el cliente
+    vuelve a pedir los datos (GET con If-None-Match).
+    """
+    from ..services.torneo_version import version_torneo
+
+    version = version_torneo(db, torneo_id)
+    if version is None:
+        await websocket.close(code=4004, reason="Torneo no encontrado")
+        return
+    # La sesión no se usa más: no retener una conexión del pool mientras dure el socket
+    db.close()
+
+    canal = f"torneo:{torneo_id}"
+    await manager.connect(websocket, canal)
+
+    try:
+        await manager.send_personal_message({
+            "type": "connected",
+            "message": f"Conectado a torneo {torneo_id}",
+            "torneo_id": torneo_id,
+            "version": version[0]
+        }, websocket)
+
+        while True:
+            data = await websocket.receive_text()
+            if data == "ping":
+                await manager.send_personal_message({
+                    "type": "pong"
+                }, websocket)
+
+    except WebSocketDisconnect:
+        manager.disconnect(websocket, canal)
+    except Exception as e:
+        logger.error(f"Error en WebSocket: {e}")
+        manager.disconnect(websocket, canal)
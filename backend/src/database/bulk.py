@@ -0,0 +1,98 @@
+"""
+Persistencia en lote.
+
+Inserta muchas filas de una tabla en un solo round trip
+(INSERT ... VALUES (...), (...) RETURNING pk) en lugar de un flush por fila.
+Se usa en generación de fixture, creación de slots, brackets de playoffs
+y en la reprogramación incremental (UPDATE por primary key).
+"""
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import insert, inspect, update
+from sqlalchemy.orm import Session
+
+
+def _valor_por_defecto(columna) -> Any:
+    """Default escalar de la columna (si tiene) para rellenar filas incompletas"""
+    default = columna.default
+    if default is not None and default.is_scalar:
+        return default.arg
+    return None
+
+
+def insertar_filas(db: Session, modelo, filas: Sequence[Dict[str, Any]]) -> List[int]:
+    """
+    Inserta filas (dicts con nombres de atributo del modelo) en un solo INSERT.
+
+    Todas las filas se normalizan al mismo set de columnas para que el driver
+    las envíe en un único statement multi-VALUES.
+
+    Returns:
+        Lista de primary keys en el mismo orden que `filas`
+    """
+    if not filas:
+        return []
+
+    mapper = inspect(modelo)
+    tabla = mapper.local_table
+    pk = mapper.primary_key[0]
+
+    # atributo ORM → columna
+    columnas = {attr.key: attr.columns[0] for attr in mapper.column_attrs}
+
+    claves = []
+    for fila in filas:
+        for clave in fila:
+            if clave not in claves:
+                claves.append(clave)
+
+    valores = []
+    for fila in filas:
+        valores.append({
+            columnas[clave].key: fila[clave] if clave in fila else _valor_por_defecto(columnas[clave])
+            for clave in claves
+        })
+
+    stmt = insert(tabla).returning(pk, sort_by_parameter_order=True)
+    return list(db.execute(stmt, valores).scalars())
+
+
+def insertar_objetos(db: Session, objetos: Sequence[Any]) -> List[Any]:
+    """
+    Persiste instancias ORM nuevas (transient) con un INSERT por tabla.
+
+    Las instancias NO se agregan a la sesión: quedan con sus valores cargados
+    y con la primary key asignada, así que pueden leerse después del commit
+    sin disparar un SELECT por objeto.
+
+    Returns:
+        Las mismas instancias, con la primary key seteada
+    """
+    por_modelo: Dict[type, List[Any]] = {}
+    for obj in objetos:
+        por_modelo.setdefault(type(obj), []).append(obj)
+
+    for modelo, instancias in por_modelo.items():
+        mapper = inspect(modelo)
+        claves = [attr.key for attr in mapper.column_attrs]
+        pk_attr = mapper.get_property_by_column(mapper.primary_key[0]).key
+
+        filas = [
+            {clave: obj.__dict__[clave] for clave in claves if clave in obj.__dict__}
+            for obj in instancias
+        ]
+        ids = insertar_filas(db, modelo, filas)
+        for obj, pk in zip(instancias, ids):
+            setattr(obj, pk_attr, pk)
+
+    return list(objetos)
+
+
+def actualizar_filas(db: Session, modelo, filas: Sequence[Dict[str, Any]]):
+    """
+    UPDATE por primary key de muchas filas en un solo executemany.
+    Cada dict debe incluir la primary key del modelo.
+    """
+    if not filas:
+        return
+    db.execute(update(modelo), list(filas))
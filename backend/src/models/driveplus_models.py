@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, Boolean, Float, Text, ForeignKey, BigInteger, SmallInteger, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Date, Boolean, Float, Text, ForeignKey, BigInteger, SmallInteger, JSON, ARRAY
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database.config import Base
@@ -114,6 +114,8 @@ class Partido(Base):
     requiere_reprogramacion = Column(Boolean, default=False, nullable=True)
     observaciones = Column(Text, nullable=True)
     categoria_id = Column(BigInteger, nullable=True)  # FK a torneo_categorias para filtrar por categoría
+    siguiente_partido_id = Column(BigInteger, nullable=True)  # Playoffs: partido al que pasa el ganador
+    slot_siguiente = Column(SmallInteger, nullable=True)  # 1 = entra como pareja1, 2 = como pareja2
     
     # Relaciones
     club = relationship("Club", back_populates="partidos")
@@ -174,6 +176,17 @@ class HistorialRating(Base):
     usuario = relationship("Usuario", back_populates="historial_rating")
     partido = relationship("Partido", back_populates="historial_rating")
 
+class JugadorEstadisticas(Base):
+    """Agregados por jugador para el ranking (se mantienen junto con historial_rating)"""
+    __tablename__ = "jugador_estadisticas"
+    
+    id_usuario = Column(BigInteger, ForeignKey("usuarios.id_usuario", ondelete="CASCADE"), primary_key=True)
+    partidos_jugados = Column(Integer, default=0, nullable=False)
+    partidos_ganados = Column(Integer, default=0, nullable=False)
+    ultimos_deltas = Column(ARRAY(Integer), default=list, nullable=False)  # El más reciente primero
+    ultimo_partido = Column(DateTime(timezone=True), nullable=True)
+    actualizado_en = Column(DateTime(timezone=True), server_default=func.now())
+
 class EventoPartido(Base):
     """Modelo de Evento de Partido basado en tu tabla 'eventos_partido'"""
     __tablename__ = "eventos_partido"
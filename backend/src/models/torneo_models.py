@@ -2,9 +2,10 @@
 Modelos SQLAlchemy para el sistema de torneos
 """
 from sqlalchemy import Column, BigInteger, String, Text, Enum, Date, DateTime, Boolean, Integer, JSON, ForeignKey, Index, Numeric
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from src.models.driveplus_models import Base
+from src.utils.disponibilidad import compilar, serializar
 import enum
 
 
@@ -102,6 +103,9 @@ class Torneo(Base):
     # Código de circuito (ej: "zf" para Zona Fitness)
     codigo = Column(String(20), nullable=True, comment="Código de circuito para ranking por torneo")
     
+    # Se incrementa en cada commit que modifica el torneo (ETag de los GET, ver torneo_version.py)
+    version = Column(BigInteger, nullable=False, default=0, server_default='0')
+    
     created_at = Column(DateTime, server_default=func.current_timestamp())
     updated_at = Column(DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
     
@@ -187,6 +191,8 @@ class TorneoPareja(Base):
     
     # Disponibilidad horaria (JSON flexible)
     disponibilidad_horaria = Column(JSON, nullable=True)
+    # Restricciones compiladas a bitmaps por día (utils/disponibilidad.py)
+    disponibilidad_compilada = Column(JSON, nullable=True)
     
     # Tracking de cambios de compañero
     jugador2_anterior_id = Column(BigInteger, ForeignKey("usuarios.id_usuario"), nullable=True)
@@ -204,6 +210,12 @@ class TorneoPareja(Base):
         Index('idx_torneos_parejas_codigo', 'codigo_confirmacion'),
         Index('idx_torneos_parejas_pago_estado', 'pago_estado'),
     )
+    
+    @validates('disponibilidad_horaria')
+    def _compilar_disponibilidad(self, key, value):
+        """Cada vez que se guardan restricciones se recompilan los bitmaps"""
+        self.disponibilidad_compilada = serializar(compilar(value)) if value else None
+        return value
 
 
 class TorneoZona(Base):
@@ -214,6 +226,7 @@ class TorneoZona(Base):
     categoria_id = Column(BigInteger, ForeignKey("torneo_categorias.id", ondelete="CASCADE"), nullable=True)  # Nueva columna
     nombre = Column(String(50), nullable=False, comment="Zona A, Zona B, etc.")
     numero_orden = Column(Integer, nullable=False)
+    partidos_pendientes = Column(Integer, nullable=True)  # Partidos de zona sin confirmar (NULL = sin calcular)
     created_at = Column(DateTime, server_default=func.current_timestamp())
     
     __table_args__ = (
@@ -322,6 +335,7 @@ class TorneoTablaPosiciones(Base):
     __table_args__ = (
         Index('idx_torneo_tabla_zona', 'zona_id'),
         Index('idx_torneo_tabla_puntos', 'puntos'),
+        Index('idx_torneo_tabla_zona_pareja', 'zona_id', 'pareja_id', unique=True),
     )
 
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class RankingResponse(BaseModel):
     """Schema para respuesta del ranking general"""
@@ -21,6 +21,16 @@ class RankingResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class PosicionRankingResponse(BaseModel):
+    """Schema para la posición de un jugador y sus vecinos en el ranking"""
+    id_usuario: int
+    posicion: int
+    total: int
+    rating: int
+    sexo: Optional[str] = None
+    categoria_id: Optional[int] = None
+    vecinos: List[RankingResponse] = []
+
 class TopWeeklyResponse(BaseModel):
     """Schema para respuesta del ranking semanal"""
     id: int
@@ -81,7 +81,8 @@ class TorneoCreate(BaseModel):
     reglas_json: Optional[dict] = Field(default_factory=lambda: {
         "puntos_victoria": 3,
         "puntos_derrota": 0,
-        "sets_para_ganar": 2
+        "sets_para_ganar": 2,
+        "duracion_partido_minutos": 70
     })
 
     # Campos de pago
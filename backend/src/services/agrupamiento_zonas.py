@@ -0,0 +1,198 @@
+"""
+Agrupamiento de parejas en zonas por compatibilidad horaria.
+
+Reemplaza el cálculo de Jaccard con sets de Python contra cada miembro de
+cada grupo (cúbico en la cantidad de parejas) por:
+- Slots de cada pareja como bitset entero (un bit por slot del torneo)
+- Matriz pareja × pareja de compatibilidad calculada una sola vez con
+  popcount (int.bit_count)
+- Sumas de compatibilidad por grupo mantenidas incrementalmente
+
+El greedy da exactamente las mismas zonas que el original. refinar() es una
+búsqueda local opcional que intercambia parejas entre zonas mientras suba
+la compatibilidad promedio, con límite de tiempo.
+
+Es un módulo puro (sin SQLAlchemy).
+"""
+import random
+import time
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+
+SCORE_GRUPO_VACIO = 100
+PENALIZACION_TAMANO = 0.1
+TIEMPO_LIMITE_SEGUNDOS = 1.0
+
+
+def vectorizar(slots_por_pareja: Sequence[Set[Hashable]]) -> List[int]:
+    """Convierte los sets de slots a bitsets sobre un universo común"""
+    indice: Dict[Hashable, int] = {}
+    bitsets = []
+    for slots in slots_por_pareja:
+        bits = 0
+        for slot in slots:
+            posicion = indice.get(slot)
+            if posicion is None:
+                posicion = indice[slot] = len(indice)
+            bits |= 1 << posicion
+        bitsets.append(bits)
+    return bitsets
+
+
+def matriz_compatibilidad(bitsets: Sequence[int]) -> List[List[float]]:
+    """
+    Jaccard de slots entre cada par de parejas (1.0 si alguna no tiene slots,
+    igual que TorneoZonaHorariosService._calcular_compatibilidad)
+    """
+    n = len(bitsets)
+    cantidades = [bits.bit_count() for bits in bitsets]
+    matriz = [[1.0] * n for _ in range(n)]
+    for i in range(n):
+        a = bitsets[i]
+        if not a:
+            continue
+        fila = matriz[i]
+        for j in range(i + 1, n):
+            b = bitsets[j]
+            if not b:
+                continue
+            interseccion = (a & b).bit_count()
+            valor = interseccion / (cantidades[i] + cantidades[j] - interseccion)
+            fila[j] = valor
+            matriz[j][i] = valor
+    return matriz
+
+
+def agrupar(
+    ratings: Sequence[float],
+    matriz: Sequence[Sequence[float]],
+    num_zonas: int
+) -> List[List[int]]:
+    """
+    Greedy original: parejas por rating descendente, cada una al grupo con
+    mejor (compatibilidad promedio con el grupo - 0.1 × tamaño); un grupo
+    vacío vale 100. Empates: el primer grupo.
+
+    Returns:
+        Índices de pareja por grupo, en orden de llegada
+    """
+    n = len(ratings)
+    orden = sorted(range(n), key=lambda i: ratings[i], reverse=True)
+    grupos: List[List[int]] = [[] for _ in range(num_zonas)]
+    # sumas[g][p] = suma de compatibilidad de p con los miembros de g (en orden de llegada)
+    sumas = [[0.0] * n for _ in range(num_zonas)]
+
+    for p in orden:
+        mejor_idx = 0
+        mejor_score = -1
+        for idx, grupo in enumerate(grupos):
+            if not grupo:
+                score = SCORE_GRUPO_VACIO
+            else:
+                score = sumas[idx][p] / len(grupo) - len(grupo) * PENALIZACION_TAMANO
+            if score > mejor_score:
+                mejor_score = score
+                mejor_idx = idx
+        grupos[mejor_idx].append(p)
+        fila = matriz[p]
+        suma = sumas[mejor_idx]
+        for q in range(n):
+            suma[q] += fila[q]
+    return grupos
+
+
+def compatibilidad_promedio(grupos: Iterable[Sequence[int]], matriz: Sequence[Sequence[float]]) -> float:
+    """Promedio de compatibilidad de todos los pares dentro de una misma zona"""
+    total = 0.0
+    cantidad = 0
+    for grupo in grupos:
+        for i in range(len(grupo)):
+            fila = matriz[grupo[i]]
+            for j in range(i + 1, len(grupo)):
+                total += fila[grupo[j]]
+                cantidad += 1
+    return total / cantidad if cantidad else 0.0
+
+
+def refinar(
+    grupos: List[List[int]],
+    matriz: Sequence[Sequence[float]],
+    tiempo_limite: float = TIEMPO_LIMITE_SEGUNDOS,
+    ratings: Optional[Sequence[float]] = None,
+    max_diferencia_rating: Optional[float] = None,
+    seed: int = 0
+) -> Tuple[List[List[int]], int]:
+    """
+    Búsqueda local: intercambia parejas de zonas distintas mientras el
+    intercambio suba la compatibilidad total dentro de las zonas (los
+    tamaños no cambian, así que sube el promedio).
+
+    Args:
+        max_diferencia_rating: Solo intercambiar parejas con ratings a esta
+            distancia o menos (para no romper el balance de nivel)
+
+    Returns:
+        (grupos refinados, cantidad de intercambios)
+    """
+    grupos = [list(g) for g in grupos]
+    n = len(matriz)
+    zona_de = {}
+    for g, grupo in enumerate(grupos):
+        for p in grupo:
+            zona_de[p] = g
+    # sumas[g][p]: compatibilidad de p con los miembros de g
+    sumas = [[0.0] * n for _ in grupos]
+    for g, grupo in enumerate(grupos):
+        for p in grupo:
+            fila = matriz[p]
+            for q in range(n):
+                sumas[g][q] += fila[q]
+
+    parejas = list(zona_de)
+    rng = random.Random(seed)
+    limite = time.monotonic() + tiempo_limite
+    intercambios = 0
+    mejoro = True
+    while mejoro and time.monotonic() < limite:
+        mejoro = False
+        rng.shuffle(parejas)
+        for a in parejas:
+            ga = zona_de[a]
+            mejor_delta = 1e-12
+            mejor_b = None
+            for b in parejas:
+                gb = zona_de[b]
+                if gb == ga:
+                    continue
+                if (
+                    max_diferencia_rating is not None and ratings is not None
+                    and abs(ratings[a] - ratings[b]) > max_diferencia_rating
+                ):
+                    continue
+                m_ab = matriz[a][b]
+                # a deja ga (pierde sus pares salvo consigo) y entra a gb sin b; igual b
+                delta = (
+                    (sumas[gb][a] - m_ab) - (sumas[ga][a] - matriz[a][a])
+                    + (sumas[ga][b] - m_ab) - (sumas[gb][b] - matriz[b][b])
+                )
+                if delta > mejor_delta:
+                    mejor_delta = delta
+                    mejor_b = b
+            if mejor_b is None:
+                continue
+            b = mejor_b
+            gb = zona_de[b]
+            fila_a, fila_b = matriz[a], matriz[b]
+            suma_a, suma_b = sumas[ga], sumas[gb]
+            for q in range(n):
+                diferencia = fila_b[q] - fila_a[q]
+                suma_a[q] += diferencia
+                suma_b[q] -= diferencia
+            grupos[ga][grupos[ga].index(a)] = b
+            grupos[gb][grupos[gb].index(b)] = a
+            zona_de[a], zona_de[b] = gb, ga
+            intercambios += 1
+            mejoro = True
+            if time.monotonic() >= limite:
+                break
+    return grupos, intercambios
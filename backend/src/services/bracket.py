@@ -0,0 +1,156 @@
+"""
+Motor de brackets de eliminación directa.
+
+- Seeding estándar para cualquier potencia de 2 (tabla recursiva cacheada):
+  el 1 y el 2 solo se cruzan en la final, 1-4 en semis, etc.
+- BYEs deterministas: con n parejas en un cuadro de P, los seeds n+1..P
+  son BYE, así que pasan directo los seeds 1..P-n
+- El árbol completo (todas las rondas) se arma en memoria con los vínculos
+  al partido siguiente (siguiente + slot), listo para insertarse de una vez
+
+Es un módulo puro (sin SQLAlchemy).
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+FASES_ELIMINACION = ('32avos', '16avos', '8vos', '4tos', 'semis', 'final')
+# Para consultas: incluye los nombres viejos que pueden quedar en la base
+FASES_PLAYOFF = FASES_ELIMINACION + ('cuartos', 'semifinal')
+TAMANO_MAXIMO = 2 ** len(FASES_ELIMINACION)  # 64
+
+ESTADO_BYE = 'bye'
+ESTADO_PENDIENTE = 'pendiente'
+
+
+def siguiente_potencia_de_dos(n: int) -> int:
+    p = 1
+    while p < n:
+        p *= 2
+    return p
+
+
+def _validar_tamano(tamano: int) -> None:
+    if tamano < 2 or tamano & (tamano - 1):
+        raise ValueError(f"El tamaño del bracket debe ser potencia de 2: {tamano}")
+    if tamano > TAMANO_MAXIMO:
+        raise ValueError(f"Bracket de {tamano}: el máximo es {TAMANO_MAXIMO}")
+
+
+@lru_cache(maxsize=None)
+def orden_seeds(tamano: int) -> Tuple[int, ...]:
+    """
+    Seeds en el orden de los lugares del cuadro, de arriba hacia abajo:
+    8 → (1, 8, 4, 5, 2, 7, 3, 6). Cada seed s del cuadro de la mitad de
+    tamaño se expande en (s, tamano + 1 - s).
+    """
+    if tamano == 1:
+        return (1,)
+    _validar_tamano(tamano)
+    return tuple(
+        seed
+        for s in orden_seeds(tamano // 2)
+        for seed in (s, tamano + 1 - s)
+    )
+
+
+def emparejamientos(tamano: int) -> List[Tuple[int, int]]:
+    """Cruces de primera ronda por seed: 8 → [(1, 8), (4, 5), (2, 7), (3, 6)]"""
+    orden = orden_seeds(tamano)
+    return [(orden[i], orden[i + 1]) for i in range(0, tamano, 2)]
+
+
+def fases(tamano: int) -> List[str]:
+    """Nombres de las rondas: 8 → ['4tos', 'semis', 'final']"""
+    _validar_tamano(tamano)
+    rondas = tamano.bit_length() - 1
+    return list(FASES_ELIMINACION[-rondas:])
+
+
+def mitades(tamano: int) -> Tuple[List[int], List[int]]:
+    """Seeds de la mitad superior y de la inferior del cuadro (se cruzan recién en la final)"""
+    orden = orden_seeds(tamano)
+    return sorted(orden[:tamano // 2]), sorted(orden[tamano // 2:])
+
+
+class Cruce:
+    """
+    Partido del bracket en memoria.
+
+    siguiente es el índice (en la lista que devuelve construir) del partido
+    al que pasa el ganador, y slot indica si entra como pareja 1 o 2.
+    """
+    __slots__ = (
+        'indice', 'ronda', 'fase', 'numero', 'pareja1_id', 'pareja2_id',
+        'estado', 'ganador_pareja_id', 'siguiente', 'slot'
+    )
+
+    def __init__(self, indice: int, ronda: int, fase: str, numero: int,
+                 pareja1_id: Optional[int] = None, pareja2_id: Optional[int] = None):
+        self.indice = indice
+        self.ronda = ronda
+        self.fase = fase
+        self.numero = numero
+        self.pareja1_id = pareja1_id
+        self.pareja2_id = pareja2_id
+        self.estado = ESTADO_PENDIENTE
+        self.ganador_pareja_id: Optional[int] = None
+        self.siguiente: Optional[int] = None
+        self.slot: Optional[int] = None
+
+    def __repr__(self):
+        return f"Cruce({self.fase} #{self.numero}: {self.pareja1_id} vs {self.pareja2_id}, {self.estado})"
+
+
+def construir(
+    primera_ronda: Sequence[Tuple[Optional[int], Optional[int]]],
+    fases_bracket: Sequence[str]
+) -> List[Cruce]:
+    """
+    Arma todas las rondas a partir de los cruces de la primera.
+
+    Un cruce con una sola pareja es BYE (estado 'bye', esa pareja ganadora) y
+    la pareja ya queda puesta en el partido siguiente. El partido N de una
+    ronda alimenta al (N+1)//2 de la siguiente: impar como pareja 1, par como 2.
+
+    Returns:
+        Cruces ronda por ronda (primera ronda primero, la final al final)
+    """
+    if len(primera_ronda) != 2 ** (len(fases_bracket) - 1):
+        raise ValueError(
+            f"{len(primera_ronda)} cruces no corresponden a {len(fases_bracket)} rondas"
+        )
+
+    cruces: List[Cruce] = []
+    for i, (pareja1_id, pareja2_id) in enumerate(primera_ronda):
+        cruce = Cruce(len(cruces), 0, fases_bracket[0], i + 1, pareja1_id, pareja2_id)
+        if (pareja1_id is None) != (pareja2_id is None):
+            cruce.estado = ESTADO_BYE
+            cruce.ganador_pareja_id = pareja1_id if pareja1_id is not None else pareja2_id
+        cruces.append(cruce)
+
+    anteriores = cruces[:]
+    for ronda, fase in enumerate(fases_bracket[1:], 1):
+        actuales = []
+        for i in range(len(anteriores) // 2):
+            cruce = Cruce(len(cruces), ronda, fase, i + 1)
+            for slot, hijo in ((1, anteriores[2 * i]), (2, anteriores[2 * i + 1])):
+                hijo.siguiente = cruce.indice
+                hijo.slot = slot
+                if hijo.estado == ESTADO_BYE:
+                    if slot == 1:
+                        cruce.pareja1_id = hijo.ganador_pareja_id
+                    else:
+                        cruce.pareja2_id = hijo.ganador_pareja_id
+            cruces.append(cruce)
+            actuales.append(cruce)
+        anteriores = actuales
+    return cruces
+
+
+def construir_por_seeds(pareja_por_seed: Dict[int, int], tamano: int) -> List[Cruce]:
+    """Bracket estándar: {seed: pareja_id}; los seeds sin pareja son BYE"""
+    return construir(
+        [(pareja_por_seed.get(s1), pareja_por_seed.get(s2)) for s1, s2 in emparejamientos(tamano)],
+        fases(tamano)
+    )
@@ -0,0 +1,273 @@
+"""
+Bus de broadcast para WebSockets con varios workers.
+
+Cada worker de uvicorn tiene sus propios sockets (ConnectionManager es un
+dict por proceso). Un mensaje para una sala se publica en el bus y cada
+worker lo entrega a los sockets que tiene conectados:
+
+- BusLocal: un solo proceso, entrega directa (default)
+- BusPostgres: LISTEN/NOTIFY en un canal de Postgres (asyncpg). El worker
+  que publica entrega localmente sin esperar el round trip y descarta su
+  propio NOTIFY; los demás lo reciben y entregan a sus sockets.
+
+Se elige con WS_BUS=local|postgres (ver crear_bus).
+
+enviar_a_todos() hace el fan-out concurrente (asyncio.gather) con timeout
+por envío: un cliente móvil lento o colgado no frena al resto de la sala.
+
+Es un módulo puro (asyncpg se importa solo al usar BusPostgres).
+"""
+import asyncio
+import json
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+SEND_TIMEOUT_SEGUNDOS = float(os.getenv("WS_SEND_TIMEOUT_SEGUNDOS", "2"))
+CANAL_POSTGRES = "driveplus_ws"
+# NOTIFY acepta payloads de hasta 8000 bytes
+LIMITE_PAYLOAD = 7900
+
+Entregar = Callable[[str, Dict], Awaitable[Any]]
+
+
+# ----------------------------------------------------------------------
+# Fan-out concurrente
+# ----------------------------------------------------------------------
+
+async def _enviar(conexion, mensaje: Dict, timeout: float) -> bool:
+    try:
+        await asyncio.wait_for(conexion.send_json(mensaje), timeout)
+        return True
+    except asyncio.TimeoutError:
+        logger.warning("WebSocket lento: envío cancelado por timeout")
+        return False
+    except Exception as e:
+        logger.error(f"Error enviando mensaje a cliente: {e}")
+        return False
+
+
+async def enviar_a_todos(
+    conexiones: Iterable,
+    mensaje: Dict,
+    timeout: float = SEND_TIMEOUT_SEGUNDOS
+) -> List:
+    """
+    Envía `mensaje` a todas las conexiones a la vez.
+
+    Returns:
+        Conexiones que fallaron o no recibieron dentro del timeout (para desconectar)
+    """
+    conexiones = list(conexiones)
+    if not conexiones:
+        return []
+    resultados = await asyncio.gather(*(_enviar(c, mensaje, timeout) for c in conexiones))
+    return [c for c, ok in zip(conexiones, resultados) if not ok]
+
+
+# ----------------------------------------------------------------------
+# Buses
+# ----------------------------------------------------------------------
+
+class BusBroadcast(ABC):
+    """Interfaz: publicar en una sala y entregar a los sockets locales de cada worker"""
+
+    @abstractmethod
+    async def iniciar(self, entregar: Entregar) -> None:
+        """`entregar(sala_id, mensaje)` envía a los sockets de este proceso"""
+
+    @abstractmethod
+    async def publicar(self, sala_id: str, mensaje: Dict) -> None:
+        """Entrega `mensaje` a los sockets de la sala en todos los workers"""
+
+    async def cerrar(self) -> None:
+        pass
+
+    def stats(self) -> Dict:
+        return {"tipo": type(self).__name__}
+
+
+class BusLocal(BusBroadcast):
+    """Un solo worker: publicar es entregar"""
+
+    def __init__(self):
+        self._entregar: Optional[Entregar] = None
+
+    async def iniciar(self, entregar: Entregar) -> None:
+        self._entregar = entregar
+
+    async def publicar(self, sala_id: str, mensaje: Dict) -> None:
+        if self._entregar is not None:
+            await self._entregar(sala_id, mensaje)
+
+
+def codificar(origen: str, sala_id: str, mensaje: Dict) -> str:
+    return json.dumps({"o": origen, "s": sala_id, "m": mensaje}, separators=(",", ":"), default=str)
+
+
+def decodificar(payload: str) -> Tuple[str, str, Dict]:
+    datos = json.loads(payload)
+    return datos["o"], datos["s"], datos["m"]
+
+
+def dsn_para_listen(database_url: str) -> str:
+    """
+    DSN de asyncpg a partir de la URL de SQLAlchemy. LISTEN necesita una
+    sesión fija: con Neon se usa el host directo en lugar del '-pooler'
+    (PgBouncer en modo transacción no mantiene los LISTEN).
+    """
+    partes = urlsplit(database_url)
+    esquema = partes.scheme.split("+", 1)[0]
+    netloc = partes.netloc.replace("-pooler.", ".")
+    return urlunsplit((esquema, netloc, partes.path, partes.query, partes.fragment))
+
+
+class BusPostgres(BusBroadcast):
+    """
+    LISTEN/NOTIFY sobre una conexión asyncpg dedicada (se reconecta sola).
+    Las publicaciones usan otra conexión, serializada con un lock para
+    mantener el orden de los mensajes de este worker.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        canal: str = CANAL_POSTGRES,
+        timeout: float = 5.0,
+        reintento_segundos: float = 2.0
+    ):
+        self.dsn = dsn
+        self.canal = canal
+        self.timeout = timeout
+        self.reintento_segundos = reintento_segundos
+        self.origen = uuid.uuid4().hex
+        self._entregar: Optional[Entregar] = None
+        self._escucha = None
+        self._publicacion = None
+        self._lock_publicacion = asyncio.Lock()
+        self._tarea: Optional[asyncio.Task] = None
+        self._perdida = asyncio.Event()
+        self._cerrando = False
+        self._recibidos = 0
+        self._publicados = 0
+        self._descartados = 0
+        self._errores = 0
+
+    async def iniciar(self, entregar: Entregar) -> None:
+        self._entregar = entregar
+        self._tarea = asyncio.create_task(self._escuchar())
+
+    async def _conectar(self):
+        import asyncpg
+        return await asyncio.wait_for(asyncpg.connect(self.dsn), self.timeout)
+
+    async def _escuchar(self) -> None:
+        """Mantiene el LISTEN abierto; si se corta la conexión, reconecta"""
+        while not self._cerrando:
+            try:
+                self._perdida.clear()
+                self._escucha = await self._conectar()
+                self._escucha.add_termination_listener(lambda _conexion: self._perdida.set())
+                await self._escucha.add_listener(self.canal, self._al_notificar)
+                logger.info(f"Bus WebSocket escuchando canal Postgres '{self.canal}'")
+                await self._perdida.wait()
+                if not self._cerrando:
+                    logger.warning("Bus WebSocket: conexión LISTEN perdida, reconectando")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._errores += 1
+                logger.error(f"Bus WebSocket: error en LISTEN: {e}")
+            await self._cerrar_conexion(self._escucha)
+            self._escucha = None
+            if not self._cerrando:
+                await asyncio.sleep(self.reintento_segundos)
+
+    def _al_notificar(self, _conexion, _pid, _canal, payload: str) -> None:
+        try:
+            origen, sala_id, mensaje = decodificar(payload)
+        except (ValueError, KeyError) as e:
+            logger.error(f"Bus WebSocket: payload inválido: {e}")
+            return
+        if origen == self.origen or self._entregar is None:
+            return  # Ya se entregó localmente al publicar
+        self._recibidos += 1
+        asyncio.ensure_future(self._entregar(sala_id, mensaje))
+
+    async def publicar(self, sala_id: str, mensaje: Dict) -> None:
+        payload = codificar(self.origen, sala_id, mensaje)
+        if self._entregar is not None:
+            await self._entregar(sala_id, mensaje)
+
+        if len(payload.encode("utf-8")) > LIMITE_PAYLOAD:
+            # Los demás workers no lo reciben; los clientes de torneos lo
+            # detectan por el salto de versión y recargan
+            self._descartados += 1
+            logger.warning(f"Bus WebSocket: mensaje de {len(payload)} bytes para {sala_id} no entra en NOTIFY")
+            return
+
+        async with self._lock_publicacion:
+            try:
+                if self._publicacion is None or self._publicacion.is_closed():
+                    self._publicacion = await self._conectar()
+                await asyncio.wait_for(
+                    self._publicacion.execute("SELECT pg_notify($1, $2)", self.canal, payload),
+                    self.timeout
+                )
+                self._publicados += 1
+            except Exception as e:
+                self._errores += 1
+                logger.error(f"Bus WebSocket: error publicando en {sala_id}: {e}")
+                await self._cerrar_conexion(self._publicacion)
+                self._publicacion = None
+
+    @staticmethod
+    async def _cerrar_conexion(conexion) -> None:
+        if conexion is None:
+            return
+        try:
+            await asyncio.wait_for(conexion.close(), 2)
+        except Exception:
+            conexion.terminate()
+
+    async def cerrar(self) -> None:
+        self._cerrando = True
+        self._perdida.set()
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except (asyncio.CancelledError, Exception):
+                pass
+        await self._cerrar_conexion(self._escucha)
+        await self._cerrar_conexion(self._publicacion)
+        self._escucha = self._publicacion = None
+
+    def stats(self) -> Dict:
+        return {
+            "tipo": type(self).__name__,
+            "canal": self.canal,
+            "escuchando": self._escucha is not None and not self._escucha.is_closed(),
+            "recibidos": self._recibidos,
+            "publicados": self._publicados,
+            "descartados_por_tamano": self._descartados,
+            "errores": self._errores,
+        }
+
+
+def crear_bus() -> BusBroadcast:
+    """WS_BUS=postgres usa WS_BUS_DATABASE_URL (o DATABASE_URL sin pooler)"""
+    tipo = os.getenv("WS_BUS", "local").lower()
+    if tipo == "postgres":
+        url = os.getenv("WS_BUS_DATABASE_URL") or os.getenv("DATABASE_URL")
+        if not url:
+            raise ValueError("WS_BUS=postgres requiere WS_BUS_DATABASE_URL o DATABASE_URL")
+        return BusPostgres(dsn_para_listen(url))
+    if tipo != "local":
+        raise ValueError(f"WS_BUS desconocido: {tipo}")
+    return BusLocal()
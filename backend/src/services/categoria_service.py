@@ -2,7 +2,7 @@
 Servicio para gestión de categorías
 """
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Callable, Optional
 from ..models.driveplus_models import Categoria, Usuario
 
 
@@ -64,3 +64,29 @@ def obtener_categoria_por_rating(db: Session, rating: int, sexo: str) -> Optiona
     ).order_by(Categoria.rating_min.desc()).first()
     
     return categoria
+
+
+def asignador_categorias(db: Session) -> Callable[[Optional[str], int], Optional[int]]:
+    """
+    Lee las categorías una vez y devuelve una función (sexo, rating) -> id_categoria
+    con el mismo criterio que actualizar_categoria_usuario (para actualizar
+    muchos usuarios sin una query por usuario).
+    """
+    # ORDER BY rating_min DESC de Postgres: los NULL primero
+    categorias = sorted(
+        db.query(Categoria.id_categoria, Categoria.sexo, Categoria.rating_min, Categoria.rating_max).all(),
+        key=lambda c: (c.rating_min is not None, -(c.rating_min or 0))
+    )
+
+    def asignar(sexo: Optional[str], rating: int) -> Optional[int]:
+        sexo_norm = _normalizar_sexo(sexo)
+        for categoria in categorias:
+            if (
+                categoria.sexo == sexo_norm
+                and (categoria.rating_min is None or categoria.rating_min <= rating)
+                and (categoria.rating_max is None or categoria.rating_max >= rating)
+            ):
+                return categoria.id_categoria
+        return None
+
+    return asignar
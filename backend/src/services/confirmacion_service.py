@@ -12,6 +12,7 @@ from ..models.confirmacion import Confirmacion
 from ..models.historial_enfrentamiento import HistorialEnfrentamiento
 from ..services.elo_service import EloService
 from ..services.categoria_service import actualizar_categoria_usuario
+from ..services.jugador_estadisticas_service import JugadorEstadisticasService
 from ..utils.cache import invalidate_ranking_cache
 
 
@@ -488,6 +489,7 @@ class ConfirmacionService:
         # CRÍTICO: Crear entradas en historial_rating para TODOS los jugadores
         from ..models.driveplus_models import HistorialRating
         
+        historial_nuevo = []
         for jugador in jugadores:
             # Verificar si ya existe entrada (por si acaso)
             historial_existente = db.query(HistorialRating).filter(
@@ -507,6 +509,14 @@ class ConfirmacionService:
                     rating_despues=jugador.rating_despues
                 )
                 db.add(historial_rating)
+                historial_nuevo.append({
+                    'id_usuario': jugador.id_usuario,
+                    'id_partido': partido.id_partido,
+                    'delta': jugador.cambio_elo
+                })
+        
+        # Estadísticas del ranking en la misma transacción que el historial
+        JugadorEstadisticasService.registrar(db, historial_nuevo, {partido.id_partido: partido.fecha})
         
         # Actualizar historial de enfrentamientos
         historial = db.query(HistorialEnfrentamiento).filter(
@@ -551,10 +561,14 @@ class ConfirmacionService:
             if reportes == 0:
                 # Auto-confirmar
                 try:
-                    ConfirmacionService._aplicar_elo(partido, db)
+                    # _aplicar_elo commitea: el estado se guarda junto con el ELO
                     partido.estado_confirmacion = 'auto_confirmado'
+                    ConfirmacionService._aplicar_elo(partido, db)
                     count += 1
                 except Exception as e:
+                    # Se descarta solo este partido (en Postgres la transacción
+                    # queda abortada tras el error y los siguientes fallarían)
+                    db.rollback()
                     print(f"Error auto-confirmando partido {partido.id_partido}: {e}")
                     continue
         
@@ -0,0 +1,414 @@
+"""
+Cálculo de ELO en lote (mismo algoritmo que EloService.calculate_match_ratings)
+
+Para recálculos y cargas masivas: los partidos se guardan por columnas
+(LoteElo) y se calculan en un solo loop con la configuración de EloConfig
+leída una vez por lote, sin armar los dicts de entrada/salida de
+calculate_match_ratings ni pasar por sus ~20 métodos auxiliares.
+
+- Cada partido se calcula con los ratings que trae (partidos independientes,
+  como en calculate_match_ratings); para encadenar ratings partido a
+  partido se usa calculadora() directamente
+- Resultados idénticos al camino escalar (mismas operaciones de punto
+  flotante en el mismo orden); los hooks check_k_lock /
+  check_daily_matches_limit solo se consultan si el servicio los redefine
+- ResultadoLote.como_dict(i) arma la misma respuesta que calculate_match_ratings
+
+Uso:
+    lote = LoteElo()
+    for partido in partidos:
+        lote.agregar(team_a_players, team_b_players, sets_a, sets_b, games_a, games_b, sets_detail, ...)
+    resultado = calcular_lote(lote)
+    resultado.nuevo[0][i], resultado.cambio[0][i]  # jugador A1 del partido i
+"""
+import math
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .elo_config import Desenlace, EloConfig
+from .elo_service import EloService
+
+# Orden de los jugadores en las columnas: A1, A2, B1, B2
+JUGADORES = 4
+
+_WO = (Desenlace.WO_EQ1.value, Desenlace.WO_EQ2.value)
+_RETIRO = (Desenlace.RET_EQ1.value, Desenlace.RET_EQ2.value)
+
+
+def resumen_sets(sets_detail: Optional[List[Dict]]) -> Tuple[int, int, int]:
+    """
+    Lo único que el algoritmo usa del detalle de sets:
+    (cantidad de sets, sets 6-0/6-1, sets 7-6)
+    """
+    dominantes = tiebreaks = 0
+    for detalle in sets_detail or ():
+        ga = detalle.get("games_a", 0)
+        gb = detalle.get("games_b", 0)
+        if (ga == 6 and gb <= 1) or (gb == 6 and ga <= 1):
+            dominantes += 1
+        if (ga == 7 and gb == 6) or (gb == 7 and ga == 6):
+            tiebreaks += 1
+    return (len(sets_detail) if sets_detail else 0), dominantes, tiebreaks
+
+
+class LoteElo:
+    """Partidos por columnas (listas paralelas, una posición por partido)"""
+
+    def __init__(self):
+        self.ids: List[List[Any]] = [[] for _ in range(JUGADORES)]
+        self.rating: List[List[float]] = [[] for _ in range(JUGADORES)]
+        self.partidos: List[List[int]] = [[] for _ in range(JUGADORES)]
+        self.volatilidad: List[List[float]] = [[] for _ in range(JUGADORES)]
+        self.sets_a: List[int] = []
+        self.sets_b: List[int] = []
+        self.games_a: List[int] = []
+        self.games_b: List[int] = []
+        # Del detalle de sets: resumen_sets()
+        self.cantidad_sets: List[int] = []
+        self.dominantes: List[int] = []
+        self.tiebreaks: List[int] = []
+        self.desenlace: List[str] = []
+        self.tipo: List[str] = []
+        self.fecha: List[Optional[datetime]] = []
+        self.recientes: List[Optional[List[Dict]]] = []
+
+    def __len__(self) -> int:
+        return len(self.sets_a)
+
+    def agregar(
+        self,
+        team_a_players: Sequence[Dict[str, Any]],
+        team_b_players: Sequence[Dict[str, Any]],
+        sets_a: int,
+        sets_b: int,
+        games_a: int = 0,
+        games_b: int = 0,
+        sets_detail: Optional[List[Dict]] = None,
+        desenlace: str = Desenlace.NORMAL.value,
+        match_type: str = "torneo",
+        match_date: Optional[datetime] = None,
+        recent_matches: Optional[List[Dict]] = None
+    ) -> int:
+        """
+        Agrega un partido con los mismos argumentos que calculate_match_ratings.
+
+        Returns:
+            Posición del partido en el lote
+        """
+        if len(team_a_players) != 2 or len(team_b_players) != 2:
+            raise ValueError("Cada equipo debe tener exactamente 2 jugadores")
+        for columna, jugador in enumerate((*team_a_players, *team_b_players)):
+            self.ids[columna].append(jugador.get("id"))
+            self.rating[columna].append(jugador["rating"])
+            self.partidos[columna].append(jugador["partidos"])
+            self.volatilidad[columna].append(jugador.get("volatilidad", 1.0))
+
+        cantidad, dominantes, tiebreaks = resumen_sets(sets_detail)
+        self.sets_a.append(sets_a)
+        self.sets_b.append(sets_b)
+        self.games_a.append(games_a)
+        self.games_b.append(games_b)
+        self.cantidad_sets.append(cantidad)
+        self.dominantes.append(dominantes)
+        self.tiebreaks.append(tiebreaks)
+        self.desenlace.append(desenlace)
+        self.tipo.append(match_type)
+        self.fecha.append(match_date)
+        self.recientes.append(recent_matches or None)
+        return len(self.sets_a) - 1
+
+
+class ResultadoLote:
+    """Salida por columnas; la posición i corresponde al partido i del lote"""
+
+    def __init__(self, cantidad: int):
+        self.nuevo: List[List[int]] = [[0] * cantidad for _ in range(JUGADORES)]
+        self.cambio: List[List[float]] = [[0.0] * cantidad for _ in range(JUGADORES)]
+        self.volatilidad: List[List[float]] = [[0.0] * cantidad for _ in range(JUGADORES)]
+        self.delta_a: List[float] = [0.0] * cantidad
+        self.delta_b: List[float] = [0.0] * cantidad
+        self.detalle: List[tuple] = [()] * cantidad
+
+    def __len__(self) -> int:
+        return len(self.delta_a)
+
+    def como_dict(self, lote: LoteElo, i: int) -> Dict[str, Any]:
+        """La misma respuesta que calculate_match_ratings para el partido i"""
+        (expected_a, expected_b, actual_a, actual_b, sets_multiplier, dominant_bonus,
+         tiebreak_reduction, k_a, k_b, k_base_a, k_base_b, soft_a, soft_b,
+         caps_a, caps_b, abuso) = self.detalle[i]
+
+        def equipo(columnas, team_rating, delta):
+            jugadores = [
+                {
+                    "player_index": indice,
+                    "old_rating": lote.rating[c][i],
+                    "new_rating": self.nuevo[c][i],
+                    "rating_change": self.cambio[c][i],
+                    "old_volatility": lote.volatilidad[c][i],
+                    "new_volatility": self.volatilidad[c][i]
+                }
+                for indice, c in enumerate(columnas)
+            ]
+            return {
+                "old_rating": team_rating,
+                "new_rating": (jugadores[0]["new_rating"] + jugadores[1]["new_rating"]) / 2,
+                "rating_change": delta,
+                "players": jugadores
+            }
+
+        team_a = (lote.rating[0][i] + lote.rating[1][i]) / 2
+        team_b = (lote.rating[2][i] + lote.rating[3][i]) / 2
+        return {
+            "team_a": equipo((0, 1), team_a, self.delta_a[i]),
+            "team_b": equipo((2, 3), team_b, self.delta_b[i]),
+            "match_details": {
+                "expected_a": expected_a,
+                "expected_b": expected_b,
+                "actual_score_a": actual_a,
+                "actual_score_b": actual_b,
+                "sets_multiplier": sets_multiplier,
+                "dominant_bonus": dominant_bonus,
+                "tiebreak_reduction": tiebreak_reduction,
+                "team_a_k": k_a,
+                "team_b_k": k_b,
+                "team_a_k_base": k_base_a,
+                "team_b_k_base": k_base_b,
+                "loss_softener_a": soft_a,
+                "loss_softener_b": soft_b,
+                "caps_a": caps_a,
+                "caps_b": caps_b,
+                "match_type": lote.tipo[i],
+                "abuse_detected": abuso,
+                "desenlace": lote.desenlace[i]
+            }
+        }
+
+
+def _redefinido(elo_service: EloService, nombre: str) -> bool:
+    return getattr(type(elo_service), nombre) is not getattr(EloService, nombre)
+
+
+def calculadora(elo_service: Optional[EloService] = None) -> Callable:
+    """
+    Función de un partido con la configuración actual de EloConfig ya leída.
+
+    calcular(ratings, partidos, volatilidades, ids, sets_a, sets_b, games_a,
+             games_b, cantidad_sets, dominantes, tiebreaks, desenlace, tipo,
+             fecha=None, recientes=None)
+    (ratings/partidos/volatilidades/ids: tuplas A1, A2, B1, B2; cantidad_sets,
+    dominantes, tiebreaks: resumen_sets(sets_detail)) devuelve
+    (nuevos, cambios, volatilidades_nuevas, delta_a, delta_b, detalle).
+
+    La configuración queda fija: si se cambia EloConfig hay que pedir otra.
+    """
+    elo_service = elo_service or EloService()
+    pow_ = math.pow
+    isfinite = math.isfinite
+
+    escala = EloConfig.ELO_SCALE
+    min_games = EloConfig.MIN_TOTAL_GAMES
+    games_mult = EloConfig.GAMES_MULTIPLIER
+    margen_cap = EloConfig.GAMES_MARGIN_CAP
+    sets_mult = EloConfig.SETS_MULTIPLIER
+    tiebreak_factor = 1.0 - EloConfig.TIEBREAK_REDUCTION
+    vol_min = EloConfig.VOLATILIDAD_MIN
+    vol_max = EloConfig.VOLATILIDAD_MAX
+    vol_down = EloConfig.VOLATILIDAD_DOWN_FACTOR
+    vol_up = EloConfig.VOLATILIDAD_UP_FACTOR
+    vol_estable = EloConfig.VOLATILIDAD_STABLE_THRESHOLD
+    vol_volatil = EloConfig.VOLATILIDAD_VOLATILE_THRESHOLD
+    piso = EloConfig.FAVORITE_LOSS_FLOOR
+    techo = EloConfig.FAVORITE_LOSS_CEILING
+    span = techo - piso
+    k_lock_mult = EloConfig.K_LOCK_MULTIPLIER
+    abuso_mult = EloConfig.ABUSE_MULTIPLIER
+    caps_por_tipo = EloConfig.caps_for_match_type
+    get_k = EloConfig.get_k_factor
+
+    # Bonus por sets dominantes sumado set a set, igual que calculate_dominant_set_bonus
+    bonus_dominantes = [0.0]
+
+    def bonus(cantidad: int) -> float:
+        while len(bonus_dominantes) <= cantidad:
+            bonus_dominantes.append(bonus_dominantes[-1] + EloConfig.DOMINANT_SET_BONUS)
+        return bonus_dominantes[cantidad]
+
+    k_por_partidos: Dict[Any, int] = {}
+    caps_cache: Dict[tuple, tuple] = {}
+    hooks = _redefinido(elo_service, "check_k_lock") or _redefinido(elo_service, "check_daily_matches_limit")
+
+    def k_equipo(partidos1, partidos2, vol1, vol2, ids, fecha):
+        k1 = k_por_partidos.get(partidos1)
+        if k1 is None:
+            k1 = k_por_partidos[partidos1] = get_k(partidos1)
+        k2 = k_por_partidos.get(partidos2)
+        if k2 is None:
+            k2 = k_por_partidos[partidos2] = get_k(partidos2)
+        k_base = (k1 + k2) / 2
+        v = (vol1 + vol2) / 2
+        v = v if isfinite(v) else 1.0
+        v = max(vol_min, min(vol_max, v))
+        k = k_base * v
+        if hooks:
+            for jugador_id in ids:
+                if elo_service.check_k_lock(jugador_id, fecha):
+                    k *= k_lock_mult
+                if elo_service.check_daily_matches_limit(jugador_id, fecha):
+                    k = 0.0
+                    break
+        return k_base, k
+
+    def caps(tipo, team, rival):
+        clave = (tipo, team, rival)
+        valor = caps_cache.get(clave)
+        if valor is None:
+            valor = caps_cache[clave] = caps_por_tipo(tipo, team, rival)
+        return valor
+
+    def suavizador(team, rival, actual, esperado):
+        if team > rival and actual < esperado and esperado > 0:
+            ratio = max(0.0, min(1.0, actual / esperado))
+            return max(piso, min(techo, piso + span * ratio))
+        return 1.0
+
+    def volatilidad(actual_vol, actual, esperado):
+        gap = abs(actual - esperado)
+        if gap < vol_estable:
+            nueva = actual_vol * vol_down
+        elif gap > vol_volatil:
+            nueva = actual_vol * vol_up
+        else:
+            nueva = actual_vol
+        return max(vol_min, min(vol_max, nueva))
+
+    def calcular(ratings, partidos, volatilidades, ids, sets_a, sets_b, games_a, games_b,
+                 cantidad_sets, dominantes, tiebreaks, desenlace, tipo, fecha=None, recientes=None):
+        ra1, ra2, rb1, rb2 = ratings
+        team_a = (ra1 + ra2) / 2
+        team_b = (rb1 + rb2) / 2
+        expected_a = 1.0 / (1.0 + pow_(10, -(team_a - team_b) / escala))
+        expected_b = 1.0 - expected_a
+
+        if desenlace == _WO[0]:
+            actual_a, actual_b = 1.0, 0.0
+        elif desenlace == _WO[1]:
+            actual_a, actual_b = 0.0, 1.0
+        elif desenlace in _RETIRO:
+            total_sets = sets_a + sets_b
+            if total_sets > 0:
+                actual_a = sets_a / total_sets
+                actual_b = sets_b / total_sets
+            else:
+                actual_a = actual_b = 0.5
+        else:
+            total_sets = sets_a + sets_b
+            sets_score = sets_a / total_sets if total_sets else 0.5
+            raw = ((games_a - games_b) / max(min_games, games_a + games_b)) * games_mult
+            raw = sets_score + max(-margen_cap, min(margen_cap, raw))
+            raw = max(0.0, min(1.0, raw))
+            actual_a = max(0.6, raw) if sets_a > sets_b else min(0.4, raw)
+            actual_b = 1.0 - actual_a
+
+        multiplicador = 1.0 + sets_mult * abs(sets_a - sets_b)
+        dominant_bonus = 0.0
+        tiebreak_reduction = 1.0
+        if desenlace in _WO:
+            multiplicador = 1.0
+        elif cantidad_sets:
+            dominant_bonus = bonus(dominantes)
+            tiebreak_reduction = 1.0 - ((tiebreaks / cantidad_sets) * tiebreak_factor)
+        multiplicador += dominant_bonus
+        multiplicador *= tiebreak_reduction
+
+        if fecha is None and (hooks or recientes):
+            fecha = datetime.now()
+        k_base_a, k_a = k_equipo(partidos[0], partidos[1], volatilidades[0], volatilidades[1], ids[:2], fecha)
+        k_base_b, k_b = k_equipo(partidos[2], partidos[3], volatilidades[2], volatilidades[3], ids[2:], fecha)
+
+        if sets_a > sets_b:
+            magnitud_a = k_a * (1.0 - expected_a) * multiplicador
+            if expected_a > 0.5:
+                magnitud_a = max(1.0, magnitud_a)
+            delta_a = abs(magnitud_a)
+            delta_b = -abs(k_b * expected_b * multiplicador)
+        elif sets_b > sets_a:
+            magnitud_b = k_b * (1.0 - expected_b) * multiplicador
+            if expected_b > 0.5:
+                magnitud_b = max(1.0, magnitud_b)
+            delta_a = -abs(k_a * expected_a * multiplicador)
+            delta_b = abs(magnitud_b)
+        else:
+            delta_a = k_a * (actual_a - expected_a) * multiplicador * 0.1
+            delta_b = k_b * (actual_b - expected_b) * multiplicador * 0.1
+
+        soft_a = suavizador(team_a, team_b, actual_a, expected_a)
+        soft_b = suavizador(team_b, team_a, actual_b, expected_b)
+        caps_a = caps(tipo, team_a, team_b)
+        caps_b = caps(tipo, team_b, team_a)
+        delta_a = max(caps_a[1], min(caps_a[0], delta_a * soft_a))
+        delta_b = max(caps_b[1], min(caps_b[0], delta_b * soft_b))
+
+        abuso = False
+        if recientes:
+            jugadores = [{"id": jugador_id} if jugador_id is not None else {} for jugador_id in ids]
+            abuso = elo_service.check_abuse_pattern(jugadores[:2], jugadores[2:], fecha, recientes)
+            if abuso:
+                delta_a *= abuso_mult
+                delta_b *= abuso_mult
+
+        # Reparto proporcional al rating (split_team_delta "proportional")
+        w1 = max(1.0, ra1)
+        w2 = max(1.0, ra2)
+        s = w1 + w2
+        da1 = delta_a * (w1 / s)
+        da2 = delta_a * (w2 / s)
+        w1 = max(1.0, rb1)
+        w2 = max(1.0, rb2)
+        s = w1 + w2
+        db1 = delta_b * (w1 / s)
+        db2 = delta_b * (w2 / s)
+
+        nuevos = (int(round(ra1 + da1)), int(round(ra2 + da2)), int(round(rb1 + db1)), int(round(rb2 + db2)))
+        volatilidades_nuevas = (
+            volatilidad(volatilidades[0], actual_a, expected_a),
+            volatilidad(volatilidades[1], actual_a, expected_a),
+            volatilidad(volatilidades[2], actual_b, expected_b),
+            volatilidad(volatilidades[3], actual_b, expected_b),
+        )
+        detalle = (
+            expected_a, expected_b, actual_a, actual_b, multiplicador, dominant_bonus,
+            tiebreak_reduction, k_a, k_b, k_base_a, k_base_b, soft_a, soft_b,
+            caps_a, caps_b, abuso
+        )
+        return nuevos, (da1, da2, db1, db2), volatilidades_nuevas, delta_a, delta_b, detalle
+
+    return calcular
+
+
+def calcular_lote(lote: LoteElo, elo_service: Optional[EloService] = None) -> ResultadoLote:
+    """
+    Calcula todos los partidos del lote, cada uno con los ratings que trae.
+
+    Returns:
+        ResultadoLote con ratings nuevos, cambios y volatilidades por columna
+    """
+    calcular = calculadora(elo_service)
+    resultado = ResultadoLote(len(lote))
+    nuevo, cambio, vol = resultado.nuevo, resultado.cambio, resultado.volatilidad
+    filas = zip(
+        zip(*lote.rating), zip(*lote.partidos), zip(*lote.volatilidad), zip(*lote.ids),
+        lote.sets_a, lote.sets_b, lote.games_a, lote.games_b,
+        lote.cantidad_sets, lote.dominantes, lote.tiebreaks,
+        lote.desenlace, lote.tipo, lote.fecha, lote.recientes
+    )
+    for i, fila in enumerate(filas):
+        nuevos, cambios, volatilidades, delta_a, delta_b, detalle = calcular(*fila)
+        for c in range(JUGADORES):
+            nuevo[c][i] = nuevos[c]
+            cambio[c][i] = cambios[c]
+            vol[c][i] = volatilidades[c]
+        resultado.delta_a[i] = delta_a
+        resultado.delta_b[i] = delta_b
+        resultado.detalle[i] = detalle
+    return resultado
@@ -0,0 +1,318 @@
+"""
+Replay determinista del ELO sobre toda la historia (sin SQLAlchemy)
+
+Recalcula todos los partidos confirmados en orden y compara contra
+historial_rating. Lo usa EloReplayService (que lee partidos e historial
+con cursores del lado del servidor); acá está todo lo que no toca la base.
+
+Reglas (las mismas en cada corrida, sin depender del orden de la base):
+- Orden: amistosos por fecha, partidos de torneo por horario programado
+  (fecha_hora, o fecha si no tiene); empates por id_partido
+- Rating inicial de cada jugador: el rating_antes de su primera fila de
+  historial (o su rating actual si nunca tuvo); partidos jugados desde 0
+- Amistosos: equipo 1 = equipoA salvo que resultado_padel diga otra cosa
+  (como confirmacion_service); torneo: pareja1 = equipoA (entrada_elo)
+- Rating nuevo = el que devuelve el motor redondeado; delta = nuevo - antes
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .elo_config import Desenlace
+from .elo_lote import calculadora, resumen_sets
+from .elo_service import EloService
+from .resultados_lote import entrada_elo
+
+AMISTOSO = 'amistoso'
+TORNEO = 'torneo'
+
+MUESTRAS = 50
+
+# (id_usuario, rating_antes, delta, rating_despues)
+Fila = Tuple[int, int, int, int]
+# (id_historial, id_usuario, rating_antes, delta, rating_despues)
+Guardada = Tuple[int, int, int, int, int]
+
+
+class PartidoReplay:
+    """Un partido listo para el motor: equipo A / equipo B ya resueltos"""
+    __slots__ = ('id_partido', 'orden', 'origen', 'equipo_a', 'equipo_b', 'sets_a', 'sets_b',
+                 'games_a', 'games_b', 'sets_detail', 'desenlace')
+
+    def __init__(self, id_partido, orden, origen, equipo_a, equipo_b, sets_a, sets_b,
+                 games_a, games_b, sets_detail, desenlace=Desenlace.NORMAL.value):
+        self.id_partido = id_partido
+        self.orden = orden
+        self.origen = origen
+        self.equipo_a = tuple(equipo_a)
+        self.equipo_b = tuple(equipo_b)
+        self.sets_a = sets_a
+        self.sets_b = sets_b
+        self.games_a = games_a
+        self.games_b = games_b
+        self.sets_detail = sets_detail
+        self.desenlace = desenlace
+
+    @property
+    def clave(self) -> Tuple[Any, int]:
+        return self.orden, self.id_partido
+
+
+def _json(valor: Any) -> Any:
+    return json.loads(valor) if isinstance(valor, str) else valor
+
+
+def _juegos(detalle: Any) -> Tuple[int, int]:
+    """Un set de resultados_partidos.detalle_sets: {juegos_eq1, juegos_eq2} o '6-3'"""
+    if isinstance(detalle, dict):
+        return int(detalle.get('juegos_eq1', 0) or 0), int(detalle.get('juegos_eq2', 0) or 0)
+    if isinstance(detalle, str) and '-' in detalle:
+        a, b = detalle.split('-', 1)
+        return int(a), int(b)
+    raise ValueError(f"Set inválido: {detalle!r}")
+
+
+def partido_desde_fila(
+    id_partido: int,
+    orden: datetime,
+    origen: str,
+    jugadores: Any,
+    sets_eq1: Optional[int],
+    sets_eq2: Optional[int],
+    detalle_sets: Any,
+    desenlace: Optional[str],
+    resultado_padel: Any
+) -> PartidoReplay:
+    """
+    Arma el partido desde una fila de la consulta de EloReplayService.
+
+    jugadores: [[id_usuario, equipo], ...] (torneo: pareja1 con equipo 1,
+    en el orden jugador1, jugador2)
+
+    Raises:
+        ValueError si el partido no se puede recalcular (se informa como omitido)
+    """
+    jugadores = _json(jugadores) or []
+    equipo1 = [int(j) for j, equipo in jugadores if equipo == 1]
+    equipo2 = [int(j) for j, equipo in jugadores if equipo == 2]
+    if len(equipo1) != 2 or len(equipo2) != 2 or len(set(equipo1 + equipo2)) != 4:
+        raise ValueError("El partido no tiene 4 jugadores distintos en 2 equipos")
+    resultado = _json(resultado_padel) or {}
+
+    if origen == TORNEO:
+        if not resultado.get('sets'):
+            raise ValueError("El partido no tiene sets cargados")
+        entrada = entrada_elo(resultado, equipo1)
+        return PartidoReplay(
+            id_partido, orden, origen, equipo1, equipo2,
+            entrada['sets_a'], entrada['sets_b'], entrada['games_a'], entrada['games_b'],
+            entrada['sets_detail']
+        )
+
+    sets = [_juegos(s) for s in _json(detalle_sets) or []]
+    equipo1_es_a = True
+    ids_equipo_a = {j.get('id') for j in resultado.get('jugadores', {}).get('equipoA', []) if j.get('id')}
+    if ids_equipo_a:
+        equipo1_es_a = bool(set(equipo1) & ids_equipo_a)
+    if not equipo1_es_a:
+        sets_eq1, sets_eq2 = sets_eq2, sets_eq1
+        sets = [(b, a) for a, b in sets]
+    return PartidoReplay(
+        id_partido, orden, origen, equipo1, equipo2,
+        sets_eq1 or 0, sets_eq2 or 0,
+        sum(a for a, _ in sets), sum(b for _, b in sets),
+        [{'games_a': a, 'games_b': b} for a, b in sets],
+        desenlace or Desenlace.NORMAL.value
+    )
+
+
+class Replay:
+    """Ratings y partidos jugados en memoria, partido por partido"""
+
+    def __init__(self, elo_service=None, ratings: Optional[Dict[int, int]] = None, rating_inicial: int = 1200):
+        """
+        Args:
+            elo_service: EloService (por defecto) o EloServiceV2
+            ratings: rating de partida de cada jugador
+            rating_inicial: para jugadores que no estén en `ratings`
+        """
+        self.elo_service = elo_service or EloService()
+        self.rating: Dict[int, int] = dict(ratings or {})
+        self.partidos: Dict[int, int] = {}
+        self.rating_inicial = rating_inicial
+        # EloService sin redefinir el cálculo: camino rápido de elo_lote (mismo resultado)
+        rapido = (
+            isinstance(self.elo_service, EloService)
+            and type(self.elo_service).calculate_match_ratings is EloService.calculate_match_ratings
+        )
+        self._calcular = calculadora(self.elo_service) if rapido else None
+
+    def aplicar(self, partido: PartidoReplay) -> List[Fila]:
+        ids = partido.equipo_a + partido.equipo_b
+        antes = tuple(self.rating.get(j, self.rating_inicial) for j in ids)
+        jugados = tuple(self.partidos.get(j, 0) for j in ids)
+        match_type = AMISTOSO if partido.origen == AMISTOSO else TORNEO
+
+        if self._calcular is not None:
+            nuevos = self._calcular(
+                antes, jugados, (1.0,) * 4, ids,
+                partido.sets_a, partido.sets_b, partido.games_a, partido.games_b,
+                *resumen_sets(partido.sets_detail), partido.desenlace, match_type, partido.orden
+            )[0]
+        else:
+            equipos = [
+                {'id': j, 'id_usuario': j, 'rating': r, 'partidos': n}
+                for j, r, n in zip(ids, antes, jugados)
+            ]
+            calculo = self.elo_service.calculate_match_ratings(
+                team_a_players=equipos[:2],
+                team_b_players=equipos[2:],
+                sets_a=partido.sets_a,
+                sets_b=partido.sets_b,
+                games_a=partido.games_a,
+                games_b=partido.games_b,
+                sets_detail=partido.sets_detail,
+                desenlace=partido.desenlace,
+                match_type=match_type,
+                match_date=partido.orden
+            )
+            nuevos = [
+                int(round(j['new_rating']))
+                for j in calculo['team_a']['players'] + calculo['team_b']['players']
+            ]
+
+        filas = []
+        for j, anterior, nuevo in zip(ids, antes, nuevos):
+            self.rating[j] = nuevo
+            self.partidos[j] = self.partidos.get(j, 0) + 1
+            filas.append((j, anterior, nuevo - anterior, nuevo))
+        return filas
+
+
+def emparejar(
+    partidos: Iterable[PartidoReplay],
+    historial: Iterable[Tuple[Tuple[Any, int], List[Guardada]]]
+) -> Iterator[Tuple[Optional[PartidoReplay], Optional[Tuple[Any, int]], List[Guardada]]]:
+    """
+    Merge de los dos streams, ordenados por la misma clave (orden, id_partido).
+
+    Yields:
+        (partido, clave, filas de historial); partido None = historial de un
+        partido que no se recalcula
+    """
+    grupos = iter(historial)
+    grupo = next(grupos, None)
+    for partido in partidos:
+        clave = partido.clave
+        while grupo is not None and grupo[0] < clave:
+            yield None, grupo[0], grupo[1]
+            grupo = next(grupos, None)
+        if grupo is not None and grupo[0] == clave:
+            yield partido, clave, grupo[1]
+            grupo = next(grupos, None)
+        else:
+            yield partido, clave, []
+    while grupo is not None:
+        yield None, grupo[0], grupo[1]
+        grupo = next(grupos, None)
+
+
+class Comparacion:
+    """
+    Diferencias entre el replay e historial_rating, y las escrituras que
+    harían falta para dejarlo igual (si se pide guardarlas).
+    """
+
+    def __init__(self, guardar_cambios: bool = False, muestras: int = MUESTRAS):
+        self.guardar_cambios = guardar_cambios
+        self.max_muestras = muestras
+        self.iguales = 0
+        self.distintas = 0
+        self.faltantes = 0
+        self.duplicadas = 0
+        self.sobrantes = 0
+        self.sin_recalcular = 0
+        self.muestras: List[Dict] = []
+        self.actualizar: List[Dict] = []
+        self.insertar: List[Dict] = []
+        self.borrar: List[int] = []
+
+    def _muestra(self, **datos):
+        if len(self.muestras) < self.max_muestras:
+            self.muestras.append(datos)
+
+    def partido(self, id_partido: int, calculadas: Sequence[Fila], guardadas: Sequence[Guardada]) -> None:
+        por_usuario: Dict[int, Guardada] = {}
+        for guardada in guardadas:
+            if guardada[1] in por_usuario:
+                self.duplicadas += 1
+                if self.guardar_cambios:
+                    self.borrar.append(guardada[0])
+            else:
+                por_usuario[guardada[1]] = guardada
+
+        for id_usuario, antes, delta, despues in calculadas:
+            guardada = por_usuario.pop(id_usuario, None)
+            if guardada is None:
+                self.faltantes += 1
+                self._muestra(id_partido=id_partido, id_usuario=id_usuario, guardada=None,
+                              calculada=[antes, delta, despues])
+                if self.guardar_cambios:
+                    self.insertar.append({
+                        'id_usuario': id_usuario, 'id_partido': id_partido,
+                        'rating_antes': antes, 'delta': delta, 'rating_despues': despues
+                    })
+            elif guardada[2:] == (antes, delta, despues):
+                self.iguales += 1
+            else:
+                self.distintas += 1
+                self._muestra(id_partido=id_partido, id_usuario=id_usuario, guardada=list(guardada[2:]),
+                              calculada=[antes, delta, despues])
+                if self.guardar_cambios:
+                    self.actualizar.append({
+                        'id_historial': guardada[0],
+                        'rating_antes': antes, 'delta': delta, 'rating_despues': despues
+                    })
+
+        # Filas de jugadores que no están en el partido
+        for guardada in por_usuario.values():
+            self.sobrantes += 1
+            if self.guardar_cambios:
+                self.borrar.append(guardada[0])
+
+    def sin_partido(self, guardadas: Sequence[Guardada]) -> None:
+        """Historial de un partido que no se recalcula (no confirmado u omitido): no se toca"""
+        self.sin_recalcular += len(guardadas)
+
+    def reporte(self) -> Dict[str, Any]:
+        return {
+            'iguales': self.iguales,
+            'distintas': self.distintas,
+            'faltantes': self.faltantes,
+            'duplicadas': self.duplicadas,
+            'sobrantes': self.sobrantes,
+            'sin_recalcular': self.sin_recalcular,
+            'muestras': self.muestras
+        }
+
+
+def usuarios_distintos(
+    replay: Replay,
+    actuales: Dict[int, Tuple[int, int]]
+) -> List[Dict[str, int]]:
+    """Jugadores del replay cuyo rating o partidos jugados guardados no coinciden"""
+    distintos = []
+    for id_usuario in sorted(replay.rating):
+        if id_usuario not in replay.partidos:
+            continue  # rating de partida de un jugador sin partidos recalculados
+        rating_actual, partidos_actual = actuales.get(id_usuario, (None, None))
+        rating, partidos = replay.rating[id_usuario], replay.partidos[id_usuario]
+        if rating_actual != rating or partidos_actual != partidos:
+            distintos.append({
+                'id_usuario': id_usuario,
+                'rating_actual': rating_actual,
+                'rating': rating,
+                'partidos_actual': partidos_actual,
+                'partidos': partidos
+            })
+    return distintos
@@ -0,0 +1,196 @@
+"""
+Replay del ELO de toda la historia contra la base (ver services/elo_replay.py)
+
+- Partidos confirmados e historial_rating se leen en orden con cursores del
+  lado del servidor (stream_results + yield_per): memoria acotada aunque
+  haya cientos de miles de partidos
+- Dry-run: solo informa diferencias (filas de historial y usuarios)
+- aplicar=True: corrige historial_rating (UPDATE/INSERT/DELETE en lote),
+  jugador_estadisticas y usuarios.rating / partidos_jugados / categoría, en
+  una sola transacción
+"""
+import time
+from itertools import groupby
+from typing import Any, Dict
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import logging
+
+from ..models.driveplus_models import HistorialRating, Usuario
+from ..database.bulk import actualizar_filas, insertar_filas
+from ..services.categoria_service import asignador_categorias
+from ..services.elo_service import EloService
+from ..services.elo_service_v2 import EloServiceV2
+from ..services.jugador_estadisticas_service import JugadorEstadisticasService
+from ..utils.cache import invalidate_ranking_cache
+from .elo_replay import MUESTRAS, Comparacion, Replay, emparejar, partido_desde_fila, usuarios_distintos
+
+logger = logging.getLogger(__name__)
+
+MOTORES = {
+    'v1': EloService,
+    'v2': EloServiceV2,
+}
+
+TAMANO_LOTE = 5000
+
+# Misma clave de orden en las dos consultas (ver elo_replay)
+_ORDEN = "CASE WHEN p.tipo = 'torneo' THEN COALESCE(p.fecha_hora, p.fecha) ELSE p.fecha END"
+
+_SQL_PARTIDOS = f"""
+    SELECT p.id_partido, {_ORDEN} AS orden, 'amistoso' AS origen,
+           (SELECT json_agg(json_build_array(pj.id_usuario, pj.equipo) ORDER BY pj.equipo, pj.id_usuario)
+            FROM partido_jugadores pj WHERE pj.id_partido = p.id_partido) AS jugadores,
+           r.sets_eq1, r.sets_eq2, r.detalle_sets, r.desenlace, p.resultado_padel
+    FROM partidos p
+    JOIN resultados_partidos r ON r.id_partido = p.id_partido
+    WHERE p.tipo != 'torneo' AND r.confirmado
+    UNION ALL
+    SELECT p.id_partido, {_ORDEN} AS orden, 'torneo' AS origen,
+           json_build_array(
+               json_build_array(tp1.jugador1_id, 1), json_build_array(tp1.jugador2_id, 1),
+               json_build_array(tp2.jugador1_id, 2), json_build_array(tp2.jugador2_id, 2)
+           ) AS jugadores,
+           NULL, NULL, NULL, NULL, p.resultado_padel
+    FROM partidos p
+    JOIN torneos_parejas tp1 ON tp1.id = p.pareja1_id
+    JOIN torneos_parejas tp2 ON tp2.id = p.pareja2_id
+    WHERE p.tipo = 'torneo' AND p.estado = 'confirmado' AND p.resultado_padel IS NOT NULL
+    ORDER BY orden, id_partido
+"""
+
+_SQL_HISTORIAL = f"""
+    SELECT {_ORDEN} AS orden, h.id_partido, h.id_historial, h.id_usuario,
+           h.rating_antes, h.delta, h.rating_despues
+    FROM historial_rating h
+    JOIN partidos p ON p.id_partido = h.id_partido
+    ORDER BY orden, h.id_partido, h.id_historial
+"""
+
+# Rating de partida: rating_antes de la primera fila de historial de cada jugador
+_SQL_RATING_INICIAL = f"""
+    SELECT DISTINCT ON (h.id_usuario) h.id_usuario, h.rating_antes
+    FROM historial_rating h
+    JOIN partidos p ON p.id_partido = h.id_partido
+    ORDER BY h.id_usuario, {_ORDEN}, h.id_partido, h.id_historial
+"""
+
+
+class EloReplayService:
+    """Recalcula el ELO de toda la historia y lo compara (o corrige) contra la base"""
+
+    @staticmethod
+    def _stream(db: Session, sql: str, tamano_lote: int):
+        return db.execute(
+            text(sql).execution_options(stream_results=True, yield_per=tamano_lote)
+        )
+
+    @staticmethod
+    def ejecutar(
+        db: Session,
+        motor: str = 'v1',
+        aplicar: bool = False,
+        muestras: int = MUESTRAS,
+        tamano_lote: int = TAMANO_LOTE
+    ) -> Dict[str, Any]:
+        """
+        Args:
+            motor: 'v1' (EloService, el que usa la app) o 'v2' (EloServiceV2)
+            aplicar: Si False solo compara (dry-run)
+            muestras: Máximo de diferencias de ejemplo en el reporte
+
+        Returns:
+            Reporte con partidos recalculados/omitidos, diferencias de
+            historial y usuarios con rating distinto
+        """
+        if motor not in MOTORES:
+            raise ValueError(f"Motor inválido: {motor} (opciones: {', '.join(MOTORES)})")
+        inicio = time.perf_counter()
+
+        usuarios = {
+            fila[0]: (fila[1], fila[2], fila[3], fila[4])
+            for fila in EloReplayService._stream(
+                db, "SELECT id_usuario, rating, partidos_jugados, sexo, id_categoria FROM usuarios", tamano_lote
+            )
+        }
+        ratings = {id_usuario: datos[0] for id_usuario, datos in usuarios.items() if datos[0] is not None}
+        ratings.update(
+            (fila[0], fila[1]) for fila in EloReplayService._stream(db, _SQL_RATING_INICIAL, tamano_lote)
+        )
+
+        replay = Replay(MOTORES[motor](), ratings)
+        comparacion = Comparacion(guardar_cambios=aplicar, muestras=muestras)
+        omitidos = []
+        recalculados = 0
+
+        def partidos():
+            for fila in EloReplayService._stream(db, _SQL_PARTIDOS, tamano_lote):
+                try:
+                    yield partido_desde_fila(*fila)
+                except (TypeError, ValueError) as e:
+                    omitidos.append({'id_partido': fila[0], 'motivo': str(e)})
+
+        historial = groupby(
+            EloReplayService._stream(db, _SQL_HISTORIAL, tamano_lote),
+            key=lambda fila: (fila[0], fila[1])
+        )
+        grupos = ((clave, [tuple(f[2:]) for f in filas]) for clave, filas in historial)
+
+        for partido, _, guardadas in emparejar(partidos(), grupos):
+            if partido is None:
+                comparacion.sin_partido(guardadas)
+                continue
+            comparacion.partido(partido.id_partido, replay.aplicar(partido), guardadas)
+            recalculados += 1
+
+        distintos = usuarios_distintos(replay, {u: (d[0], d[1]) for u, d in usuarios.items()})
+
+        if aplicar:
+            EloReplayService._guardar(db, comparacion, distintos, usuarios)
+
+        duracion = time.perf_counter() - inicio
+        logger.info(
+            f"Replay ELO ({motor}, {'aplicado' if aplicar else 'dry-run'}): {recalculados} partidos, "
+            f"{comparacion.distintas + comparacion.faltantes} filas de historial y "
+            f"{len(distintos)} usuarios distintos en {duracion:.1f}s"
+        )
+        return {
+            'motor': motor,
+            'aplicado': aplicar,
+            'partidos': recalculados,
+            'omitidos': len(omitidos),
+            'omitidos_muestra': omitidos[:muestras],
+            'historial': comparacion.reporte(),
+            'usuarios_distintos': len(distintos),
+            'usuarios_muestra': distintos[:muestras],
+            'segundos': round(duracion, 2)
+        }
+
+    @staticmethod
+    def _guardar(db: Session, comparacion: Comparacion, distintos, usuarios: Dict[int, tuple]) -> None:
+        """Escribe las correcciones en lote y hace un solo commit"""
+        actualizar_filas(db, HistorialRating, comparacion.actualizar)
+        insertar_filas(db, HistorialRating, comparacion.insertar)
+        for i in range(0, len(comparacion.borrar), TAMANO_LOTE):
+            db.query(HistorialRating).filter(
+                HistorialRating.id_historial.in_(comparacion.borrar[i:i + TAMANO_LOTE])
+            ).delete(synchronize_session=False)
+        if comparacion.actualizar or comparacion.insertar or comparacion.borrar:
+            JugadorEstadisticasService.reconstruir(db)
+
+        categoria_para = asignador_categorias(db)
+        actualizar_filas(db, Usuario, [
+            {
+                'id_usuario': d['id_usuario'],
+                'rating': d['rating'],
+                'partidos_jugados': d['partidos'],
+                # Sin categoría para el rating nuevo: queda la que tenía
+                'id_categoria': categoria_para(usuarios[d['id_usuario']][2], d['rating'])
+                or usuarios[d['id_usuario']][3]
+            }
+            for d in distintos
+            if d['id_usuario'] in usuarios
+        ])
+        db.commit()
+        invalidate_ranking_cache()
@@ -0,0 +1,134 @@
+"""
+Eventos en vivo de torneos (canal WebSocket /ws/torneos/{id}).
+
+En lugar de volver a pedir el torneo completo, el cliente recibe deltas
+chicos:
+- resultado_cargado: resultado y estado de un partido
+- tabla_actualizada: filas de la tabla de una zona que cambiaron (valores absolutos)
+- ganador_avanzado: la pareja ganadora ocupa su lugar en el partido siguiente
+- partido_reprogramado: nuevo horario / cancha de un partido
+
+Cada evento lleva la versión del torneo (torneos.version) que dejó el commit
+que lo generó. Si al cliente le llega una versión que no es la siguiente a
+la última que vio (hubo cambios sin evento o se cortó la conexión), vuelve a
+pedir los datos con If-None-Match (ETag, ver utils/etag.py).
+
+Los servicios registran los eventos en la sesión con
+torneo_version.publicar_evento(); se publican acá recién después del commit.
+
+Es un módulo puro (sin SQLAlchemy ni FastAPI).
+"""
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+RESULTADO_CARGADO = "resultado_cargado"
+TABLA_ACTUALIZADA = "tabla_actualizada"
+GANADOR_AVANZADO = "ganador_avanzado"
+PARTIDO_REPROGRAMADO = "partido_reprogramado"
+
+
+def _iso(fecha: Optional[datetime]) -> Optional[str]:
+    return fecha.isoformat() if fecha else None
+
+
+def datos_resultado(partido) -> Dict:
+    return {
+        "partido_id": partido.id_partido,
+        "zona_id": partido.zona_id,
+        "categoria_id": partido.categoria_id,
+        "fase": partido.fase,
+        "estado": partido.estado,
+        "resultado_padel": partido.resultado_padel,
+        "ganador_pareja_id": partido.ganador_pareja_id,
+    }
+
+
+def datos_tabla(zona_id: int, filas: Iterable[Dict]) -> Dict:
+    """filas: [{pareja_id, partidos_jugados, ..., puntos}] con los valores nuevos"""
+    return {"zona_id": zona_id, "filas": sorted(filas, key=lambda f: f["pareja_id"])}
+
+
+def datos_ganador(partido, siguiente, ganador_pareja_id: int) -> Dict:
+    return {
+        "partido_id": partido.id_partido,
+        "fase": partido.fase,
+        "categoria_id": partido.categoria_id,
+        "ganador_pareja_id": ganador_pareja_id,
+        "siguiente_partido_id": siguiente.id_partido if siguiente else None,
+        "siguiente_fase": siguiente.fase if siguiente else None,
+        "pareja1_id": siguiente.pareja1_id if siguiente else None,
+        "pareja2_id": siguiente.pareja2_id if siguiente else None,
+    }
+
+
+def datos_reprogramado(partido) -> Dict:
+    return {
+        "partido_id": partido.id_partido,
+        "fecha_hora": _iso(partido.fecha_hora),
+        "cancha_id": partido.cancha_id,
+    }
+
+
+class PublicadorEventos:
+    """
+    Publica los eventos commiteados a `notificar(evento)` (en el servidor:
+    broadcast al canal torneo:{id}). Thread-safe: se llama desde los hilos
+    del threadpool y de los trabajos en segundo plano.
+    """
+
+    def __init__(self, notificar: Optional[Callable[[Dict], None]] = None):
+        self.notificar = notificar
+        self._lock = threading.Lock()
+        self._publicados = 0
+        self._errores = 0
+
+    def publicar(self, torneo_id: int, version: Optional[int], tipo: str, datos: Dict) -> Dict:
+        evento = {
+            "type": tipo,
+            "torneo_id": torneo_id,
+            "version": version,
+            "data": datos,
+        }
+        notificar = self.notificar
+        if notificar is None:
+            return evento
+        try:
+            notificar(evento)
+            with self._lock:
+                self._publicados += 1
+        except Exception as e:
+            # Un cliente caído no puede romper la carga de un resultado ya commiteada
+            logger.error(f"Error publicando evento {tipo} del torneo {torneo_id}: {e}")
+            with self._lock:
+                self._errores += 1
+        return evento
+
+    def publicar_todos(self, pendientes: List, versiones: Dict[int, int]) -> List[Dict]:
+        """pendientes: [(torneo_id, tipo, datos)] en orden; versiones: {torneo_id: version nueva}"""
+        return [
+            self.publicar(torneo_id, versiones.get(torneo_id), tipo, datos)
+            for torneo_id, tipo, datos in pendientes
+        ]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"publicados": self._publicados, "errores": self._errores}
+
+
+def notificador_websocket(loop: asyncio.AbstractEventLoop, manager) -> Callable[[Dict], None]:
+    """
+    Adaptador para PublicadorEventos.notificar: programa el broadcast en el
+    event loop del servidor sin esperar a que termine (el commit ya pasó).
+    """
+    def notificar(evento: Dict) -> None:
+        asyncio.run_coroutine_threadsafe(manager.notify_evento_torneo(evento), loop)
+    return notificar
+
+
+# Instancia global
+eventos = PublicadorEventos()
@@ -0,0 +1,174 @@
+"""
+Reprogramación incremental del fixture de zonas.
+
+En lugar de borrar y regenerar la categoría, toma el fixture actual como fijo
+y solo mueve los partidos que hace falta mover:
+- Partidos sin horario (zona nueva, partidos recién generados)
+- Partidos que ahora violan una regla: restricción de pareja, cancha
+  repetida o inactiva, descanso mínimo entre partidos de un jugador
+- Partidos de parejas que ya no existen (se eliminan)
+
+Los partidos jugados nunca se mueven. Cuando dos partidos chocan, se mueve
+el de las parejas afectadas por el cambio (o el más tardío), el resto queda
+donde estaba.
+
+Es un módulo puro (sin SQLAlchemy): TorneoFixtureIncrementalService carga
+los datos, llama a planificar() y persiste el diff.
+"""
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from .fixture_scheduler import (
+    FixtureScheduler, pareja_disponible, DURACION_PARTIDO_MINUTOS, DESCANSO_MINIMO_MINUTOS
+)
+from .fixture_optimizer import FixtureOptimizer, TIEMPO_LIMITE_SEGUNDOS
+
+
+DIAS_SEMANA = ['lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo']
+
+# Partido de zona tal como está hoy en la base
+PartidoActual = namedtuple(
+    'PartidoActual',
+    ['id', 'zona_id', 'pareja1_id', 'pareja2_id', 'fecha_hora', 'cancha_id', 'jugado']
+)
+
+# Motivos por los que un partido se mueve
+MOTIVO_SIN_HORARIO = 'sin_horario'
+MOTIVO_RESTRICCION = 'restriccion_pareja'
+MOTIVO_CANCHA_OCUPADA = 'cancha_ocupada'
+MOTIVO_CANCHA_INACTIVA = 'cancha_inactiva'
+MOTIVO_DESCANSO = 'descanso'
+
+
+def _sin_tz(fecha_hora: datetime) -> datetime:
+    return fecha_hora.replace(tzinfo=None) if fecha_hora.tzinfo is not None else fecha_hora
+
+
+def planificar(
+    partidos: Sequence[PartidoActual],
+    jugadores_por_pareja: Dict[int, Sequence[int]],
+    restricciones_por_pareja: Dict[int, Dict],
+    slots: Sequence[Tuple[str, str, str]],
+    cancha_ids: Sequence[int],
+    parejas_afectadas: Iterable[int] = (),
+    optimizar: bool = False,
+    tiempo_limite: float = TIEMPO_LIMITE_SEGUNDOS,
+    duracion: int = DURACION_PARTIDO_MINUTOS,
+    descanso: int = DESCANSO_MINIMO_MINUTOS
+) -> Dict:
+    """
+    Calcula el conjunto mínimo de partidos a mover y les busca lugar.
+
+    Args:
+        partidos: Partidos de zona actuales del torneo
+        jugadores_por_pareja: {pareja_id: (jugador1_id, jugador2_id)} de las parejas existentes
+        restricciones_por_pareja: {pareja_id: restricciones_por_dia}
+        slots: Grilla del torneo (fecha, dia, hora)
+        cancha_ids: Canchas activas
+        parejas_afectadas: Parejas del cambio; ante un choque se mueven sus partidos
+        optimizar: Si quedan partidos sin lugar, correr la búsqueda local
+        duracion, descanso: Minutos de partido y de descanso del torneo
+
+    Returns:
+        Dict con:
+        - movidos: [(PartidoActual, motivo, nuevo_horario)] con nuevo_horario
+          (fecha_hora, cancha_id) o None si no entró
+        - eliminados: [PartidoActual] de parejas que ya no existen
+        - sin_cambios: cantidad de partidos que quedan donde estaban
+    """
+    afectadas = set(parejas_afectadas)
+    canchas_activas = set(cancha_ids)
+    scheduler = FixtureScheduler(slots, cancha_ids, duracion, descanso)
+
+    eliminados = []
+    a_mover: List[Tuple[PartidoActual, str]] = []
+    ocupadas = set()
+    sin_cambios = 0
+
+    def jugadores(partido):
+        return list(jugadores_por_pareja[partido.pareja1_id]) + list(jugadores_por_pareja[partido.pareja2_id])
+
+    def fijar(partido):
+        fecha_hora = _sin_tz(partido.fecha_hora)
+        ocupadas.add((fecha_hora, partido.cancha_id))
+        scheduler.registrar_existente(fecha_hora, partido.cancha_id, jugadores(partido))
+
+    pendientes = []
+    for partido in partidos:
+        existe = partido.pareja1_id in jugadores_por_pareja and partido.pareja2_id in jugadores_por_pareja
+        if partido.jugado:
+            # Los jugados no se tocan (tampoco si la pareja ya no existe)
+            if existe and partido.fecha_hora is not None:
+                fijar(partido)
+            sin_cambios += 1
+        elif not existe:
+            eliminados.append(partido)
+        elif partido.fecha_hora is None or partido.cancha_id is None:
+            a_mover.append((partido, MOTIVO_SIN_HORARIO))
+        else:
+            pendientes.append(partido)
+
+    # Primero los que no tocan parejas afectadas: ante un choque se mueve el otro
+    pendientes.sort(key=lambda p: (
+        p.pareja1_id in afectadas or p.pareja2_id in afectadas,
+        _sin_tz(p.fecha_hora),
+        p.id
+    ))
+
+    for partido in pendientes:
+        fecha_hora = _sin_tz(partido.fecha_hora)
+        dia = DIAS_SEMANA[fecha_hora.weekday()]
+        hora_mins = fecha_hora.hour * 60 + fecha_hora.minute
+
+        motivo = None
+        if partido.cancha_id not in canchas_activas:
+            motivo = MOTIVO_CANCHA_INACTIVA
+        elif not all(
+            pareja_disponible(dia, hora_mins, restricciones_por_pareja.get(pid, {}), scheduler.duracion)
+            for pid in (partido.pareja1_id, partido.pareja2_id)
+        ):
+            motivo = MOTIVO_RESTRICCION
+        elif (fecha_hora, partido.cancha_id) in ocupadas:
+            motivo = MOTIVO_CANCHA_OCUPADA
+        elif not scheduler.jugadores_libres_en(jugadores(partido), fecha_hora):
+            motivo = MOTIVO_DESCANSO
+
+        if motivo is None:
+            fijar(partido)
+            sin_cambios += 1
+        else:
+            a_mover.append((partido, motivo))
+
+    # Reubicar con first-fit (mismo orden que el fixture: por zona)
+    a_mover.sort(key=lambda item: (item[0].zona_id or 0, item[0].id))
+    lista_jugadores, mascaras, asignaciones = [], [], []
+    for partido, _ in a_mover:
+        p1, p2 = partido.pareja1_id, partido.pareja2_id
+        lista_jugadores.append(jugadores(partido))
+        mascaras.append(
+            scheduler.mascara_restricciones(restricciones_por_pareja.get(p1, {}), p1)
+            | scheduler.mascara_restricciones(restricciones_por_pareja.get(p2, {}), p2)
+        )
+        asignaciones.append(scheduler.buscar_slot(lista_jugadores[-1], mascaras[-1]))
+        if asignaciones[-1] is not None:
+            scheduler.ocupar(asignaciones[-1][0], asignaciones[-1][1], lista_jugadores[-1])
+
+    if optimizar and any(a is None for a in asignaciones):
+        asignaciones = FixtureOptimizer(
+            scheduler, lista_jugadores, mascaras, asignaciones
+        ).optimizar(tiempo_limite)
+
+    movidos = []
+    for (partido, motivo), asignacion in zip(a_mover, asignaciones):
+        nuevo = None
+        if asignacion is not None:
+            fecha, _, hora = slots[asignacion[0]]
+            nuevo = (datetime.strptime(f"{fecha} {hora}", '%Y-%m-%d %H:%M'), cancha_ids[asignacion[1]])
+        movidos.append((partido, motivo, nuevo))
+
+    return {
+        "movidos": movidos,
+        "eliminados": eliminados,
+        "sin_cambios": sin_cambios
+    }
@@ -0,0 +1,220 @@
+"""
+Modo óptimo del fixture: búsqueda local (LNS) sobre el resultado del greedy.
+
+El greedy first-fit deja partidos sin programar aunque exista un fixture
+factible (ej: un partido sin restricciones ocupa el único horario posible de
+otro). Este optimizador parte de la asignación del greedy y, mientras haya
+tiempo, toma un partido sin lugar, lo mete en un slot permitido desalojando
+a lo sumo unos pocos partidos que lo bloquean (por cancha o por descanso) y
+reubica los desalojados con first-fit. El movimiento se acepta si no baja la
+cantidad de partidos programados.
+
+Respeta las mismas reglas que FixtureScheduler (restricciones de pareja,
+descanso mínimo por jugador, una cancha por partido y partidos existentes
+de otras categorías, que nunca se mueven). Devuelve la mejor asignación
+encontrada, que nunca es peor que la de entrada.
+
+Es un módulo puro: no usa SQLAlchemy ni solvers externos.
+"""
+import random
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .fixture_scheduler import FixtureScheduler
+
+
+TIEMPO_LIMITE_SEGUNDOS = 5.0
+MAX_DESALOJOS = 2
+INTENTOS_POR_PARTIDO = 8
+# Iteraciones seguidas sin mejorar antes de cortar (aunque sobre tiempo)
+MAX_ITERACIONES_SIN_MEJORA = 20000
+
+Asignacion = Optional[Tuple[int, int]]
+
+
+class FixtureOptimizer:
+    """
+    Uso:
+        optimizer = FixtureOptimizer(scheduler, jugadores, mascaras, asignaciones)
+        mejores = optimizer.optimizar(tiempo_limite=5)
+
+    `scheduler` ya tiene registrados los partidos existentes y las
+    `asignaciones` iniciales (tal como queda después del greedy).
+    """
+
+    def __init__(
+        self,
+        scheduler: FixtureScheduler,
+        jugadores: Sequence[Sequence[int]],
+        mascaras: Sequence[int],
+        asignaciones: Sequence[Asignacion],
+        seed: int = 0,
+        max_desalojos: int = MAX_DESALOJOS
+    ):
+        self.scheduler = scheduler
+        self.jugadores = [list(j) for j in jugadores]
+        self.mascaras = list(mascaras)
+        self.asignaciones: List[Asignacion] = list(asignaciones)
+        self.max_desalojos = max_desalojos
+        self.rng = random.Random(seed)
+
+        # Partidos movibles por clave de slot y por jugador
+        self._por_clave: Dict[int, Dict[int, int]] = {}
+        self._por_jugador: Dict[int, Set[int]] = {}
+        # Slots permitidos por restricciones (se calculan al necesitarlos)
+        self._slots_validos: Dict[int, List[int]] = {}
+
+        for i, asignacion in enumerate(self.asignaciones):
+            if asignacion is not None:
+                self._indexar(i, asignacion)
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+
+    def _indexar(self, i: int, asignacion: Tuple[int, int]):
+        indice_slot, indice_cancha = asignacion
+        self._por_clave.setdefault(self.scheduler.clave_de_slot(indice_slot), {})[indice_cancha] = i
+        for jugador_id in self.jugadores[i]:
+            self._por_jugador.setdefault(jugador_id, set()).add(i)
+
+    def _colocar(self, i: int, indice_slot: int, indice_cancha: int):
+        self.scheduler.ocupar(indice_slot, indice_cancha, self.jugadores[i])
+        self.asignaciones[i] = (indice_slot, indice_cancha)
+        self._indexar(i, (indice_slot, indice_cancha))
+
+    def _quitar(self, i: int) -> Tuple[int, int]:
+        indice_slot, indice_cancha = self.asignaciones[i]
+        self.scheduler.liberar(indice_slot, indice_cancha, self.jugadores[i])
+        del self._por_clave[self.scheduler.clave_de_slot(indice_slot)][indice_cancha]
+        for jugador_id in self.jugadores[i]:
+            self._por_jugador[jugador_id].discard(i)
+        self.asignaciones[i] = None
+        return indice_slot, indice_cancha
+
+    def _validos(self, i: int) -> List[int]:
+        validos = self._slots_validos.get(i)
+        if validos is None:
+            mascara = self.mascaras[i]
+            validos = [s for s in range(len(self.scheduler.slots)) if not mascara >> s & 1]
+            self._slots_validos[i] = validos
+        return validos
+
+    def programados(self) -> int:
+        return sum(1 for a in self.asignaciones if a is not None)
+
+    # ------------------------------------------------------------------
+    # Movimiento: insertar con desalojo
+    # ------------------------------------------------------------------
+
+    def _bloqueantes_descanso(self, i: int, indice_slot: int) -> Set[int]:
+        minutos = self.scheduler.minutos[indice_slot]
+        descanso = self.scheduler.descanso_minimo
+        bloqueantes = set()
+        for jugador_id in self.jugadores[i]:
+            for k in self._por_jugador.get(jugador_id, ()):
+                if abs(self.scheduler.minutos[self.asignaciones[k][0]] - minutos) < descanso:
+                    bloqueantes.add(k)
+        return bloqueantes
+
+    def _intentar(self, i: int, indice_slot: int) -> bool:
+        """
+        Mete el partido i en el slot desalojando bloqueantes.
+        Devuelve True si el movimiento se aceptó (no baja la cantidad programada).
+        """
+        bloqueantes = self._bloqueantes_descanso(i, indice_slot)
+        if len(bloqueantes) > self.max_desalojos:
+            return False
+
+        anteriores = {k: self._quitar(k) for k in sorted(bloqueantes)}
+
+        def deshacer():
+            for k, (s, c) in anteriores.items():
+                self._colocar(k, s, c)
+
+        # Si sigue sin descanso, el conflicto es con un partido fijo
+        if not self.scheduler.jugadores_libres(self.jugadores[i], indice_slot):
+            deshacer()
+            return False
+
+        indice_cancha = self.scheduler.cancha_libre(indice_slot)
+        if indice_cancha is None:
+            ocupantes = list(self._por_clave.get(self.scheduler.clave_de_slot(indice_slot), {}).values())
+            if not ocupantes or len(anteriores) >= self.max_desalojos:
+                deshacer()
+                return False
+            k = self.rng.choice(ocupantes)
+            anteriores[k] = self._quitar(k)
+            indice_cancha = self.scheduler.cancha_libre(indice_slot)
+
+        self._colocar(i, indice_slot, indice_cancha)
+
+        # Reubicar desalojados con first-fit
+        desalojados = list(anteriores)
+        self.rng.shuffle(desalojados)
+        reubicados = []
+        for k in desalojados:
+            asignacion = self.scheduler.buscar_slot(self.jugadores[k], self.mascaras[k])
+            if asignacion is not None:
+                self._colocar(k, *asignacion)
+                reubicados.append(k)
+
+        if 1 + len(reubicados) - len(desalojados) >= 0:
+            return True
+
+        # Empeora: volver al estado anterior
+        for k in reubicados:
+            self._quitar(k)
+        self._quitar(i)
+        deshacer()
+        return False
+
+    # ------------------------------------------------------------------
+    # Búsqueda
+    # ------------------------------------------------------------------
+
+    def optimizar(
+        self,
+        tiempo_limite: float = TIEMPO_LIMITE_SEGUNDOS,
+        max_iteraciones: Optional[int] = None
+    ) -> List[Asignacion]:
+        """
+        Búsqueda local con presupuesto de tiempo (segundos de reloj).
+
+        Returns:
+            La mejor asignación encontrada: una entrada por partido,
+            (indice_slot, indice_cancha) o None
+        """
+        limite = time.perf_counter() + tiempo_limite
+        mejor = list(self.asignaciones)
+        mejor_programados = self.programados()
+        iteracion = 0
+        ultima_mejora = 0
+
+        while mejor_programados < len(self.asignaciones):
+            if max_iteraciones is not None and iteracion >= max_iteraciones:
+                break
+            if iteracion - ultima_mejora >= MAX_ITERACIONES_SIN_MEJORA:
+                break
+            if time.perf_counter() >= limite:
+                break
+            iteracion += 1
+
+            # Partidos sin lugar que tienen al menos un slot permitido
+            sin_lugar = [i for i, a in enumerate(self.asignaciones) if a is None and self._validos(i)]
+            if not sin_lugar:
+                break
+            i = self.rng.choice(sin_lugar)
+            candidatos = self._validos(i)
+
+            for indice_slot in self.rng.sample(candidatos, min(INTENTOS_POR_PARTIDO, len(candidatos))):
+                if self._intentar(i, indice_slot):
+                    break
+
+            programados = self.programados()
+            if programados > mejor_programados:
+                mejor = list(self.asignaciones)
+                mejor_programados = programados
+                ultima_mejora = iteracion
+
+        return mejor
@@ -0,0 +1,294 @@
+"""
+Motor de asignación de horarios y canchas para el fixture de torneos.
+
+Reemplaza el loop "partido × slot" de TorneoFixtureGlobalService por estructuras
+precalculadas:
+- Slots como offsets enteros en minutos (se parsean una sola vez)
+- Ocupación por jugador en listas ordenadas (bisect) para la regla de descanso
+- Bitmap de canchas ocupadas por slot
+- Bitset de slots prohibidos por pareja (restricciones_por_dia compiladas una vez)
+
+Es un módulo puro (sin SQLAlchemy): recibe datos ya cargados y devuelve índices.
+El resultado es idéntico al greedy first-fit original.
+"""
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..utils.disponibilidad import mascara_rango
+
+
+DURACION_PARTIDO_MINUTOS = 70
+DESCANSO_MINIMO_MINUTOS = 180
+
+
+def hora_a_minutos(hora: str) -> int:
+    """Convierte 'HH:MM' a minutos desde medianoche"""
+    h, m = hora.split(':')[:2]
+    return int(h) * 60 + int(m)
+
+
+def datetime_a_minutos(fecha_hora: datetime) -> float:
+    """
+    Convierte un datetime a minutos absolutos (misma escala que los slots).
+    Los segundos se conservan como fracción para no alterar la regla de descanso.
+    """
+    if fecha_hora.tzinfo is not None:
+        fecha_hora = fecha_hora.replace(tzinfo=None)
+    minutos = fecha_hora.toordinal() * 1440 + fecha_hora.hour * 60 + fecha_hora.minute
+    if fecha_hora.second or fecha_hora.microsecond:
+        return minutos + fecha_hora.second / 60 + fecha_hora.microsecond / 60_000_000
+    return minutos
+
+
+def pareja_disponible(
+    dia: str,
+    hora_mins: int,
+    restricciones_por_dia: Dict,
+    duracion: int = DURACION_PARTIDO_MINUTOS
+) -> bool:
+    """
+    True si un partido que empieza en hora_mins NO se solapa con ninguna restricción.
+
+    restricciones_por_dia puede traer por día el bitmap compilado
+    (utils/disponibilidad.py) o la lista de rangos (inicio, fin) en minutos.
+    Un partido que empieza exactamente cuando termina la restricción no es conflicto.
+    """
+    if not restricciones_por_dia or dia not in restricciones_por_dia:
+        return True
+
+    restricciones = restricciones_por_dia[dia]
+    if isinstance(restricciones, int):
+        return not restricciones & mascara_rango(hora_mins, hora_mins + duracion)
+
+    partido_fin = hora_mins + duracion
+    for inicio_mins, fin_mins in restricciones:
+        if hora_mins < fin_mins and partido_fin > inicio_mins:
+            return False
+    return True
+
+
+class FixtureScheduler:
+    """
+    Asignador greedy first-fit indexado.
+
+    Uso:
+        scheduler = FixtureScheduler(slots, cancha_ids)
+        scheduler.registrar_existente(fecha_hora, cancha_id, jugadores)
+        asignacion = scheduler.asignar(jugadores, restr_pareja1, restr_pareja2)
+        # asignacion = (indice_slot, indice_cancha) o None
+    """
+
+    def __init__(
+        self,
+        slots: Sequence[Tuple[str, str, str]],
+        cancha_ids: Sequence[int],
+        duracion: int = DURACION_PARTIDO_MINUTOS,
+        descanso_minimo: int = DESCANSO_MINIMO_MINUTOS
+    ):
+        self.slots = list(slots)
+        self.cancha_ids = list(cancha_ids)
+        self.duracion = duracion
+        self.descanso_minimo = descanso_minimo
+
+        self._indice_cancha = {cid: i for i, cid in enumerate(self.cancha_ids)}
+        self._canchas_llenas = (1 << len(self.cancha_ids)) - 1
+
+        # Offsets en minutos por slot y clave (fecha, hora) compartida: si el
+        # mismo horario aparece dos veces en la lista, comparte ocupación.
+        self.minutos: List[int] = []
+        self._clave_slot: List[int] = []
+        self._clave_por_fecha_hora: Dict[Tuple[str, str], int] = {}
+        self._slots_por_clave: List[int] = []  # bitmask de índices de slot por clave
+        self._dia_hora: List[Tuple[str, int]] = []
+
+        ordinales: Dict[str, int] = {}
+        for idx, (fecha, dia, hora) in enumerate(self.slots):
+            if fecha not in ordinales:
+                ordinales[fecha] = date.fromisoformat(fecha).toordinal() * 1440
+            hora_mins = hora_a_minutos(hora)
+            self.minutos.append(ordinales[fecha] + hora_mins)
+            self._dia_hora.append((dia, hora_mins))
+
+            clave = self._clave_por_fecha_hora.get((fecha, hora))
+            if clave is None:
+                clave = len(self._slots_por_clave)
+                self._clave_por_fecha_hora[(fecha, hora)] = clave
+                self._slots_por_clave.append(0)
+            self._clave_slot.append(clave)
+            self._slots_por_clave[clave] |= 1 << idx
+
+        # Bitmap de canchas ocupadas por clave de slot
+        self._ocupacion: List[int] = [0] * len(self._slots_por_clave)
+        # Bitset de slots sin ninguna cancha libre
+        self._todos_los_slots = (1 << len(self.slots)) - 1
+        self._slots_llenos = 0 if self.cancha_ids else self._todos_los_slots
+
+        # Ocupación por jugador: minutos de inicio ordenados
+        self._agenda_jugador: Dict[int, List[float]] = {}
+
+        # Cache de bitsets de restricciones por pareja
+        self._mascaras: Dict[object, int] = {}
+
+    # ------------------------------------------------------------------
+    # Restricciones
+    # ------------------------------------------------------------------
+
+    def mascara_restricciones(self, restricciones_por_dia: Dict, clave=None) -> int:
+        """
+        Compila restricciones_por_dia a un bitset de slots prohibidos.
+        Si se pasa una clave (ej: pareja_id) el resultado se cachea.
+        """
+        if clave is not None and clave in self._mascaras:
+            return self._mascaras[clave]
+
+        mascara = 0
+        if restricciones_por_dia:
+            por_dia_hora: Dict[Tuple[str, int], bool] = {}
+            for idx, dia_hora in enumerate(self._dia_hora):
+                libre = por_dia_hora.get(dia_hora)
+                if libre is None:
+                    libre = pareja_disponible(
+                        dia_hora[0], dia_hora[1], restricciones_por_dia, self.duracion
+                    )
+                    por_dia_hora[dia_hora] = libre
+                if not libre:
+                    mascara |= 1 << idx
+
+        if clave is not None:
+            self._mascaras[clave] = mascara
+        return mascara
+
+    # ------------------------------------------------------------------
+    # Ocupación
+    # ------------------------------------------------------------------
+
+    def _marcar_cancha(self, clave: int, indice_cancha: int):
+        ocupadas = self._ocupacion[clave] | (1 << indice_cancha)
+        self._ocupacion[clave] = ocupadas
+        if ocupadas == self._canchas_llenas:
+            self._slots_llenos |= self._slots_por_clave[clave]
+
+    def _registrar_jugadores(self, jugadores: Iterable[int], minutos: float):
+        for jugador_id in jugadores:
+            insort(self._agenda_jugador.setdefault(jugador_id, []), minutos)
+
+    def _liberar_jugadores(self, jugadores: Iterable[int], minutos: float):
+        for jugador_id in jugadores:
+            agenda = self._agenda_jugador[jugador_id]
+            del agenda[bisect_left(agenda, minutos)]
+
+    def registrar_existente(
+        self,
+        fecha_hora: datetime,
+        cancha_id: Optional[int],
+        jugadores: Optional[Iterable[int]] = None
+    ):
+        """
+        Marca un partido ya programado (ej: de otra categoría).
+
+        La cancha solo se bloquea si el partido empieza exactamente en un slot
+        de la grilla; los jugadores siempre cuentan para la regla de descanso.
+        """
+        if fecha_hora.tzinfo is not None:
+            fecha_hora = fecha_hora.replace(tzinfo=None)
+
+        clave = self._clave_por_fecha_hora.get(
+            (fecha_hora.strftime('%Y-%m-%d'), fecha_hora.strftime('%H:%M'))
+        )
+        indice_cancha = self._indice_cancha.get(cancha_id)
+        if clave is not None and indice_cancha is not None:
+            self._marcar_cancha(clave, indice_cancha)
+
+        if jugadores:
+            self._registrar_jugadores(jugadores, datetime_a_minutos(fecha_hora))
+
+    def _jugador_libre(self, jugador_id: int, minutos: int) -> bool:
+        agenda = self._agenda_jugador.get(jugador_id)
+        if not agenda:
+            return True
+        # Conflicto si existe t con |t - minutos| < descanso
+        i = bisect_right(agenda, minutos - self.descanso_minimo)
+        return i >= len(agenda) or agenda[i] >= minutos + self.descanso_minimo
+
+    # ------------------------------------------------------------------
+    # Asignación
+    # ------------------------------------------------------------------
+
+    def buscar_slot(self, jugadores: Sequence[int], mascara_prohibida: int = 0) -> Optional[Tuple[int, int]]:
+        """
+        Primer slot (en el orden de la lista) válido para los jugadores.
+        No modifica la ocupación.
+
+        Returns:
+            (indice_slot, indice_cancha) o None
+        """
+        candidatos = self._todos_los_slots & ~(mascara_prohibida | self._slots_llenos)
+        while candidatos:
+            bit = candidatos & -candidatos
+            idx = bit.bit_length() - 1
+            candidatos ^= bit
+
+            minutos = self.minutos[idx]
+            if all(self._jugador_libre(j, minutos) for j in jugadores):
+                libres = ~self._ocupacion[self._clave_slot[idx]] & self._canchas_llenas
+                libre = libres & -libres
+                return idx, libre.bit_length() - 1
+        return None
+
+    def ocupar(self, indice_slot: int, indice_cancha: int, jugadores: Sequence[int]):
+        """Registra la asignación de un partido"""
+        self._marcar_cancha(self._clave_slot[indice_slot], indice_cancha)
+        self._registrar_jugadores(jugadores, self.minutos[indice_slot])
+
+    def liberar(self, indice_slot: int, indice_cancha: int, jugadores: Sequence[int]):
+        """Deshace un ocupar() (lo usa la búsqueda local del modo óptimo)"""
+        clave = self._clave_slot[indice_slot]
+        if self._ocupacion[clave] == self._canchas_llenas:
+            self._slots_llenos &= ~self._slots_por_clave[clave]
+        self._ocupacion[clave] &= ~(1 << indice_cancha)
+        self._liberar_jugadores(jugadores, self.minutos[indice_slot])
+
+    def clave_de_slot(self, indice_slot: int) -> int:
+        """Clave de ocupación (fecha, hora) compartida por slots repetidos"""
+        return self._clave_slot[indice_slot]
+
+    def cancha_libre(self, indice_slot: int) -> Optional[int]:
+        """Índice de la primera cancha libre en el slot, o None"""
+        libres = ~self._ocupacion[self._clave_slot[indice_slot]] & self._canchas_llenas
+        if not libres:
+            return None
+        return (libres & -libres).bit_length() - 1
+
+    def jugadores_libres(self, jugadores: Sequence[int], indice_slot: int) -> bool:
+        """True si ningún jugador rompe la regla de descanso en el slot"""
+        minutos = self.minutos[indice_slot]
+        return all(self._jugador_libre(j, minutos) for j in jugadores)
+
+    def jugadores_libres_en(self, jugadores: Sequence[int], fecha_hora: datetime) -> bool:
+        """Igual que jugadores_libres para un horario que puede estar fuera de la grilla"""
+        minutos = datetime_a_minutos(fecha_hora)
+        return all(self._jugador_libre(j, minutos) for j in jugadores)
+
+    def asignar(
+        self,
+        jugadores: Sequence[int],
+        restricciones_pareja1: Optional[Dict] = None,
+        restricciones_pareja2: Optional[Dict] = None,
+        pareja1_id=None,
+        pareja2_id=None
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Busca y ocupa el primer slot válido para un partido.
+
+        Returns:
+            (indice_slot, indice_cancha) o None si no hay lugar
+        """
+        mascara = (
+            self.mascara_restricciones(restricciones_pareja1 or {}, pareja1_id)
+            | self.mascara_restricciones(restricciones_pareja2 or {}, pareja2_id)
+        )
+        asignacion = self.buscar_slot(jugadores, mascara)
+        if asignacion is not None:
+            self.ocupar(asignacion[0], asignacion[1], jugadores)
+        return asignacion
@@ -0,0 +1,377 @@
+"""
+Índice de intervalos de partidos (cancha × tiempo, pareja × tiempo, jugador × tiempo).
+
+Compartido por la verificación de solapamientos del torneo y por la
+validación de cambios manuales de horario. Todos los partidos de un torneo
+duran lo mismo (duracion_partido_minutos del torneo), así que dos partidos
+se solapan si sus inicios están a menos de una duración, y violan el
+descanso si un jugador en común tiene los inicios a menos del descanso mínimo.
+
+- detectar_solapamientos: sweep sobre inicios ordenados por clave, O(n log n + k)
+- OcupacionTorneo: listas ordenadas (bisect) para consultar un horario puntual
+- RegistroOcupacion: una OcupacionTorneo por torneo, cacheada y actualizada
+  en el lugar cuando se mueve un partido
+
+Es un módulo puro (sin SQLAlchemy).
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .fixture_scheduler import DURACION_PARTIDO_MINUTOS, DESCANSO_MINIMO_MINUTOS, datetime_a_minutos
+
+
+# Partido programado: inicio en minutos absolutos (datetime_a_minutos)
+PartidoIntervalo = namedtuple(
+    'PartidoIntervalo',
+    ['id', 'inicio', 'cancha_id', 'pareja1_id', 'pareja2_id']
+)
+
+CONFLICTO_CANCHA = 'cancha'
+CONFLICTO_PAREJA = 'pareja'
+CONFLICTO_DESCANSO = 'descanso'
+
+
+def _minutos_regla(torneo, clave: str, default: int) -> int:
+    reglas = getattr(torneo, 'reglas_json', None) or {}
+    try:
+        valor = int(reglas.get(clave) or 0)
+    except (TypeError, ValueError, AttributeError):
+        valor = 0
+    return valor if valor > 0 else default
+
+
+def duracion_partido_torneo(torneo) -> int:
+    """Duración de partido del torneo (reglas_json.duracion_partido_minutos, default 70)"""
+    return _minutos_regla(torneo, 'duracion_partido_minutos', DURACION_PARTIDO_MINUTOS)
+
+
+def descanso_minimo_torneo(torneo) -> int:
+    """Descanso mínimo entre partidos de un jugador (reglas_json.descanso_minimo_minutos, default 180)"""
+    return _minutos_regla(torneo, 'descanso_minimo_minutos', DESCANSO_MINIMO_MINUTOS)
+
+
+def partido_intervalo(id, fecha_hora: datetime, cancha_id, pareja1_id, pareja2_id) -> PartidoIntervalo:
+    return PartidoIntervalo(id, datetime_a_minutos(fecha_hora), cancha_id, pareja1_id, pareja2_id)
+
+
+# ----------------------------------------------------------------------
+# Verificación completa del torneo
+# ----------------------------------------------------------------------
+
+def _barrer(grupos: Dict, ventana: float):
+    """
+    Para cada clave, pares de partidos con inicios a menos de `ventana`.
+    Yields (clave, partido_a, partido_b) con partido_a.inicio <= partido_b.inicio
+    """
+    for clave, partidos in grupos.items():
+        if len(partidos) < 2:
+            continue
+        partidos.sort(key=lambda p: (p.inicio, p.id))
+        n = len(partidos)
+        for i, a in enumerate(partidos):
+            limite = a.inicio + ventana
+            j = i + 1
+            while j < n and partidos[j].inicio < limite:
+                yield clave, a, partidos[j]
+                j += 1
+
+
+def detectar_solapamientos(
+    partidos: Iterable[PartidoIntervalo],
+    jugadores_por_pareja: Dict[int, Sequence[int]],
+    duracion: int = DURACION_PARTIDO_MINUTOS,
+    descanso: int = DESCANSO_MINIMO_MINUTOS
+) -> List[Dict]:
+    """
+    Todos los conflictos del fixture en O(n log n + k):
+    - cancha: misma cancha con partidos solapados
+    - pareja: la misma pareja en dos partidos solapados
+    - descanso: un jugador (de cualquier categoría) con menos del descanso
+      mínimo entre dos partidos (si no es ya un conflicto de pareja)
+
+    Returns:
+        [{tipo, partido1, partido2, claves}] ordenados por horario, con
+        partido1 el que empieza antes y claves las canchas/parejas/jugadores en común
+    """
+    por_cancha = defaultdict(list)
+    por_pareja = defaultdict(list)
+    por_jugador = defaultdict(list)
+    for partido in partidos:
+        if partido.cancha_id:
+            por_cancha[partido.cancha_id].append(partido)
+        jugadores = set()
+        for pareja_id in {partido.pareja1_id, partido.pareja2_id}:
+            if pareja_id is None:
+                continue
+            por_pareja[pareja_id].append(partido)
+            jugadores.update(jugadores_por_pareja.get(pareja_id, ()))
+        for jugador_id in jugadores:
+            por_jugador[jugador_id].append(partido)
+
+    conflictos: Dict[Tuple[str, int, int], Dict] = {}
+
+    def registrar(tipo, clave, a, b):
+        item = conflictos.get((tipo, a.id, b.id))
+        if item is None:
+            item = conflictos[(tipo, a.id, b.id)] = {
+                "tipo": tipo, "partido1": a, "partido2": b, "claves": []
+            }
+        item["claves"].append(clave)
+
+    for clave, a, b in _barrer(por_cancha, duracion):
+        registrar(CONFLICTO_CANCHA, clave, a, b)
+    for clave, a, b in _barrer(por_pareja, duracion):
+        registrar(CONFLICTO_PAREJA, clave, a, b)
+    for clave, a, b in _barrer(por_jugador, descanso):
+        if (CONFLICTO_PAREJA, a.id, b.id) not in conflictos:
+            registrar(CONFLICTO_DESCANSO, clave, a, b)
+
+    orden_tipo = {CONFLICTO_CANCHA: 0, CONFLICTO_PAREJA: 1, CONFLICTO_DESCANSO: 2}
+    return sorted(
+        conflictos.values(),
+        key=lambda c: (c["partido1"].inicio, c["partido1"].id, c["partido2"].inicio, c["partido2"].id, orden_tipo[c["tipo"]])
+    )
+
+
+# ----------------------------------------------------------------------
+# Consultas puntuales (cambio manual de horario)
+# ----------------------------------------------------------------------
+
+class _Linea:
+    """Inicios ordenados de una clave (cancha o jugador) con sus partidos"""
+
+    __slots__ = ('inicios', 'ids')
+
+    def __init__(self):
+        self.inicios: List[float] = []
+        self.ids: List[int] = []
+
+    def agregar(self, inicio: float, partido_id: int):
+        i = bisect_right(self.inicios, inicio)
+        self.inicios.insert(i, inicio)
+        self.ids.insert(i, partido_id)
+
+    def quitar(self, inicio: float, partido_id: int):
+        i = bisect_left(self.inicios, inicio)
+        while self.ids[i] != partido_id:
+            i += 1
+        del self.inicios[i]
+        del self.ids[i]
+
+    def cercanos(self, inicio: float, ventana: float) -> List[int]:
+        """Partidos con |inicio_otro - inicio| < ventana"""
+        desde = bisect_right(self.inicios, inicio - ventana)
+        hasta = bisect_left(self.inicios, inicio + ventana)
+        return self.ids[desde:hasta]
+
+
+class OcupacionTorneo:
+    """
+    Ocupación de un torneo por cancha y por jugador.
+
+    Uso:
+        ocupacion = OcupacionTorneo(duracion, descanso)
+        ocupacion.agregar(partido_intervalo(...), jugadores)
+        conflictos = ocupacion.conflictos(partido_id, fecha_hora, cancha_id)
+    """
+
+    def __init__(
+        self,
+        duracion: int = DURACION_PARTIDO_MINUTOS,
+        descanso: int = DESCANSO_MINIMO_MINUTOS,
+        jugadores_por_pareja: Optional[Dict[int, Sequence[int]]] = None
+    ):
+        self.duracion = duracion
+        self.descanso = descanso
+        self.parejas: Dict[int, Tuple[int, ...]] = {
+            pareja_id: tuple(jugadores) for pareja_id, jugadores in (jugadores_por_pareja or {}).items()
+        }
+        self.partidos: Dict[int, PartidoIntervalo] = {}
+        self.jugadores: Dict[int, Tuple[int, ...]] = {}
+        self._canchas: Dict[int, _Linea] = defaultdict(_Linea)
+        self._por_jugador: Dict[int, _Linea] = defaultdict(_Linea)
+
+    def agregar(self, partido: PartidoIntervalo, jugadores: Iterable[int]):
+        self.quitar(partido.id)
+        jugadores = tuple(sorted(set(jugadores)))
+        self.partidos[partido.id] = partido
+        self.jugadores[partido.id] = jugadores
+        if partido.cancha_id:
+            self._canchas[partido.cancha_id].agregar(partido.inicio, partido.id)
+        for jugador_id in jugadores:
+            self._por_jugador[jugador_id].agregar(partido.inicio, partido.id)
+
+    def jugadores_de(self, pareja1_id: Optional[int], pareja2_id: Optional[int]) -> Tuple[int, ...]:
+        return self.parejas.get(pareja1_id, ()) + self.parejas.get(pareja2_id, ())
+
+    def mover(
+        self,
+        partido_id: int,
+        fecha_hora: Optional[datetime],
+        cancha_id: Optional[int],
+        pareja1_id: Optional[int] = None,
+        pareja2_id: Optional[int] = None
+    ):
+        """
+        Aplica un cambio de horario ya confirmado. fecha_hora None saca el partido.
+        Las parejas se toman del partido registrado si no se pasan.
+        """
+        anterior = self.partidos.get(partido_id)
+        if fecha_hora is None:
+            self.quitar(partido_id)
+            return
+        if anterior is not None and pareja1_id is None and pareja2_id is None:
+            pareja1_id, pareja2_id = anterior.pareja1_id, anterior.pareja2_id
+        self.agregar(
+            partido_intervalo(partido_id, fecha_hora, cancha_id, pareja1_id, pareja2_id),
+            self.jugadores_de(pareja1_id, pareja2_id)
+        )
+
+    def quitar(self, partido_id: int):
+        partido = self.partidos.pop(partido_id, None)
+        if partido is None:
+            return
+        if partido.cancha_id:
+            self._canchas[partido.cancha_id].quitar(partido.inicio, partido_id)
+        for jugador_id in self.jugadores.pop(partido_id):
+            self._por_jugador[jugador_id].quitar(partido.inicio, partido_id)
+
+    def conflictos(
+        self,
+        partido_id: int,
+        fecha_hora: datetime,
+        cancha_id: Optional[int],
+        jugadores: Optional[Iterable[int]] = None
+    ) -> List[Tuple[str, int, Tuple[int, ...], float]]:
+        """
+        Conflictos de ubicar el partido en fecha_hora/cancha_id (sin modificar nada).
+
+        Args:
+            jugadores: Jugadores del partido; si se omite se usan los registrados
+
+        Returns:
+            [(tipo, otro_partido_id, jugadores_en_comun, diferencia_minutos)]
+            Un partido con conflicto de cancha no se repite como conflicto de descanso.
+        """
+        inicio = datetime_a_minutos(fecha_hora)
+        if jugadores is None:
+            jugadores = self.jugadores.get(partido_id, ())
+
+        resultado = []
+        en_cancha = set()
+        if cancha_id and cancha_id in self._canchas:
+            for otro_id in self._canchas[cancha_id].cercanos(inicio, self.duracion):
+                if otro_id != partido_id:
+                    en_cancha.add(otro_id)
+                    resultado.append((CONFLICTO_CANCHA, otro_id, (), abs(self.partidos[otro_id].inicio - inicio)))
+
+        comunes: Dict[int, List[int]] = defaultdict(list)
+        for jugador_id in sorted(set(jugadores)):
+            if jugador_id not in self._por_jugador:
+                continue
+            for otro_id in self._por_jugador[jugador_id].cercanos(inicio, self.descanso):
+                if otro_id != partido_id and otro_id not in en_cancha:
+                    comunes[otro_id].append(jugador_id)
+
+        for otro_id, jugadores_comunes in comunes.items():
+            resultado.append((
+                CONFLICTO_DESCANSO, otro_id, tuple(jugadores_comunes),
+                abs(self.partidos[otro_id].inicio - inicio)
+            ))
+
+        resultado.sort(key=lambda c: (self.partidos[c[1]].inicio, c[1]))
+        return resultado
+
+
+class RegistroOcupacion:
+    """
+    Ocupaciones cacheadas por torneo (thread-safe).
+
+    La primera consulta de un torneo la construye con `construir` (una carga
+    completa); después los cambios de horario confirmados se aplican con
+    mover() y las consultas son búsquedas bisect. Quien reescribe el fixture
+    en bloque (generación, reprogramación, playoffs, bajas) llama a invalidar().
+    El TTL acota lo que puede durar un índice desactualizado por escrituras
+    de otro proceso.
+    """
+
+    def __init__(self, ttl_segundos: float = 600):
+        self.ttl_segundos = ttl_segundos
+        self._lock = threading.RLock()
+        self._ocupaciones: Dict[int, Tuple[OcupacionTorneo, float]] = {}
+
+    def _vigente(self, torneo_id: int) -> Optional[OcupacionTorneo]:
+        entrada = self._ocupaciones.get(torneo_id)
+        if entrada is None:
+            return None
+        if time.monotonic() > entrada[1]:
+            del self._ocupaciones[torneo_id]
+            return None
+        return entrada[0]
+
+    def conflictos(
+        self,
+        torneo_id: int,
+        construir: Callable[[], OcupacionTorneo],
+        partido_id: int,
+        fecha_hora: datetime,
+        cancha_id: Optional[int],
+        pareja1_id: Optional[int] = None,
+        pareja2_id: Optional[int] = None
+    ) -> Tuple[OcupacionTorneo, List[Tuple[str, int, Tuple[int, ...], float]]]:
+        """
+        Conflictos de ubicar el partido (ver OcupacionTorneo.conflictos).
+        Returns: (ocupación usada, conflictos)
+        """
+        with self._lock:
+            ocupacion = self._vigente(torneo_id)
+        if ocupacion is None:
+            # Construir fuera del lock: no bloquear consultas de otros torneos
+            nueva = construir()
+            with self._lock:
+                ocupacion = self._vigente(torneo_id)
+                if ocupacion is None:
+                    ocupacion = nueva
+                    self._ocupaciones[torneo_id] = (nueva, time.monotonic() + self.ttl_segundos)
+        with self._lock:
+            jugadores = None
+            if partido_id not in ocupacion.partidos:
+                jugadores = ocupacion.jugadores_de(pareja1_id, pareja2_id)
+            return ocupacion, ocupacion.conflictos(partido_id, fecha_hora, cancha_id, jugadores)
+
+    def mover(
+        self,
+        torneo_id: int,
+        partido_id: int,
+        fecha_hora: Optional[datetime],
+        cancha_id: Optional[int],
+        pareja1_id: Optional[int] = None,
+        pareja2_id: Optional[int] = None
+    ):
+        """Aplica un cambio confirmado (no hace nada si el torneo no está cacheado)"""
+        with self._lock:
+            ocupacion = self._vigente(torneo_id)
+            if ocupacion is not None:
+                ocupacion.mover(partido_id, fecha_hora, cancha_id, pareja1_id, pareja2_id)
+
+    def invalidar(self, torneo_id: Optional[int] = None):
+        with self._lock:
+            if torneo_id is None:
+                self._ocupaciones.clear()
+            else:
+                self._ocupaciones.pop(torneo_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "torneos": len(self._ocupaciones),
+                "partidos": sum(len(o.partidos) for o, _ in self._ocupaciones.values())
+            }
+
+
+# Instancia global (una por proceso)
+ocupaciones = RegistroOcupacion()
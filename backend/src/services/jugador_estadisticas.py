@@ -0,0 +1,76 @@
+"""
+Agregados por jugador para el ranking (tabla jugador_estadisticas)
+
+Sin dependencias de base de datos: acumula las filas de historial_rating de
+una escritura (un partido o un lote) por jugador, para aplicarlas con un solo
+UPSERT (ver jugador_estadisticas_service), y calcula la tendencia.
+
+- partidos_jugados: partidos distintos con fila de historial (cualquier
+  partidos.estado: cuenta si se le aplicó ELO)
+- partidos_ganados: filas con delta > 0 (victoria)
+- ultimos_deltas: los últimos ULTIMOS deltas, el más reciente primero
+- ultimo_partido: fecha del partido más reciente
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+ULTIMOS = 5
+UMBRAL_TENDENCIA = 10
+
+
+def acumular(
+    historial: Iterable[Mapping[str, Any]],
+    fechas: Optional[Mapping[int, datetime]] = None
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Agrupa por jugador filas de historial (dicts con id_usuario, id_partido
+    y delta) que vienen en orden cronológico.
+
+    Args:
+        fechas: {id_partido: fecha} para ultimo_partido (None si no se conoce)
+
+    Returns:
+        {id_usuario: {partidos_jugados, partidos_ganados, ultimos_deltas, ultimo_partido}}
+    """
+    fechas = fechas or {}
+    acumulado: Dict[int, Dict[str, Any]] = {}
+    partidos: Dict[int, set] = {}
+    for fila in historial:
+        id_usuario = fila['id_usuario']
+        datos = acumulado.get(id_usuario)
+        if datos is None:
+            datos = acumulado[id_usuario] = {
+                'partidos_jugados': 0,
+                'partidos_ganados': 0,
+                'ultimos_deltas': [],
+                'ultimo_partido': None
+            }
+            partidos[id_usuario] = set()
+        if fila['id_partido'] not in partidos[id_usuario]:
+            partidos[id_usuario].add(fila['id_partido'])
+            datos['partidos_jugados'] += 1
+        if fila['delta'] > 0:
+            datos['partidos_ganados'] += 1
+        datos['ultimos_deltas'].insert(0, int(fila['delta']))
+        del datos['ultimos_deltas'][ULTIMOS:]
+        fecha = fechas.get(fila['id_partido'])
+        if fecha is not None and (datos['ultimo_partido'] is None or fecha > datos['ultimo_partido']):
+            datos['ultimo_partido'] = fecha
+    return acumulado
+
+
+def tendencia(ultimos_deltas: Optional[Sequence[int]]) -> str:
+    """'up' / 'down' / 'stable' según la suma de los últimos deltas; 'neutral' sin cambios"""
+    suma = sum(ultimos_deltas or ())
+    if suma > UMBRAL_TENDENCIA:
+        return "up"
+    if suma < -UMBRAL_TENDENCIA:
+        return "down"
+    if suma != 0:
+        return "stable"
+    return "neutral"
+
+
+def filas_upsert(acumulado: Dict[int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Parámetros del UPSERT, en orden de id_usuario (orden de locks estable entre transacciones)"""
+    return [{'id_usuario': id_usuario, **acumulado[id_usuario]} for id_usuario in sorted(acumulado)]
@@ -0,0 +1,132 @@
+"""
+Estadísticas agregadas por jugador (tabla jugador_estadisticas)
+
+- Se actualizan en la misma transacción que escribe historial_rating
+  (registrar): un UPSERT por escritura, sin leer el historial
+- reconstruir / reconciliar las recalculan desde historial_rating completo
+  (migración inicial, replay de ELO, correcciones manuales)
+- El ranking lee partidos jugados/ganados y tendencia de acá en lugar de
+  agrupar todo el historial en cada consulta
+- Cuenta toda fila de historial_rating (un partido cuenta si se le aplicó
+  ELO), sin mirar partidos.estado: las dos vías dan lo mismo aunque el estado
+  cambie después de escribir el historial (la auto-confirmación aplica ELO
+  sin pasar el partido a 'confirmado')
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import logging
+
+from .jugador_estadisticas import ULTIMOS, acumular, filas_upsert
+
+logger = logging.getLogger(__name__)
+
+_SQL_REGISTRAR = f"""
+    INSERT INTO jugador_estadisticas AS e
+        (id_usuario, partidos_jugados, partidos_ganados, ultimos_deltas, ultimo_partido, actualizado_en)
+    VALUES (:id_usuario, :partidos_jugados, :partidos_ganados,
+            CAST(:ultimos_deltas AS INTEGER[]), :ultimo_partido, now())
+    ON CONFLICT (id_usuario) DO UPDATE SET
+        partidos_jugados = e.partidos_jugados + EXCLUDED.partidos_jugados,
+        partidos_ganados = e.partidos_ganados + EXCLUDED.partidos_ganados,
+        ultimos_deltas = (EXCLUDED.ultimos_deltas || e.ultimos_deltas)[1:{ULTIMOS}],
+        ultimo_partido = GREATEST(e.ultimo_partido, EXCLUDED.ultimo_partido),
+        actualizado_en = now()
+"""
+
+# Agregados desde el historial completo (una pasada, un GROUP BY)
+_SQL_CALCULAR = f"""
+    SELECT h.id_usuario,
+           COUNT(DISTINCT h.id_partido) AS partidos_jugados,
+           COUNT(*) FILTER (WHERE h.delta > 0) AS partidos_ganados,
+           (ARRAY_AGG(h.delta ORDER BY p.fecha DESC, h.id_partido DESC, h.id_historial DESC))[1:{ULTIMOS}]
+               AS ultimos_deltas,
+           MAX(p.fecha) AS ultimo_partido
+    FROM historial_rating h
+    JOIN partidos p ON p.id_partido = h.id_partido
+    GROUP BY h.id_usuario
+"""
+
+_CAMPOS = ('partidos_jugados', 'partidos_ganados', 'ultimos_deltas', 'ultimo_partido')
+
+
+class JugadorEstadisticasService:
+    """Mantiene jugador_estadisticas junto con historial_rating"""
+
+    @staticmethod
+    def registrar(
+        db: Session,
+        historial: Iterable[Mapping[str, Any]],
+        fechas: Optional[Mapping[int, datetime]] = None
+    ) -> None:
+        """
+        Suma filas recién escritas en historial_rating (en orden cronológico)
+        a las estadísticas de cada jugador. No hace commit.
+
+        Args:
+            historial: dicts con id_usuario, id_partido y delta
+            fechas: {id_partido: fecha del partido}
+        """
+        filas = filas_upsert(acumular(historial, fechas))
+        if filas:
+            db.execute(text(_SQL_REGISTRAR), filas)
+
+    @staticmethod
+    def reconstruir(db: Session) -> int:
+        """
+        Recalcula toda la tabla desde historial_rating. No hace commit.
+
+        Returns:
+            Cantidad de jugadores con estadísticas
+        """
+        db.execute(text("DELETE FROM jugador_estadisticas"))
+        resultado = db.execute(text(f"""
+            INSERT INTO jugador_estadisticas
+                (id_usuario, partidos_jugados, partidos_ganados, ultimos_deltas, ultimo_partido, actualizado_en)
+            SELECT id_usuario, partidos_jugados, partidos_ganados, ultimos_deltas, ultimo_partido, now()
+            FROM ({_SQL_CALCULAR}) calculadas
+        """))
+        return resultado.rowcount
+
+    @staticmethod
+    def reconciliar(db: Session, aplicar: bool = True) -> Dict:
+        """
+        Compara la tabla contra el historial y (si aplicar) la reconstruye.
+
+        Args:
+            aplicar: Si False solo compara (dry-run)
+        """
+        calculadas = {
+            fila.id_usuario: {campo: getattr(fila, campo) for campo in _CAMPOS}
+            for fila in db.execute(text(_SQL_CALCULAR))
+        }
+        guardadas = {
+            fila.id_usuario: {campo: getattr(fila, campo) for campo in _CAMPOS}
+            for fila in db.execute(text(
+                f"SELECT id_usuario, {', '.join(_CAMPOS)} FROM jugador_estadisticas"
+            ))
+        }
+
+        diferencias = [
+            {
+                "id_usuario": id_usuario,
+                "guardada": guardadas.get(id_usuario),
+                "calculada": calculadas.get(id_usuario)
+            }
+            for id_usuario in sorted(calculadas.keys() | guardadas.keys())
+            if guardadas.get(id_usuario) != calculadas.get(id_usuario)
+        ]
+
+        if aplicar:
+            JugadorEstadisticasService.reconstruir(db)
+            db.commit()
+            logger.info(f"jugador_estadisticas reconstruida: {len(calculadas)} jugadores, {len(diferencias)} corregidos")
+
+        return {
+            "aplicado": aplicar,
+            "jugadores": len(calculadas),
+            "filas_corregidas": len(diferencias),
+            "diferencias": diferencias
+        }
@@ -0,0 +1,349 @@
+"""
+Índice de ranking en memoria (order statistics por rating)
+
+Sin dependencias de base de datos. Por cada vista (todos, por sexo, por
+categoría) un árbol de Fenwick sobre el rating cuenta jugadores por valor, y
+cada rating tiene su cubeta de ids ordenados. Orden del ranking: rating
+descendente, empates por id_usuario ascendente.
+
+- posicion(id): O(log R + log cubeta)
+- pagina(offset, limit) y vecinos: O(log R) por cada rating distinto devuelto
+- actualizar / quitar: O(log R) + inserción en la cubeta
+
+R es el rango de ratings cubierto por el árbol (crece solo si aparece un
+rating fuera de rango). La carga completa (cargar) construye las vistas nuevas
+aparte y reaplica los cambios que llegaron mientras se leía la base.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+TODOS = ('todos',)
+RATING_MINIMO = 0
+TAMANO_INICIAL = 4096
+
+# (id_usuario, rating, sexo, id_categoria)
+FilaUsuario = Tuple[int, Optional[int], Optional[str], Optional[int]]
+# (posicion, id_usuario, rating)
+FilaRanking = Tuple[int, int, int]
+
+
+def normalizar_sexo(sexo: Optional[str]) -> Optional[str]:
+    """'M' / 'masculino' -> 'M', 'F' / 'femenino' -> 'F' (como el filtro del ranking)"""
+    if sexo in ('M', 'masculino'):
+        return 'M'
+    if sexo in ('F', 'femenino'):
+        return 'F'
+    return None
+
+
+def vista(sexo: Optional[str] = None, categoria: Optional[int] = None) -> Hashable:
+    """Clave de la vista: por categoría, por sexo o todos"""
+    if categoria is not None:
+        return ('categoria', int(categoria))
+    sexo = normalizar_sexo(sexo)
+    if sexo is not None:
+        return ('sexo', sexo)
+    return TODOS
+
+
+def vistas_de(sexo: Optional[str], id_categoria: Optional[int]) -> List[Hashable]:
+    """Vistas en las que aparece un jugador"""
+    vistas = [TODOS]
+    sexo = normalizar_sexo(sexo)
+    if sexo is not None:
+        vistas.append(('sexo', sexo))
+    if id_categoria is not None:
+        vistas.append(('categoria', int(id_categoria)))
+    return vistas
+
+
+class OrdenRating:
+    """Jugadores ordenados por rating (desc) e id (asc) con posición en O(log n)"""
+
+    def __init__(self, minimo: int = RATING_MINIMO, tamano: int = TAMANO_INICIAL):
+        self._base = minimo
+        self._arbol = [0] * (tamano + 1)
+        self._cubetas: Dict[int, List[int]] = {}
+        self._rating: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._rating)
+
+    def __contains__(self, id_usuario: int) -> bool:
+        return id_usuario in self._rating
+
+    def rating(self, id_usuario: int) -> Optional[int]:
+        return self._rating.get(id_usuario)
+
+    # -- Fenwick -------------------------------------------------------
+
+    def _sumar(self, rating: int, delta: int) -> None:
+        i = rating - self._base + 1
+        arbol = self._arbol
+        while i < len(arbol):
+            arbol[i] += delta
+            i += i & -i
+
+    def _hasta(self, rating: int) -> int:
+        """Jugadores con rating <= rating"""
+        i = min(rating - self._base + 1, len(self._arbol) - 1)
+        total = 0
+        arbol = self._arbol
+        while i > 0:
+            total += arbol[i]
+            i -= i & -i
+        return total
+
+    def _k_esimo_menor(self, k: int) -> int:
+        """Rating del k-ésimo jugador de menor a mayor (1-based)"""
+        arbol = self._arbol
+        posicion = 0
+        paso = 1 << (len(arbol) - 1).bit_length()
+        while paso:
+            siguiente = posicion + paso
+            if siguiente < len(arbol) and arbol[siguiente] < k:
+                posicion = siguiente
+                k -= arbol[siguiente]
+            paso >>= 1
+        return posicion + self._base
+
+    def _asegurar(self, rating: int) -> None:
+        """Agranda el rango del árbol (al doble) si el rating no entra"""
+        tamano = len(self._arbol) - 1
+        if self._base <= rating < self._base + tamano:
+            return
+        minimo = min(self._base, rating)
+        maximo = max(self._base + tamano, rating + 1)
+        while tamano < maximo - minimo:
+            tamano *= 2
+        self._base = minimo
+        self._arbol = [0] * (tamano + 1)
+        for valor, ids in self._cubetas.items():
+            self._sumar(valor, len(ids))
+
+    # -- Cambios -------------------------------------------------------
+
+    def agregar(self, id_usuario: int, rating: int) -> None:
+        """Agrega o mueve al jugador al rating dado"""
+        rating = int(rating)
+        anterior = self._rating.get(id_usuario)
+        if anterior == rating:
+            return
+        if anterior is not None:
+            self.quitar(id_usuario)
+        self._asegurar(rating)
+        self._rating[id_usuario] = rating
+        insort(self._cubetas.setdefault(rating, []), id_usuario)
+        self._sumar(rating, 1)
+
+    def quitar(self, id_usuario: int) -> None:
+        rating = self._rating.pop(id_usuario, None)
+        if rating is None:
+            return
+        cubeta = self._cubetas[rating]
+        del cubeta[bisect_left(cubeta, id_usuario)]
+        if not cubeta:
+            del self._cubetas[rating]
+        self._sumar(rating, -1)
+
+    # -- Consultas -----------------------------------------------------
+
+    def posicion(self, id_usuario: int) -> Optional[int]:
+        """Posición (1-based) del jugador; None si no está"""
+        rating = self._rating.get(id_usuario)
+        if rating is None:
+            return None
+        mayores = len(self._rating) - self._hasta(rating)
+        return mayores + bisect_left(self._cubetas[rating], id_usuario) + 1
+
+    def pagina(self, offset: int, limit: int) -> List[FilaRanking]:
+        """[(posicion, id_usuario, rating)] desde la posición offset + 1"""
+        total = len(self._rating)
+        filas: List[FilaRanking] = []
+        posicion = max(offset, 0) + 1
+        while len(filas) < limit and posicion <= total:
+            rating = self._k_esimo_menor(total - posicion + 1)
+            mayores = total - self._hasta(rating)
+            cubeta = self._cubetas[rating]
+            for id_usuario in cubeta[posicion - mayores - 1:posicion - mayores - 1 + limit - len(filas)]:
+                filas.append((posicion, id_usuario, rating))
+                posicion += 1
+        return filas
+
+    def vecinos(self, id_usuario: int, cantidad: int) -> List[FilaRanking]:
+        """El jugador con hasta `cantidad` jugadores arriba y abajo"""
+        posicion = self.posicion(id_usuario)
+        if posicion is None:
+            return []
+        desde = max(posicion - cantidad, 1)
+        return self.pagina(desde - 1, posicion + cantidad - desde + 1)
+
+
+class RankingIndice:
+    """Vistas del ranking (todos / sexo / categoría), seguras entre threads"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._vistas: Dict[Hashable, OrdenRating] = {}
+        self._jugadores: Dict[int, Tuple[int, Optional[str], Optional[int]]] = {}
+        self._durante_carga: Optional[List[Tuple[str, tuple]]] = None
+        self.cargado_en: Optional[float] = None
+        self.cambios = 0
+        self._vencido = False
+
+    @property
+    def cargado(self) -> bool:
+        return self.cargado_en is not None
+
+    def vigente(self, ttl_segundos: float) -> bool:
+        return (
+            not self._vencido
+            and self.cargado_en is not None
+            and time.monotonic() - self.cargado_en < ttl_segundos
+        )
+
+    def vencer(self) -> None:
+        """Marca el índice para recargar (se sigue usando hasta que se recargue)"""
+        self._vencido = True
+
+    # -- Carga ---------------------------------------------------------
+
+    def cargar(self, leer: Callable[[], Iterable[FilaUsuario]]) -> int:
+        """
+        Reemplaza el índice con las filas que devuelve `leer` (id, rating,
+        sexo, id_categoria). Los cambios aplicados mientras se lee se
+        reaplican sobre el índice nuevo antes de reemplazarlo.
+
+        Returns:
+            Cantidad de jugadores cargados
+        """
+        with self._lock:
+            self._durante_carga = []
+            self._vencido = False
+        try:
+            filas = list(leer())
+        except Exception:
+            with self._lock:
+                self._durante_carga = None
+            raise
+
+        vistas: Dict[Hashable, OrdenRating] = {}
+        jugadores: Dict[int, Tuple[int, Optional[str], Optional[int]]] = {}
+        for id_usuario, rating, sexo, id_categoria in filas:
+            if rating is None:
+                continue
+            jugadores[id_usuario] = (int(rating), sexo, id_categoria)
+            for clave in vistas_de(sexo, id_categoria):
+                orden = vistas.get(clave)
+                if orden is None:
+                    orden = vistas[clave] = OrdenRating()
+                orden.agregar(id_usuario, rating)
+
+        with self._lock:
+            pendientes, self._durante_carga = self._durante_carga or [], None
+            anteriores = (self._vistas, self._jugadores)
+            self._vistas, self._jugadores = vistas, jugadores
+            try:
+                for metodo, argumentos in pendientes:
+                    getattr(self, metodo)(*argumentos)
+            except Exception:
+                self._vistas, self._jugadores = anteriores
+                raise
+            self.cargado_en = time.monotonic()
+            return len(self._jugadores)
+
+    # -- Cambios -------------------------------------------------------
+
+    def actualizar(
+        self,
+        id_usuario: int,
+        rating: Optional[int],
+        sexo: Optional[str],
+        id_categoria: Optional[int]
+    ) -> None:
+        """Rating / sexo / categoría actuales del jugador (rating None = sacarlo)"""
+        with self._lock:
+            if self._durante_carga is not None:
+                self._durante_carga.append(('actualizar', (id_usuario, rating, sexo, id_categoria)))
+            self._quitar(id_usuario)
+            self.cambios += 1
+            if rating is None:
+                return
+            self._jugadores[id_usuario] = (int(rating), sexo, id_categoria)
+            for clave in vistas_de(sexo, id_categoria):
+                orden = self._vistas.get(clave)
+                if orden is None:
+                    orden = self._vistas[clave] = OrdenRating()
+                orden.agregar(id_usuario, rating)
+
+    def actualizar_parcial(self, id_usuario: int, **campos) -> None:
+        """Como actualizar, con solo algunos campos (rating, sexo, id_categoria)"""
+        with self._lock:
+            rating, sexo, id_categoria = self._jugadores.get(id_usuario, (None, None, None))
+            self.actualizar(
+                id_usuario,
+                campos.get('rating', rating),
+                campos.get('sexo', sexo),
+                campos.get('id_categoria', id_categoria)
+            )
+
+    def quitar(self, id_usuario: int) -> None:
+        with self._lock:
+            if self._durante_carga is not None:
+                self._durante_carga.append(('quitar', (id_usuario,)))
+            self._quitar(id_usuario)
+
+    def _quitar(self, id_usuario: int) -> None:
+        datos = self._jugadores.pop(id_usuario, None)
+        if datos is None:
+            return
+        _, sexo, id_categoria = datos
+        for clave in vistas_de(sexo, id_categoria):
+            orden = self._vistas.get(clave)
+            if orden is not None:
+                orden.quitar(id_usuario)
+
+    # -- Consultas -----------------------------------------------------
+
+    def total(self, clave: Hashable = TODOS) -> int:
+        with self._lock:
+            orden = self._vistas.get(clave)
+            return len(orden) if orden is not None else 0
+
+    def posicion(self, id_usuario: int, clave: Hashable = TODOS) -> Optional[int]:
+        with self._lock:
+            orden = self._vistas.get(clave)
+            return orden.posicion(id_usuario) if orden is not None else None
+
+    def pagina(self, clave: Hashable, offset: int, limit: int) -> List[FilaRanking]:
+        with self._lock:
+            orden = self._vistas.get(clave)
+            return orden.pagina(offset, limit) if orden is not None else []
+
+    def vecinos(self, id_usuario: int, cantidad: int, clave: Hashable = TODOS) -> List[FilaRanking]:
+        with self._lock:
+            orden = self._vistas.get(clave)
+            return orden.vecinos(id_usuario, cantidad) if orden is not None else []
+
+    def jugador(self, id_usuario: int) -> Optional[Tuple[int, Optional[str], Optional[int]]]:
+        """(rating, sexo, id_categoria) según el índice"""
+        with self._lock:
+            return self._jugadores.get(id_usuario)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'cargado': self.cargado,
+                'jugadores': len(self._jugadores),
+                'vistas': len(self._vistas),
+                'cambios': self.cambios,
+                'segundos_desde_carga': (
+                    round(time.monotonic() - self.cargado_en, 1) if self.cargado_en is not None else None
+                )
+            }
+
+
+# Índice del proceso (ver ranking_indice_service para carga y eventos)
+ranking = RankingIndice()
@@ -0,0 +1,121 @@
+"""
+Carga y mantenimiento del índice de ranking en memoria (ver ranking_indice.py)
+
+- Se carga al iniciar la app y se vuelve a cargar si tiene más de
+  RANKING_INDICE_TTL_SEGUNDOS (cambios hechos por otros workers o por SQL
+  directo)
+- Cambios de rating / sexo / categoría de usuarios se aplican solos al
+  commitear la sesión que los hizo:
+  - ORM (usuario.rating = ...) se detectan en after_flush
+  - UPDATE por primary key en lote (actualizar_filas) en do_orm_execute
+  - Otros UPDATE sobre usuarios (query.update()) marcan el índice para
+    recargar en la próxima consulta
+  Un rollback descarta los cambios recolectados.
+"""
+import os
+import threading
+from typing import List, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+import logging
+
+from ..models.driveplus_models import Usuario
+from .ranking_indice import ranking
+
+logger = logging.getLogger(__name__)
+
+TTL_SEGUNDOS = float(os.getenv("RANKING_INDICE_TTL_SEGUNDOS", "300"))
+
+CAMPOS = ('rating', 'sexo', 'id_categoria')
+CLAVE_CAMBIOS = 'ranking_cambios'
+CLAVE_RECARGAR = 'ranking_recargar'
+
+_carga = threading.Lock()
+
+
+def cargar_indice(db: Session) -> int:
+    """Carga el índice completo desde usuarios (una query). Returns: jugadores"""
+    cantidad = ranking.cargar(lambda: db.execute(
+        select(Usuario.id_usuario, Usuario.rating, Usuario.sexo, Usuario.id_categoria)
+    ).all())
+    logger.info(f"Índice de ranking cargado: {cantidad} jugadores")
+    return cantidad
+
+
+def asegurar_indice(db: Session) -> bool:
+    """
+    Carga el índice si no está cargado o está vencido. Si otro thread ya lo
+    está recargando se sigue usando el anterior.
+
+    Returns:
+        True si el índice se puede usar
+    """
+    if ranking.vigente(TTL_SEGUNDOS):
+        return True
+    if not _carga.acquire(blocking=not ranking.cargado):
+        return True
+    try:
+        if not ranking.vigente(TTL_SEGUNDOS):
+            cargar_indice(db)
+    except Exception as e:
+        logger.error(f"Error cargando índice de ranking: {e}")
+    finally:
+        _carga.release()
+    return ranking.cargado
+
+
+def _cambios(session: Session) -> List[Tuple[int, dict]]:
+    return session.info.setdefault(CLAVE_CAMBIOS, [])
+
+
+@event.listens_for(Session, "after_flush")
+def _recolectar_usuarios(session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, Usuario):
+            _cambios(session).append((obj.id_usuario, {campo: getattr(obj, campo) for campo in CAMPOS}))
+    for obj in session.dirty:
+        if isinstance(obj, Usuario):
+            estado = inspect(obj)
+            if any(estado.attrs[campo].history.has_changes() for campo in CAMPOS):
+                _cambios(session).append((obj.id_usuario, {campo: getattr(obj, campo) for campo in CAMPOS}))
+    for obj in session.deleted:
+        if isinstance(obj, Usuario):
+            _cambios(session).append((obj.id_usuario, {'rating': None}))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _recolectar_updates(orm_execute_state):
+    """UPDATE en lote sobre usuarios (actualizar_filas o query.update())"""
+    if not orm_execute_state.is_update:
+        return
+    if getattr(orm_execute_state.statement, 'table', None) is not Usuario.__table__:
+        return
+    parametros = orm_execute_state.parameters
+    filas = parametros if isinstance(parametros, (list, tuple)) else [parametros] if parametros else []
+    if filas and all('id_usuario' in fila for fila in filas):
+        _cambios(orm_execute_state.session).extend(
+            (fila['id_usuario'], {campo: fila[campo] for campo in CAMPOS if campo in fila})
+            for fila in filas
+            if any(campo in fila for campo in CAMPOS)
+        )
+    else:
+        orm_execute_state.session.info[CLAVE_RECARGAR] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_cambios(session):
+    cambios = session.info.pop(CLAVE_CAMBIOS, None)
+    if session.info.pop(CLAVE_RECARGAR, False):
+        ranking.vencer()  # la próxima consulta lo recarga
+        return
+    if not cambios or not ranking.cargado:
+        return
+    for id_usuario, campos in cambios:
+        ranking.actualizar_parcial(id_usuario, **campos)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_cambios(session):
+    session.info.pop(CLAVE_CAMBIOS, None)
+    session.info.pop(CLAVE_RECARGAR, None)
@@ -0,0 +1,251 @@
+"""
+Carga de resultados de torneo en lote (sin SQLAlchemy)
+
+- Filas desde JSON o CSV (la planilla del día: partido_id,set1,set2,set3)
+- Validación con PadelValidator y conversión al formato resultado_padel
+  que manda el frontend (gamesEquipoA/gamesEquipoB/ganador/completado)
+- EstadoElo: ratings en memoria que se actualizan partido por partido, en
+  orden cronológico; la carga individual usa el mismo cálculo
+
+Formato JSON:
+    {"resultados": [{"partido_id": 812, "sets": ["6-3", "4-6", "6-2"]}, ...]}
+    (cada set también puede ser [6, 3] o {"gamesEquipoA": 6, "gamesEquipoB": 3})
+
+Formato CSV (encabezado opcional, separador coma o punto y coma):
+    partido_id,set1,set2,set3
+    812,6-3,4-6,6-2
+    813,6-1,6-2,
+"""
+import csv
+import io
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..utils.padel_validator import PadelValidator
+from .elo_config import Desenlace
+from .elo_lote import calculadora, resumen_sets
+
+MAX_FILAS = 500
+
+OK = 'ok'
+ERROR = 'error'
+
+_SET = re.compile(r'^\s*(\d{1,2})\s*[-/:]\s*(\d{1,2})\s*$')
+
+
+class FilaResultado:
+    """Una fila del lote: el resultado ya convertido o los errores"""
+    __slots__ = ('fila', 'partido_id', 'resultado', 'errores')
+
+    def __init__(self, fila: int, partido_id: Optional[int]):
+        self.fila = fila
+        self.partido_id = partido_id
+        self.resultado: Optional[Dict] = None
+        self.errores: List[str] = []
+
+    @property
+    def valida(self) -> bool:
+        return not self.errores
+
+    def error(self, mensaje: str) -> 'FilaResultado':
+        self.errores.append(mensaje)
+        return self
+
+
+def _parsear_set(valor: Any) -> Tuple[int, int]:
+    if isinstance(valor, str):
+        coincide = _SET.match(valor)
+        if not coincide:
+            raise ValueError(f"Set inválido: '{valor}' (usar 6-3)")
+        return int(coincide.group(1)), int(coincide.group(2))
+    if isinstance(valor, (list, tuple)) and len(valor) == 2:
+        return int(valor[0]), int(valor[1])
+    if isinstance(valor, dict):
+        if 'gamesEquipoA' in valor:
+            return int(valor['gamesEquipoA']), int(valor.get('gamesEquipoB', 0))
+        if 'juegos_eq1' in valor:
+            return int(valor['juegos_eq1']), int(valor.get('juegos_eq2', 0))
+    raise ValueError(f"Set inválido: {valor!r}")
+
+
+def resultado_padel(sets: Sequence[Tuple[int, int]]) -> Tuple[Optional[Dict], List[str]]:
+    """
+    Valida los sets (pareja1 = equipoA) y arma el resultado_padel.
+
+    Returns:
+        (resultado, errores); resultado es None si hay errores
+    """
+    es_valido, errores = PadelValidator.validar_resultado_completo(
+        [{'juegos_eq1': a, 'juegos_eq2': b} for a, b in sets]
+    )
+    if not es_valido:
+        return None, errores
+    # Igual que la carga individual: con 3 sets tiene que ser 2-1
+    if len(sets) == 3 and (sets[0][0] > sets[0][1]) == (sets[1][0] > sets[1][1]):
+        return None, ["El partido se definió en 2 sets: sobra el tercero"]
+    return {
+        'sets': [
+            {
+                'gamesEquipoA': a,
+                'gamesEquipoB': b,
+                'ganador': 'equipoA' if a > b else 'equipoB',
+                'completado': True
+            }
+            for a, b in sets
+        ]
+    }, []
+
+
+def _fila(numero: int, partido_id: Any, sets: Sequence[Any]) -> FilaResultado:
+    try:
+        partido_id = int(partido_id)
+    except (TypeError, ValueError):
+        return FilaResultado(numero, None).error(f"partido_id inválido: {partido_id!r}")
+    fila = FilaResultado(numero, partido_id)
+    try:
+        juegos = [_parsear_set(s) for s in sets]
+    except (TypeError, ValueError) as e:
+        return fila.error(str(e))
+    fila.resultado, errores = resultado_padel(juegos)
+    fila.errores.extend(errores)
+    return fila
+
+
+def leer_json(datos: Any) -> List[FilaResultado]:
+    """Lista de {"partido_id", "sets"} (o {"resultados": [...]})"""
+    if isinstance(datos, dict):
+        datos = datos.get('resultados')
+    if not isinstance(datos, list):
+        raise ValueError("Se esperaba una lista de resultados")
+    filas = []
+    for numero, item in enumerate(datos, 1):
+        if not isinstance(item, dict):
+            filas.append(FilaResultado(numero, None).error("Cada resultado debe ser un objeto"))
+            continue
+        sets = item.get('sets')
+        if isinstance(sets, str):
+            sets = sets.replace(',', ' ').split()
+        filas.append(_fila(numero, item.get('partido_id'), sets or []))
+    return _finalizar(filas)
+
+
+def leer_csv(texto: str) -> List[FilaResultado]:
+    """partido_id,set1,set2[,set3] por línea; las líneas vacías se ignoran"""
+    muestra = texto[:1024]
+    separador = ';' if muestra.count(';') > muestra.count(',') else ','
+    filas = []
+    numero = 0
+    for columnas in csv.reader(io.StringIO(texto.strip()), delimiter=separador):
+        columnas = [c.strip() for c in columnas]
+        if not any(columnas):
+            continue
+        if numero == 0 and not columnas[0].isdigit() and columnas[0].lower().startswith('partido'):
+            continue  # encabezado
+        numero += 1
+        filas.append(_fila(numero, columnas[0], [c for c in columnas[1:] if c]))
+    return _finalizar(filas)
+
+
+def _finalizar(filas: List[FilaResultado]) -> List[FilaResultado]:
+    if len(filas) > MAX_FILAS:
+        raise ValueError(f"Máximo {MAX_FILAS} resultados por lote")
+    vistos = set()
+    for fila in filas:
+        if fila.partido_id is None:
+            continue
+        if fila.partido_id in vistos:
+            fila.error("Partido repetido en el lote")
+        vistos.add(fila.partido_id)
+    return filas
+
+
+def orden_cronologico(fecha_hora: Optional[datetime], fecha: Optional[datetime], fila: int) -> Tuple:
+    """
+    Clave para aplicar el lote: horario programado del partido (o su fecha
+    de creación), después el número de fila. Las fechas con zona horaria se
+    comparan en UTC.
+    """
+    momento = fecha_hora or fecha
+    if momento is None:
+        return (1, datetime.min, fila)
+    if momento.tzinfo is not None:
+        momento = momento.astimezone(timezone.utc).replace(tzinfo=None)
+    return (0, momento, fila)
+
+
+def entrada_elo(resultado: Dict, pareja1: Sequence[int]) -> Dict:
+    """
+    Sets y games de pareja1 (team_a) y pareja2 (team_b) para EloService.
+
+    El frontend siempre manda pareja1 = equipoA; solo se invierte si el
+    resultado trae 'jugadores' y pareja1 no está en equipoA.
+    """
+    sets = resultado.get('sets', [])
+    jugadores_equipo_a = resultado.get('jugadores', {}).get('equipoA', [])
+    pareja1_es_equipo_a = True
+    if jugadores_equipo_a:
+        ids_equipo_a = {j.get('id') for j in jugadores_equipo_a if j.get('id')}
+        pareja1_es_equipo_a = bool(set(pareja1) & ids_equipo_a)
+
+    propio, rival = ('equipoA', 'equipoB') if pareja1_es_equipo_a else ('equipoB', 'equipoA')
+    games_propio, games_rival = ('gamesEquipoA', 'gamesEquipoB') if pareja1_es_equipo_a else ('gamesEquipoB', 'gamesEquipoA')
+    return {
+        'sets_a': sum(1 for s in sets if s.get('ganador') == propio),
+        'sets_b': sum(1 for s in sets if s.get('ganador') == rival),
+        'games_a': sum(s.get(games_propio, 0) for s in sets),
+        'games_b': sum(s.get(games_rival, 0) for s in sets),
+        'sets_detail': [{'games_a': s.get(games_propio, 0), 'games_b': s.get(games_rival, 0)} for s in sets],
+    }
+
+
+class EstadoElo:
+    """
+    Rating y partidos jugados por jugador, en memoria. aplicar() calcula un
+    partido con los valores actuales y los deja actualizados para el siguiente
+    (elo_lote.calculadora: mismo resultado que calculate_match_ratings).
+    """
+
+    def __init__(self, elo_service, jugadores: Dict[int, Tuple[Optional[int], Optional[int]]]):
+        """jugadores: {id_usuario: (rating, partidos_jugados)} tal como están en usuarios"""
+        self._calcular = calculadora(elo_service)
+        self.rating = {jid: rating or 1200 for jid, (rating, _) in jugadores.items()}
+        self.partidos = {jid: partidos or 0 for jid, (_, partidos) in jugadores.items()}
+
+    def aplicar(
+        self,
+        pareja1: Sequence[int],
+        pareja2: Sequence[int],
+        resultado: Dict,
+        fecha: Optional[datetime] = None
+    ) -> Dict[int, Dict[str, int]]:
+        """
+        Returns:
+            {id_usuario: {'anterior', 'nuevo', 'cambio'}} de los 4 jugadores
+        """
+        faltantes = [jid for jid in (*pareja1, *pareja2) if jid not in self.rating]
+        if faltantes:
+            raise ValueError("No se encontraron todos los jugadores")
+
+        ids = (*pareja1, *pareja2)
+        entrada = entrada_elo(resultado, pareja1)
+        nuevos, cambios_float, *_ = self._calcular(
+            tuple(self.rating[jid] for jid in ids),
+            tuple(self.partidos[jid] for jid in ids),
+            (1.0,) * 4,
+            ids,
+            entrada['sets_a'], entrada['sets_b'], entrada['games_a'], entrada['games_b'],
+            *resumen_sets(entrada['sets_detail']),
+            Desenlace.NORMAL.value, 'torneo', fecha or datetime.now()
+        )
+
+        cambios = {}
+        for jid, nuevo, cambio in zip(ids, nuevos, cambios_float):
+            cambios[jid] = {
+                'anterior': self.rating[jid],
+                'nuevo': nuevo,
+                'cambio': int(round(cambio))
+            }
+            self.rating[jid] = nuevo
+            self.partidos[jid] += 1
+        return cambios
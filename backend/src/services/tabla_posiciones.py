@@ -0,0 +1,153 @@
+"""
+Cálculo de tablas de posiciones de zona por aportes de partido.
+
+Cada partido confirmado de zona aporta a las dos parejas un vector de
+estadísticas (jugados, ganados, perdidos, sets, games, puntos). La tabla es
+la suma de los aportes, así que un resultado cargado o corregido se aplica
+como diferencia (aporte nuevo - aporte anterior) sobre las filas
+materializadas en torneo_tabla_posiciones, sin recorrer toda la zona.
+
+Las reglas son las mismas que TorneoZonaService.obtener_tabla_posiciones:
+- Cuenta si estado es confirmado/finalizado y las dos parejas están en la zona
+- Sets y games solo de sets con completado=true
+- 3 puntos por partido ganado (según ganador_pareja_id)
+- Orden: puntos, diferencia de sets, diferencia de games (estable)
+
+Es un módulo puro (sin SQLAlchemy).
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+ESTADOS_COMPUTABLES = ('confirmado', 'finalizado')
+PUNTOS_VICTORIA = 3
+
+CAMPOS = (
+    'partidos_jugados', 'partidos_ganados', 'partidos_perdidos',
+    'sets_ganados', 'sets_perdidos', 'games_ganados', 'games_perdidos',
+    'puntos'
+)
+
+# Nombre de la columna en TorneoTablaPosiciones para cada campo de la tabla
+COLUMNAS = {
+    'partidos_jugados': 'partidos_jugados',
+    'partidos_ganados': 'partidos_ganados',
+    'partidos_perdidos': 'partidos_perdidos',
+    'sets_ganados': 'sets_favor',
+    'sets_perdidos': 'sets_contra',
+    'games_ganados': 'games_favor',
+    'games_perdidos': 'games_contra',
+    'puntos': 'puntos',
+}
+
+
+def fila_vacia() -> Dict[str, int]:
+    return dict.fromkeys(CAMPOS, 0)
+
+
+def aporte(
+    estado: Optional[str],
+    pareja1_id: Optional[int],
+    pareja2_id: Optional[int],
+    resultado_padel: Optional[Dict],
+    ganador_pareja_id: Optional[int]
+) -> Dict[int, Dict[str, int]]:
+    """
+    Estadísticas que un partido suma a cada pareja ({} si no cuenta).
+    No chequea pertenencia a la zona (eso lo hace quien aplica el aporte).
+    """
+    if estado not in ESTADOS_COMPUTABLES or not pareja1_id or not pareja2_id:
+        return {}
+
+    a, b = fila_vacia(), fila_vacia()
+    a['partidos_jugados'] = b['partidos_jugados'] = 1
+
+    if resultado_padel:
+        sets_a = sets_b = games_a = games_b = 0
+        for set_data in resultado_padel.get('sets', []):
+            if set_data.get('completado'):
+                games_a += set_data.get('gamesEquipoA', 0)
+                games_b += set_data.get('gamesEquipoB', 0)
+                if set_data.get('ganador') == 'equipoA':
+                    sets_a += 1
+                elif set_data.get('ganador') == 'equipoB':
+                    sets_b += 1
+
+        a['sets_ganados'], a['sets_perdidos'] = sets_a, sets_b
+        a['games_ganados'], a['games_perdidos'] = games_a, games_b
+        b['sets_ganados'], b['sets_perdidos'] = sets_b, sets_a
+        b['games_ganados'], b['games_perdidos'] = games_b, games_a
+
+        if ganador_pareja_id == pareja1_id:
+            ganador, perdedor = a, b
+        elif ganador_pareja_id == pareja2_id:
+            ganador, perdedor = b, a
+        else:
+            ganador = perdedor = None
+        if ganador is not None:
+            ganador['partidos_ganados'] = 1
+            ganador['puntos'] = PUNTOS_VICTORIA
+            perdedor['partidos_perdidos'] = 1
+
+    if pareja1_id == pareja2_id:
+        # Dato inconsistente: el recálculo completo suma los dos lados a la misma fila
+        return {pareja1_id: {c: a[c] + b[c] for c in CAMPOS}}
+    return {pareja1_id: a, pareja2_id: b}
+
+
+def aporte_de_partido(partido) -> Dict[int, Dict[str, int]]:
+    """aporte() leyendo los campos de un Partido (o cualquier objeto con esos atributos)"""
+    return aporte(
+        partido.estado, partido.pareja1_id, partido.pareja2_id,
+        partido.resultado_padel, partido.ganador_pareja_id
+    )
+
+
+def diferencia(
+    antes: Dict[int, Dict[str, int]],
+    despues: Dict[int, Dict[str, int]]
+) -> Dict[int, Dict[str, int]]:
+    """despues - antes por pareja; omite parejas y campos sin cambios"""
+    resultado = {}
+    for pareja_id in set(antes) | set(despues):
+        a = antes.get(pareja_id)
+        d = despues.get(pareja_id)
+        cambios = {}
+        for campo in CAMPOS:
+            delta = (d[campo] if d else 0) - (a[campo] if a else 0)
+            if delta:
+                cambios[campo] = delta
+        if cambios:
+            resultado[pareja_id] = cambios
+    return resultado
+
+
+def calcular(pareja_ids: Iterable[int], partidos: Iterable) -> Dict[int, Dict[str, int]]:
+    """
+    Recálculo completo de una zona: {pareja_id: estadísticas} para las
+    parejas de la zona. Solo cuentan partidos entre parejas de la zona.
+    """
+    tabla = {pid: fila_vacia() for pid in pareja_ids}
+    for partido in partidos:
+        if partido.pareja1_id not in tabla or partido.pareja2_id not in tabla:
+            continue
+        for pareja_id, valores in aporte_de_partido(partido).items():
+            fila = tabla[pareja_id]
+            for campo, valor in valores.items():
+                fila[campo] += valor
+    return tabla
+
+
+def clave_orden(fila: Dict) -> tuple:
+    return (
+        -fila['puntos'],
+        -(fila['sets_ganados'] - fila['sets_perdidos']),
+        -(fila['games_ganados'] - fila['games_perdidos'])
+    )
+
+
+def ordenar(filas: Sequence[Dict]) -> List[Dict]:
+    """Ordena (estable) y agrega 'posicion' desde 1"""
+    ordenadas = sorted(filas, key=clave_orden)
+    for i, fila in enumerate(ordenadas, 1):
+        fila['posicion'] = i
+    return ordenadas
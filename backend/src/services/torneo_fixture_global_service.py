@@ -2,15 +2,164 @@
 Servicio para gestión global de fixture considerando todas las categorías y canchas
 """
 from sqlalchemy.orm import Session
-from typing import List, Dict, Set, Tuple, Optional
+from typing import Callable, List, Dict, Set, Tuple, Optional, Iterable
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 
 from ..models.torneo_models import (
     Torneo, TorneoZona, TorneoPareja, TorneoCancha, 
-    TorneoCategoria
+    TorneoCategoria, TorneoZonaPareja
 )
-from ..models.driveplus_models import Partido
+from ..models.driveplus_models import Partido, Usuario
+from ..database.bulk import insertar_filas
+from .fixture_scheduler import FixtureScheduler, pareja_disponible
+from ..utils.disponibilidad import mapa_de_pareja, rangos as rangos_restringidos
+from .fixture_optimizer import FixtureOptimizer, TIEMPO_LIMITE_SEGUNDOS
+from .intervalos import duracion_partido_torneo, descanso_minimo_torneo, ocupaciones
+from .torneo_tabla_service import TorneoTablaService
+
+
+# Modos de asignación: first-fit o first-fit + búsqueda local (fixture_optimizer)
+MODO_GREEDY = 'greedy'
+MODO_OPTIMO = 'optimo'
+
+# Partido ya programado (mismos atributos que Partido para el scheduler)
+PartidoAgendado = namedtuple(
+    'PartidoAgendado',
+    ['fecha_hora', 'cancha_id', 'pareja1_id', 'pareja2_id', 'categoria_id']
+)
+
+
+class ContextoFixture:
+    """
+    Datos del torneo precargados en memoria para generar el fixture.
+
+    Se carga con un puñado de queries por conjunto (categorías, zonas, canchas,
+    parejas por zona, partidos ya programados) y se reutiliza en todo el
+    pipeline: generar_fixture_completo → _generar_fixture_categoria →
+    _asignar_horarios_y_canchas → _guardar_partidos.
+
+    Los objetos ORM se desasocian de la sesión para que los commits intermedios
+    (uno por categoría) no los expiren y disparen un SELECT por objeto.
+    """
+    
+    def __init__(self, torneo: Optional[Torneo] = None):
+        self.torneo = torneo
+        self.categorias: Dict[int, TorneoCategoria] = {}
+        self.zonas: List[TorneoZona] = []
+        self.canchas: List[TorneoCancha] = []
+        self.parejas: Dict[int, TorneoPareja] = {}
+        self.parejas_por_zona: Dict[int, List[TorneoPareja]] = defaultdict(list)
+        self.partidos_agendados: List[PartidoAgendado] = []
+        self.nombres_usuarios: Dict[int, str] = {}
+    
+    @staticmethod
+    def cargar(db: Session, torneo: Torneo, categoria_id: Optional[int] = None) -> "ContextoFixture":
+        """Carga todo lo necesario para generar el fixture del torneo (o de una categoría)"""
+        contexto = ContextoFixture(torneo)
+        torneo_id = torneo.id
+        
+        categorias = db.query(TorneoCategoria).filter(
+            TorneoCategoria.torneo_id == torneo_id
+        ).all()
+        contexto.categorias = {c.id: c for c in categorias}
+        
+        query_zonas = db.query(TorneoZona).filter(TorneoZona.torneo_id == torneo_id)
+        if categoria_id:
+            query_zonas = query_zonas.filter(TorneoZona.categoria_id == categoria_id)
+        contexto.zonas = query_zonas.all()
+        
+        contexto.canchas = db.query(TorneoCancha).filter(
+            TorneoCancha.torneo_id == torneo_id,
+            TorneoCancha.activa == True
+        ).all()
+        
+        zona_ids = [z.id for z in contexto.zonas]
+        if zona_ids:
+            filas = db.query(TorneoZonaPareja.zona_id, TorneoPareja).join(
+                TorneoPareja,
+                TorneoZonaPareja.pareja_id == TorneoPareja.id
+            ).filter(
+                TorneoZonaPareja.zona_id.in_(zona_ids)
+            ).all()
+            for zona_id, pareja in filas:
+                contexto.parejas[pareja.id] = pareja
+                contexto.parejas_por_zona[zona_id].append(pareja)
+        
+        # Partidos de zona ya programados (de cualquier categoría)
+        filas = db.query(
+            Partido.fecha_hora, Partido.cancha_id,
+            Partido.pareja1_id, Partido.pareja2_id, Partido.categoria_id
+        ).filter(
+            Partido.id_torneo == torneo_id,
+            Partido.fase == 'zona',
+            Partido.fecha_hora.isnot(None)
+        ).all()
+        contexto.partidos_agendados = [PartidoAgendado(*fila) for fila in filas]
+        
+        contexto.asegurar_parejas(db, (
+            pid for p in contexto.partidos_agendados for pid in (p.pareja1_id, p.pareja2_id)
+        ))
+        
+        for obj in [torneo, *categorias, *contexto.zonas, *contexto.canchas, *contexto.parejas.values()]:
+            if obj in db:
+                db.expunge(obj)
+        
+        return contexto
+    
+    def asegurar_parejas(self, db: Session, pareja_ids: Iterable[int]):
+        """Carga en una sola query las parejas que todavía no están en el contexto"""
+        faltantes = {pid for pid in pareja_ids if pid is not None and pid not in self.parejas}
+        if not faltantes:
+            return
+        for pareja in db.query(TorneoPareja).filter(TorneoPareja.id.in_(faltantes)).all():
+            self.parejas[pareja.id] = pareja
+            db.expunge(pareja)
+    
+    def asegurar_categorias(self, db: Session, categoria_ids: Iterable[int]):
+        """Carga en una sola query las categorías que todavía no están en el contexto"""
+        faltantes = {cid for cid in categoria_ids if cid and cid not in self.categorias}
+        if not faltantes:
+            return
+        for categoria in db.query(TorneoCategoria).filter(TorneoCategoria.id.in_(faltantes)).all():
+            self.categorias[categoria.id] = categoria
+            db.expunge(categoria)
+    
+    def asegurar_usuarios(self, db: Session, usuario_ids: Iterable[int]):
+        """Carga en una sola query los nombres de usuario que faltan"""
+        faltantes = {uid for uid in usuario_ids if uid is not None and uid not in self.nombres_usuarios}
+        if not faltantes:
+            return
+        filas = db.query(Usuario.id_usuario, Usuario.nombre_usuario).filter(
+            Usuario.id_usuario.in_(faltantes)
+        ).all()
+        for id_usuario, nombre_usuario in filas:
+            self.nombres_usuarios[id_usuario] = nombre_usuario
+    
+    def zonas_de_categoria(self, categoria_id: int) -> List[TorneoZona]:
+        return [z for z in self.zonas if z.categoria_id == categoria_id]
+    
+    def partidos_otras_categorias(self, categoria_id: int) -> List[PartidoAgendado]:
+        """Equivalente a filtrar Partido.categoria_id != categoria_id en SQL (excluye NULL)"""
+        return [
+            p for p in self.partidos_agendados
+            if p.categoria_id is not None and p.categoria_id != categoria_id
+        ]
+    
+    def reemplazar_partidos_categoria(self, categoria_id: Optional[int], partidos_programados: List[Dict]):
+        """Refleja en memoria lo que _guardar_partidos acaba de persistir"""
+        self.partidos_agendados = [
+            p for p in self.partidos_agendados
+            if categoria_id and p.categoria_id != categoria_id
+        ]
+        for partido_data in partidos_programados:
+            self.partidos_agendados.append(PartidoAgendado(
+                datetime.strptime(f"{partido_data['fecha']} {partido_data['hora']}", '%Y-%m-%d %H:%M'),
+                partido_data['cancha_id'],
+                partido_data['pareja1_id'],
+                partido_data['pareja2_id'],
+                partido_data.get('categoria_id')
+            ))
 
 
 class TorneoFixtureGlobalService:
@@ -29,7 +178,10 @@ class TorneoFixtureGlobalService:
         db: Session,
         torneo_id: int,
         user_id: int,
-        categoria_id: Optional[int] = None
+        categoria_id: Optional[int] = None,
+        modo: str = MODO_GREEDY,
+        tiempo_limite: Optional[float] = None,
+        progreso: Optional[Callable[[float, Optional[str]], None]] = None
     ) -> Dict:
         """
         Genera fixture completo para todas las zonas y categorías del torneo
@@ -40,6 +192,9 @@ class TorneoFixtureGlobalService:
             torneo_id: ID del torneo
             user_id: ID del usuario organizador
             categoria_id: (Opcional) ID de categoría específica
+            modo: 'greedy' (default) u 'optimo'
+            tiempo_limite: (Opcional) Segundos totales para el modo óptimo
+            progreso: (Opcional) Callback (porcentaje, mensaje) por categoría terminada
             
         Returns:
             Dict con partidos generados y estadísticas
@@ -52,12 +207,18 @@ class TorneoFixtureGlobalService:
         if torneo.creado_por != user_id:
             raise ValueError("No tienes permisos")
         
+        if modo not in (MODO_GREEDY, MODO_OPTIMO):
+            raise ValueError(f"Modo inválido: {modo} (usar '{MODO_GREEDY}' u '{MODO_OPTIMO}')")
+        if tiempo_limite is None:
+            tiempo_limite = TIEMPO_LIMITE_SEGUNDOS
+        
+        # Precargar todo el torneo en memoria (pocas queries por conjunto)
+        contexto = ContextoFixture.cargar(db, torneo, categoria_id)
+        
         # 🔴 FIX CRÍTICO: Si no se especifica categoría, generar por categoría secuencialmente
         if not categoria_id:
-            # Obtener todas las categorías del torneo
-            categorias = db.query(TorneoCategoria).filter(
-                TorneoCategoria.torneo_id == torneo_id
-            ).all()
+            # Todas las categorías del torneo
+            categorias = list(contexto.categorias.values())
             
             if not categorias:
                 raise ValueError("No hay categorías en el torneo")
@@ -73,11 +234,16 @@ class TorneoFixtureGlobalService:
                 "partidos_sin_programar": []
             }
             
-            for categoria in categorias:
+            # El presupuesto del modo óptimo se reparte entre categorías
+            tiempo_categoria = tiempo_limite / len(categorias)
+            
+            for i, categoria in enumerate(categorias):
 # DEBUG: print(f"\n🔄 Generando fixture para categoría {categoria.nombre} (ID {categoria.id})...")
+                if progreso:
+                    progreso(100 * i / len(categorias), f"Categoría {categoria.nombre}")
                 try:
                     resultado_cat = TorneoFixtureGlobalService._generar_fixture_categoria(
-                        db, torneo_id, user_id, categoria.id
+                        db, torneo_id, user_id, categoria.id, contexto, modo, tiempo_categoria
                     )
                     
                     # Acumular resultados
@@ -96,7 +262,7 @@ class TorneoFixtureGlobalService:
         
         # Si se especifica categoría, generar solo para esa categoría
         return TorneoFixtureGlobalService._generar_fixture_categoria(
-            db, torneo_id, user_id, categoria_id
+            db, torneo_id, user_id, categoria_id, contexto, modo, tiempo_limite
         )
     
     @staticmethod
@@ -104,28 +270,28 @@ class TorneoFixtureGlobalService:
         db: Session,
         torneo_id: int,
         user_id: int,
-        categoria_id: int
+        categoria_id: int,
+        contexto: Optional[ContextoFixture] = None,
+        modo: str = MODO_GREEDY,
+        tiempo_limite: Optional[float] = None
     ) -> Dict:
         """
         Genera fixture para una categoría específica
         Considera partidos ya programados de otras categorías
         """
-        torneo = db.query(Torneo).filter(Torneo.id == torneo_id).first()
+        if contexto is None:
+            torneo = db.query(Torneo).filter(Torneo.id == torneo_id).first()
+            contexto = ContextoFixture.cargar(db, torneo, categoria_id)
+        torneo = contexto.torneo
         
         # Obtener zonas de la categoría
-        zonas = db.query(TorneoZona).filter(
-            TorneoZona.torneo_id == torneo_id,
-            TorneoZona.categoria_id == categoria_id
-        ).all()
+        zonas = contexto.zonas_de_categoria(categoria_id)
         
         if not zonas:
             raise ValueError(f"No hay zonas para la categoría {categoria_id}")
         
         # Obtener canchas disponibles
-        canchas = db.query(TorneoCancha).filter(
-            TorneoCancha.torneo_id == torneo_id,
-            TorneoCancha.activa == True
-        ).all()
+        canchas = contexto.canchas
         
         if not canchas:
             raise ValueError("No hay canchas configuradas")
@@ -135,13 +301,8 @@ class TorneoFixtureGlobalService:
         # Obtener horarios del torneo
         horarios_torneo = torneo.horarios_disponibles or {}
         
-        # 🔴 CRÍTICO: Cargar partidos ya programados de OTRAS categorías
-        partidos_existentes = db.query(Partido).filter(
-            Partido.id_torneo == torneo_id,
-            Partido.fase == 'zona',
-            Partido.categoria_id != categoria_id,
-            Partido.fecha_hora.isnot(None)
-        ).all()
+        # 🔴 CRÍTICO: Partidos ya programados de OTRAS categorías
+        partidos_existentes = contexto.partidos_otras_categorias(categoria_id)
         
 # DEBUG: print(f"   📊 Partidos existentes de otras categorías: {len(partidos_existentes)}")
         
@@ -149,13 +310,13 @@ class TorneoFixtureGlobalService:
         todos_partidos = []
         for zona in zonas:
             partidos_zona = TorneoFixtureGlobalService._generar_partidos_zona(
-                db, zona
+                db, zona, contexto.parejas_por_zona.get(zona.id, [])
             )
             todos_partidos.extend(partidos_zona)
         
         # Obtener disponibilidad de todas las parejas involucradas
         parejas_disponibilidad = TorneoFixtureGlobalService._obtener_disponibilidad_parejas(
-            db, todos_partidos, torneo
+            db, todos_partidos, torneo, contexto
         )
         
         # Generar slots de tiempo disponibles
@@ -171,7 +332,10 @@ class TorneoFixtureGlobalService:
             slots_disponibles,
             canchas,
             num_canchas,
-            partidos_existentes  # Pasar partidos existentes
+            partidos_existentes,  # Pasar partidos existentes
+            contexto,
+            modo,
+            tiempo_limite
         )
         
         partidos_programados = resultado_asignacion['partidos_programados']
@@ -179,7 +343,7 @@ class TorneoFixtureGlobalService:
         
         # Guardar partidos en la base de datos (solo de esta categoría)
         TorneoFixtureGlobalService._guardar_partidos(
-            db, torneo_id, partidos_programados, categoria_id
+            db, torneo_id, partidos_programados, categoria_id, contexto
         )
         
         return {
@@ -195,23 +359,26 @@ class TorneoFixtureGlobalService:
     @staticmethod
     def _generar_partidos_zona(
         db: Session,
-        zona: TorneoZona
+        zona: TorneoZona,
+        parejas: Optional[List[TorneoPareja]] = None
     ) -> List[Dict]:
         """
         Genera todos los partidos de una zona (round-robin)
         
+        Args:
+            parejas: (Opcional) Parejas de la zona ya cargadas; si no se pasan se consultan
+        
         Returns:
             Lista de dicts con info de partidos
         """
-        from ..models.torneo_models import TorneoZonaPareja
-        
         # Obtener parejas de la zona
-        parejas = db.query(TorneoPareja).join(
-            TorneoZonaPareja,
-            TorneoZonaPareja.pareja_id == TorneoPareja.id
-        ).filter(
-            TorneoZonaPareja.zona_id == zona.id
-        ).all()
+        if parejas is None:
+            parejas = db.query(TorneoPareja).join(
+                TorneoZonaPareja,
+                TorneoZonaPareja.pareja_id == TorneoPareja.id
+            ).filter(
+                TorneoZonaPareja.zona_id == zona.id
+            ).all()
         
         if len(parejas) < 2:
             return []
@@ -236,7 +403,8 @@ class TorneoFixtureGlobalService:
     def _obtener_disponibilidad_parejas(
         db: Session,
         partidos: List[Dict],
-        torneo: Torneo
+        torneo: Torneo,
+        contexto: Optional[ContextoFixture] = None
     ) -> Dict[int, Dict]:
         """
         Obtiene restricciones horarias de todas las parejas
@@ -247,128 +415,41 @@ class TorneoFixtureGlobalService:
         [
             {"dias": ["viernes"], "horaInicio": "09:00", "horaFin": "19:00"}
         ]
+        Se usa la versión compilada guardada en la pareja
+        (disponibilidad_compilada); ver utils/disponibilidad.py.
         
         Formato de salida:
         {
             pareja_id: {
                 'restricciones_por_dia': {
-                    'viernes': [(540, 1140)]  # minutos desde medianoche
+                    'viernes': <bitmap de bloques de 5 minutos>
                 },
                 'raw': <datos originales para debug>
             }
         }
         
         Returns:
-            Dict {pareja_id: {'restricciones_por_dia': {dia: [(inicio, fin)]}, 'raw': ...}}
+            Dict {pareja_id: {'restricciones_por_dia': {dia: bitmap}, 'raw': ...}}
         """
         parejas_ids = set()
         for partido in partidos:
             parejas_ids.add(partido['pareja1_id'])
             parejas_ids.add(partido['pareja2_id'])
         
-        resultado = {}
+        # Todas las parejas en una sola query
+        if contexto is None:
+            contexto = ContextoFixture(torneo)
+        contexto.asegurar_parejas(db, parejas_ids)
         
+        resultado = {}
         for pareja_id in parejas_ids:
-            pareja = db.query(TorneoPareja).filter(TorneoPareja.id == pareja_id).first()
+            pareja = contexto.parejas.get(pareja_id)
             if not pareja:
-# DEBUG: print(f"⚠️  Pareja {pareja_id} no encontrada en DB")
-                continue
-            
-            restricciones_raw = pareja.disponibilidad_horaria
-            
-            # 🔴 LOGGING CRÍTICO: Ver datos crudos
-# DEBUG: print(f"\n🔍 Pareja #{pareja_id}:")
-# DEBUG: print(f"   Raw DB: {restricciones_raw}")
-# DEBUG: print(f"   Tipo: {type(restricciones_raw)}")
-            
-            # Parseo robusto con múltiples formatos
-            franjas_restricciones = []
-            
-            if not restricciones_raw:
-                # Caso 1: None o vacío → Sin restricciones
-# DEBUG: print(f"   ✅ Sin restricciones (disponible siempre)")
-                resultado[pareja_id] = {
-                    'restricciones_por_dia': {},
-                    'raw': None
-                }
-                continue
-            
-            elif isinstance(restricciones_raw, list):
-                # Caso 2: Lista directa [{'dias': [...], 'horaInicio': ..., 'horaFin': ...}]
-                franjas_restricciones = restricciones_raw
-# DEBUG: print(f"   📋 Formato: lista directa con {len(franjas_restricciones)} franjas")
-            
-            elif isinstance(restricciones_raw, dict):
-                # Caso 3: Dict con 'franjas' key
-                if 'franjas' in restricciones_raw:
-                    franjas_restricciones = restricciones_raw['franjas']
-# DEBUG: print(f"   📋 Formato: dict con franjas ({len(franjas_restricciones)} franjas)")
-                # Caso 4: Dict con 'restricciones_por_dia' (ya procesado)
-                elif 'restricciones_por_dia' in restricciones_raw:
-# DEBUG: print(f"   📋 Formato: ya procesado")
-                    resultado[pareja_id] = restricciones_raw
-                    continue
-                # Caso 5: Dict directo con dias/horaInicio/horaFin
-                elif 'dias' in restricciones_raw and 'horaInicio' in restricciones_raw:
-                    franjas_restricciones = [restricciones_raw]
-# DEBUG: print(f"   📋 Formato: dict directo (convertido a lista)")
-                else:
-                    # Caso 6: Dict con estructura desconocida → tratar como sin restricciones
-# DEBUG: print(f"   ⚠️  Dict sin estructura conocida → tratando como sin restricciones")
-                    resultado[pareja_id] = {
-                        'restricciones_por_dia': {},
-                        'raw': restricciones_raw
-                    }
-                    continue
-            
-            else:
-                # Caso 7: Tipo inesperado
-                print(f"   ❌ Tipo inesperado: {type(restricciones_raw)} → tratando como sin restricciones")
-                resultado[pareja_id] = {
-                    'restricciones_por_dia': {},
-                    'raw': restricciones_raw
-                }
                 continue
-            
-            # 🔴 PROCESAR FRANJAS COMO RESTRICCIONES (horarios bloqueados)
-            restricciones_por_dia = {}
-            
-            for idx, franja in enumerate(franjas_restricciones):
-                if not isinstance(franja, dict):
-# DEBUG: print(f"   ⚠️  Franja {idx} no es dict: {franja}")
-                    continue
-                
-                dias = franja.get('dias', [])
-                hora_inicio = franja.get('horaInicio') or franja.get('hora_inicio') or franja.get('desde', '00:00')
-                hora_fin = franja.get('horaFin') or franja.get('hora_fin') or franja.get('hasta', '23:59')
-                
-                if not dias:
-# DEBUG: print(f"   ⚠️  Franja {idx} sin días: {franja}")
-                    continue
-                
-                # Convertir a minutos
-                try:
-                    inicio_mins = int(hora_inicio.split(':')[0]) * 60 + int(hora_inicio.split(':')[1])
-                    fin_mins = int(hora_fin.split(':')[0]) * 60 + int(hora_fin.split(':')[1])
-                except (ValueError, IndexError, AttributeError) as e:
-                    print(f"   ❌ Error parseando horas en franja {idx}: {e}")
-                    continue
-                
-                # Normalizar días a lowercase
-                for dia in dias:
-                    dia_norm = str(dia).strip().lower()
-                    if dia_norm not in restricciones_por_dia:
-                        restricciones_por_dia[dia_norm] = []
-                    restricciones_por_dia[dia_norm].append((inicio_mins, fin_mins))
-# DEBUG: print(f"   🚫 {dia_norm}: NO puede {hora_inicio}-{hora_fin} ({inicio_mins}-{fin_mins} mins)")
-            
             resultado[pareja_id] = {
-                'restricciones_por_dia': restricciones_por_dia,
-                'raw': restricciones_raw
+                'restricciones_por_dia': mapa_de_pareja(pareja),
+                'raw': pareja.disponibilidad_horaria
             }
-            
-            if not restricciones_por_dia:
-                pass  # Sin restricciones válidas
         
         return resultado
     
@@ -384,6 +465,8 @@ class TorneoFixtureGlobalService:
             Lista de tuplas (fecha, dia_semana, hora)
         """
         slots = []
+        # Grilla cada duracion_partido_minutos del torneo (default 70)
+        paso = timedelta(minutes=duracion_partido_torneo(torneo))
         
         # 🔴 FIX: Normalizar horarios_torneo si viene como lista
         if isinstance(horarios_torneo, list):
@@ -432,8 +515,8 @@ class TorneoFixtureGlobalService:
                     hora_limite = datetime.strptime(hora_hasta, '%H:%M')
                     
                     # IMPORTANTE: Asegurar que no se generen slots que excedan el límite
-                    # Restar 70 minutos del límite para que el partido termine antes del cierre
-                    hora_limite_ajustada = hora_limite - timedelta(minutes=70)
+                    # Restar la duración del partido para que termine antes del cierre
+                    hora_limite_ajustada = hora_limite - paso
                     
                     while hora_actual <= hora_limite_ajustada:
                         slots.append((
@@ -441,7 +524,7 @@ class TorneoFixtureGlobalService:
                             dia_semana,
                             hora_actual.strftime('%H:%M')
                         ))
-                        hora_actual += timedelta(minutes=70)
+                        hora_actual += paso
                 
                 fecha_actual += timedelta(days=1)
                 continue
@@ -458,8 +541,8 @@ class TorneoFixtureGlobalService:
                 hora_limite = datetime.strptime(hora_hasta, '%H:%M')
                 
                 # IMPORTANTE: Asegurar que no se generen slots que excedan el límite
-                # Restar 70 minutos del límite para que el partido termine antes del cierre
-                hora_limite_ajustada = hora_limite - timedelta(minutes=70)
+                # Restar la duración del partido para que termine antes del cierre
+                hora_limite_ajustada = hora_limite - paso
                 
                 while hora_actual <= hora_limite_ajustada:
                     slots.append((
@@ -467,7 +550,7 @@ class TorneoFixtureGlobalService:
                         dia_semana,
                         hora_actual.strftime('%H:%M')
                     ))
-                    hora_actual += timedelta(minutes=70)
+                    hora_actual += paso
             
             fecha_actual += timedelta(days=1)
         
@@ -487,7 +570,10 @@ class TorneoFixtureGlobalService:
         slots_disponibles: List[Tuple[str, str, str]],
         canchas: List[TorneoCancha],
         num_canchas: int,
-        partidos_existentes: List[Partido] = None
+        partidos_existentes: List[Partido] = None,
+        contexto: Optional[ContextoFixture] = None,
+        modo: str = MODO_GREEDY,
+        tiempo_limite: Optional[float] = None
     ) -> Dict:
         """
         Asigna horarios y canchas a los partidos considerando:
@@ -499,46 +585,64 @@ class TorneoFixtureGlobalService:
         
         Args:
             partidos_existentes: Lista de partidos ya programados (de otras categorías)
+            contexto: Datos precargados; lo que falte se carga con una query por conjunto
+            modo: 'greedy' (first-fit) u 'optimo' (greedy + búsqueda local)
+            tiempo_limite: Segundos para la búsqueda local del modo óptimo
         
         Returns:
             Dict con partidos_programados y partidos_no_programados
         """
         partidos_programados = []
         partidos_no_programados = []
+        partidos_existentes = partidos_existentes or []
+        
+        # Parejas de partidos nuevos y existentes en una sola query
+        if contexto is None:
+            contexto = ContextoFixture()
+        contexto.asegurar_parejas(db, (
+            pid
+            for p in partidos for pid in (p['pareja1_id'], p['pareja2_id'])
+        ))
+        contexto.asegurar_parejas(db, (
+            pid
+            for p in partidos_existentes for pid in (p.pareja1_id, p.pareja2_id)
+        ))
+        parejas = contexto.parejas
+        
+        # Motor indexado: slots en minutos, bitmap de canchas, agenda por jugador
+        scheduler = FixtureScheduler(
+            slots_disponibles,
+            [cancha.id for cancha in canchas],
+            duracion_partido_torneo(contexto.torneo),
+            descanso_minimo_torneo(contexto.torneo)
+        )
         
-        # Mapa de ocupación: {(fecha, hora): [cancha_id, ...]}
-        ocupacion_canchas = defaultdict(list)
+        # Inicializar con partidos existentes de otras categorías
+        for partido_existente in partidos_existentes:
+            if partido_existente.fecha_hora and partido_existente.cancha_id:
+                pareja1 = parejas.get(partido_existente.pareja1_id)
+                pareja2 = parejas.get(partido_existente.pareja2_id)
+                
+                jugadores_existentes = None
+                if pareja1 and pareja2:
+                    jugadores_existentes = [
+                        pareja1.jugador1_id, 
+                        pareja1.jugador2_id, 
+                        pareja2.jugador1_id, 
+                        pareja2.jugador2_id
+                    ]
+                
+                scheduler.registrar_existente(
+                    partido_existente.fecha_hora,
+                    partido_existente.cancha_id,
+                    jugadores_existentes
+                )
         
-        # Tracking de partidos por jugador: {jugador_id: [datetime, ...]}
-        partidos_por_jugador = defaultdict(list)
+        # Partidos que no entraron (el reporte se arma al final con una query de usuarios)
+        sin_lugar = []
         
-        # NUEVO: Inicializar con partidos existentes de otras categorías
-        if partidos_existentes:
-            for partido_existente in partidos_existentes:
-                if partido_existente.fecha_hora and partido_existente.cancha_id:
-                    # Marcar ocupación de cancha
-                    fecha_str = partido_existente.fecha_hora.strftime('%Y-%m-%d')
-                    hora_str = partido_existente.fecha_hora.strftime('%H:%M')
-                    ocupacion_canchas[(fecha_str, hora_str)].append(partido_existente.cancha_id)
-                    
-                    # Obtener parejas del partido existente
-                    pareja1 = db.query(TorneoPareja).filter(TorneoPareja.id == partido_existente.pareja1_id).first()
-                    pareja2 = db.query(TorneoPareja).filter(TorneoPareja.id == partido_existente.pareja2_id).first()
-                    
-                    if pareja1 and pareja2:
-                        # Registrar partidos de jugadores
-                        jugadores_existentes = [
-                            pareja1.jugador1_id, 
-                            pareja1.jugador2_id, 
-                            pareja2.jugador1_id, 
-                            pareja2.jugador2_id
-                        ]
-                        for jugador_id in jugadores_existentes:
-                            # Convertir a naive para evitar error offset-naive vs offset-aware
-                            fh = partido_existente.fecha_hora
-                            if fh.tzinfo is not None:
-                                fh = fh.replace(tzinfo=None)
-                            partidos_por_jugador[jugador_id].append(fh)
+        # Partidos considerados, en orden, con su asignación (para el modo óptimo)
+        considerados = []
         
         # Ordenar partidos por prioridad (ej: zonas con menos partidos primero)
         partidos_ordenados = sorted(partidos, key=lambda p: p['zona_id'])
@@ -547,9 +651,8 @@ class TorneoFixtureGlobalService:
             pareja1_id = partido['pareja1_id']
             pareja2_id = partido['pareja2_id']
             
-            # Obtener parejas para obtener jugadores
-            pareja1 = db.query(TorneoPareja).filter(TorneoPareja.id == pareja1_id).first()
-            pareja2 = db.query(TorneoPareja).filter(TorneoPareja.id == pareja2_id).first()
+            pareja1 = parejas.get(pareja1_id)
+            pareja2 = parejas.get(pareja2_id)
             
             if not pareja1 or not pareja2:
                 continue
@@ -561,81 +664,44 @@ class TorneoFixtureGlobalService:
             datos_pareja1 = parejas_disponibilidad.get(pareja1_id, {'restricciones_por_dia': {}})
             datos_pareja2 = parejas_disponibilidad.get(pareja2_id, {'restricciones_por_dia': {}})
             
-# DEBUG: print(f"\n🎾 Buscando slot para partido: Pareja {pareja1_id} vs Pareja {pareja2_id}")
-            
-            # Buscar slot compatible
-            slot_asignado = None
-            cancha_asignada = None
+            # Buscar primer slot compatible (restricciones, descanso de 180 min, cancha libre)
+            asignacion = scheduler.asignar(
+                jugadores,
+                datos_pareja1.get('restricciones_por_dia', {}),
+                datos_pareja2.get('restricciones_por_dia', {}),
+                pareja1_id,
+                pareja2_id
+            )
             
-            for fecha, dia, hora in slots_disponibles:
-                # 1. VERIFICAR DISPONIBILIDAD HORARIA
-                hora_mins = int(hora.split(':')[0]) * 60 + int(hora.split(':')[1])
-                
-# DEBUG: print(f"   🔍 Evaluando slot: {fecha} {dia} {hora} ({hora_mins} mins)")
-                
-                # Verificar pareja 1
-# DEBUG: print(f"      Verificando Pareja {pareja1_id}:")
-                pareja1_disponible = TorneoFixtureGlobalService._verificar_disponibilidad_pareja(
-                    dia, hora_mins, datos_pareja1
+            considerados.append((partido, pareja1, pareja2, datos_pareja1, datos_pareja2, jugadores, asignacion))
+        
+        asignaciones = [c[-1] for c in considerados]
+        
+        # Modo óptimo: búsqueda local sobre el resultado greedy si quedó algo afuera
+        if modo == MODO_OPTIMO and any(a is None for a in asignaciones):
+            try:
+                optimizer = FixtureOptimizer(
+                    scheduler,
+                    [c[5] for c in considerados],
+                    [
+                        scheduler.mascara_restricciones(c[3].get('restricciones_por_dia', {}), c[0]['pareja1_id'])
+                        | scheduler.mascara_restricciones(c[4].get('restricciones_por_dia', {}), c[0]['pareja2_id'])
+                        for c in considerados
+                    ],
+                    asignaciones
                 )
-                
-                # Verificar pareja 2
-# DEBUG: print(f"      Verificando Pareja {pareja2_id}:")
-                pareja2_disponible = TorneoFixtureGlobalService._verificar_disponibilidad_pareja(
-                    dia, hora_mins, datos_pareja2
+                asignaciones = optimizer.optimizar(
+                    tiempo_limite if tiempo_limite is not None else TIEMPO_LIMITE_SEGUNDOS
                 )
-                
-                if not (pareja1_disponible and pareja2_disponible):
-# DEBUG: print(f"      ❌ Slot rechazado por restricciones horarias")
-                    continue
-                
-                # 2. VERIFICAR TIEMPO MÍNIMO ENTRE PARTIDOS (180 MINUTOS = 3 HORAS)
-                fecha_hora_slot = datetime.strptime(f"{fecha} {hora}", '%Y-%m-%d %H:%M')
-                
-                conflicto_tiempo = False
-                for jugador_id in jugadores:
-                    for fecha_hora_existente in partidos_por_jugador[jugador_id]:
-                        diferencia_minutos = abs((fecha_hora_slot - fecha_hora_existente).total_seconds() / 60)
-                        if diferencia_minutos < 180:  # Mínimo 180 minutos (3 horas)
-# DEBUG: print(f"      ❌ Jugador {jugador_id} tiene partido muy cercano ({diferencia_minutos:.0f} mins)")
-                            conflicto_tiempo = True
-                            break
-                    if conflicto_tiempo:
-                        break
-                
-                if conflicto_tiempo:
-                    continue
-                
-                # 3. VERIFICAR CANCHA DISPONIBLE
-                canchas_ocupadas = ocupacion_canchas[(fecha, hora)]
-                cancha_libre = None
-                
-                for cancha in canchas:
-                    if cancha.id not in canchas_ocupadas:
-                        cancha_libre = cancha
-                        break
-                
-                if not cancha_libre:
-# DEBUG: print(f"      ❌ No hay canchas disponibles en este slot")
-                    continue
-                
-                # ✅ SLOT VÁLIDO ENCONTRADO
-# DEBUG: print(f"      ✅ SLOT VÁLIDO - Cancha {cancha_libre.nombre}")
-                slot_asignado = (fecha, dia, hora)
-                cancha_asignada = cancha_libre
-                break
-            
-            if slot_asignado and cancha_asignada:
-                # PROGRAMAR PARTIDO
-                fecha, dia, hora = slot_asignado
-                fecha_hora_slot = datetime.strptime(f"{fecha} {hora}", '%Y-%m-%d %H:%M')
-                
-                # Marcar ocupación de cancha
-                ocupacion_canchas[(fecha, hora)].append(cancha_asignada.id)
-                
-                # Registrar partidos de jugadores
-                for jugador_id in jugadores:
-                    partidos_por_jugador[jugador_id].append(fecha_hora_slot)
+            except Exception as e:
+                # Fallback: se queda el resultado greedy
+                print(f"⚠️  Modo óptimo falló, se usa greedy: {e}")
+        
+        for (partido, pareja1, pareja2, datos_pareja1, datos_pareja2, _, _), asignacion in zip(considerados, asignaciones):
+            if asignacion is not None:
+                indice_slot, indice_cancha = asignacion
+                fecha, dia, hora = slots_disponibles[indice_slot]
+                cancha_asignada = canchas[indice_cancha]
                 
                 # Agregar partido programado
                 partidos_programados.append({
@@ -646,71 +712,84 @@ class TorneoFixtureGlobalService:
                     "cancha_id": cancha_asignada.id,
                     "cancha_nombre": cancha_asignada.nombre
                 })
-                
             else:
-                # NO SE PUDO PROGRAMAR - Agregar a lista de no programados
-                # Obtener información detallada para el reporte
-                
-                # Obtener nombres de jugadores
-                pareja1_nombres = "Pareja desconocida"
-                pareja2_nombres = "Pareja desconocida"
-                
-                if pareja1:
-                    from ..models.driveplus_models import Usuario
-                    j1 = db.query(Usuario).filter(Usuario.id_usuario == pareja1.jugador1_id).first()
-                    j2 = db.query(Usuario).filter(Usuario.id_usuario == pareja1.jugador2_id).first()
-                    if j1 and j2:
-                        pareja1_nombres = f"{j1.nombre_usuario} & {j2.nombre_usuario}"
-                
-                if pareja2:
-                    from ..models.driveplus_models import Usuario
-                    j1 = db.query(Usuario).filter(Usuario.id_usuario == pareja2.jugador1_id).first()
-                    j2 = db.query(Usuario).filter(Usuario.id_usuario == pareja2.jugador2_id).first()
-                    if j1 and j2:
-                        pareja2_nombres = f"{j1.nombre_usuario} & {j2.nombre_usuario}"
-                
-                # Obtener información de la categoría
-                categoria_info = "Categoría desconocida"
-                if partido.get('categoria_id'):
-                    categoria = db.query(TorneoCategoria).filter(TorneoCategoria.id == partido['categoria_id']).first()
-                    if categoria:
-                        genero_icon = "♂" if categoria.genero == "masculino" else "♀" if categoria.genero == "femenino" else "⚥"
-                        categoria_info = f"{genero_icon} {categoria.nombre}"
-                
-                # Formatear restricciones para mostrar
-                def formatear_restricciones(datos):
-                    restricciones_por_dia = datos.get('restricciones_por_dia', {})
-                    if not restricciones_por_dia:
-                        return "Sin restricciones (disponible en todos los horarios del torneo)"
-                    
-                    result = []
-                    for dia, rangos in restricciones_por_dia.items():
-                        for inicio_mins, fin_mins in rangos:
-                            inicio_str = f"{inicio_mins // 60:02d}:{inicio_mins % 60:02d}"
-                            fin_str = f"{fin_mins // 60:02d}:{fin_mins % 60:02d}"
-                            result.append(f"NO disponible {dia} {inicio_str}-{fin_str}")
-                    return ", ".join(result)
-                
-                # Agregar a lista de no programados con detalles
-                partidos_no_programados.append({
-                    "zona_id": partido['zona_id'],
-                    "zona_nombre": partido['zona_nombre'],
-                    "categoria_id": partido['categoria_id'],
-                    "categoria_nombre": categoria_info,
-                    "pareja1_id": pareja1_id,
-                    "pareja2_id": pareja2_id,
-                    "pareja1_nombre": pareja1_nombres,
-                    "pareja2_nombre": pareja2_nombres,
-                    "motivo": "Sin horarios compatibles o conflicto de tiempo mínimo entre partidos",
-                    "disponibilidad_pareja1": formatear_restricciones(datos_pareja1),
-                    "disponibilidad_pareja2": formatear_restricciones(datos_pareja2)
-                })
+                sin_lugar.append((partido, pareja1, pareja2, datos_pareja1, datos_pareja2))
+        
+        if sin_lugar:
+            # NO SE PUDO PROGRAMAR - Cargar nombres y categorías de una sola vez
+            contexto.asegurar_usuarios(db, (
+                jugador_id
+                for _, pareja1, pareja2, _, _ in sin_lugar
+                for jugador_id in (pareja1.jugador1_id, pareja1.jugador2_id, pareja2.jugador1_id, pareja2.jugador2_id)
+            ))
+            contexto.asegurar_categorias(db, (p['categoria_id'] for p, *_ in sin_lugar))
+            
+            for partido, pareja1, pareja2, datos_pareja1, datos_pareja2 in sin_lugar:
+                partidos_no_programados.append(
+                    TorneoFixtureGlobalService._detalle_no_programado(
+                        partido, pareja1, pareja2, datos_pareja1, datos_pareja2, contexto
+                    )
+                )
         
         return {
             "partidos_programados": partidos_programados,
             "partidos_no_programados": partidos_no_programados
         }
     
+    @staticmethod
+    def _detalle_no_programado(
+        partido: Dict,
+        pareja1: TorneoPareja,
+        pareja2: TorneoPareja,
+        datos_pareja1: Dict,
+        datos_pareja2: Dict,
+        contexto: ContextoFixture
+    ) -> Dict:
+        """Arma el reporte de un partido que no pudo programarse"""
+        nombres = contexto.nombres_usuarios
+        
+        def nombre_pareja(pareja):
+            j1 = nombres.get(pareja.jugador1_id)
+            j2 = nombres.get(pareja.jugador2_id)
+            if j1 and j2:
+                return f"{j1} & {j2}"
+            return "Pareja desconocida"
+        
+        # Obtener información de la categoría
+        categoria_info = "Categoría desconocida"
+        categoria = contexto.categorias.get(partido.get('categoria_id'))
+        if categoria:
+            genero_icon = "♂" if categoria.genero == "masculino" else "♀" if categoria.genero == "femenino" else "⚥"
+            categoria_info = f"{genero_icon} {categoria.nombre}"
+        
+        # Formatear restricciones para mostrar
+        def formatear_restricciones(datos):
+            restricciones_por_dia = datos.get('restricciones_por_dia', {})
+            if not restricciones_por_dia:
+                return "Sin restricciones (disponible en todos los horarios del torneo)"
+            
+            result = []
+            for dia, rangos in rangos_restringidos(restricciones_por_dia).items():
+                for inicio_mins, fin_mins in rangos:
+                    inicio_str = f"{inicio_mins // 60:02d}:{inicio_mins % 60:02d}"
+                    fin_str = f"{fin_mins // 60:02d}:{fin_mins % 60:02d}"
+                    result.append(f"NO disponible {dia} {inicio_str}-{fin_str}")
+            return ", ".join(result)
+        
+        return {
+            "zona_id": partido['zona_id'],
+            "zona_nombre": partido['zona_nombre'],
+            "categoria_id": partido['categoria_id'],
+            "categoria_nombre": categoria_info,
+            "pareja1_id": partido['pareja1_id'],
+            "pareja2_id": partido['pareja2_id'],
+            "pareja1_nombre": nombre_pareja(pareja1),
+            "pareja2_nombre": nombre_pareja(pareja2),
+            "motivo": "Sin horarios compatibles o conflicto de tiempo mínimo entre partidos",
+            "disponibilidad_pareja1": formatear_restricciones(datos_pareja1),
+            "disponibilidad_pareja2": formatear_restricciones(datos_pareja2)
+        }
+    
     @staticmethod
     def _verificar_disponibilidad_pareja(dia: str, hora_mins: int, datos_pareja: Dict) -> bool:
         """
@@ -721,57 +800,27 @@ class TorneoFixtureGlobalService:
         Args:
             dia: Día de la semana en español lowercase (lunes, martes, etc.)
             hora_mins: Hora en minutos desde medianoche
-            datos_pareja: Dict con 'restricciones_por_dia' {dia: [(inicio, fin)]}
+            datos_pareja: Dict con 'restricciones_por_dia' {dia: bitmap}
             
         Returns:
             bool: True si está disponible (NO restringido), False si está restringido
         """
-        restricciones_por_dia = datos_pareja.get('restricciones_por_dia', {})
-        
-        # 🔴 LOGGING DETALLADO
-# DEBUG: print(f"      🔍 Verificando {dia} {hora_mins//60:02d}:{hora_mins%60:02d}")
-# DEBUG: print(f"         Restricciones: {restricciones_por_dia}")
-        
-        # Sin restricciones = disponible siempre
-        if not restricciones_por_dia:
-# DEBUG: print(f"         ✅ Sin restricciones → DISPONIBLE")
-            return True
-        
-        # Verificar si el día tiene restricciones
-        if dia not in restricciones_por_dia:
-# DEBUG: print(f"         ✅ Día sin restricciones → DISPONIBLE")
-            return True  # Día sin restricciones = disponible todo el día
-        
-        # Verificar si la hora está en alguna restricción
-        rangos_restringidos = restricciones_por_dia[dia]
-# DEBUG: print(f"         Rangos restringidos en {dia}: {rangos_restringidos}")
-        
-        for inicio_mins, fin_mins in rangos_restringidos:
-            # 🔴 FIX CRÍTICO: Verificar solapamiento correcto
-            # El partido dura 70 minutos: [hora_mins, hora_mins + 70]
-            # La restricción es: [inicio_mins, fin_mins]
-            # Hay solapamiento si: partido_inicio < restriccion_fin AND partido_fin > restriccion_inicio
-            # Si el partido empieza EXACTAMENTE cuando termina la restricción, NO es conflicto
-            partido_fin = hora_mins + 70
-            
-            # 🔴 CORRECCIÓN: Si el partido empieza ANTES que el fin de la restricción
-            # Y el partido termina DESPUÉS del inicio de la restricción
-            if hora_mins < fin_mins and partido_fin > inicio_mins:
-# DEBUG: print(f"         ❌ SOLAPAMIENTO con restricción {inicio_mins//60:02d}:{inicio_mins%60:02d}-{fin_mins//60:02d}:{fin_mins%60:02d}")
-# DEBUG: print(f"            Partido: {hora_mins//60:02d}:{hora_mins%60:02d}-{partido_fin//60:02d}:{partido_fin%60:02d}")
-# DEBUG: print(f"            Restricción: {inicio_mins//60:02d}:{inicio_mins%60:02d}-{fin_mins//60:02d}:{fin_mins%60:02d}")
-# DEBUG: print(f"            Condición: {hora_mins} <= {fin_mins} AND {partido_fin} > {inicio_mins}")
-                return False  # Hay solapamiento = NO disponible
-        
-# DEBUG: print(f"         ✅ Sin solapamiento → DISPONIBLE")
-        return True  # No hay solapamiento con ninguna restricción = disponible
+        # Hay solapamiento si: partido_inicio < restriccion_fin AND partido_fin > restriccion_inicio
+        # (misma regla que usa el FixtureScheduler al compilar los bitsets)
+        return pareja_disponible(
+            dia,
+            hora_mins,
+            datos_pareja.get('restricciones_por_dia', {}),
+            TorneoFixtureGlobalService.DURACION_PARTIDO_MINUTOS
+        )
     
     @staticmethod
     def _guardar_partidos(
         db: Session,
         torneo_id: int,
         partidos_programados: List[Dict],
-        categoria_id: Optional[int] = None
+        categoria_id: Optional[int] = None,
+        contexto: Optional[ContextoFixture] = None
     ):
         """
         Guarda los partidos programados en la base de datos
@@ -781,6 +830,7 @@ class TorneoFixtureGlobalService:
             torneo_id: ID del torneo
             partidos_programados: Lista de partidos a guardar
             categoria_id: (Opcional) Si se especifica, solo elimina partidos de esa categoría antes de guardar
+            contexto: (Opcional) Si se pasa, se actualizan en memoria los partidos ya programados
         """
         # Eliminar partidos existentes de fase de grupos
         query = db.query(Partido).filter(
@@ -792,19 +842,24 @@ class TorneoFixtureGlobalService:
         if categoria_id:
             query = query.filter(Partido.categoria_id == categoria_id)
         
-        query.delete()
-        db.commit()
+        # Delete + insert en la misma transacción (un round trip por tabla)
+        query.delete(synchronize_session=False)
+        TorneoTablaService.invalidar(db, torneo_id=torneo_id)
         
         # Crear nuevos partidos
         # Get tournament creator for id_creador
-        torneo = db.query(Torneo).filter(Torneo.id == torneo_id).first()
+        if contexto is not None and contexto.torneo is not None:
+            torneo = contexto.torneo
+        else:
+            torneo = db.query(Torneo).filter(Torneo.id == torneo_id).first()
         
+        filas = []
         for i, partido_data in enumerate(partidos_programados):
             fecha_hora_str = f"{partido_data['fecha']} {partido_data['hora']}:00"
             # Crear datetime naive (sin timezone) para evitar conversiones UTC
             fecha_hora = datetime.strptime(fecha_hora_str, '%Y-%m-%d %H:%M:%S')
             
-            partido = Partido(
+            filas.append(dict(
                 id_torneo=torneo_id,
                 zona_id=partido_data['zona_id'],
                 fase='zona',
@@ -818,7 +873,14 @@ class TorneoFixtureGlobalService:
                 tipo='torneo',
                 id_creador=torneo.creado_por if torneo else 1,
                 categoria_id=partido_data.get('categoria_id')
-            )
-            db.add(partido)
+            ))
+        
+        ids = insertar_filas(db, Partido, filas)
+        for partido_data, partido_id in zip(partidos_programados, ids):
+            partido_data['partido_id'] = partido_id
         
         db.commit()
+        ocupaciones.invalidar(torneo_id)
+        
+        if contexto is not None:
+            contexto.reemplazar_partidos_categoria(categoria_id, partidos_programados)
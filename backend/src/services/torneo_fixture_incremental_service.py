@@ -0,0 +1,221 @@
+"""
+Servicio de reprogramación incremental del fixture
+Mueve solo los partidos afectados por un cambio (baja de pareja, zona nueva,
+restricciones editadas) y deja el resto del fixture publicado como está.
+"""
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional
+
+from ..models.torneo_models import Torneo, TorneoZona
+from ..models.driveplus_models import Partido
+from ..database.bulk import insertar_filas, actualizar_filas
+from .torneo_version import marcar_modificado
+from .fixture_incremental import PartidoActual, planificar
+from .torneo_fixture_global_service import (
+    ContextoFixture, TorneoFixtureGlobalService, MODO_GREEDY, MODO_OPTIMO
+)
+from .fixture_optimizer import TIEMPO_LIMITE_SEGUNDOS
+from .intervalos import duracion_partido_torneo, descanso_minimo_torneo, ocupaciones
+from .torneo_tabla_service import TorneoTablaService
+
+
+class TorneoFixtureIncrementalService:
+    """Reprogramación incremental de partidos de zona"""
+
+    @staticmethod
+    def reprogramar(
+        db: Session,
+        torneo_id: int,
+        pareja_ids: Optional[Iterable[int]] = None,
+        aplicar: bool = True,
+        modo: str = MODO_GREEDY,
+        tiempo_limite: Optional[float] = None
+    ) -> Dict:
+        """
+        Toma el fixture actual como fijo y reubica solo lo necesario
+
+        Args:
+            db: Sesión de base de datos
+            torneo_id: ID del torneo
+            pareja_ids: Parejas afectadas por el cambio (ante un choque se mueven sus partidos)
+            aplicar: Si False solo calcula el diff (dry-run)
+            modo: 'greedy' u 'optimo' para los partidos que no entran con first-fit
+            tiempo_limite: Segundos para el modo óptimo
+
+        Returns:
+            Dict con el diff: movidos, sin_lugar, eliminados y sin_cambios
+        """
+        torneo = db.query(Torneo).filter(Torneo.id == torneo_id).first()
+        if not torneo:
+            raise ValueError("Torneo no encontrado")
+        if modo not in (MODO_GREEDY, MODO_OPTIMO):
+            raise ValueError(f"Modo inválido: {modo} (usar '{MODO_GREEDY}' u '{MODO_OPTIMO}')")
+
+        contexto = ContextoFixture.cargar(db, torneo)
+
+        filas = db.query(
+            Partido.id_partido, Partido.zona_id, Partido.pareja1_id, Partido.pareja2_id,
+            Partido.fecha_hora, Partido.cancha_id, Partido.estado, Partido.resultado_padel
+        ).filter(
+            Partido.id_torneo == torneo_id,
+            Partido.fase == 'zona'
+        ).all()
+        partidos = [
+            PartidoActual(
+                f.id_partido, f.zona_id, f.pareja1_id, f.pareja2_id, f.fecha_hora, f.cancha_id,
+                f.estado != 'pendiente' or f.resultado_padel is not None
+            )
+            for f in filas
+        ]
+
+        # Parejas de los partidos (las que falten fueron dadas de baja)
+        contexto.asegurar_parejas(db, (
+            pid for p in partidos for pid in (p.pareja1_id, p.pareja2_id)
+        ))
+        jugadores_por_pareja = {
+            pareja.id: (pareja.jugador1_id, pareja.jugador2_id)
+            for pareja in contexto.parejas.values()
+        }
+
+        disponibilidad = TorneoFixtureGlobalService._obtener_disponibilidad_parejas(
+            db,
+            [{'pareja1_id': p.pareja1_id, 'pareja2_id': p.pareja2_id} for p in partidos],
+            torneo,
+            contexto
+        )
+        restricciones = {
+            pareja_id: datos.get('restricciones_por_dia', {})
+            for pareja_id, datos in disponibilidad.items()
+        }
+
+        slots = TorneoFixtureGlobalService._generar_slots_torneo(
+            torneo, torneo.horarios_disponibles or {}
+        )
+        canchas = {cancha.id: cancha for cancha in contexto.canchas}
+
+        plan = planificar(
+            partidos,
+            jugadores_por_pareja,
+            restricciones,
+            slots,
+            list(canchas),
+            pareja_ids or (),
+            optimizar=modo == MODO_OPTIMO,
+            tiempo_limite=tiempo_limite if tiempo_limite is not None else TIEMPO_LIMITE_SEGUNDOS,
+            duracion=duracion_partido_torneo(torneo),
+            descanso=descanso_minimo_torneo(torneo)
+        )
+
+        movidos = []
+        sin_lugar = []
+        # UPDATEs por primary key, agrupados por set de columnas (un executemany cada uno)
+        reubicados = []
+        desprogramados = []
+        for partido, motivo, nuevo in plan['movidos']:
+            item = {
+                "partido_id": partido.id,
+                "zona_id": partido.zona_id,
+                "motivo": motivo,
+                "antes": TorneoFixtureIncrementalService._horario(partido.fecha_hora, partido.cancha_id, canchas),
+                "despues": TorneoFixtureIncrementalService._horario(*nuevo, canchas) if nuevo else None
+            }
+            if nuevo:
+                movidos.append(item)
+                reubicados.append({
+                    "id_partido": partido.id,
+                    "fecha_hora": nuevo[0],
+                    "fecha": nuevo[0],
+                    "cancha_id": nuevo[1],
+                    "requiere_reprogramacion": False
+                })
+            else:
+                sin_lugar.append(item)
+                # Sin lugar: queda sin horario y marcado para programación manual
+                if partido.fecha_hora is not None:
+                    desprogramados.append({
+                        "id_partido": partido.id,
+                        "fecha_hora": None,
+                        "cancha_id": None,
+                        "requiere_reprogramacion": True
+                    })
+
+        eliminados = [p.id for p in plan['eliminados']]
+
+        if aplicar and (reubicados or desprogramados or eliminados):
+            actualizar_filas(db, Partido, reubicados)
+            actualizar_filas(db, Partido, desprogramados)
+            marcar_modificado(db, torneo_id)
+            if eliminados:
+                db.query(Partido).filter(
+                    Partido.id_partido.in_(eliminados)
+                ).delete(synchronize_session=False)
+                TorneoTablaService.invalidar(db, torneo_id=torneo_id)
+            db.commit()
+            ocupaciones.invalidar(torneo_id)
+
+        return {
+            "aplicado": aplicar,
+            "movidos": movidos,
+            "sin_lugar": sin_lugar,
+            "eliminados": eliminados,
+            "sin_cambios": plan['sin_cambios']
+        }
+
+    @staticmethod
+    def crear_partidos_zona(
+        db: Session,
+        torneo: Torneo,
+        zona: TorneoZona,
+        user_id: int,
+        partidos_dict: Optional[List[Dict]] = None
+    ) -> int:
+        """
+        Crea los partidos round-robin de una zona que todavía no existen,
+        sin fecha ni cancha (un solo INSERT)
+
+        Returns:
+            Cantidad de partidos creados
+        """
+        if partidos_dict is None:
+            partidos_dict = TorneoFixtureGlobalService._generar_partidos_zona(db, zona)
+
+        # Batch: cargar partidos existentes de la zona (evitar N+1)
+        existentes = db.query(Partido.pareja1_id, Partido.pareja2_id).filter(
+            Partido.id_torneo == torneo.id,
+            Partido.zona_id == zona.id
+        ).all()
+        existentes_set = {(r.pareja1_id, r.pareja2_id) for r in existentes}
+
+        filas = []
+        for p in partidos_dict:
+            key = (p['pareja1_id'], p['pareja2_id'])
+            if key in existentes_set:
+                continue
+            existentes_set.add(key)
+            filas.append(dict(
+                id_torneo=torneo.id,
+                zona_id=zona.id,
+                categoria_id=zona.categoria_id,
+                fase='zona',
+                pareja1_id=p['pareja1_id'],
+                pareja2_id=p['pareja2_id'],
+                estado='pendiente',
+                tipo='torneo',
+                id_creador=torneo.creado_por or user_id,
+            ))
+
+        insertar_filas(db, Partido, filas)
+        db.commit()
+        return len(filas)
+
+    @staticmethod
+    def _horario(fecha_hora, cancha_id, canchas: Dict) -> Optional[Dict]:
+        if fecha_hora is None:
+            return None
+        cancha = canchas.get(cancha_id)
+        return {
+            "fecha": fecha_hora.strftime('%Y-%m-%d'),
+            "hora": fecha_hora.strftime('%H:%M'),
+            "cancha_id": cancha_id,
+            "cancha_nombre": cancha.nombre if cancha else None
+        }
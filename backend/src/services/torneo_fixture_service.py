@@ -4,8 +4,8 @@ Considera disponibilidad horaria y balanceo por rating
 """
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
-from typing import List, Dict, Set, Tuple, Optional
-from datetime import datetime, date, time, timedelta
+from typing import List, Dict, Optional
+from datetime import datetime, date, timedelta
 from collections import defaultdict
 import itertools
 
@@ -14,6 +14,8 @@ from ..models.torneo_models import (
     TorneoBloqueoJugador, TorneoCancha, TorneoSlot
 )
 from ..models.driveplus_models import Usuario, Partido
+from ..utils.disponibilidad import DIAS_SEMANA, compilar_bloqueos, mapa_de_pareja
+from .torneo_version import marcar_modificado
 
 
 class TorneoFixtureService:
@@ -85,6 +87,7 @@ class TorneoFixtureService:
         ).delete(synchronize_session=False)
         
         db.query(TorneoZona).filter(TorneoZona.torneo_id == torneo_id).delete()
+        marcar_modificado(db, torneo_id)
         db.commit()
         
         # Crear zonas
@@ -116,48 +119,65 @@ class TorneoFixtureService:
         db: Session,
         torneo: Torneo,
         parejas: List[TorneoPareja]
-    ) -> Dict[int, Set[Tuple[date, str, str]]]:
+    ) -> Dict[int, Dict[date, int]]:
         """
-        Calcula la disponibilidad horaria de cada pareja
+        Calcula las restricciones horarias de cada pareja por fecha del torneo
+        
+        Combina los bloqueos puntuales de ambos jugadores con las restricciones
+        semanales compiladas de la pareja (disponibilidad_compilada).
         
         Returns:
-            Dict con pareja_id -> Set de (fecha, hora_desde, hora_hasta) disponibles
+            Dict con pareja_id -> {fecha: bitmap de bloques de 5 minutos restringidos}
         """
-        disponibilidad = {}
-        
-        # Obtener rango de fechas del torneo
         fecha_inicio = torneo.fecha_inicio
         fecha_fin = torneo.fecha_fin
         
+        # Bloqueos de todos los jugadores en una sola query
+        jugadores_ids = set()
         for pareja in parejas:
-            # Obtener bloqueos de ambos jugadores
-            bloqueos_j1 = db.query(TorneoBloqueoJugador).filter(
+            jugadores_ids.update((pareja.jugador1_id, pareja.jugador2_id))
+        bloqueos_por_jugador = defaultdict(list)
+        if jugadores_ids:
+            filas = db.query(
+                TorneoBloqueoJugador.jugador_id, TorneoBloqueoJugador.fecha,
+                TorneoBloqueoJugador.hora_desde, TorneoBloqueoJugador.hora_hasta
+            ).filter(
                 TorneoBloqueoJugador.torneo_id == torneo.id,
-                TorneoBloqueoJugador.jugador_id == pareja.jugador1_id,
+                TorneoBloqueoJugador.jugador_id.in_(jugadores_ids),
                 TorneoBloqueoJugador.fecha >= fecha_inicio,
                 TorneoBloqueoJugador.fecha <= fecha_fin
             ).all()
-            
-            bloqueos_j2 = db.query(TorneoBloqueoJugador).filter(
-                TorneoBloqueoJugador.torneo_id == torneo.id,
-                TorneoBloqueoJugador.jugador_id == pareja.jugador2_id,
-                TorneoBloqueoJugador.fecha >= fecha_inicio,
-                TorneoBloqueoJugador.fecha <= fecha_fin
-            ).all()
-            
-            # Combinar bloqueos de ambos jugadores
-            bloqueos_pareja = set()
-            for bloqueo in bloqueos_j1 + bloqueos_j2:
-                bloqueos_pareja.add((bloqueo.fecha, bloqueo.hora_desde, bloqueo.hora_hasta))
-            
-            disponibilidad[pareja.id] = bloqueos_pareja
+            for fila in filas:
+                bloqueos_por_jugador[fila.jugador_id].append((fila.fecha, fila.hora_desde, fila.hora_hasta))
+        
+        # Fechas del torneo con su día de la semana
+        fechas = []
+        if fecha_inicio and fecha_fin:
+            fecha = fecha_inicio.date() if isinstance(fecha_inicio, datetime) else fecha_inicio
+            ultima = fecha_fin.date() if isinstance(fecha_fin, datetime) else fecha_fin
+            while fecha <= ultima:
+                fechas.append((fecha, DIAS_SEMANA[fecha.weekday()]))
+                fecha += timedelta(days=1)
+        
+        disponibilidad = {}
+        for pareja in parejas:
+            mapa = compilar_bloqueos(
+                bloqueos_por_jugador.get(pareja.jugador1_id, [])
+                + bloqueos_por_jugador.get(pareja.jugador2_id, [])
+            )
+            semanal = mapa_de_pareja(pareja)
+            if semanal:
+                for fecha, dia in fechas:
+                    if semanal.get(dia):
+                        mapa[fecha] = mapa.get(fecha, 0) | semanal[dia]
+            disponibilidad[pareja.id] = mapa
         
         return disponibilidad
     
     @staticmethod
     def _agrupar_por_compatibilidad(
         parejas: List[TorneoPareja],
-        disponibilidad: Dict[int, Set[Tuple[date, str, str]]]
+        disponibilidad: Dict[int, Dict[date, int]]
     ) -> List[List[TorneoPareja]]:
         """
         Agrupa parejas que tienen compatibilidad horaria
@@ -174,8 +194,8 @@ class TorneoFixtureService:
                 
                 # Verificar si son compatibles
                 if TorneoFixtureService._son_compatibles(
-                    disponibilidad.get(pareja1.id, set()),
-                    disponibilidad.get(pareja2.id, set())
+                    disponibilidad.get(pareja1.id, {}),
+                    disponibilidad.get(pareja2.id, {})
                 ):
                     compatibilidad[pareja1.id].add(pareja2.id)
                     compatibilidad[pareja2.id].add(pareja1.id)
@@ -213,53 +233,22 @@ class TorneoFixtureService:
     
     @staticmethod
     def _son_compatibles(
-        bloqueos1: Set[Tuple[date, str, str]],
-        bloqueos2: Set[Tuple[date, str, str]]
+        bloqueos1: Dict[date, int],
+        bloqueos2: Dict[date, int]
     ) -> bool:
         """
         Verifica si dos parejas son compatibles horariamente
         
         Son compatibles si NO tienen bloqueos que se solapen en la misma fecha
+        (AND de los bitmaps de cada fecha)
         """
         # Si alguna no tiene bloqueos, son compatibles
         if not bloqueos1 or not bloqueos2:
             return True
         
-        # Verificar solapamiento
-        for fecha1, desde1, hasta1 in bloqueos1:
-            for fecha2, desde2, hasta2 in bloqueos2:
-                # Si es la misma fecha
-                if fecha1 == fecha2:
-                    # Verificar si los horarios se solapan
-                    if TorneoFixtureService._horarios_se_solapan(
-                        desde1, hasta1, desde2, hasta2
-                    ):
-                        return False
-        
-        return True
-    
-    @staticmethod
-    def _horarios_se_solapan(
-        desde1, hasta1,
-        desde2, hasta2
-    ) -> bool:
-        """Verifica si dos rangos horarios se solapan"""
-        # Convertir a time objects si son strings
-        def to_time(s):
-            if isinstance(s, time):
-                return s
-            if isinstance(s, str):
-                parts = s.split(':')
-                return time(int(parts[0]), int(parts[1]))
-            return s
-        
-        t1_desde = to_time(desde1)
-        t1_hasta = to_time(hasta1)
-        t2_desde = to_time(desde2)
-        t2_hasta = to_time(hasta2)
-        
-        # Verificar solapamiento
-        return not (t1_hasta <= t2_desde or t2_hasta <= t1_desde)
+        if len(bloqueos2) < len(bloqueos1):
+            bloqueos1, bloqueos2 = bloqueos2, bloqueos1
+        return not any(bits & bloqueos2.get(fecha, 0) for fecha, bits in bloqueos1.items())
     
     @staticmethod
     def _distribuir_parejas_inteligente(
@@ -267,7 +256,7 @@ class TorneoFixtureService:
         parejas: List[TorneoPareja],
         zonas: List[TorneoZona],
         grupos_compatibles: List[List[TorneoPareja]],
-        disponibilidad: Dict[int, Set[Tuple[date, str, str]]]
+        disponibilidad: Dict[int, Dict[date, int]]
     ):
         """
         Distribuye parejas en zonas priorizando compatibilidad horaria
@@ -0,0 +1,98 @@
+"""
+Contadores de partidos de zona pendientes (torneo_zonas.partidos_pendientes)
+
+- Al confirmar un resultado de zona se descuenta 1 con un UPDATE por primary
+  key (RETURNING): mientras la zona tenga pendientes no hace falta mirar nada más
+- NULL = sin calcular: se cuenta desde los partidos la primera vez que hace falta
+- Los cambios de fixture o de integrantes de zona los vuelven a NULL
+  (TorneoTablaService.invalidar); borrar una zona borra su contador
+- Pendiente = partido de zona no confirmado (igual que verificar_zona_completa)
+"""
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional
+
+from ..models.driveplus_models import Partido
+from ..models.torneo_models import TorneoZona
+from ..database.bulk import actualizar_filas
+
+
+class TorneoPendientesService:
+    """Partidos de zona pendientes por zona y por categoría"""
+
+    @staticmethod
+    def descontar(db: Session, partido: Partido) -> int:
+        """
+        Descuenta el partido recién confirmado del contador de su zona.
+        No hace commit (va en la transacción del resultado).
+
+        Returns:
+            Partidos pendientes que le quedan a la zona
+        """
+        fila = db.execute(
+            update(TorneoZona)
+            .where(TorneoZona.id == partido.zona_id, TorneoZona.partidos_pendientes.isnot(None))
+            .values(partidos_pendientes=TorneoZona.partidos_pendientes - 1)
+            .returning(TorneoZona.partidos_pendientes)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if fila is not None:
+            return fila[0]
+        # Zona sin contador: contar con el partido ya confirmado
+        db.flush()
+        return TorneoPendientesService.contar_zonas(db, [partido.zona_id]).get(partido.zona_id, 0)
+
+    @staticmethod
+    def por_categoria(db: Session, torneo_id: int) -> Dict[Optional[int], int]:
+        """
+        {categoria_id: partidos pendientes} con una query sobre torneo_zonas;
+        solo las zonas sin contador se cuentan desde los partidos.
+        """
+        zonas = db.query(
+            TorneoZona.id, TorneoZona.categoria_id, TorneoZona.partidos_pendientes
+        ).filter(TorneoZona.torneo_id == torneo_id).all()
+
+        sin_contar = [zona_id for zona_id, _, pendientes in zonas if pendientes is None]
+        contadas = TorneoPendientesService.contar_zonas(db, sin_contar) if sin_contar else {}
+
+        resultado: Dict[Optional[int], int] = {}
+        for zona_id, categoria_id, pendientes in zonas:
+            if pendientes is None:
+                pendientes = contadas[zona_id]
+            resultado[categoria_id] = resultado.get(categoria_id, 0) + pendientes
+        return resultado
+
+    @staticmethod
+    def recontar(db: Session, torneo_id: int) -> Dict[Optional[int], int]:
+        """Vuelve a contar todas las zonas del torneo desde los partidos (ignora los contadores)"""
+        TorneoPendientesService.invalidar(db, torneo_id=torneo_id)
+        return TorneoPendientesService.por_categoria(db, torneo_id)
+
+    @staticmethod
+    def invalidar(db: Session, torneo_id: Optional[int] = None, zona_ids: Optional[Iterable[int]] = None) -> None:
+        """Pasa a NULL los contadores (de zonas o de todo el torneo). No hace commit."""
+        query = update(TorneoZona).values(partidos_pendientes=None)
+        if zona_ids is not None:
+            zona_ids = list(zona_ids)
+            if not zona_ids:
+                return
+            query = query.where(TorneoZona.id.in_(zona_ids))
+        elif torneo_id is not None:
+            query = query.where(TorneoZona.torneo_id == torneo_id)
+        else:
+            return
+        db.execute(query.execution_options(synchronize_session=False))
+
+    @staticmethod
+    def contar_zonas(db: Session, zona_ids: List[int]) -> Dict[int, int]:
+        """Cuenta desde los partidos (un GROUP BY) y guarda los contadores"""
+        pendientes = {zona_id: 0 for zona_id in zona_ids}
+        for zona_id, cantidad in db.query(Partido.zona_id, func.count(Partido.id_partido)).filter(
+            Partido.zona_id.in_(zona_ids),
+            Partido.estado != 'confirmado'
+        ).group_by(Partido.zona_id):
+            pendientes[zona_id] = cantidad
+        actualizar_filas(db, TorneoZona, [
+            {'id': zona_id, 'partidos_pendientes': cantidad} for zona_id, cantidad in pendientes.items()
+        ])
+        return pendientes
@@ -1,17 +1,25 @@
 """
 Servicio para gestión de playoffs (fase de eliminación) en torneos
-Genera brackets dinámicos con BYEs automáticos
+Genera brackets dinámicos con BYEs automáticos (motor en bracket.py)
 """
+from sqlalchemy import case, update
 from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 from datetime import datetime
-import math
 
 from ..models.torneo_models import (
     Torneo, TorneoZona, TorneoPareja, TorneoCategoria,
     EstadoTorneo
 )
 from ..models.driveplus_models import Partido
+from ..database.bulk import actualizar_filas, insertar_objetos
+from .intervalos import ocupaciones
+from .bracket import (
+    FASES_PLAYOFF, TAMANO_MAXIMO, Cruce, construir, construir_por_seeds, emparejamientos,
+    fases as fases_bracket, mitades, siguiente_potencia_de_dos
+)
+from .torneo_version import marcar_modificado, publicar_evento
+from .eventos_torneo import GANADOR_AVANZADO, datos_ganador
 
 
 class TorneoPlayoffService:
@@ -20,10 +28,7 @@ class TorneoPlayoffService:
     @staticmethod
     def _next_power_of_two(n: int) -> int:
         """Calcula la siguiente potencia de 2"""
-        p = 1
-        while p < n:
-            p *= 2
-        return p
+        return siguiente_potencia_de_dos(n)
     
     @staticmethod
     def generar_playoffs(
@@ -31,9 +36,17 @@ class TorneoPlayoffService:
         torneo_id: int,
         user_id: int,
         clasificados_por_zona: int = 2,
-        categoria_id: Optional[int] = None
+        categoria_id: Optional[int] = None,
+        progreso: Optional[Callable[[float, Optional[str]], None]] = None
     ) -> List[Partido]:
-        """Genera playoffs. Si categoria_id se pasa, solo para esa categoría; si no, para todas."""
+        """
+        Genera playoffs. Si categoria_id se pasa, solo para esa categoría; si no, para todas.
+        progreso (opcional): callback (porcentaje, mensaje) por categoría.
+
+        Los brackets de todas las categorías se arman en memoria y se insertan
+        con un solo INSERT y un solo commit (todo o nada). Cada partido guarda
+        a qué partido pasa su ganador (siguiente_partido_id + slot_siguiente).
+        """
         torneo = db.query(Torneo).filter(Torneo.id == torneo_id).first()
         if not torneo:
             raise ValueError("Torneo no encontrado")
@@ -41,32 +54,31 @@ class TorneoPlayoffService:
         if not TorneoPlayoffService._es_organizador(db, torneo_id, user_id):
             raise ValueError("No tienes permisos para generar playoffs")
         
-        todos_partidos = []
-        
         if categoria_id is not None:
-            partidos = TorneoPlayoffService._generar_playoffs_categoria(
-                db, torneo_id, user_id, categoria_id, clasificados_por_zona
-            )
-            todos_partidos.extend(partidos)
+            categorias = [(categoria_id, None)]
         else:
-            categorias = db.query(TorneoCategoria).filter(
-                TorneoCategoria.torneo_id == torneo_id
-            ).all()
-            if categorias:
-                for categoria in categorias:
-                    partidos = TorneoPlayoffService._generar_playoffs_categoria(
-                        db, torneo_id, user_id, categoria.id, clasificados_por_zona
-                    )
-                    todos_partidos.extend(partidos)
-            else:
-                partidos = TorneoPlayoffService._generar_playoffs_categoria(
-                    db, torneo_id, user_id, None, clasificados_por_zona
-                )
-                todos_partidos.extend(partidos)
+            categorias = [
+                (categoria.id, categoria.nombre)
+                for categoria in db.query(TorneoCategoria).filter(
+                    TorneoCategoria.torneo_id == torneo_id
+                ).all()
+            ] or [(None, None)]
         
+        brackets = []
+        for i, (cat_id, nombre) in enumerate(categorias):
+            if progreso and nombre is not None:
+                progreso(100 * i / len(categorias), f"Categoría {nombre}")
+            cruces = TorneoPlayoffService._generar_playoffs_categoria(
+                db, torneo_id, user_id, cat_id, clasificados_por_zona
+            )
+            brackets.append((cat_id, cruces))
+        
+        todos_partidos = TorneoPlayoffService._insertar_brackets(db, torneo_id, user_id, brackets)
         if todos_partidos:
             torneo.estado = EstadoTorneo.FASE_ELIMINACION
+        marcar_modificado(db, torneo_id)
         db.commit()
+        ocupaciones.invalidar(torneo_id)
         
         return todos_partidos
     
@@ -77,19 +89,20 @@ class TorneoPlayoffService:
         user_id: int,
         categoria_id: Optional[int],
         clasificados_por_zona: int
-    ) -> List[Partido]:
-        """Genera playoffs para una categoría específica"""
-        # Eliminar playoffs existentes de esta categoría
+    ) -> List[Cruce]:
+        """
+        Borra los playoffs de una categoría y devuelve el bracket nuevo en
+        memoria (generar_playoffs inserta y commitea).
+        """
         query_delete = db.query(Partido).filter(
             Partido.id_torneo == torneo_id,
-            Partido.fase.in_(['16avos', '8vos', '4tos', 'cuartos', 'semis', 'semifinal', 'final'])
+            Partido.fase.in_(FASES_PLAYOFF)
         )
         if categoria_id:
             query_delete = query_delete.filter(Partido.categoria_id == categoria_id)
         else:
             query_delete = query_delete.filter(Partido.categoria_id.is_(None))
         query_delete.delete(synchronize_session=False)
-        db.commit()
         
         # Obtener clasificados
         clasificados = TorneoPlayoffService._obtener_clasificados_categoria(
@@ -100,11 +113,9 @@ class TorneoPlayoffService:
             return []
         
         # Generar bracket completo con BYEs explícitos
-        partidos = TorneoPlayoffService._generar_bracket_con_byes(
+        return TorneoPlayoffService._generar_bracket_con_byes(
             db, torneo_id, clasificados, user_id, categoria_id
         )
-        
-        return partidos
     
     @staticmethod
     def _obtener_clasificados_categoria(
@@ -114,8 +125,7 @@ class TorneoPlayoffService:
         clasificados_por_zona: int
     ) -> List[Dict]:
         """Obtiene los clasificados ordenados por posición y puntos"""
-        from ..services.torneo_zona_service import TorneoZonaService
-        from ..models.torneo_models import TorneoZonaPareja
+        from .torneo_tabla_service import TorneoTablaService
         
         query_zonas = db.query(TorneoZona).filter(TorneoZona.torneo_id == torneo_id)
         if categoria_id:
@@ -145,41 +155,21 @@ class TorneoPlayoffService:
                 })
             return clasificados
         
-        # Obtener clasificados de cada zona
+        # Tablas de todas las zonas de la categoría en una sola lectura
+        tablas = TorneoTablaService.obtener_tablas(db, [zona.id for zona in zonas])
         for zona in zonas:
-            try:
-                resultado = TorneoZonaService.obtener_tabla_posiciones(db, zona.id)
-                tabla = resultado.get('tabla', [])
-                
-                for i, pos in enumerate(tabla[:clasificados_por_zona]):
-                    # Usar posición de la tabla (1º, 2º, ...) para que playoffs emparejen 1º vs 2º
-                    posicion_tabla = pos.get('posicion', i + 1)
-                    if not isinstance(posicion_tabla, int):
-                        posicion_tabla = int(posicion_tabla) if posicion_tabla else (i + 1)
-                    clasificados.append({
-                        'pareja_id': pos['pareja_id'],
-                        'posicion': posicion_tabla,
-                        'puntos': pos.get('puntos', 0),
-                        'rating': pos.get('rating_promedio', 1200),
-                        'zona_nombre': zona.nombre
-                    })
-            except Exception:
-                parejas_zona = db.query(TorneoPareja).join(
-                    TorneoZonaPareja, TorneoZonaPareja.pareja_id == TorneoPareja.id
-                ).filter(TorneoZonaPareja.zona_id == zona.id).all()
-                
-                for i, pareja in enumerate(parejas_zona[:clasificados_por_zona]):
-                    clasificados.append({
-                        'pareja_id': pareja.id,
-                        'posicion': i + 1,
-                        'puntos': 0,
-                        'rating': 1200,
-                        'zona_nombre': zona.nombre
-                    })
+            for i, pos in enumerate(tablas.get(zona.id, [])[:clasificados_por_zona]):
+                # Usar posición de la tabla (1º, 2º, ...) para que playoffs emparejen 1º vs 2º
+                clasificados.append({
+                    'pareja_id': pos['pareja_id'],
+                    'posicion': pos.get('posicion', i + 1),
+                    'puntos': pos.get('puntos', 0),
+                    'rating': 1200,
+                    'zona_nombre': zona.nombre
+                })
         
         return clasificados
 
-    
     @staticmethod
     def _generar_bracket_con_byes(
         db: Session,
@@ -187,10 +177,11 @@ class TorneoPlayoffService:
         clasificados: List[Dict],
         user_id: int,
         categoria_id: Optional[int]
-    ) -> List[Partido]:
+    ) -> List[Cruce]:
         """
-        Genera bracket según formato APA (Asociación Padel Argentino).
-        Soporta 2, 3, 4, 5 y 6 zonas con los cruces oficiales.
+        Genera el bracket completo en memoria.
+        De 2 a 8 zonas usa los cruces oficiales APA (Asociación Padel Argentino);
+        sin zonas o con más de 8, seeding estándar hasta 64 parejas.
         """
         # Detectar cantidad de zonas
         zonas_set = []
@@ -200,76 +191,74 @@ class TorneoPlayoffService:
                 zonas_set.append(z)
         num_zonas = len(zonas_set)
 
-        if num_zonas >= 2:
+        if 2 <= num_zonas <= 8:
             return TorneoPlayoffService._generar_bracket_apa(
                 db, torneo_id, clasificados, user_id, categoria_id, num_zonas
             )
 
-        # Fallback sin zonas: bracket estándar
-        num_clasificados = len(clasificados)
-        bracket_size = TorneoPlayoffService._next_power_of_two(num_clasificados)
-        if bracket_size > 16:
-            bracket_size = 16
-            clasificados = clasificados[:16]
+        # Bracket estándar: seeds 1..n, los seeds de n+1 al tamaño del cuadro son BYE
+        bracket_size = siguiente_potencia_de_dos(len(clasificados))
+        if bracket_size > TAMANO_MAXIMO:
+            bracket_size = TAMANO_MAXIMO
+            clasificados = sorted(
+                clasificados, key=lambda x: (x['posicion'], -x.get('puntos', 0))
+            )[:TAMANO_MAXIMO]
 
         clasificados_ordenados = TorneoPlayoffService._reordenar_clasificados_evitando_rematches_zona(
             clasificados, bracket_size
         )
-        fases = TorneoPlayoffService._determinar_fases(bracket_size)
-        num_rondas = len(fases)
-        emparejamientos = TorneoPlayoffService._generar_emparejamientos(bracket_size)
-        clasificados_dict = {c['seed']: c for c in clasificados_ordenados}
-
-        partidos_creados = []
-        partidos_ronda: Dict[int, Dict[int, Partido]] = {i: {} for i in range(num_rondas)}
-        fase_inicial = fases[0]
-
-        for i, (seed1, seed2) in enumerate(emparejamientos):
-            c1 = clasificados_dict.get(seed1)
-            c2 = clasificados_dict.get(seed2)
-            pareja1_id = c1['pareja_id'] if c1 else None
-            pareja2_id = c2['pareja_id'] if c2 else None
-            es_bye = (pareja1_id is not None and pareja2_id is None) or \
-                     (pareja1_id is None and pareja2_id is not None)
-            ganador_id = None
-            estado = 'pendiente'
-            if es_bye:
-                ganador_id = pareja1_id or pareja2_id
-                estado = 'bye'
-            partido = Partido(
-                id_torneo=torneo_id, categoria_id=categoria_id,
-                pareja1_id=pareja1_id, pareja2_id=pareja2_id,
-                ganador_pareja_id=ganador_id, fase=fase_inicial,
-                numero_partido=i + 1, estado=estado,
-                fecha=datetime.now(), id_creador=user_id, tipo='torneo'
-            )
-            db.add(partido)
-            partidos_creados.append(partido)
-            partidos_ronda[0][i + 1] = partido
-
-        db.flush()
-
-        for ronda_idx in range(1, num_rondas):
-            fase = fases[ronda_idx]
-            partidos_ronda_anterior = partidos_ronda[ronda_idx - 1]
-            num_partidos_ronda = bracket_size // (2 ** (ronda_idx + 1))
-            for i in range(num_partidos_ronda):
-                po1 = partidos_ronda_anterior.get(i * 2 + 1)
-                po2 = partidos_ronda_anterior.get(i * 2 + 2)
-                p1 = po1.ganador_pareja_id if po1 and po1.estado == 'bye' else None
-                p2 = po2.ganador_pareja_id if po2 and po2.estado == 'bye' else None
-                partido = Partido(
-                    id_torneo=torneo_id, categoria_id=categoria_id,
-                    pareja1_id=p1, pareja2_id=p2, fase=fase,
-                    numero_partido=i + 1, estado='pendiente',
-                    fecha=datetime.now(), id_creador=user_id, tipo='torneo'
-                )
-                db.add(partido)
-                partidos_creados.append(partido)
-                partidos_ronda[ronda_idx][i + 1] = partido
+        pareja_por_seed = {c['seed']: c['pareja_id'] for c in clasificados_ordenados if 'seed' in c}
+        return construir_por_seeds(pareja_por_seed, bracket_size)
 
-        db.commit()
-        return partidos_creados
+    @staticmethod
+    def _insertar_brackets(
+        db: Session,
+        torneo_id: int,
+        user_id: int,
+        brackets: List[Tuple[Optional[int], List[Cruce]]]
+    ) -> List[Partido]:
+        """
+        Inserta los brackets [(categoria_id, cruces)] con un INSERT y guarda
+        los vínculos al partido siguiente con un UPDATE en lote (los ids se
+        conocen recién después del INSERT). No commitea.
+        """
+        ahora = datetime.now()
+        por_bracket = [
+            [
+                Partido(
+                    id_torneo=torneo_id,
+                    categoria_id=categoria_id,
+                    pareja1_id=cruce.pareja1_id,
+                    pareja2_id=cruce.pareja2_id,
+                    ganador_pareja_id=cruce.ganador_pareja_id,
+                    fase=cruce.fase,
+                    numero_partido=cruce.numero,
+                    estado=cruce.estado,
+                    fecha=ahora,
+                    id_creador=user_id,
+                    tipo='torneo'
+                )
+                for cruce in cruces
+            ]
+            for categoria_id, cruces in brackets
+        ]
+        todos = [partido for partidos in por_bracket for partido in partidos]
+        insertar_objetos(db, todos)
+
+        vinculos = []
+        for partidos, (_, cruces) in zip(por_bracket, brackets):
+            for partido, cruce in zip(partidos, cruces):
+                if cruce.siguiente is None:
+                    continue
+                partido.siguiente_partido_id = partidos[cruce.siguiente].id_partido
+                partido.slot_siguiente = cruce.slot
+                vinculos.append({
+                    'id_partido': partido.id_partido,
+                    'siguiente_partido_id': partido.siguiente_partido_id,
+                    'slot_siguiente': partido.slot_siguiente
+                })
+        actualizar_filas(db, Partido, vinculos)
+        return todos
 
     @staticmethod
     def _generar_bracket_apa(
@@ -279,16 +268,15 @@ class TorneoPlayoffService:
         user_id: int,
         categoria_id: Optional[int],
         num_zonas: int
-    ) -> List[Partido]:
+    ) -> List[Cruce]:
         """
-        Genera bracket según formato oficial APA para 2-6 zonas.
+        Genera bracket según formato oficial APA para 2-8 zonas.
 
-        Los BYEs NO se crean como partidos — en su lugar, las parejas que
-        pasan directo se setean directamente en la ronda siguiente.
-        Solo se crean partidos reales (ambas parejas presentes).
+        Los BYEs quedan como partidos en estado 'bye' y la pareja que pasa
+        directo ya se setea en la ronda siguiente.
 
-        numero_partido sigue la convención de bracket binario para que
-        avanzar_ganador funcione: siguiente = (n+1)//2, impar→p1, par→p2.
+        numero_partido sigue la convención de bracket binario:
+        siguiente = (n+1)//2, impar→p1, par→p2.
         """
         # Agrupar por zona
         zonas: Dict[str, List[Dict]] = {}
@@ -504,80 +492,17 @@ class TorneoPlayoffService:
                 ]),
             ]
 
-        # Generar partidos ronda por ronda
-        partidos_creados = []
-        partidos_por_fase: Dict[str, List[Partido]] = {}
-
-        for ronda_idx, (fase, cruces) in enumerate(rondas):
-            partidos_por_fase[fase] = []
-
-            for i, cruce in enumerate(cruces):
-                num = i + 1
-                p1_id = None
-                p2_id = None
-
-                if ronda_idx == 0:
-                    # Primera ronda: resolver desde zonas
-                    c1, c2 = cruce
-                    if c1 is not None and isinstance(c1, tuple):
-                        p1_id = gp(c1[0], c1[1])
-                    if c2 is not None and isinstance(c2, tuple):
-                        p2_id = gp(c2[0], c2[1])
-                else:
-                    # Rondas siguientes: p1 y p2 vienen de ganadores de ronda anterior
-                    fase_anterior = rondas[ronda_idx - 1][0]
-                    partidos_ant = partidos_por_fase.get(fase_anterior, [])
-                    # Partido i recibe ganadores de partidos (i*2) y (i*2+1) de ronda anterior
-                    idx1 = i * 2
-                    idx2 = i * 2 + 1
-                    if idx1 < len(partidos_ant) and partidos_ant[idx1].estado == 'bye':
-                        p1_id = partidos_ant[idx1].ganador_pareja_id
-                    if idx2 < len(partidos_ant) and partidos_ant[idx2].estado == 'bye':
-                        p2_id = partidos_ant[idx2].ganador_pareja_id
-
-                # Determinar BYE: solo en primera ronda (BYEs reales del formato APA).
-                # En rondas siguientes, p2=None significa "rival por determinar", no BYE.
-                es_bye = ronda_idx == 0 and (p1_id is not None and p2_id is None)
-                ganador_id = p1_id if es_bye else None
-                estado = 'bye' if es_bye else 'pendiente'
-
-                partido = Partido(
-                    id_torneo=torneo_id,
-                    categoria_id=categoria_id,
-                    pareja1_id=p1_id,
-                    pareja2_id=p2_id,
-                    ganador_pareja_id=ganador_id,
-                    fase=fase,
-                    numero_partido=num,
-                    estado=estado,
-                    fecha=datetime.now(),
-                    id_creador=user_id,
-                    tipo='torneo'
-                )
-                db.add(partido)
-                partidos_creados.append(partido)
-                partidos_por_fase[fase].append(partido)
-
-            db.flush()
+        # Solo la primera ronda sale de la tabla; las siguientes las arma el motor
+        primera_ronda = [
+            (gp(*c1) if c1 else None, gp(*c2) if c2 else None)
+            for c1, c2 in rondas[0][1]
+        ]
+        return construir(primera_ronda, [fase for fase, _ in rondas])
 
-        db.commit()
-        return partidos_creados
-
-
-    
     @staticmethod
     def _determinar_fases(bracket_size: int) -> List[str]:
         """Determina las fases según el tamaño del bracket"""
-        if bracket_size == 2:
-            return ['final']
-        elif bracket_size == 4:
-            return ['semis', 'final']
-        elif bracket_size == 8:
-            return ['4tos', 'semis', 'final']
-        elif bracket_size == 16:
-            return ['8vos', '4tos', 'semis', 'final']
-        else:
-            return ['16avos', '8vos', '4tos', 'semis', 'final']
+        return fases_bracket(bracket_size)
     
     @staticmethod
     def _seeds_por_mitad_bracket(bracket_size: int) -> tuple:
@@ -586,17 +511,7 @@ class TorneoPlayoffService:
         Las parejas de la misma zona deben estar en mitades opuestas para
         no cruzarse hasta la final.
         """
-        if bracket_size == 2:
-            return ([1], [2])
-        elif bracket_size == 4:
-            return ([1, 4], [2, 3])
-        elif bracket_size == 8:
-            return ([1, 4, 5, 8], [2, 3, 6, 7])
-        elif bracket_size == 16:
-            return ([1, 4, 5, 8, 9, 12, 13, 16], [2, 3, 6, 7, 10, 11, 14, 15])
-        else:
-            m = bracket_size // 2
-            return (list(range(1, m + 1)), list(range(m + 1, bracket_size + 1)))
+        return mitades(bracket_size)
     
     @staticmethod
     def _reordenar_clasificados_evitando_rematches_zona(
@@ -719,22 +634,7 @@ class TorneoPlayoffService:
         Genera emparejamientos estándar de bracket
         Seed 1 vs último, etc. para que los mejores se encuentren en la final
         """
-        if bracket_size == 2:
-            return [(1, 2)]
-        elif bracket_size == 4:
-            return [(1, 4), (2, 3)]
-        elif bracket_size == 8:
-            return [(1, 8), (4, 5), (2, 7), (3, 6)]
-        elif bracket_size == 16:
-            return [
-                (1, 16), (8, 9), (4, 13), (5, 12),
-                (2, 15), (7, 10), (3, 14), (6, 11)
-            ]
-        else:
-            emparejamientos = []
-            for i in range(bracket_size // 2):
-                emparejamientos.append((i + 1, bracket_size - i))
-            return emparejamientos
+        return emparejamientos(bracket_size)
 
     
     @staticmethod
@@ -746,7 +646,7 @@ class TorneoPlayoffService:
         """Lista partidos de playoffs agrupados por fase"""
         query = db.query(Partido).filter(
             Partido.id_torneo == torneo_id,
-            Partido.fase.in_(['16avos', '8vos', '4tos', 'cuartos', 'semis', 'semifinal', 'final'])
+            Partido.fase.in_(FASES_PLAYOFF)
         )
         
         if categoria_id:
@@ -755,6 +655,7 @@ class TorneoPlayoffService:
         partidos = query.order_by(Partido.numero_partido).all()
         
         partidos_por_fase = {
+            '32avos': [],
             '16avos': [],
             '8vos': [],
             '4tos': [],
@@ -791,7 +692,7 @@ class TorneoPlayoffService:
 
         query_delete = db.query(Partido).filter(
             Partido.id_torneo == torneo_id,
-            Partido.fase.in_(['16avos', '8vos', '4tos', 'cuartos', 'semis', 'semifinal', 'final'])
+            Partido.fase.in_(FASES_PLAYOFF)
         )
         if categoria_id is not None:
             query_delete = query_delete.filter(Partido.categoria_id == categoria_id)
@@ -799,12 +700,14 @@ class TorneoPlayoffService:
             query_delete = query_delete.filter(Partido.categoria_id.is_(None))
 
         count = query_delete.delete(synchronize_session=False)
+        marcar_modificado(db, torneo_id)
         db.commit()
+        ocupaciones.invalidar(torneo_id)
 
         # Si no quedan partidos de playoffs en el torneo, volver estado a fase_grupos
         restantes = db.query(Partido).filter(
             Partido.id_torneo == torneo_id,
-            Partido.fase.in_(['16avos', '8vos', '4tos', 'cuartos', 'semis', 'semifinal', 'final'])
+            Partido.fase.in_(FASES_PLAYOFF)
         ).count()
         if restantes == 0:
             torneo = db.query(Torneo).filter(Torneo.id == torneo_id).first()
@@ -841,40 +744,58 @@ class TorneoPlayoffService:
                     db.commit()
             return None
         
-        # Determinar siguiente fase
-        siguiente_fase = TorneoPlayoffService._obtener_siguiente_fase(partido.fase)
-        numero_siguiente = (partido.numero_partido + 1) // 2
-        
-        partido_siguiente = db.query(Partido).filter(
-            Partido.id_torneo == partido.id_torneo,
-            Partido.fase == siguiente_fase,
-            Partido.numero_partido == numero_siguiente,
-            Partido.categoria_id == partido.categoria_id
-        ).first()
-        
+        partido_siguiente = TorneoPlayoffService.asignar_en_siguiente(db, partido, pareja_ganadora_id)
         if partido_siguiente:
-            if partido.numero_partido % 2 == 1:
-                partido_siguiente.pareja1_id = pareja_ganadora_id
-            else:
-                partido_siguiente.pareja2_id = pareja_ganadora_id
-            
+            publicar_evento(db, partido.id_torneo, GANADOR_AVANZADO, datos_ganador(partido, partido_siguiente, pareja_ganadora_id))
             db.commit()
-            return partido_siguiente
-        
-        return None
+        return partido_siguiente
     
     @staticmethod
-    def _obtener_siguiente_fase(fase_actual: str) -> str:
-        """Obtiene la siguiente fase del torneo"""
-        mapa = {
-            '16avos': '8vos',
-            '8vos': '4tos',
-            '4tos': 'semis',
-            'cuartos': 'semis',
-            'semis': 'final',
-            'semifinal': 'final'
-        }
-        return mapa.get(fase_actual, 'final')
+    def asignar_en_siguiente(
+        db: Session,
+        partido: Partido,
+        pareja_ganadora_id: int
+    ) -> Optional[Partido]:
+        """
+        Pone al ganador en el partido siguiente con un solo UPDATE condicional,
+        usando el vínculo guardado al armar el bracket. Solo escribe la columna
+        de su slot y solo si el partido siguiente todavía no tiene ganador, así
+        dos resultados simultáneos (ej. las dos semis) no se pisan.
+        No commitea. Devuelve el partido siguiente, o None si no hay o ya se jugó.
+        """
+        if partido.siguiente_partido_id is None:
+            return None
+        columna = 'pareja1_id' if partido.slot_siguiente == 1 else 'pareja2_id'
+        return db.scalars(
+            update(Partido)
+            .where(
+                Partido.id_partido == partido.siguiente_partido_id,
+                Partido.ganador_pareja_id.is_(None)
+            )
+            .values({columna: pareja_ganadora_id})
+            .returning(Partido)
+        ).first()
+    
+    @staticmethod
+    def intercambiar_posiciones(db: Session, pa: Partido, pb: Partido) -> None:
+        """
+        Intercambia el lugar de dos partidos de la misma fase en el bracket
+        (numero_partido y vínculo al partido siguiente). Los partidos que
+        alimentaban cada posición siguen alimentando la misma posición, así
+        que se re-apuntan al partido que ahora la ocupa. No commitea.
+        """
+        pa.numero_partido, pb.numero_partido = pb.numero_partido, pa.numero_partido
+        pa.siguiente_partido_id, pb.siguiente_partido_id = pb.siguiente_partido_id, pa.siguiente_partido_id
+        pa.slot_siguiente, pb.slot_siguiente = pb.slot_siguiente, pa.slot_siguiente
+        db.execute(
+            update(Partido)
+            .where(Partido.siguiente_partido_id.in_([pa.id_partido, pb.id_partido]))
+            .values(siguiente_partido_id=case(
+                (Partido.siguiente_partido_id == pa.id_partido, pb.id_partido),
+                else_=pa.id_partido
+            )),
+            execution_options={"synchronize_session": False}
+        )
     
     @staticmethod
     def _es_organizador(db: Session, torneo_id: int, user_id: int) -> bool:
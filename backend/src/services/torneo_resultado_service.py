@@ -11,6 +11,13 @@ logger = logging.getLogger(__name__)
 from ..models.driveplus_models import Partido
 from ..models.torneo_models import TorneoPareja, TorneoZona
 from ..services.categoria_service import actualizar_categoria_usuario
+from .torneo_tabla_service import TorneoTablaService
+from .torneo_pendientes_service import TorneoPendientesService
+from .jugador_estadisticas_service import JugadorEstadisticasService
+from ..utils.cache import invalidate_circuito_cache
+from .torneo_version import publicar_evento
+from .eventos_torneo import RESULTADO_CARGADO, GANADOR_AVANZADO, datos_resultado, datos_ganador
+from .resultados_lote import ERROR, OK, EstadoElo, FilaResultado, orden_cronologico
 
 
 class TorneoResultadoService:
@@ -57,13 +64,21 @@ class TorneoResultadoService:
         )
         
         # Actualizar partido
+        aporte_anterior = TorneoTablaService.aporte(partido)
         partido.resultado_padel = resultado_data
         partido.estado = 'confirmado'  # Usar 'confirmado' en lugar de 'finalizado'
         partido.ganador_pareja_id = ganador_pareja_id
         
-        # Aplicar ELO y actualizar estadísticas de jugadores
+        # Tabla de posiciones de la zona: se aplica la diferencia en la misma transacción
+        TorneoTablaService.aplicar_cambio(db, partido, aporte_anterior)
+        pendientes_zona = TorneoPendientesService.descontar(db, partido) if partido.zona_id else None
+        
+        # Aplicar ELO y actualizar estadísticas de jugadores en un SAVEPOINT: si
+        # falla (ej. sin migrations_jugador_estadisticas.sql) Postgres aborta la
+        # transacción; así se deshace solo el ELO y el resultado se guarda igual
         try:
-            TorneoResultadoService._aplicar_elo_torneo(db, partido, resultado_data, ganador_pareja_id)
+            with db.begin_nested():
+                TorneoResultadoService._aplicar_elo_torneo(db, partido, resultado_data, ganador_pareja_id)
             partido.elo_aplicado = True
             logger.info(f"ELO aplicado correctamente para partido {partido.id_partido}")
         except Exception as e:
@@ -72,28 +87,206 @@ class TorneoResultadoService:
             logger.error(f"Traceback: {traceback.format_exc()}")
             partido.elo_aplicado = False
         
+        publicar_evento(db, partido.id_torneo, RESULTADO_CARGADO, datos_resultado(partido))
         db.commit()
         db.refresh(partido)
         
         # Si es partido de playoffs, avanzar ganador a siguiente fase
         if partido.fase and partido.fase != 'zona':
             TorneoResultadoService._avanzar_ganador_playoff(db, partido, ganador_pareja_id)
-        else:
-            # Si es partido de zona, verificar si se completaron todas las zonas
-            # para auto-generar playoffs
+        elif pendientes_zona == 0:
+            # Se completó la zona: si se completaron todas, auto-generar playoffs
             TorneoResultadoService._verificar_auto_playoffs(db, partido.id_torneo)
         
         return partido
     
+    @staticmethod
+    def cargar_resultados_lote(
+        db: Session,
+        torneo_id: int,
+        filas: List[FilaResultado],
+        user_id: int
+    ) -> Dict:
+        """
+        Carga muchos resultados de un torneo en una sola transacción
+        (la planilla del día, ya leída con resultados_lote.leer_json/leer_csv).
+        
+        - Partidos, parejas y jugadores se leen con una query cada uno
+        - El ELO se aplica en orden cronológico (fecha del partido, después
+          número de fila) sobre ratings en memoria: mismo resultado que
+          cargarlos de a uno en ese orden
+        - Historial de rating en un solo INSERT; tablas de posiciones y
+          contadores de pendientes se reconstruyen una vez por zona tocada
+        - Las filas con error no frenan al resto
+        
+        Returns:
+            Dict con totales y el resultado de cada fila
+        """
+        from ..models.driveplus_models import Usuario, HistorialRating
+        from ..services.elo_service import EloService
+        from ..services.torneo_playoff_service import TorneoPlayoffService
+        from ..services.torneo_zona_service import TorneoZonaService
+        from ..database.bulk import insertar_filas
+        from sqlalchemy import select
+        
+        if not TorneoZonaService._es_organizador(db, torneo_id, user_id):
+            raise ValueError("No tienes permisos para cargar resultados en este torneo")
+        
+        salida = {
+            fila.fila: {
+                'fila': fila.fila,
+                'partido_id': fila.partido_id,
+                'estado': ERROR if fila.errores else OK,
+                'errores': list(fila.errores)
+            }
+            for fila in filas
+        }
+        
+        def fallar(fila: FilaResultado, mensaje: str):
+            salida[fila.fila]['estado'] = ERROR
+            salida[fila.fila]['errores'].append(mensaje)
+        
+        validas = [fila for fila in filas if fila.valida]
+        partidos = {
+            partido.id_partido: partido
+            for partido in db.query(Partido).filter(
+                Partido.id_partido.in_([fila.partido_id for fila in validas])
+            )
+        } if validas else {}
+        
+        a_cargar = []
+        for fila in validas:
+            partido = partidos.get(fila.partido_id)
+            if not partido:
+                fallar(fila, "Partido no encontrado")
+            elif partido.id_torneo != torneo_id or partido.tipo != 'torneo':
+                fallar(fila, "El partido no es de este torneo")
+            elif partido.estado == 'confirmado':
+                fallar(fila, "El partido ya está confirmado")
+            else:
+                a_cargar.append((fila, partido))
+        
+        # Orden cronológico (horario del partido); empates en el orden del archivo
+        a_cargar.sort(key=lambda item: orden_cronologico(item[1].fecha_hora, item[1].fecha, item[0].fila))
+        
+        # Las parejas de un partido de playoff pueden quedar definidas dentro
+        # del mismo lote (semis y final en la planilla): se leen las del torneo
+        parejas = {
+            fila[0]: (fila[1], fila[2])
+            for fila in db.execute(select(
+                TorneoPareja.id, TorneoPareja.jugador1_id, TorneoPareja.jugador2_id
+            ).where(TorneoPareja.torneo_id == torneo_id))
+        } if a_cargar else {}
+        jugador_ids = {jid for jugadores in parejas.values() for jid in jugadores}
+        usuarios = {
+            usuario.id_usuario: usuario
+            for usuario in db.query(Usuario).filter(Usuario.id_usuario.in_(jugador_ids))
+        } if jugador_ids else {}
+        estado_elo = EstadoElo(EloService(), {
+            jid: (usuario.rating, usuario.partidos_jugados) for jid, usuario in usuarios.items()
+        })
+        
+        historial = []
+        zonas_tocadas = set()
+        finales = []
+        for fila, partido in a_cargar:
+            if not partido.pareja1_id or not partido.pareja2_id:
+                fallar(fila, "El partido todavía no tiene las dos parejas")
+                continue
+            ganador_pareja_id = TorneoResultadoService._determinar_ganador(
+                fila.resultado, partido.pareja1_id, partido.pareja2_id
+            )
+            partido.resultado_padel = fila.resultado
+            partido.estado = 'confirmado'
+            partido.ganador_pareja_id = ganador_pareja_id
+            
+            cambios_elo = {}
+            try:
+                if partido.pareja1_id not in parejas or partido.pareja2_id not in parejas:
+                    raise ValueError("No se encontraron las parejas del partido")
+                cambios_elo = estado_elo.aplicar(
+                    parejas[partido.pareja1_id], parejas[partido.pareja2_id],
+                    fila.resultado, partido.fecha or datetime.now()
+                )
+                partido.elo_aplicado = True
+            except Exception as e:
+                logger.error(f"Error aplicando ELO en lote (partido {partido.id_partido}): {e}")
+                partido.elo_aplicado = False
+            historial.extend(
+                {
+                    'id_usuario': jid,
+                    'id_partido': partido.id_partido,
+                    'rating_antes': cambio['anterior'],
+                    'delta': cambio['cambio'],
+                    'rating_despues': cambio['nuevo']
+                }
+                for jid, cambio in cambios_elo.items()
+            )
+            publicar_evento(db, torneo_id, RESULTADO_CARGADO, datos_resultado(partido))
+            
+            if partido.zona_id:
+                zonas_tocadas.add(partido.zona_id)
+            elif partido.fase == 'final':
+                finales.append((partido, ganador_pareja_id))
+            elif partido.fase:
+                # Cada UPDATE queda en la transacción; un partido siguiente
+                # que venga más adelante en el lote ya tiene su pareja
+                siguiente = TorneoPlayoffService.asignar_en_siguiente(db, partido, ganador_pareja_id)
+                if siguiente:
+                    publicar_evento(db, torneo_id, GANADOR_AVANZADO, datos_ganador(partido, siguiente, ganador_pareja_id))
+            
+            salida[fila.fila].update({
+                'ganador_pareja_id': ganador_pareja_id,
+                'elo_aplicado': partido.elo_aplicado,
+                'cambios_elo': cambios_elo
+            })
+        
+        # Jugadores: rating y partidos finales una sola vez por jugador
+        if historial:
+            insertar_filas(db, HistorialRating, historial)
+            JugadorEstadisticasService.registrar(db, historial, {
+                partido.id_partido: partido.fecha for _, partido in a_cargar
+            })
+        for jid in {h['id_usuario'] for h in historial}:
+            usuario = usuarios[jid]
+            usuario.rating = estado_elo.rating[jid]
+            usuario.partidos_jugados = estado_elo.partidos[jid]
+            actualizar_categoria_usuario(db, usuario)
+        
+        # Tablas y pendientes: una vez por zona (reconstruir hace flush de los partidos)
+        TorneoTablaService.reconstruir(db, torneo_id, zonas_tocadas)
+        pendientes = TorneoPendientesService.contar_zonas(db, sorted(zonas_tocadas)) if zonas_tocadas else {}
+        db.commit()
+        
+        cargados = sum(1 for fila in salida.values() if fila['estado'] == OK)
+        logger.info(f"Torneo {torneo_id}: {cargados} resultados cargados en lote ({len(filas) - cargados} con error)")
+        
+        for partido, ganador_pareja_id in finales:
+            TorneoResultadoService._avanzar_ganador_playoff(db, partido, ganador_pareja_id)
+        if 0 in pendientes.values():
+            # Alguna zona se completó: si se completaron todas, auto-generar playoffs
+            TorneoResultadoService._verificar_auto_playoffs(db, torneo_id)
+        
+        return {
+            'procesados': len(filas),
+            'cargados': cargados,
+            'errores': len(filas) - cargados,
+            'filas': [salida[numero] for numero in sorted(salida)]
+        }
+    
     @staticmethod
     def _verificar_auto_playoffs(db: Session, torneo_id: int) -> bool:
         """
-        Verifica si todas las zonas están completas y auto-genera playoffs si corresponde
+        Verifica si todas las zonas están completas y, si corresponde, encola
+        la generación de playoffs como trabajo en segundo plano.
+        
+        La consulta es sobre los contadores de pendientes de las zonas del
+        torneo; solo cuando todos dan 0 se confirma contra los partidos.
         
         Returns:
-            True si se generaron playoffs automáticamente
+            True si se encoló la generación automática de playoffs
         """
-        from ..models.torneo_models import Torneo, TorneoZona
+        from ..models.torneo_models import Torneo
         
         # Obtener torneo
         torneo = db.query(Torneo).filter(Torneo.id == torneo_id).first()
@@ -104,48 +297,49 @@ class TorneoResultadoService:
         if str(torneo.estado) not in ['fase_grupos', 'EstadoTorneo.FASE_GRUPOS']:
             return False
         
-        # Verificar si ya hay partidos de playoffs
-        partidos_playoffs = db.query(Partido).filter(
-            Partido.id_torneo == torneo_id,
-            Partido.fase != 'zona',
-            Partido.fase.isnot(None)
-        ).count()
-        
-        if partidos_playoffs > 0:
-            # Ya hay playoffs generados
-            return False
-        
-        # Obtener todas las zonas
-        zonas = db.query(TorneoZona).filter(TorneoZona.torneo_id == torneo_id).all()
-        if not zonas:
+        pendientes = TorneoPendientesService.por_categoria(db, torneo_id)
+        if not pendientes or any(pendientes.values()):
+            db.commit()  # guarda los contadores que se hayan calculado
             return False
         
-        # Verificar que todas las zonas estén completas
-        todas_completas = True
-        for zona in zonas:
-            if not TorneoResultadoService.verificar_zona_completa(db, zona.id):
-                todas_completas = False
-                break
-        
-        if not todas_completas:
+        # Todo en 0: confirmar contra los partidos antes de generar
+        pendientes = TorneoPendientesService.recontar(db, torneo_id)
+        db.commit()
+        if any(pendientes.values()):
+            logger.warning(f"Torneo {torneo_id}: contadores de pendientes corregidos {pendientes}")
             return False
         
-        # Todas las zonas completas - generar playoffs automáticamente
-        try:
-            from ..services.torneo_playoff_service import TorneoPlayoffService
-            
-            logger.info(f"Auto-generando playoffs para torneo {torneo_id}")
-            TorneoPlayoffService.generar_playoffs(
-                db=db,
-                torneo_id=torneo_id,
-                user_id=torneo.creado_por,  # Usar el creador del torneo
-                clasificados_por_zona=2
+        from ..services.trabajos import trabajos
+        from ..services.torneo_playoff_service import TorneoPlayoffService
+        from ..services.bracket import FASES_PLAYOFF
+        
+        creador = torneo.creado_por  # Usar el creador del torneo
+        
+        def generar(db_trabajo, progreso):
+            # Si mientras tanto alguien los generó a mano, no se pisan
+            existentes = db_trabajo.query(Partido.id_partido).filter(
+                Partido.id_torneo == torneo_id,
+                Partido.fase.in_(FASES_PLAYOFF)
+            ).first()
+            if existentes:
+                return {"total_partidos": 0, "omitido": "El torneo ya tiene playoffs"}
+            partidos = TorneoPlayoffService.generar_playoffs(
+                db_trabajo, torneo_id, creador, clasificados_por_zona=2, progreso=progreso
             )
             logger.info(f"Playoffs auto-generados exitosamente para torneo {torneo_id}")
-            return True
-        except Exception as e:
-            logger.error(f"Error auto-generando playoffs: {e}")
-            return False
+            return {"total_partidos": len(partidos)}
+        
+        # Misma clave activa que POST /generar-playoffs en segundo plano con los valores por defecto
+        trabajo, _ = trabajos.encolar(
+            'playoffs',
+            generar,
+            torneo_id=torneo_id,
+            usuario_id=creador,
+            parametros={"categoria_id": None, "clasificados_por_zona": 2},
+            clave_activa=f"playoffs:{torneo_id}:categoria_id=None:clasificados_por_zona=2"
+        )
+        logger.info(f"Auto-generación de playoffs encolada para torneo {torneo_id}: trabajo {trabajo.id}")
+        return True
     
     @staticmethod
     def _avanzar_ganador_playoff(
@@ -186,65 +380,26 @@ class TorneoResultadoService:
                         logger.error(f"Error calculando puntos de circuito: {e}")
             return None
         
-        # Determinar siguiente fase
-        fases_orden = ['16avos', '8vos', '4tos', 'semis', 'final']
-        fase_actual = partido.fase
-        if fase_actual == 'semifinal':
-            fase_actual = 'semis'
-        elif fase_actual == 'cuartos':
-            fase_actual = '4tos'
-            
-        try:
-            idx_actual = fases_orden.index(fase_actual)
-            siguiente_fase = fases_orden[idx_actual + 1]
-        except (ValueError, IndexError):
-            return None
-        
-        # Buscar o crear partido de siguiente ronda
-        # Lógica: el ganador del partido N va al partido (N+1)//2 de la siguiente fase
-        numero_partido = partido.numero_partido or 1
-        numero_siguiente = (numero_partido + 1) // 2
-        
-        partido_siguiente = db.query(Partido).filter(
-            Partido.id_torneo == partido.id_torneo,
-            Partido.fase == siguiente_fase,
-            Partido.numero_partido == numero_siguiente,
-            Partido.categoria_id == partido.categoria_id
-        ).first()
-        
-        # Si no existe el partido de siguiente fase, crearlo (poco habitual; el bracket ya los crea)
+        # Un UPDATE condicional sobre el partido siguiente guardado en el bracket
+        from ..services.torneo_playoff_service import TorneoPlayoffService
+        partido_siguiente = TorneoPlayoffService.asignar_en_siguiente(db, partido, ganador_pareja_id)
         if not partido_siguiente:
-            partido_siguiente = Partido(
-                id_torneo=partido.id_torneo,
-                categoria_id=partido.categoria_id,
-                fase=siguiente_fase,
-                numero_partido=numero_siguiente,
-                estado='pendiente',
-                fecha=partido.fecha,
-                id_creador=partido.id_creador,
-                tipo='torneo'
+            logger.warning(
+                f"Partido {partido.id_partido} ({partido.fase}): sin partido siguiente vinculado o ya jugado"
             )
-            db.add(partido_siguiente)
-            db.flush()
-        
-        # Asignar ganador a la posición correspondiente
-        # Partido impar -> pareja1, Partido par -> pareja2
-        if numero_partido % 2 == 1:
-            partido_siguiente.pareja1_id = ganador_pareja_id
-            logger.info(f"Asignado ganador {ganador_pareja_id} como pareja1 en partido {partido_siguiente.id_partido} ({siguiente_fase})")
-        else:
-            partido_siguiente.pareja2_id = ganador_pareja_id
-            logger.info(f"Asignado ganador {ganador_pareja_id} como pareja2 en partido {partido_siguiente.id_partido} ({siguiente_fase})")
-        
-        db.commit()
-        db.refresh(partido_siguiente)
+            return None
         
-        logger.info(f"Partido siguiente actualizado: pareja1={partido_siguiente.pareja1_id}, pareja2={partido_siguiente.pareja2_id}")
+        logger.info(
+            f"Asignado ganador {ganador_pareja_id} como pareja{partido.slot_siguiente} "
+            f"en partido {partido_siguiente.id_partido} ({partido_siguiente.fase})"
+        )
         
-        # Verificar si el partido siguiente ya tiene ambas parejas y una es de bye
-        # Si es así, verificar si necesita crear el siguiente partido
+        # Verificar si el partido siguiente ya tiene ambas parejas
         TorneoResultadoService._verificar_partido_listo(db, partido_siguiente)
         
+        publicar_evento(db, partido.id_torneo, GANADOR_AVANZADO, datos_ganador(partido, partido_siguiente, ganador_pareja_id))
+        db.commit()
+        
         return partido_siguiente
     
     @staticmethod
@@ -326,6 +481,7 @@ class TorneoResultadoService:
                 count += 1
         
         db.commit()
+        invalidate_circuito_cache()
         logger.info(f"Puntos de circuito calculados: {count} registros para torneo {torneo.id}, categoría {categoria_id}")
 
     @staticmethod
@@ -566,8 +722,11 @@ class TorneoResultadoService:
         )
         
         # Actualizar
+        aporte_anterior = TorneoTablaService.aporte(partido)
         partido.resultado_padel = nuevo_resultado
         partido.ganador_pareja_id = ganador_pareja_id
+        TorneoTablaService.aplicar_cambio(db, partido, aporte_anterior)
+        publicar_evento(db, partido.id_torneo, RESULTADO_CARGADO, datos_resultado(partido))
         
         db.commit()
         db.refresh(partido)
@@ -595,205 +754,59 @@ class TorneoResultadoService:
         """
         from ..models.driveplus_models import Usuario, HistorialRating
         from ..services.elo_service import EloService
-        from sqlalchemy import text
+        from sqlalchemy import select
         
         # Obtener parejas usando SQL directo para evitar problemas con Enum
-        result1 = db.execute(text(
-            "SELECT id, jugador1_id, jugador2_id FROM torneos_parejas WHERE id = :id"
-        ), {'id': partido.pareja1_id}).fetchone()
-        
-        result2 = db.execute(text(
-            "SELECT id, jugador1_id, jugador2_id FROM torneos_parejas WHERE id = :id"
-        ), {'id': partido.pareja2_id}).fetchone()
+        filas = db.execute(select(
+            TorneoPareja.id, TorneoPareja.jugador1_id, TorneoPareja.jugador2_id
+        ).where(TorneoPareja.id.in_([partido.pareja1_id, partido.pareja2_id]))).all()
+        parejas = {fila[0]: (fila[1], fila[2]) for fila in filas}
         
-        if not result1 or not result2:
+        if partido.pareja1_id not in parejas or partido.pareja2_id not in parejas:
             raise ValueError("No se encontraron las parejas del partido")
-        
-        # Crear objetos simples con los datos de las parejas
-        class ParejaData:
-            def __init__(self, row):
-                self.id = row[0]
-                self.jugador1_id = row[1]
-                self.jugador2_id = row[2]
-        
-        pareja1 = ParejaData(result1)
-        pareja2 = ParejaData(result2)
+        pareja1 = parejas[partido.pareja1_id]
+        pareja2 = parejas[partido.pareja2_id]
         
         # Obtener los 4 jugadores
-        jugadores_ids = [
-            pareja1.jugador1_id, pareja1.jugador2_id,
-            pareja2.jugador1_id, pareja2.jugador2_id
-        ]
-        
-        jugadores = {}
-        for jid in jugadores_ids:
-            usuario = db.query(Usuario).filter(Usuario.id_usuario == jid).first()
-            if usuario:
-                jugadores[jid] = usuario
+        jugadores = {
+            usuario.id_usuario: usuario
+            for usuario in db.query(Usuario).filter(Usuario.id_usuario.in_(pareja1 + pareja2))
+        }
         
         if len(jugadores) != 4:
             raise ValueError("No se encontraron todos los jugadores")
         
-        # Preparar datos para el servicio ELO
-        team_a_players = [
-            {
-                'id': pareja1.jugador1_id,
-                'id_usuario': pareja1.jugador1_id,
-                'rating': jugadores[pareja1.jugador1_id].rating or 1200,
-                'partidos': jugadores[pareja1.jugador1_id].partidos_jugados or 0
-            },
-            {
-                'id': pareja1.jugador2_id,
-                'id_usuario': pareja1.jugador2_id,
-                'rating': jugadores[pareja1.jugador2_id].rating or 1200,
-                'partidos': jugadores[pareja1.jugador2_id].partidos_jugados or 0
-            }
-        ]
-        
-        team_b_players = [
-            {
-                'id': pareja2.jugador1_id,
-                'id_usuario': pareja2.jugador1_id,
-                'rating': jugadores[pareja2.jugador1_id].rating or 1200,
-                'partidos': jugadores[pareja2.jugador1_id].partidos_jugados or 0
-            },
-            {
-                'id': pareja2.jugador2_id,
-                'id_usuario': pareja2.jugador2_id,
-                'rating': jugadores[pareja2.jugador2_id].rating or 1200,
-                'partidos': jugadores[pareja2.jugador2_id].partidos_jugados or 0
-            }
-        ]
-        
-        # Extraer datos del resultado
-        sets = resultado_data.get('sets', [])
-        sets_a = sum(1 for s in sets if s.get('ganador') == 'equipoA')
-        sets_b = sum(1 for s in sets if s.get('ganador') == 'equipoB')
-        games_a = sum(s.get('gamesEquipoA', 0) for s in sets)
-        games_b = sum(s.get('gamesEquipoB', 0) for s in sets)
-        
-        # MAPEAR CORRECTAMENTE PAREJAS PARA ELO (FIX CRÍTICO - BUG ELO INVERTIDO)
-        # El frontend (ModalCargarResultado) SIEMPRE usa: pareja1 = equipoA, pareja2 = equipoB
-        # El resultado enviado NO incluye 'jugadores', solo 'sets' con gamesEquipoA/gamesEquipoB
-        # DEFAULT: pareja1_es_equipoA = True (convención del frontend)
-        # Solo invertir si hay jugadores en el resultado Y pareja1 NO está en equipoA
-        
-        jugadores_resultado = resultado_data.get('jugadores', {})
-        jugadores_equipoA = jugadores_resultado.get('equipoA', [])
-        
-        pareja1_es_equipoA = True  # DEFAULT: frontend usa pareja1=equipoA, pareja2=equipoB
-        if jugadores_equipoA:
-            ids_pareja1 = {pareja1.jugador1_id, pareja1.jugador2_id}
-            ids_equipoA = {j.get('id') for j in jugadores_equipoA if j.get('id')}
-            pareja1_es_equipoA = bool(ids_pareja1.intersection(ids_equipoA))
-        
-        # Asignar sets correctamente según la correspondencia
-        if pareja1_es_equipoA:
-            # pareja1 = equipoA, pareja2 = equipoB
-            sets_pareja1 = sets_a  # sets de equipoA
-            sets_pareja2 = sets_b  # sets de equipoB
-            games_pareja1 = games_a
-            games_pareja2 = games_b
-        else:
-            # pareja1 = equipoB, pareja2 = equipoA (INVERTIDO - caso raro con jugadores en resultado)
-            sets_pareja1 = sets_b  # sets de equipoB
-            sets_pareja2 = sets_a  # sets de equipoA
-            games_pareja1 = games_b
-            games_pareja2 = games_a
-        
-        # Convertir sets al formato esperado por EloService
-        # games_a = team_a (pareja1), games_b = team_b (pareja2)
-        if pareja1_es_equipoA:
-            sets_detail = [
-                {'games_a': s.get('gamesEquipoA', 0), 'games_b': s.get('gamesEquipoB', 0)}
-                for s in sets
-            ]
-        else:
-            sets_detail = [
-                {'games_a': s.get('gamesEquipoB', 0), 'games_b': s.get('gamesEquipoA', 0)}
-                for s in sets
-            ]
-        
-        # Calcular ELO (CORREGIDO)
-        elo_service = EloService()
-        cambios_elo_result = elo_service.calculate_match_ratings(
-            team_a_players=team_a_players,
-            team_b_players=team_b_players,
-            sets_a=sets_pareja1,  # Ahora corresponde correctamente a pareja1
-            sets_b=sets_pareja2,  # Ahora corresponde correctamente a pareja2
-            games_a=games_pareja1,
-            games_b=games_pareja2,
-            sets_detail=sets_detail,
-            match_type='torneo',
-            match_date=partido.fecha or datetime.now()
+        # Mismo cálculo que la carga en lote (resultados_lote.EstadoElo):
+        # pareja1 = equipoA salvo que el resultado traiga 'jugadores' que digan otra cosa
+        estado_elo = EstadoElo(EloService(), {
+            jid: (usuario.rating, usuario.partidos_jugados) for jid, usuario in jugadores.items()
+        })
+        resultado_elo = estado_elo.aplicar(
+            pareja1, pareja2, resultado_data, partido.fecha or datetime.now()
         )
         
         # Aplicar cambios de ELO y actualizar estadísticas
-        resultado_elo = {}
-        
-        # Equipo A (pareja1)
-        for i, player_data in enumerate(cambios_elo_result['team_a']['players']):
-            jid = [pareja1.jugador1_id, pareja1.jugador2_id][i]
-            usuario = jugadores[jid]
-            
-            rating_antes = usuario.rating or 1200
-            nuevo_rating = int(round(player_data['new_rating']))
-            cambio = int(round(player_data['rating_change']))
-            
-            # Actualizar usuario
-            usuario.rating = nuevo_rating
-            usuario.partidos_jugados = (usuario.partidos_jugados or 0) + 1
-            
-            # Actualizar categoría según el nuevo rating
-            actualizar_categoria_usuario(db, usuario)
-            
-            # Crear historial de rating
-            historial = HistorialRating(
-                id_usuario=jid,
-                id_partido=partido.id_partido,
-                rating_antes=rating_antes,
-                delta=cambio,
-                rating_despues=nuevo_rating
-            )
-            db.add(historial)
-            
-            resultado_elo[jid] = {
-                'anterior': rating_antes,
-                'nuevo': nuevo_rating,
-                'cambio': cambio
-            }
-        
-        # Equipo B (pareja2)
-        for i, player_data in enumerate(cambios_elo_result['team_b']['players']):
-            jid = [pareja2.jugador1_id, pareja2.jugador2_id][i]
+        for jid, cambio in resultado_elo.items():
             usuario = jugadores[jid]
-            
-            rating_antes = usuario.rating or 1200
-            nuevo_rating = int(round(player_data['new_rating']))
-            cambio = int(round(player_data['rating_change']))
-            
-            # Actualizar usuario
-            usuario.rating = nuevo_rating
-            usuario.partidos_jugados = (usuario.partidos_jugados or 0) + 1
+            usuario.rating = cambio['nuevo']
+            usuario.partidos_jugados = estado_elo.partidos[jid]
             
             # Actualizar categoría según el nuevo rating
             actualizar_categoria_usuario(db, usuario)
             
             # Crear historial de rating
-            historial = HistorialRating(
+            db.add(HistorialRating(
                 id_usuario=jid,
                 id_partido=partido.id_partido,
-                rating_antes=rating_antes,
-                delta=cambio,
-                rating_despues=nuevo_rating
-            )
-            db.add(historial)
-            
-            resultado_elo[jid] = {
-                'anterior': rating_antes,
-                'nuevo': nuevo_rating,
-                'cambio': cambio
-            }
+                rating_antes=cambio['anterior'],
+                delta=cambio['cambio'],
+                rating_despues=cambio['nuevo']
+            ))
+        
+        JugadorEstadisticasService.registrar(db, [
+            {'id_usuario': jid, 'id_partido': partido.id_partido, 'delta': cambio['cambio']}
+            for jid, cambio in resultado_elo.items()
+        ], {partido.id_partido: partido.fecha})
         
         # Flush para asegurar que los cambios se persistan
         db.flush()
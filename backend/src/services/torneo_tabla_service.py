@@ -0,0 +1,320 @@
+"""
+Servicio de tablas de posiciones materializadas (torneo_tabla_posiciones)
+
+- Al cargar o corregir un resultado de zona se aplica la diferencia de
+  aportes con UPDATE col = col + delta, en la misma transacción, y las filas
+  que cambiaron se publican como evento tabla_actualizada
+- Una zona sin filas no está materializada: la lectura la calcula desde los
+  partidos y el primer resultado que entra la reconstruye
+- Los cambios de fixture o de integrantes de zona invalidan (borran) las
+  filas del torneo; reconciliar() reconstruye todo desde cero
+"""
+from sqlalchemy import and_, update
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional
+import logging
+
+from ..models.driveplus_models import Partido
+from ..models.torneo_models import TorneoZona, TorneoZonaPareja, TorneoTablaPosiciones
+from ..database.bulk import insertar_filas
+from .torneo_pendientes_service import TorneoPendientesService
+from .torneo_version import marcar_modificado, marcar_zonas, publicar_evento
+from .eventos_torneo import TABLA_ACTUALIZADA, datos_tabla
+from .tabla_posiciones import (
+    CAMPOS, COLUMNAS, ESTADOS_COMPUTABLES, aporte_de_partido, calcular, diferencia,
+    fila_vacia, ordenar
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TorneoTablaService:
+    """Mantenimiento y lectura de las tablas de posiciones de zona"""
+
+    # ------------------------------------------------------------------
+    # Escritura incremental
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def aporte(partido: Partido) -> Dict[int, Dict[str, int]]:
+        """Aporte actual del partido (llamar ANTES de modificarlo)"""
+        if not partido.zona_id:
+            return {}
+        return aporte_de_partido(partido)
+
+    @staticmethod
+    def aplicar_cambio(db: Session, partido: Partido, aporte_anterior: Dict[int, Dict[str, int]]) -> None:
+        """
+        Aplica a la tabla de la zona la diferencia entre el aporte anterior y
+        el actual del partido. No hace commit (va en la transacción del resultado).
+        """
+        if not partido.zona_id:
+            return
+        zona_id = partido.zona_id
+
+        if not TorneoTablaService._materializada(db, zona_id):
+            # Dos primeros resultados a la vez: el segundo espera el lock de la
+            # zona y, si el primero ya la materializó, aplica su delta
+            TorneoTablaService._bloquear_zonas(db, [zona_id])
+            materializada = TorneoTablaService._materializada(db, zona_id)
+        else:
+            materializada = True
+        if not materializada:
+            # Primer resultado de la zona (o zona invalidada): reconstruir con el partido ya cambiado
+            db.flush()
+            calculadas = TorneoTablaService._reconstruir_zonas(db, [zona_id])
+            publicar_evento(db, partido.id_torneo, TABLA_ACTUALIZADA, datos_tabla(zona_id, [
+                {'pareja_id': pareja_id, **fila} for pareja_id, fila in calculadas[zona_id].items()
+            ]))
+            return
+
+        cambios = diferencia(aporte_anterior, aporte_de_partido(partido))
+        if not cambios:
+            return
+
+        # Igual que el recálculo completo: solo cuenta si las dos parejas están en la zona
+        en_zona = {
+            pid for (pid,) in db.query(TorneoZonaPareja.pareja_id).filter(
+                TorneoZonaPareja.zona_id == zona_id,
+                TorneoZonaPareja.pareja_id.in_([partido.pareja1_id, partido.pareja2_id])
+            )
+        }
+        if partido.pareja1_id not in en_zona or partido.pareja2_id not in en_zona:
+            return
+
+        columnas = [getattr(TorneoTablaPosiciones, COLUMNAS[campo]) for campo in CAMPOS]
+        filas_nuevas = []
+        for pareja_id, deltas in cambios.items():
+            valores = {
+                COLUMNAS[campo]: getattr(TorneoTablaPosiciones, COLUMNAS[campo]) + delta
+                for campo, delta in deltas.items()
+            }
+            # RETURNING: los valores nuevos de la fila van en el evento en vivo
+            actualizada = db.execute(
+                update(TorneoTablaPosiciones)
+                .where(
+                    TorneoTablaPosiciones.zona_id == zona_id,
+                    TorneoTablaPosiciones.pareja_id == pareja_id
+                )
+                .values(valores)
+                .returning(*columnas)
+                .execution_options(synchronize_session=False)
+            ).first()
+            if actualizada is not None:
+                fila = {campo: valor or 0 for campo, valor in zip(CAMPOS, actualizada)}
+            else:
+                fila = fila_vacia()
+                fila.update(deltas)
+                db.add(TorneoTablaPosiciones(
+                    zona_id=zona_id,
+                    pareja_id=pareja_id,
+                    **{COLUMNAS[campo]: valor for campo, valor in fila.items()}
+                ))
+            filas_nuevas.append({'pareja_id': pareja_id, **fila})
+        publicar_evento(db, partido.id_torneo, TABLA_ACTUALIZADA, datos_tabla(zona_id, filas_nuevas))
+
+    @staticmethod
+    def _materializada(db: Session, zona_id: int) -> bool:
+        return db.query(TorneoTablaPosiciones.id).filter(
+            TorneoTablaPosiciones.zona_id == zona_id
+        ).first() is not None
+
+    @staticmethod
+    def _bloquear_zonas(db: Session, zona_ids: List[int]) -> None:
+        """SELECT ... FOR UPDATE de las zonas (en orden de id: sin deadlocks) hasta el commit"""
+        db.query(TorneoZona.id).filter(
+            TorneoZona.id.in_(zona_ids)
+        ).order_by(TorneoZona.id).with_for_update().all()
+
+    @staticmethod
+    def invalidar(db: Session, torneo_id: Optional[int] = None, zona_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Borra las filas materializadas (de zonas o de todo el torneo) cuando
+        cambian los partidos o los integrantes por fuera de la carga de
+        resultados. También los contadores de partidos pendientes. No hace commit.
+        """
+        if zona_ids is not None:
+            zona_ids = list(zona_ids)
+        TorneoPendientesService.invalidar(db, torneo_id=torneo_id, zona_ids=zona_ids)
+        query = db.query(TorneoTablaPosiciones)
+        if zona_ids is not None:
+            if not zona_ids:
+                return 0
+            query = query.filter(TorneoTablaPosiciones.zona_id.in_(zona_ids))
+            marcar_zonas(db, zona_ids)
+        elif torneo_id is not None:
+            query = query.filter(TorneoTablaPosiciones.zona_id.in_(
+                db.query(TorneoZona.id).filter(TorneoZona.torneo_id == torneo_id)
+            ))
+            marcar_modificado(db, torneo_id)
+        return query.delete(synchronize_session=False)
+
+    # ------------------------------------------------------------------
+    # Reconstrucción
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _calcular_zonas(db: Session, zona_ids: List[int]) -> Dict[int, Dict[int, Dict[str, int]]]:
+        """Recálculo completo desde los partidos: {zona_id: {pareja_id: estadísticas}}"""
+        if not zona_ids:
+            return {}
+        parejas_por_zona: Dict[int, List[int]] = {z: [] for z in zona_ids}
+        for zona_id, pareja_id in db.query(TorneoZonaPareja.zona_id, TorneoZonaPareja.pareja_id).filter(
+            TorneoZonaPareja.zona_id.in_(zona_ids)
+        ):
+            parejas_por_zona[zona_id].append(pareja_id)
+
+        partidos_por_zona: Dict[int, List] = {z: [] for z in zona_ids}
+        for partido in db.query(
+            Partido.zona_id, Partido.estado, Partido.pareja1_id, Partido.pareja2_id,
+            Partido.resultado_padel, Partido.ganador_pareja_id
+        ).filter(
+            Partido.zona_id.in_(zona_ids),
+            Partido.estado.in_(ESTADOS_COMPUTABLES)
+        ):
+            partidos_por_zona[partido.zona_id].append(partido)
+
+        return {
+            zona_id: calcular(parejas_por_zona[zona_id], partidos_por_zona[zona_id])
+            for zona_id in zona_ids
+        }
+
+    @staticmethod
+    def _reconstruir_zonas(db: Session, zona_ids: List[int]) -> Dict[int, Dict[int, Dict[str, int]]]:
+        calculadas = TorneoTablaService._calcular_zonas(db, zona_ids)
+        # Solo las filas de la tabla (invalidar también borraría los contadores de pendientes)
+        db.query(TorneoTablaPosiciones).filter(
+            TorneoTablaPosiciones.zona_id.in_(zona_ids)
+        ).delete(synchronize_session=False)
+        marcar_zonas(db, zona_ids)
+        insertar_filas(db, TorneoTablaPosiciones, [
+            {
+                'zona_id': zona_id,
+                'pareja_id': pareja_id,
+                **{COLUMNAS[campo]: valor for campo, valor in fila.items()}
+            }
+            for zona_id, tabla in calculadas.items()
+            for pareja_id, fila in tabla.items()
+        ])
+        return calculadas
+
+    @staticmethod
+    def reconstruir(db: Session, torneo_id: int, zona_ids: Iterable[int]) -> None:
+        """
+        Reconstruye las tablas de varias zonas desde sus partidos y publica
+        cada una como tabla_actualizada (carga de resultados en lote: una
+        reconstrucción por zona en lugar de un delta por partido). No hace commit.
+        """
+        zona_ids = sorted(set(zona_ids))
+        if not zona_ids:
+            return
+        db.flush()
+        TorneoTablaService._bloquear_zonas(db, zona_ids)
+        calculadas = TorneoTablaService._reconstruir_zonas(db, zona_ids)
+        for zona_id in zona_ids:
+            publicar_evento(db, torneo_id, TABLA_ACTUALIZADA, datos_tabla(zona_id, [
+                {'pareja_id': pareja_id, **fila} for pareja_id, fila in calculadas[zona_id].items()
+            ]))
+
+    @staticmethod
+    def reconciliar(db: Session, torneo_id: Optional[int] = None, aplicar: bool = True) -> Dict:
+        """
+        Reconstruye las tablas desde los partidos (de un torneo o de todos) y
+        reporta las filas materializadas que no coincidían.
+
+        Args:
+            aplicar: Si False solo compara (dry-run)
+        """
+        query = db.query(TorneoZona.id)
+        if torneo_id is not None:
+            query = query.filter(TorneoZona.torneo_id == torneo_id)
+        zona_ids = [z for (z,) in query.order_by(TorneoZona.id)]
+
+        calculadas = TorneoTablaService._calcular_zonas(db, zona_ids)
+        actuales = TorneoTablaService._leer_materializadas(db, zona_ids)
+
+        diferencias = []
+        for zona_id in zona_ids:
+            guardada = actuales.get(zona_id)
+            if guardada is None:
+                continue  # sin materializar: no hay nada desincronizado
+            for pareja_id, fila in calculadas[zona_id].items():
+                if guardada.get(pareja_id) != fila:
+                    diferencias.append({
+                        "zona_id": zona_id,
+                        "pareja_id": pareja_id,
+                        "guardada": guardada.get(pareja_id),
+                        "calculada": fila
+                    })
+
+        if aplicar and zona_ids:
+            TorneoTablaService._reconstruir_zonas(db, zona_ids)
+            db.commit()
+            logger.info(f"Tablas de posiciones reconstruidas: {len(zona_ids)} zonas, {len(diferencias)} filas corregidas")
+
+        return {
+            "aplicado": aplicar,
+            "zonas": len(zona_ids),
+            "zonas_sin_materializar": sum(1 for z in zona_ids if z not in actuales),
+            "filas_corregidas": len(diferencias),
+            "diferencias": diferencias
+        }
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _leer_materializadas(db: Session, zona_ids: List[int]) -> Dict[int, Dict[int, Dict[str, int]]]:
+        resultado: Dict[int, Dict[int, Dict[str, int]]] = {}
+        if not zona_ids:
+            return resultado
+        for fila in db.query(TorneoTablaPosiciones).filter(TorneoTablaPosiciones.zona_id.in_(zona_ids)):
+            resultado.setdefault(fila.zona_id, {})[fila.pareja_id] = {
+                campo: getattr(fila, COLUMNAS[campo]) or 0 for campo in CAMPOS
+            }
+        return resultado
+
+    @staticmethod
+    def obtener_tablas(db: Session, zona_ids: Iterable[int]) -> Dict[int, List[Dict]]:
+        """
+        Tablas ordenadas por zona: [{pareja_id, posicion, partidos_jugados, ...}]
+        en el orden de obtener_tabla_posiciones (empates: orden de asignación).
+
+        Una query indexada para asignaciones + filas materializadas; las zonas
+        sin materializar se calculan desde sus partidos (sin escribir).
+        """
+        zona_ids = list(zona_ids)
+        if not zona_ids:
+            return {}
+
+        asignaciones: Dict[int, List[int]] = {z: [] for z in zona_ids}
+        guardadas: Dict[int, Dict[int, Dict[str, int]]] = {}
+        filas = db.query(TorneoZonaPareja.zona_id, TorneoZonaPareja.pareja_id, TorneoTablaPosiciones).outerjoin(
+            TorneoTablaPosiciones,
+            and_(
+                TorneoTablaPosiciones.zona_id == TorneoZonaPareja.zona_id,
+                TorneoTablaPosiciones.pareja_id == TorneoZonaPareja.pareja_id
+            )
+        ).filter(
+            TorneoZonaPareja.zona_id.in_(zona_ids)
+        ).order_by(TorneoZonaPareja.id).all()
+
+        for zona_id, pareja_id, guardada in filas:
+            asignaciones[zona_id].append(pareja_id)
+            if guardada is not None:
+                guardadas.setdefault(zona_id, {})[pareja_id] = {
+                    campo: getattr(guardada, COLUMNAS[campo]) or 0 for campo in CAMPOS
+                }
+
+        sin_materializar = [z for z in zona_ids if asignaciones[z] and z not in guardadas]
+        calculadas = TorneoTablaService._calcular_zonas(db, sin_materializar)
+
+        tablas = {}
+        for zona_id in zona_ids:
+            estadisticas = guardadas.get(zona_id) or calculadas.get(zona_id) or {}
+            tablas[zona_id] = ordenar([
+                {'pareja_id': pareja_id, **(estadisticas.get(pareja_id) or fila_vacia())}
+                for pareja_id in asignaciones[zona_id]
+            ])
+        return tablas
@@ -0,0 +1,145 @@
+"""
+Versión por torneo para ETag / GET condicional.
+
+torneos.version se incrementa una vez por commit que toca el torneo:
+- Cambios ORM (add / modificación / delete de Partido, TorneoPareja,
+  TorneoZona, etc.) se detectan solos en before_flush
+- INSERT en lote (insertar_filas / insertar_objetos) se detectan por las
+  columnas torneo_id / id_torneo / zona_id de las filas
+- query.delete() / query.update() y actualizar_filas se marcan con
+  marcar_modificado(db, torneo_id) en el servicio que los hace
+
+En before_commit se hace un único UPDATE torneos SET version = version + 1
+para los torneos marcados (misma transacción) y en after_commit se publican
+los eventos en vivo registrados con publicar_evento() (ver eventos_torneo.py),
+con la versión nueva.
+
+La versión se lee de la base en cada GET condicional (una fila por primary
+key): un caché en memoria por proceso no se entera de los commits de otros
+workers y respondería 304 con un ETag viejo.
+"""
+from types import SimpleNamespace
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from ..models.torneo_models import Torneo, TorneoZona
+from ..utils.etag import Version
+from .eventos_torneo import eventos
+
+CLAVE_TORNEOS = 'torneos_modificados'
+CLAVE_ZONAS = 'zonas_modificadas'
+CLAVE_EVENTOS = 'eventos_torneo'
+CLAVE_EVENTOS_COMMITEADOS = 'eventos_torneo_commiteados'
+
+def marcar_modificado(db: Session, *torneo_ids: Optional[int]) -> None:
+    """Marca torneos cuya versión sube al commitear esta sesión"""
+    pendientes: Set[int] = db.info.setdefault(CLAVE_TORNEOS, set())
+    pendientes.update(int(t) for t in torneo_ids if t)
+
+
+def marcar_zonas(db: Session, zona_ids: Iterable[int]) -> None:
+    """Como marcar_modificado, para cambios que solo conocen las zonas"""
+    db.info.setdefault(CLAVE_ZONAS, set()).update(z for z in zona_ids if z)
+
+
+def publicar_evento(db: Session, torneo_id: int, tipo: str, datos: Dict) -> None:
+    """
+    Registra un evento en vivo del torneo. Se publica solo si la transacción
+    commitea (y con la versión que deja ese commit); un rollback lo descarta.
+    """
+    marcar_modificado(db, torneo_id)
+    db.info.setdefault(CLAVE_EVENTOS, []).append((int(torneo_id), tipo, datos))
+
+
+def version_torneo(db: Session, torneo_id: int) -> Optional[Version]:
+    """(version, updated_at) del torneo leídos de la base; None si no existe"""
+    fila = db.execute(
+        select(Torneo.version, Torneo.updated_at).where(Torneo.id == torneo_id)
+    ).first()
+    if fila is None:
+        return None
+    return (fila.version or 0, fila.updated_at)
+
+
+def _marcar_objeto(session: Session, obj) -> None:
+    if isinstance(obj, Torneo):
+        if obj.id is not None:
+            marcar_modificado(session, obj.id)
+        return
+    torneo_id = getattr(obj, 'torneo_id', None) or getattr(obj, 'id_torneo', None)
+    if torneo_id:
+        marcar_modificado(session, torneo_id)
+        return
+    zona_id = getattr(obj, 'zona_id', None)
+    if zona_id:
+        # TorneoZonaPareja / TorneoTablaPosiciones: el torneo se resuelve al commitear
+        marcar_zonas(session, [zona_id])
+
+
+@event.listens_for(Session, "before_flush")
+def _recolectar_cambios(session, flush_context, instances):
+    for obj in session.new:
+        _marcar_objeto(session, obj)
+    for obj in session.deleted:
+        _marcar_objeto(session, obj)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            _marcar_objeto(session, obj)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _recolectar_inserts(orm_execute_state):
+    """INSERT en lote (database/bulk.py): las filas traen torneo_id / id_torneo / zona_id"""
+    if not orm_execute_state.is_insert:
+        return
+    parametros = orm_execute_state.parameters
+    if not parametros:
+        return
+    filas = parametros if isinstance(parametros, (list, tuple)) else [parametros]
+    for fila in filas:
+        _marcar_objeto(orm_execute_state.session, SimpleNamespace(**{
+            clave: fila.get(clave) for clave in ('torneo_id', 'id_torneo', 'zona_id')
+        }))
+
+
+@event.listens_for(Session, "before_commit")
+def _incrementar_versiones(session):
+    if session.new or session.dirty or session.deleted:
+        session.flush()  # para que before_flush recolecte antes de incrementar
+
+    torneos: Set[int] = session.info.pop(CLAVE_TORNEOS, set())
+    zonas = session.info.pop(CLAVE_ZONAS, set())
+    if zonas:
+        torneos.update(
+            t for (t,) in session.execute(
+                select(TorneoZona.torneo_id).where(TorneoZona.id.in_(zonas))
+            )
+        )
+    if not torneos:
+        return
+
+    nuevas = session.execute(
+        update(Torneo)
+        .where(Torneo.id.in_(sorted(torneos)))  # orden fijo: sin deadlocks entre commits concurrentes
+        .values(version=Torneo.version + 1)
+        .returning(Torneo.id, Torneo.version)
+        .execution_options(synchronize_session=False)
+    ).all()
+    pendientes = session.info.pop(CLAVE_EVENTOS, None)
+    if pendientes:
+        session.info[CLAVE_EVENTOS_COMMITEADOS] = (pendientes, {t: v for t, v in nuevas})
+
+
+@event.listens_for(Session, "after_commit")
+def _publicar_eventos(session):
+    publicables = session.info.pop(CLAVE_EVENTOS_COMMITEADOS, None)
+    if publicables:
+        eventos.publicar_todos(*publicables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_marcas(session):
+    for clave in (CLAVE_TORNEOS, CLAVE_ZONAS, CLAVE_EVENTOS, CLAVE_EVENTOS_COMMITEADOS):
+        session.info.pop(clave, None)
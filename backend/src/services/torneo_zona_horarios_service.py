@@ -9,12 +9,20 @@ import random
 
 from ..models.torneo_models import Torneo, TorneoZona, TorneoPareja, TorneoZonaPareja
 from ..models.driveplus_models import Usuario
+from .agrupamiento_zonas import (
+    vectorizar, matriz_compatibilidad, agrupar, compatibilidad_promedio,
+    refinar as refinar_grupos, TIEMPO_LIMITE_SEGUNDOS
+)
+from ..utils.disponibilidad import DIAS_SEMANA, compilar, libre, mapa_de_pareja, normalizar_dia
+from .torneo_version import marcar_modificado
 
 
 class TorneoZonaHorariosService:
     """Servicio para generación de zonas considerando disponibilidad horaria"""
     
     DURACION_PARTIDO_MINUTOS = 70
+    # Al refinar solo se intercambian parejas con ratings cercanos
+    MAX_DIFERENCIA_RATING_INTERCAMBIO = 150
     
     @staticmethod
     def generar_zonas_con_horarios(
@@ -23,7 +31,9 @@ class TorneoZonaHorariosService:
         user_id: int,
         num_zonas: Optional[int] = None,
         num_canchas: int = 3,
-        categoria_id: Optional[int] = None
+        categoria_id: Optional[int] = None,
+        refinar: bool = False,
+        tiempo_limite: float = TIEMPO_LIMITE_SEGUNDOS
     ) -> Dict:
         """
         Genera zonas considerando:
@@ -38,6 +48,8 @@ class TorneoZonaHorariosService:
             num_zonas: Número de zonas (opcional, se calcula automáticamente)
             num_canchas: Número de canchas disponibles
             categoria_id: ID de categoría (opcional)
+            refinar: Mejorar el greedy intercambiando parejas entre zonas
+            tiempo_limite: Segundos máximos para refinar
             
         Returns:
             Dict con zonas creadas y fixture generado
@@ -78,9 +90,12 @@ class TorneoZonaHorariosService:
             db, parejas, horarios_torneo
         )
         
+        # Matriz de compatibilidad pareja × pareja (una sola vez)
+        matriz = TorneoZonaHorariosService._matriz_compatibilidad(parejas_con_datos)
+        
         # Agrupar parejas por compatibilidad horaria
         grupos_compatibles = TorneoZonaHorariosService._agrupar_por_compatibilidad(
-            parejas_con_datos, num_zonas
+            parejas_con_datos, num_zonas, matriz, refinar, tiempo_limite
         )
         
         # Limpiar zonas existentes
@@ -122,7 +137,7 @@ class TorneoZonaHorariosService:
                 for z in zonas
             ],
             "compatibilidad_promedio": TorneoZonaHorariosService._calcular_compatibilidad_promedio(
-                distribucion, parejas_con_datos
+                distribucion, parejas_con_datos, matriz
             )
         }
     
@@ -177,9 +192,9 @@ class TorneoZonaHorariosService:
             # Obtener disponibilidad horaria de la pareja
             disponibilidad = pareja.disponibilidad_horaria or {}
             
-            # Convertir disponibilidad a slots de tiempo
+            # Convertir las restricciones compiladas a slots de tiempo
             slots = TorneoZonaHorariosService._extraer_slots_disponibles(
-                disponibilidad, horarios_torneo
+                mapa_de_pareja(pareja), horarios_torneo
             )
             
             parejas_datos.append({
@@ -193,67 +208,84 @@ class TorneoZonaHorariosService:
     
     @staticmethod
     def _extraer_slots_disponibles(
-        disponibilidad_pareja: any,  # Puede ser Dict o List
+        disponibilidad_pareja: any,  # Puede ser Dict o List (o el mapa ya compilado)
         horarios_torneo: Dict
     ) -> Set[Tuple[str, str]]:
         """
         Extrae slots de tiempo disponibles para una pareja
         
-        IMPORTANTE: disponibilidad_pareja ahora contiene RESTRICCIONES (horarios NO disponibles)
+        IMPORTANTE: disponibilidad_pareja ahora contiene RESTRICCIONES (horarios NO disponibles).
+        Se compilan a bitmaps (utils/disponibilidad.py) y un slot queda afuera si el
+        partido que empieza ahí se solapa con alguna restricción.
         
         Returns:
             Set de tuplas (dia, hora) ej: {('sabado', '18:00'), ('domingo', '10:00')}
         """
-        # Generar TODOS los slots del torneo primero
-        todos_slots = set()
-        for tipo_dia, franjas in horarios_torneo.items():
-            if not franjas:
-                continue
-            for franja in franjas:
-                desde = franja.get('desde', '08:00')
-                hasta = franja.get('hasta', '23:00')
-                # Generar slots cada 70 minutos
-                hora_actual = TorneoZonaHorariosService._parse_hora(desde)
-                hora_fin = TorneoZonaHorariosService._parse_hora(hasta)
-                while hora_actual < hora_fin:
-                    todos_slots.add((tipo_dia, hora_actual.strftime('%H:%M')))
-                    hora_actual += timedelta(minutes=70)
+        duracion = TorneoZonaHorariosService.DURACION_PARTIDO_MINUTOS
+        todos_slots = TorneoZonaHorariosService._slots_torneo(horarios_torneo)
         
         # Si la pareja no tiene restricciones, está disponible en todos los horarios
         if not disponibilidad_pareja:
-            return todos_slots
-        
-        # Extraer restricciones (horarios NO disponibles)
-        restricciones = set()
-        
-        # Manejar ambos formatos: array directo o objeto con "franjas"
-        franjas_restricciones = []
-        if isinstance(disponibilidad_pareja, list):
-            # Formato nuevo: array directo
-            franjas_restricciones = disponibilidad_pareja
-        elif isinstance(disponibilidad_pareja, dict):
-            # Formato antiguo: objeto con "franjas"
-            franjas_restricciones = disponibilidad_pareja.get('franjas', [])
-        
-        # Procesar restricciones
-        for franja in franjas_restricciones:
-            dias = franja.get('dias', [])
-            hora_inicio = franja.get('horaInicio', '08:00')
-            hora_fin = franja.get('horaFin', '23:00')
-            
-            # Generar slots RESTRINGIDOS para cada día
-            for dia in dias:
-                hora_actual = TorneoZonaHorariosService._parse_hora(hora_inicio)
-                hora_limite = TorneoZonaHorariosService._parse_hora(hora_fin)
-                
-                while hora_actual < hora_limite:
-                    restricciones.add((dia, hora_actual.strftime('%H:%M')))
-                    hora_actual += timedelta(minutes=70)
+            return set(todos_slots)
+        
+        if isinstance(disponibilidad_pareja, dict) and all(
+            isinstance(bits, int) for bits in disponibilidad_pareja.values()
+        ):
+            mapa = disponibilidad_pareja
+        else:
+            mapa = compilar(disponibilidad_pareja)
+        if not mapa:
+            return set(todos_slots)
         
-        # Retornar slots disponibles = todos los slots - restricciones
-        slots_disponibles = todos_slots - restricciones
+        return {
+            slot for slot, hora_mins in todos_slots.items()
+            if libre(mapa, slot[0], hora_mins, duracion)
+        }
+    
+    @staticmethod
+    def _slots_torneo(horarios_torneo) -> Dict[Tuple[str, str], int]:
+        """
+        Grilla de slots del torneo cada DURACION_PARTIDO_MINUTOS: {(dia, 'HH:MM'): minutos}
         
-        return slots_disponibles
+        Acepta horarios por día ({"sabado": [...]} o {"sabado": {"inicio", "fin"}}),
+        por tipo de día ({"semana": [...], "finDeSemana": [...]}) o lista de franjas con "dias".
+        """
+        duracion = TorneoZonaHorariosService.DURACION_PARTIDO_MINUTOS
+        
+        franjas_por_clave = []
+        if isinstance(horarios_torneo, list):
+            for franja in horarios_torneo:
+                if isinstance(franja, dict):
+                    for dia in franja.get('dias', []):
+                        franjas_por_clave.append((dia, [franja]))
+        elif isinstance(horarios_torneo, dict):
+            for clave, franjas in horarios_torneo.items():
+                if isinstance(franjas, dict):
+                    franjas = [franjas]
+                franjas_por_clave.append((clave, franjas or []))
+        
+        slots = {}
+        for clave, franjas in franjas_por_clave:
+            clave_norm = normalizar_dia(clave)
+            if clave_norm == 'semana':
+                dias = DIAS_SEMANA[:5]
+            elif clave_norm == 'findesemana':
+                dias = DIAS_SEMANA[5:]
+            else:
+                dias = [clave_norm]
+            for franja in franjas:
+                if not isinstance(franja, dict):
+                    continue
+                desde = franja.get('desde') or franja.get('inicio') or franja.get('horaInicio') or '08:00'
+                hasta = franja.get('hasta') or franja.get('fin') or franja.get('horaFin') or '23:00'
+                hora_actual = TorneoZonaHorariosService._parse_hora(desde)
+                hora_fin = TorneoZonaHorariosService._parse_hora(hasta)
+                while hora_actual < hora_fin:
+                    hora = hora_actual.strftime('%H:%M')
+                    for dia in dias:
+                        slots[(dia, hora)] = hora_actual.hour * 60 + hora_actual.minute
+                    hora_actual += timedelta(minutes=duracion)
+        return slots
     
     @staticmethod
     def _parse_hora(hora_str: str) -> datetime:
@@ -282,10 +314,21 @@ class TorneoZonaHorariosService:
         
         return len(interseccion) / len(union)
     
+    @staticmethod
+    def _matriz_compatibilidad(parejas_datos: List[Dict]) -> List[List[float]]:
+        """
+        Compatibilidad de cada par de parejas (mismo valor que _calcular_compatibilidad),
+        con los slots como bitsets y popcount
+        """
+        return matriz_compatibilidad(vectorizar([p['slots'] for p in parejas_datos]))
+    
     @staticmethod
     def _agrupar_por_compatibilidad(
         parejas_datos: List[Dict],
-        num_zonas: int
+        num_zonas: int,
+        matriz: Optional[List[List[float]]] = None,
+        refinar: bool = False,
+        tiempo_limite: float = TIEMPO_LIMITE_SEGUNDOS
     ) -> List[List[Dict]]:
         """
         Agrupa parejas maximizando compatibilidad horaria dentro de cada grupo
@@ -293,62 +336,22 @@ class TorneoZonaHorariosService:
         Usa algoritmo greedy:
         1. Ordena parejas por rating
         2. Asigna a zonas balanceando rating y compatibilidad
+        3. (Opcional) Intercambia parejas de rating parecido entre zonas
+           mientras suba la compatibilidad promedio
         """
-        # Ordenar por rating descendente
-        parejas_ordenadas = sorted(parejas_datos, key=lambda x: x['rating'], reverse=True)
-        
-        # Inicializar grupos
-        grupos = [[] for _ in range(num_zonas)]
-        
-        # Distribuir en serpiente considerando compatibilidad
-        for pareja_data in parejas_ordenadas:
-            # Encontrar el grupo con mejor compatibilidad y menor tamaño
-            mejor_grupo_idx = TorneoZonaHorariosService._encontrar_mejor_grupo(
-                pareja_data, grupos
+        if matriz is None:
+            matriz = TorneoZonaHorariosService._matriz_compatibilidad(parejas_datos)
+        ratings = [p['rating'] for p in parejas_datos]
+        
+        grupos = agrupar(ratings, matriz, num_zonas)
+        if refinar:
+            grupos, _ = refinar_grupos(
+                grupos, matriz, tiempo_limite,
+                ratings=ratings,
+                max_diferencia_rating=TorneoZonaHorariosService.MAX_DIFERENCIA_RATING_INTERCAMBIO
             )
-            grupos[mejor_grupo_idx].append(pareja_data)
         
-        return grupos
-    
-    @staticmethod
-    def _encontrar_mejor_grupo(
-        pareja_data: Dict,
-        grupos: List[List[Dict]]
-    ) -> int:
-        """
-        Encuentra el mejor grupo para una pareja considerando:
-        1. Compatibilidad horaria con parejas del grupo
-        2. Tamaño del grupo (balance)
-        """
-        mejor_idx = 0
-        mejor_score = -1
-        
-        for idx, grupo in enumerate(grupos):
-            if not grupo:
-                # Grupo vacío, score alto
-                score = 100
-            else:
-                # Calcular compatibilidad promedio con el grupo
-                compatibilidades = []
-                for otra_pareja in grupo:
-                    comp = TorneoZonaHorariosService._calcular_compatibilidad(
-                        pareja_data['slots'],
-                        otra_pareja['slots']
-                    )
-                    compatibilidades.append(comp)
-                
-                compatibilidad_promedio = sum(compatibilidades) / len(compatibilidades)
-                
-                # Penalizar grupos más grandes
-                penalizacion_tamano = len(grupo) * 0.1
-                
-                score = compatibilidad_promedio - penalizacion_tamano
-            
-            if score > mejor_score:
-                mejor_score = score
-                mejor_idx = idx
-        
-        return mejor_idx
+        return [[parejas_datos[i] for i in grupo] for grupo in grupos]
     
     @staticmethod
     def _distribuir_parejas_inteligente(
@@ -385,33 +388,19 @@ class TorneoZonaHorariosService:
     @staticmethod
     def _calcular_compatibilidad_promedio(
         distribucion: Dict[int, List[int]],
-        parejas_datos: List[Dict]
+        parejas_datos: List[Dict],
+        matriz: Optional[List[List[float]]] = None
     ) -> float:
         """Calcula compatibilidad promedio de todas las zonas"""
-        parejas_dict = {p['pareja'].id: p for p in parejas_datos}
-        
-        compatibilidades = []
-        
-        for zona_id, parejas_ids in distribucion.items():
-            if len(parejas_ids) < 2:
-                continue
-            
-            # Calcular compatibilidad entre todas las parejas de la zona
-            for i in range(len(parejas_ids)):
-                for j in range(i + 1, len(parejas_ids)):
-                    p1 = parejas_dict.get(parejas_ids[i])
-                    p2 = parejas_dict.get(parejas_ids[j])
-                    
-                    if p1 and p2:
-                        comp = TorneoZonaHorariosService._calcular_compatibilidad(
-                            p1['slots'], p2['slots']
-                        )
-                        compatibilidades.append(comp)
-        
-        if not compatibilidades:
-            return 0.0
-        
-        return sum(compatibilidades) / len(compatibilidades)
+        if matriz is None:
+            matriz = TorneoZonaHorariosService._matriz_compatibilidad(parejas_datos)
+        indices = {p['pareja'].id: i for i, p in enumerate(parejas_datos)}
+        
+        grupos = [
+            [indices[pid] for pid in parejas_ids if pid in indices]
+            for parejas_ids in distribucion.values()
+        ]
+        return compatibilidad_promedio(grupos, matriz)
     
     @staticmethod
     def _limpiar_zonas_existentes(
@@ -435,5 +424,6 @@ class TorneoZonaHorariosService:
                 TorneoZonaPareja.zona_id.in_(zonas_ids)
             ).delete(synchronize_session=False)
             db.query(TorneoZona).filter(TorneoZona.id.in_(zonas_ids)).delete(synchronize_session=False)
+            marcar_modificado(db, torneo_id)
         
         db.commit()
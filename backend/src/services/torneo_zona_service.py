@@ -7,6 +7,7 @@ from typing import List, Optional
 import random
 from ..models.torneo_models import Torneo, TorneoZona, TorneoPareja, TorneoZonaPareja
 from ..models.driveplus_models import Usuario
+from .torneo_version import marcar_modificado
 
 
 class TorneoZonaService:
@@ -108,6 +109,7 @@ class TorneoZonaService:
                 )
             ).delete(synchronize_session=False)
             db.query(TorneoZona).filter(TorneoZona.torneo_id == torneo_id).delete()
+        marcar_modificado(db, torneo_id)
         
         db.commit()
         
@@ -304,144 +306,45 @@ class TorneoZonaService:
         """
         Obtiene la tabla de posiciones de una zona (incluyendo parejas eliminadas)
         
-        Calcula:
+        Las estadísticas salen de torneo_tabla_posiciones, que se mantiene al
+        cargar/corregir resultados (TorneoTablaService):
         - Partidos jugados
         - Partidos ganados/perdidos
         - Sets ganados/perdidos
         - Games ganados/perdidos
         - Puntos
         """
-        from ..models.driveplus_models import Partido
+        from .torneo_tabla_service import TorneoTablaService
         
         zona = db.query(TorneoZona).filter(TorneoZona.id == zona_id).first()
         if not zona:
             raise ValueError("Zona no encontrada")
         
-        # Obtener todas las asignaciones de parejas a esta zona
-        asignaciones = db.query(TorneoZonaPareja).filter(
-            TorneoZonaPareja.zona_id == zona_id
-        ).all()
+        # Estadísticas ya ordenadas (una query indexada por zona_id)
+        filas = TorneoTablaService.obtener_tablas(db, [zona_id])[zona_id]
         
         # Batch cargar parejas (evitar N+1)
-        parejas_ids = [a.pareja_id for a in asignaciones]
-        parejas = db.query(TorneoPareja).filter(TorneoPareja.id.in_(parejas_ids)).all()
+        parejas_ids = [f['pareja_id'] for f in filas]
+        parejas = db.query(TorneoPareja).filter(TorneoPareja.id.in_(parejas_ids)).all() if parejas_ids else []
         parejas_dict = {p.id: p for p in parejas}
         
         tabla = []
-        for asignacion in asignaciones:
-            pareja = parejas_dict.get(asignacion.pareja_id)
-            if pareja:
-                # Pareja existe
-                tabla.append({
-                    'pareja_id': pareja.id,
-                    'jugador1_id': pareja.jugador1_id,
-                    'jugador2_id': pareja.jugador2_id,
-                    'eliminada': False,
-                    'partidos_jugados': 0,
-                    'partidos_ganados': 0,
-                    'partidos_perdidos': 0,
-                    'sets_ganados': 0,
-                    'sets_perdidos': 0,
-                    'games_ganados': 0,
-                    'games_perdidos': 0,
-                    'puntos': 0
-                })
-            else:
-                # Pareja eliminada
-                tabla.append({
-                    'pareja_id': asignacion.pareja_id,
-                    'jugador1_id': None,
-                    'jugador2_id': None,
-                    'eliminada': True,
-                    'partidos_jugados': 0,
-                    'partidos_ganados': 0,
-                    'partidos_perdidos': 0,
-                    'sets_ganados': 0,
-                    'sets_perdidos': 0,
-                    'games_ganados': 0,
-                    'games_perdidos': 0,
-                    'puntos': 0
-                })
-        
-        # Obtener partidos de la zona (confirmados o finalizados)
-        # IMPORTANTE: Incluir 'finalizado' para calcular puntos correctamente
-        partidos = db.query(Partido).filter(
-            Partido.id_torneo == zona.torneo_id,
-            Partido.zona_id == zona_id,
-            Partido.estado.in_(['confirmado', 'finalizado'])
-        ).all()
-        
-        # Calcular estadísticas
-        for partido in partidos:
-            # Usar pareja1_id y pareja2_id directamente
-            pareja_a_id = partido.pareja1_id
-            pareja_b_id = partido.pareja2_id
-            
-            if not pareja_a_id or not pareja_b_id:
-                continue
-            
-            # Encontrar índices en tabla
-            idx_a = next((i for i, p in enumerate(tabla) if p['pareja_id'] == pareja_a_id), None)
-            idx_b = next((i for i, p in enumerate(tabla) if p['pareja_id'] == pareja_b_id), None)
-            
-            if idx_a is None or idx_b is None:
-                continue
-            
-            # Actualizar partidos jugados
-            tabla[idx_a]['partidos_jugados'] += 1
-            tabla[idx_b]['partidos_jugados'] += 1
-            
-            # Obtener resultado
-            if partido.resultado_padel:
-                resultado = partido.resultado_padel
-                sets = resultado.get('sets', [])
-                
-                # Contar sets y games
-                sets_a = 0
-                sets_b = 0
-                games_a = 0
-                games_b = 0
-                
-                for set_data in sets:
-                    if set_data.get('completado'):
-                        games_eq_a = set_data.get('gamesEquipoA', 0)
-                        games_eq_b = set_data.get('gamesEquipoB', 0)
-                        
-                        games_a += games_eq_a
-                        games_b += games_eq_b
-                        
-                        if set_data.get('ganador') == 'equipoA':
-                            sets_a += 1
-                        elif set_data.get('ganador') == 'equipoB':
-                            sets_b += 1
-                
-                # Actualizar estadísticas
-                tabla[idx_a]['sets_ganados'] += sets_a
-                tabla[idx_a]['sets_perdidos'] += sets_b
-                tabla[idx_a]['games_ganados'] += games_a
-                tabla[idx_a]['games_perdidos'] += games_b
-                
-                tabla[idx_b]['sets_ganados'] += sets_b
-                tabla[idx_b]['sets_perdidos'] += sets_a
-                tabla[idx_b]['games_ganados'] += games_b
-                tabla[idx_b]['games_perdidos'] += games_a
-                
-                # Actualizar ganados/perdidos y puntos usando ganador_pareja_id
-                if partido.ganador_pareja_id == pareja_a_id:
-                    tabla[idx_a]['partidos_ganados'] += 1
-                    tabla[idx_a]['puntos'] += 3
-                    tabla[idx_b]['partidos_perdidos'] += 1
-                elif partido.ganador_pareja_id == pareja_b_id:
-                    tabla[idx_b]['partidos_ganados'] += 1
-                    tabla[idx_b]['puntos'] += 3
-                    tabla[idx_a]['partidos_perdidos'] += 1
-        
-        # Ordenar tabla por puntos, diferencia de sets, diferencia de games
-        tabla.sort(key=lambda x: (
-            -x['puntos'],
-            -(x['sets_ganados'] - x['sets_perdidos']),
-            -(x['games_ganados'] - x['games_perdidos'])
-        ))
+        for fila in filas:
+            pareja = parejas_dict.get(fila['pareja_id'])
+            tabla.append({
+                'pareja_id': fila['pareja_id'],
+                'jugador1_id': pareja.jugador1_id if pareja else None,
+                'jugador2_id': pareja.jugador2_id if pareja else None,
+                'eliminada': pareja is None,
+                'partidos_jugados': fila['partidos_jugados'],
+                'partidos_ganados': fila['partidos_ganados'],
+                'partidos_perdidos': fila['partidos_perdidos'],
+                'sets_ganados': fila['sets_ganados'],
+                'sets_perdidos': fila['sets_perdidos'],
+                'games_ganados': fila['games_ganados'],
+                'games_perdidos': fila['games_perdidos'],
+                'puntos': fila['puntos']
+            })
         
         # Obtener nombres y usernames de jugadores (solo para parejas existentes)
         from ..models.driveplus_models import Usuario, PerfilUsuario
@@ -529,6 +432,11 @@ class TorneoZonaService:
         db.flush()
 
         # Quitar parejas de cualquier zona anterior (mover a la nueva)
+        from .torneo_tabla_service import TorneoTablaService
+        zonas_origen = [z for (z,) in db.query(TorneoZonaPareja.zona_id).filter(
+            TorneoZonaPareja.pareja_id.in_(pareja_ids)
+        ).distinct()]
+        TorneoTablaService.invalidar(db, zona_ids=zonas_origen)
         db.query(TorneoZonaPareja).filter(
             TorneoZonaPareja.pareja_id.in_(pareja_ids)
         ).delete(synchronize_session=False)
@@ -571,6 +479,13 @@ class TorneoZonaService:
         if zona_destino.torneo_id != pareja.torneo_id:
             raise ValueError("La zona destino no pertenece al mismo torneo")
         
+        # Las tablas de las dos zonas cambian de integrantes: se recalculan
+        from .torneo_tabla_service import TorneoTablaService
+        zonas_origen = [z for (z,) in db.query(TorneoZonaPareja.zona_id).filter(
+            TorneoZonaPareja.pareja_id == pareja_id
+        )]
+        TorneoTablaService.invalidar(db, zona_ids=zonas_origen + [zona_destino_id])
+        
         # Eliminar de zona actual
         db.query(TorneoZonaPareja).filter(
             TorneoZonaPareja.pareja_id == pareja_id
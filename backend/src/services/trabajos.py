@@ -0,0 +1,312 @@
+"""
+Trabajos en segundo plano para operaciones pesadas de torneos
+(fixture, zonas, playoffs, reprogramación masiva).
+
+La request devuelve 202 con el id del trabajo y el cliente consulta
+GET /jobs/{id} (o escucha el canal WebSocket trabajo:{id}) en lugar de
+esperar la respuesta y chocar con el timeout del proxy.
+
+- Cola en memoria del proceso + ThreadPoolExecutor (los servicios son
+  síncronos y usan su propia sesión de base)
+- Claves de idempotencia: el mismo Idempotency-Key devuelve el mismo
+  trabajo en lugar de generar otra vez
+- Exclusión por clave activa: mientras haya un trabajo pendiente o en curso
+  con la misma clave (ej: fixture del torneo 5) se devuelve ese
+- Progreso (0-100 + mensaje) notificado por callback desde el hilo worker
+- Trabajos terminados expiran a las TTL (limpieza perezosa, como utils/cache)
+
+Es un módulo puro: la sesión y el canal de notificación se inyectan.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+ESTADO_PENDIENTE = 'pendiente'
+ESTADO_EN_CURSO = 'en_curso'
+ESTADO_COMPLETADO = 'completado'
+ESTADO_ERROR = 'error'
+ESTADOS_ACTIVOS = (ESTADO_PENDIENTE, ESTADO_EN_CURSO)
+
+MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "2"))  # Cada worker toma una conexión del pool
+TTL_SEGUNDOS = int(os.getenv("JOBS_TTL_SEGUNDOS", "3600"))
+
+
+class Trabajo:
+    """Estado de un trabajo (solo lo modifica el gestor, bajo su lock)"""
+
+    def __init__(
+        self,
+        tipo: str,
+        torneo_id: Optional[int] = None,
+        usuario_id: Optional[int] = None,
+        parametros: Optional[Dict] = None,
+        clave_idempotencia: Optional[str] = None
+    ):
+        self.id = uuid.uuid4().hex
+        self.tipo = tipo
+        self.torneo_id = torneo_id
+        self.usuario_id = usuario_id
+        self.parametros = parametros or {}
+        self.clave_idempotencia = clave_idempotencia
+        self.estado = ESTADO_PENDIENTE
+        self.progreso = 0.0
+        self.mensaje: Optional[str] = None
+        self.resultado: Any = None
+        self.error: Optional[str] = None
+        self.codigo_error: Optional[int] = None
+        self.creado = datetime.now()
+        self.iniciado: Optional[datetime] = None
+        self.finalizado: Optional[datetime] = None
+        self._expira: Optional[float] = None
+
+    @property
+    def activo(self) -> bool:
+        return self.estado in ESTADOS_ACTIVOS
+
+    def to_dict(self, incluir_resultado: bool = True) -> Dict:
+        data = {
+            "id": self.id,
+            "tipo": self.tipo,
+            "torneo_id": self.torneo_id,
+            "estado": self.estado,
+            "progreso": round(self.progreso, 1),
+            "mensaje": self.mensaje,
+            "error": self.error,
+            "creado": self.creado.isoformat(),
+            "iniciado": self.iniciado.isoformat() if self.iniciado else None,
+            "finalizado": self.finalizado.isoformat() if self.finalizado else None,
+        }
+        if incluir_resultado:
+            data["resultado"] = self.resultado
+        return data
+
+
+class GestorTrabajos:
+    """
+    Uso:
+        trabajo, creado = trabajos.encolar(
+            'fixture', lambda db, progreso: Servicio.generar(db, ..., progreso=progreso),
+            torneo_id=5, usuario_id=1, clave_idempotencia=header, clave_activa='fixture:5'
+        )
+
+    La función recibe una sesión nueva (se cierra al terminar; rollback si
+    falla) y un callback progreso(porcentaje, mensaje). Lo que devuelva tiene
+    que ser serializable a JSON. ValueError se registra como error 400, el
+    resto como 500.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = MAX_WORKERS,
+        ttl_segundos: int = TTL_SEGUNDOS,
+        fabrica_sesion: Optional[Callable[[], Any]] = None,
+        notificar: Optional[Callable[[Dict], None]] = None
+    ):
+        self.max_workers = max_workers
+        self.ttl_segundos = ttl_segundos
+        self.fabrica_sesion = fabrica_sesion
+        self.notificar = notificar
+        self._trabajos: Dict[str, Trabajo] = {}
+        self._por_clave: Dict[str, str] = {}
+        self._activos: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def encolar(
+        self,
+        tipo: str,
+        funcion: Callable[[Any, Callable[[float, Optional[str]], None]], Any],
+        torneo_id: Optional[int] = None,
+        usuario_id: Optional[int] = None,
+        parametros: Optional[Dict] = None,
+        clave_idempotencia: Optional[str] = None,
+        clave_activa: Optional[str] = None
+    ) -> Tuple[Trabajo, bool]:
+        """
+        Returns:
+            (trabajo, creado). creado=False si se reutilizó uno existente
+            por clave de idempotencia o por clave activa.
+        """
+        with self._lock:
+            self._limpiar_expirados()
+
+            if clave_idempotencia:
+                existente = self._trabajos.get(self._por_clave.get(clave_idempotencia))
+                if existente is not None:
+                    return existente, False
+            if clave_activa:
+                existente = self._trabajos.get(self._activos.get(clave_activa))
+                if existente is not None and existente.activo:
+                    if clave_idempotencia:
+                        self._por_clave[clave_idempotencia] = existente.id
+                    return existente, False
+
+            trabajo = Trabajo(tipo, torneo_id, usuario_id, parametros, clave_idempotencia)
+            self._trabajos[trabajo.id] = trabajo
+            if clave_idempotencia:
+                self._por_clave[clave_idempotencia] = trabajo.id
+            if clave_activa:
+                self._activos[clave_activa] = trabajo.id
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="trabajo"
+                )
+            self._executor.submit(self._ejecutar, trabajo, funcion, clave_activa)
+
+        self._notificar(trabajo)
+        return trabajo, True
+
+    def obtener(self, trabajo_id: str) -> Optional[Trabajo]:
+        with self._lock:
+            self._limpiar_expirados()
+            return self._trabajos.get(trabajo_id)
+
+    def listar(self, torneo_id: Optional[int] = None, usuario_id: Optional[int] = None) -> List[Trabajo]:
+        """Trabajos vigentes, más nuevos primero"""
+        with self._lock:
+            self._limpiar_expirados()
+            trabajos = [
+                t for t in self._trabajos.values()
+                if (torneo_id is None or t.torneo_id == torneo_id)
+                and (usuario_id is None or t.usuario_id == usuario_id)
+            ]
+        return sorted(trabajos, key=lambda t: t.creado, reverse=True)
+
+    def esperar(self, trabajo_id: str, timeout: Optional[float] = None) -> Optional[Trabajo]:
+        """Bloquea hasta que el trabajo termine (tests y scripts)"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            trabajo = self.obtener(trabajo_id)
+            if trabajo is None or not trabajo.activo:
+                return trabajo
+            if limite is not None and time.monotonic() >= limite:
+                return trabajo
+            time.sleep(0.01)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            por_estado: Dict[str, int] = {}
+            for t in self._trabajos.values():
+                por_estado[t.estado] = por_estado.get(t.estado, 0) + 1
+            return {
+                "total": len(self._trabajos),
+                "por_estado": por_estado,
+                "claves_idempotencia": len(self._por_clave),
+                "max_workers": self.max_workers,
+                "ttl_segundos": self.ttl_segundos,
+            }
+
+    def apagar(self, esperar: bool = False):
+        """Detiene el pool (en el shutdown de la app)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=esperar, cancel_futures=not esperar)
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _ejecutar(self, trabajo: Trabajo, funcion: Callable, clave_activa: Optional[str]):
+        with self._lock:
+            trabajo.estado = ESTADO_EN_CURSO
+            trabajo.iniciado = datetime.now()
+        self._notificar(trabajo)
+
+        def progreso(porcentaje: float, mensaje: Optional[str] = None):
+            with self._lock:
+                trabajo.progreso = max(0.0, min(100.0, float(porcentaje)))
+                if mensaje is not None:
+                    trabajo.mensaje = mensaje
+            self._notificar(trabajo)
+
+        db = self.fabrica_sesion() if self.fabrica_sesion else None
+        try:
+            resultado = funcion(db, progreso)
+            with self._lock:
+                trabajo.resultado = resultado
+                trabajo.progreso = 100.0
+                trabajo.estado = ESTADO_COMPLETADO
+        except Exception as e:
+            if db is not None:
+                try:
+                    db.rollback()
+                except Exception:
+                    pass
+            logger.error(f"Trabajo {trabajo.tipo} {trabajo.id} falló: {e}")
+            with self._lock:
+                trabajo.error = str(e)
+                trabajo.codigo_error = 400 if isinstance(e, ValueError) else 500
+                trabajo.estado = ESTADO_ERROR
+        finally:
+            if db is not None:
+                try:
+                    db.close()
+                except Exception:
+                    pass
+            with self._lock:
+                trabajo.finalizado = datetime.now()
+                trabajo._expira = time.monotonic() + self.ttl_segundos
+                if clave_activa and self._activos.get(clave_activa) == trabajo.id:
+                    del self._activos[clave_activa]
+        self._notificar(trabajo)
+
+    def _notificar(self, trabajo: Trabajo):
+        if self.notificar is None:
+            return
+        with self._lock:
+            evento = trabajo.to_dict(incluir_resultado=False)
+        try:
+            self.notificar(evento)
+        except Exception as e:
+            logger.warning(f"No se pudo notificar el trabajo {trabajo.id}: {e}")
+
+    def _limpiar_expirados(self):
+        ahora = time.monotonic()
+        expirados = [
+            tid for tid, t in self._trabajos.items()
+            if t._expira is not None and t._expira <= ahora
+        ]
+        for tid in expirados:
+            trabajo = self._trabajos.pop(tid)
+            if trabajo.clave_idempotencia and self._por_clave.get(trabajo.clave_idempotencia) == tid:
+                del self._por_clave[trabajo.clave_idempotencia]
+        if expirados:
+            vivos = set(self._trabajos)
+            for clave in [c for c, tid in self._por_clave.items() if tid not in vivos]:
+                del self._por_clave[clave]
+
+
+def notificador_websocket(loop: asyncio.AbstractEventLoop, manager) -> Callable[[Dict], None]:
+    """
+    Callback de notificación que publica en el ConnectionManager desde el
+    hilo worker (el manager es async y vive en el event loop de la app).
+    """
+    def notificar(evento: Dict):
+        if loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(manager.notify_trabajo_actualizado(evento), loop)
+    return notificar
+
+
+def _nueva_sesion():
+    from ..database.config import SessionLocal
+    return SessionLocal()
+
+
+# Instancia global del gestor
+trabajos = GestorTrabajos(fabrica_sesion=_nueva_sesion)
@@ -1,92 +1,406 @@
 """
 Sistema de caché en memoria para Drive+.
-Optimizado para escalar a 1000+ usuarios sin necesidad de Redis.
 
 Para datos que cambian poco y se consultan mucho:
 - Rankings
 - Estadísticas globales
 - Listados de torneos activos
+
+CacheLRU:
+- Acotado (CACHE_MAX_ENTRADAS): al llenarse descarta la entrada usada hace más tiempo
+- TTL con un heap de vencimientos: las vencidas se descartan al escribir,
+  sin recorrer todo el caché
+- Tags: cada key pertenece a su namespace (lo que está antes del primer ':')
+  y a los tags que se le pasen; invalidar un tag cuesta O(keys con ese tag)
+- Métricas por namespace (aciertos, fallos, desalojos, vencidas, invalidadas)
+- obtener(): single-flight, si varios requests piden la misma key ausente
+  a la vez se calcula una sola vez y los demás esperan ese resultado
+- obtener_swr(): stale-while-revalidate, vencido el TTL se sigue sirviendo
+  el valor anterior mientras se recalcula en segundo plano
+
+Con varios workers cada proceso tendría su propio CacheLRU: CACHE_BACKEND
+elige un backend compartido (src/utils/cache_compartido.py) con la misma API.
 """
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
-from datetime import datetime, timedelta
-from typing import Any, Callable, Optional
+from heapq import heappop, heappush
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import os
 import threading
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+MAX_ENTRADAS = int(os.getenv("CACHE_MAX_ENTRADAS", "5000"))
+
+# Recálculos de stale-while-revalidate (fuera del request)
+_refrescos = ThreadPoolExecutor(
+    max_workers=int(os.getenv("CACHE_REFRESCOS_HILOS", "2")),
+    thread_name_prefix="cache-refresco"
+)
+
+_AUSENTE = object()
+
+
+def namespace_de(key: str) -> str:
+    """'ranking:100:0:all' -> 'ranking'"""
+    return key.split(':', 1)[0]
+
+
+class _EnVuelo:
+    """Cálculo en curso de una key (single-flight)"""
+    __slots__ = ('listo', 'valor', 'error')
 
-class SimpleCache:
-    """
-    Caché en memoria thread-safe con TTL.
-    Suficiente para 1000 usuarios. Para más, migrar a Redis.
-    """
-    
     def __init__(self):
-        self._cache: dict[str, tuple[Any, datetime]] = {}
+        self.listo = threading.Event()
+        self.valor = None
+        self.error: Optional[BaseException] = None
+
+
+class CacheBase(ABC):
+    """Métricas por namespace y tags, comunes a todos los backends"""
+
+    def __init__(self):
+        self._metricas: Dict[str, Dict[str, int]] = {}
+        self._refrescando: Set[str] = set()
         self._lock = threading.RLock()
-    
+
+    def _contar(self, namespace: str, metrica: str, cantidad: int = 1) -> None:
+        with self._lock:
+            metricas = self._metricas.get(namespace)
+            if metricas is None:
+                metricas = self._metricas[namespace] = {
+                    'aciertos': 0, 'fallos': 0, 'guardadas': 0,
+                    'desalojadas': 0, 'vencidas': 0, 'invalidadas': 0, 'compartidas': 0,
+                    'viejas': 0, 'refrescadas': 0
+                }
+            metricas[metrica] += cantidad
+
+    def _tags(self, key: str, tags: Iterable[str]) -> Tuple[str, ...]:
+        namespace = namespace_de(key)
+        return (namespace,) + tuple(t for t in dict.fromkeys(tags) if t != namespace)
+
+    @abstractmethod
+    def obtener(self, key: str, calcular: Callable[[], Any], ttl_seconds: float = 60, tags: Iterable[str] = ()) -> Any:
+        """Valor cacheado de key; si falta, calcular() una sola vez y guardarlo"""
+
+    @abstractmethod
+    def _refrescar(self, key: str, calcular: Callable[[], Any], ttl_seconds: float, tags: Iterable[str]) -> bool:
+        """
+        Recalcula y guarda la key salvo que se invalide durante el cálculo (o
+        que otro ya la esté recalculando). Returns: si se guardó
+        """
+
+    def obtener_swr(
+        self,
+        key: str,
+        calcular: Callable[[], Any],
+        ttl_seconds: float,
+        stale_seconds: float,
+        tags: Iterable[str] = (),
+        recalcular: Optional[Callable[[], Any]] = None
+    ) -> Any:
+        """
+        Stale-while-revalidate: el valor está fresco durante ttl_seconds; los
+        stale_seconds siguientes se devuelve igual y se recalcula una sola vez
+        en segundo plano con recalcular() (por defecto calcular). Si no está,
+        venció del todo o se invalidó, se calcula en el momento (single-flight).
+
+        La entrada guarda (valor, fresco_hasta): estas keys se leen solo con
+        obtener_swr.
+        """
+        tags = tuple(tags)
+        valor, fresco_hasta = self.obtener(
+            key, lambda: (calcular(), self._reloj() + ttl_seconds), ttl_seconds + stale_seconds, tags
+        )
+        if fresco_hasta <= self._reloj():
+            self._contar(namespace_de(key), 'viejas')
+            self._refrescar_en_segundo_plano(key, recalcular or calcular, ttl_seconds, stale_seconds, tags)
+        return valor
+
+    def _refrescar_en_segundo_plano(self, key, calcular, ttl_seconds, stale_seconds, tags) -> None:
+        with self._lock:
+            if key in self._refrescando:
+                return
+            self._refrescando.add(key)
+
+        def refrescar():
+            try:
+                if self._refrescar(key, lambda: (calcular(), self._reloj() + ttl_seconds), ttl_seconds + stale_seconds, tags):
+                    self._contar(namespace_de(key), 'refrescadas')
+            except Exception as e:
+                logger.error(f"Cache: error recalculando {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refrescando.discard(key)
+
+        try:
+            _refrescos.submit(refrescar)
+        except RuntimeError:
+            # Apagando: el próximo request lo calcula
+            with self._lock:
+                self._refrescando.discard(key)
+
+    def _por_namespace(self, keys: Callable[[str], int]) -> Dict[str, Dict]:
+        """Métricas de este proceso, con `keys(namespace)` guardadas en el backend"""
+        with self._lock:
+            por_namespace = {}
+            for namespace, metricas in sorted(self._metricas.items()):
+                consultas = metricas['aciertos'] + metricas['fallos'] + metricas['compartidas']
+                por_namespace[namespace] = {
+                    'keys': keys(namespace),
+                    **metricas,
+                    'hit_rate': round((metricas['aciertos'] + metricas['compartidas']) / consultas, 3)
+                    if consultas else 0.0
+                }
+            return por_namespace
+
+
+class CacheLRU(CacheBase):
+    """
+    Caché en memoria thread-safe con TTL, límite de entradas (LRU), tags y
+    single-flight.
+    """
+
+    def __init__(self, max_entradas: int = MAX_ENTRADAS, reloj: Callable[[], float] = time.monotonic):
+        super().__init__()
+        self.max_entradas = max_entradas
+        self._reloj = reloj
+        # key -> (valor, vence, tags); el orden es el de uso (más reciente al final)
+        self._entradas: "OrderedDict[str, Tuple[Any, float, Tuple[str, ...]]]" = OrderedDict()
+        self._vencimientos: List[Tuple[float, int, str]] = []
+        self._secuencia = 0
+        self._por_tag: Dict[str, Set[str]] = {}
+        self._en_vuelo: Dict[str, _EnVuelo] = {}
+        # Invalidaciones por tag (y globales): un cálculo que empezó antes
+        # de invalidar no guarda su resultado
+        self._invalidaciones: Dict[str, int] = {}
+        self._epoca = 0
+
+    # ------------------------------------------------------------------
+    # Internos (con el lock tomado)
+    # ------------------------------------------------------------------
+
+    def _sacar(self, key: str, metrica: Optional[str] = None) -> None:
+        entrada = self._entradas.pop(key, None)
+        if entrada is None:
+            return
+        for tag in entrada[2]:
+            keys = self._por_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._por_tag[tag]
+        if metrica:
+            self._contar(namespace_de(key), metrica)
+
+    def _vencer(self, ahora: float) -> int:
+        """Descarta las entradas vencidas desde el tope del heap"""
+        vencidas = 0
+        heap = self._vencimientos
+        while heap and heap[0][0] <= ahora:
+            vence, _, key = heappop(heap)
+            entrada = self._entradas.get(key)
+            # El heap puede tener vencimientos viejos de una key ya reescrita
+            if entrada is not None and entrada[1] == vence:
+                self._sacar(key, 'vencidas')
+                vencidas += 1
+        # Compactar si quedaron muchos vencimientos huérfanos
+        if len(heap) > 2 * len(self._entradas) + 1024:
+            self._vencimientos = [(e[1], i, k) for i, (k, e) in enumerate(self._entradas.items())]
+            self._vencimientos.sort()
+            self._secuencia = len(self._vencimientos)
+        return vencidas
+
+    def _marca(self, tags: Iterable[str]) -> Tuple[int, Tuple[int, ...]]:
+        return (self._epoca, tuple(self._invalidaciones.get(tag, 0) for tag in tags))
+
+    def _leer(self, key: str, ahora: float) -> Any:
+        entrada = self._entradas.get(key)
+        if entrada is None:
+            return _AUSENTE
+        if entrada[1] <= ahora:
+            self._sacar(key, 'vencidas')
+            return _AUSENTE
+        self._entradas.move_to_end(key)
+        return entrada[0]
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
     def get(self, key: str) -> Optional[Any]:
         """Obtener valor del caché si no expiró"""
         with self._lock:
-            if key not in self._cache:
-                return None
-            
-            value, expires_at = self._cache[key]
-            if datetime.now() > expires_at:
-                del self._cache[key]
-                return None
-            
-            return value
-    
-    def set(self, key: str, value: Any, ttl_seconds: int = 60):
-        """Guardar valor en caché con TTL"""
+            valor = self._leer(key, self._reloj())
+            self._contar(namespace_de(key), 'fallos' if valor is _AUSENTE else 'aciertos')
+            return None if valor is _AUSENTE else valor
+
+    def set(self, key: str, value: Any, ttl_seconds: float = 60, tags: Iterable[str] = ()):
+        """Guardar valor en caché con TTL (y tags además del namespace)"""
+        with self._lock:
+            ahora = self._reloj()
+            self._vencer(ahora)
+            self._sacar(key)
+            tags = self._tags(key, tags)
+            vence = ahora + ttl_seconds
+            self._entradas[key] = (value, vence, tags)
+            for tag in tags:
+                self._por_tag.setdefault(tag, set()).add(key)
+            self._secuencia += 1
+            heappush(self._vencimientos, (vence, self._secuencia, key))
+            self._contar(tags[0], 'guardadas')
+            while len(self._entradas) > self.max_entradas:
+                self._sacar(next(iter(self._entradas)), 'desalojadas')
+
+    def obtener(
+        self,
+        key: str,
+        calcular: Callable[[], Any],
+        ttl_seconds: float = 60,
+        tags: Iterable[str] = ()
+    ) -> Any:
+        """
+        Valor en caché o, si no está, el que devuelve calcular(). Si otro
+        thread ya está calculando la misma key se espera su resultado (o su
+        error) en lugar de calcularla de nuevo.
+        """
+        tags = self._tags(key, tags)
+        with self._lock:
+            valor = self._leer(key, self._reloj())
+            if valor is not _AUSENTE:
+                self._contar(tags[0], 'aciertos')
+                return valor
+            vuelo = self._en_vuelo.get(key)
+            if vuelo is not None:
+                self._contar(tags[0], 'compartidas')
+                lider = False
+            else:
+                self._contar(tags[0], 'fallos')
+                vuelo = self._en_vuelo[key] = _EnVuelo()
+                marca = self._marca(tags)
+                lider = True
+
+        if not lider:
+            vuelo.listo.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.valor
+
+        # Calcular fuera del lock (es una query)
+        try:
+            vuelo.valor = calcular()
+        except BaseException as e:
+            vuelo.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._en_vuelo[key]
+                if vuelo.error is None and marca == self._marca(tags):
+                    self.set(key, vuelo.valor, ttl_seconds, tags)
+            vuelo.listo.set()
+        return vuelo.valor
+
+    def _refrescar(self, key, calcular, ttl_seconds, tags) -> bool:
+        tags = self._tags(key, tags)
         with self._lock:
-            expires_at = datetime.now() + timedelta(seconds=ttl_seconds)
-            self._cache[key] = (value, expires_at)
-    
+            if key in self._en_vuelo:
+                return False  # Ya se está calculando en primer plano
+            marca = self._marca(tags)
+        valor = calcular()
+        with self._lock:
+            if marca != self._marca(tags):
+                return False
+            self.set(key, valor, ttl_seconds, tags)
+            return True
+
     def delete(self, key: str):
         """Eliminar una key específica"""
         with self._lock:
-            self._cache.pop(key, None)
-    
+            self._sacar(key, 'invalidadas')
+
+    def invalidar_tag(self, *tags: str) -> int:
+        """Elimina las keys con alguno de los tags (o namespaces). Returns: keys eliminadas"""
+        eliminadas = 0
+        with self._lock:
+            for tag in tags:
+                self._invalidaciones[tag] = self._invalidaciones.get(tag, 0) + 1
+                for key in list(self._por_tag.get(tag, ())):
+                    self._sacar(key, 'invalidadas')
+                    eliminadas += 1
+        return eliminadas
+
     def delete_pattern(self, pattern: str):
-        """Eliminar todas las keys que contengan el pattern"""
+        """
+        Eliminar todas las keys que contengan el pattern. Si el pattern es un
+        tag o namespace se resuelve por índice; si no, se recorren las keys.
+        """
         with self._lock:
-            keys_to_delete = [k for k in self._cache.keys() if pattern in k]
-            for key in keys_to_delete:
-                del self._cache[key]
-    
+            if pattern in self._por_tag:
+                self.invalidar_tag(pattern)
+                return
+            for key in [k for k in self._entradas if pattern in k]:
+                self._sacar(key, 'invalidadas')
+
     def clear(self):
         """Limpiar todo el caché"""
         with self._lock:
-            self._cache.clear()
-    
-    def cleanup_expired(self):
-        """Limpiar entries expirados (llamar periódicamente)"""
+            self._entradas.clear()
+            self._vencimientos.clear()
+            self._por_tag.clear()
+            self._invalidaciones.clear()
+            self._epoca += 1
+
+    def cleanup_expired(self) -> int:
+        """Descarta las entradas vencidas. Returns: cantidad descartada"""
         with self._lock:
-            now = datetime.now()
-            expired_keys = [
-                k for k, (_, expires_at) in self._cache.items() 
-                if now > expires_at
-            ]
-            for key in expired_keys:
-                del self._cache[key]
-            
-            if expired_keys:
-                logger.debug(f"Cache cleanup: {len(expired_keys)} keys eliminadas")
-    
+            vencidas = self._vencer(self._reloj())
+        if vencidas:
+            logger.debug(f"Cache cleanup: {vencidas} keys eliminadas")
+        return vencidas
+
     def stats(self) -> dict:
-        """Estadísticas del caché"""
+        """Estadísticas del caché, por namespace"""
         with self._lock:
             return {
-                "total_keys": len(self._cache),
-                "keys": list(self._cache.keys())
+                "backend": type(self).__name__,
+                "total_keys": len(self._entradas),
+                "max_keys": self.max_entradas,
+                "en_calculo": len(self._en_vuelo),
+                "namespaces": self._por_namespace(lambda namespace: len(self._por_tag.get(namespace, ())))
             }
 
 
+def crear_cache() -> CacheBase:
+    """
+    CACHE_BACKEND=local (por defecto, un caché por proceso), sqlite (archivo
+    en tmpfs compartido por los workers de la máquina, CACHE_SQLITE_RUTA) o
+    redis (CACHE_REDIS_URL o REDIS_URL, requiere el paquete redis).
+    Si el backend compartido no se puede abrir se usa el local.
+    """
+    tipo = os.getenv("CACHE_BACKEND", "local").lower()
+    if tipo == "local":
+        return CacheLRU()
+    try:
+        from .cache_compartido import CacheRedis, CacheSQLite, ruta_sqlite_por_defecto
+        if tipo == "sqlite":
+            return CacheSQLite(os.getenv("CACHE_SQLITE_RUTA") or ruta_sqlite_por_defecto())
+        if tipo == "redis":
+            url = os.getenv("CACHE_REDIS_URL") or os.getenv("REDIS_URL")
+            if not url:
+                raise ValueError("CACHE_BACKEND=redis requiere CACHE_REDIS_URL o REDIS_URL")
+            return CacheRedis(url)
+        raise ValueError(f"CACHE_BACKEND desconocido: {tipo}")
+    except Exception as e:
+        logger.error(f"❌ Caché {tipo} no disponible, se usa el caché en memoria: {e}")
+        return CacheLRU()
+
+
 # Instancia global del caché
-cache = SimpleCache()
+cache = crear_cache()
 
 
 # TTLs recomendados por tipo de dato
@@ -95,68 +409,109 @@ CACHE_TTL = {
     "estadisticas": 120,     # Estadísticas globales: 2 minutos
     "torneos_activos": 30,   # Lista de torneos: 30 segundos
     "perfil_usuario": 300,   # Perfil de usuario: 5 minutos
+    "circuito_ranking": 120, # Ranking de circuito: 2 minutos
+    "dashboard_top": 60,     # Top 5 del dashboard: 1 minuto
     "default": 60
 }
 
+# Ventana stale-while-revalidate: vencido el TTL se sirve el valor anterior
+# hasta estos segundos más mientras se recalcula en segundo plano
+CACHE_STALE = {
+    "ranking": 300,
+    "top_weekly": 600,
+    "circuito_ranking": 600,
+    "dashboard_top": 300,
+}
+
+# Tag de todo lo que depende de los ratings (ranking, top semanal, ...)
+TAG_RANKING = "ranking"
+
+
+def _es_sesion(arg: Any) -> bool:
+    return 'Session' in arg.__class__.__name__
 
-def cached(key_prefix: str, ttl_seconds: Optional[int] = None):
+
+def _abrir_sesion():
+    from ..database.config import SessionLocal
+    return SessionLocal()
+
+
+def cached(
+    key_prefix: str,
+    ttl_seconds: Optional[int] = None,
+    tags: Iterable[str] = (),
+    stale_seconds: Optional[int] = None,
+    abrir_sesion: Callable[[], Any] = _abrir_sesion
+):
     """
-    Decorador para cachear resultados de funciones.
-    
+    Decorador para cachear resultados de funciones (con single-flight).
+
     Uso:
         @cached("ranking", ttl_seconds=60)
         def get_ranking_global(db, categoria):
             ...
-    
+
     La key se genera como: {prefix}:{args}
+
+    Con stale_seconds (stale-while-revalidate) un valor vencido hace menos de
+    stale_seconds se devuelve igual y la función se vuelve a llamar en
+    segundo plano. Ese recálculo usa una sesión propia (abrir_sesion) en
+    lugar de la del request, que para entonces ya está cerrada.
     """
+    tags = tuple(tags)
+
     def decorator(func: Callable):
         @wraps(func)
         def wrapper(*args, **kwargs):
             # Generar key única basada en argumentos (ignorando db session)
             cache_args = []
             for arg in args:
-                if hasattr(arg, '__class__') and 'Session' in arg.__class__.__name__:
+                if _es_sesion(arg):
                     continue  # Ignorar session de DB
                 cache_args.append(str(arg))
-            
+
             for k, v in sorted(kwargs.items()):
                 if k != 'db':
                     cache_args.append(f"{k}={v}")
-            
+
             cache_key = f"{key_prefix}:{':'.join(cache_args)}"
-            
-            # Intentar obtener del caché
-            cached_value = cache.get(cache_key)
-            if cached_value is not None:
-                logger.debug(f"Cache HIT: {cache_key}")
-                return cached_value
-            
-            # Ejecutar función y cachear resultado
-            logger.debug(f"Cache MISS: {cache_key}")
-            result = func(*args, **kwargs)
-            
             ttl = ttl_seconds or CACHE_TTL.get(key_prefix, CACHE_TTL["default"])
-            cache.set(cache_key, result, ttl)
-            
-            return result
-        
+            if stale_seconds is None:
+                return cache.obtener(cache_key, lambda: func(*args, **kwargs), ttl, tags)
+
+            def recalcular():
+                sesion = abrir_sesion()
+                try:
+                    return func(
+                        *[sesion if _es_sesion(arg) else arg for arg in args],
+                        **{k: sesion if k == 'db' else v for k, v in kwargs.items()}
+                    )
+                finally:
+                    sesion.close()
+
+            return cache.obtener_swr(cache_key, lambda: func(*args, **kwargs), ttl, stale_seconds, tags, recalcular)
+
         return wrapper
     return decorator
 
 
 def invalidate_ranking_cache():
     """Invalidar caché de rankings (llamar después de guardar resultado)"""
-    cache.delete_pattern("ranking")
+    cache.invalidar_tag(TAG_RANKING)
 
 
 def invalidate_torneo_cache(torneo_id: Optional[int] = None):
-    """Invalidar caché de torneos"""
+    """Invalidar caché de torneos (keys guardadas con tags=(f"torneo:{torneo_id}",))"""
     if torneo_id:
-        cache.delete_pattern(f"torneo:{torneo_id}")
-    cache.delete_pattern("torneos_activos")
+        cache.invalidar_tag(f"torneo:{torneo_id}")
+    cache.invalidar_tag("torneos_activos")
+
+
+def invalidate_circuito_cache():
+    """Invalidar los rankings de circuitos (después de asignar o borrar puntos)"""
+    cache.invalidar_tag("circuito_ranking")
 
 
 def invalidate_user_cache(user_id: int):
-    """Invalidar caché de un usuario específico"""
-    cache.delete_pattern(f"user:{user_id}")
+    """Invalidar caché de un usuario específico (keys guardadas con tags=(f"user:{user_id}",))"""
+    cache.invalidar_tag(f"user:{user_id}")
@@ -0,0 +1,656 @@
+"""
+Backends de caché compartidos entre workers (CACHE_BACKEND=sqlite|redis).
+
+Con varios workers de uvicorn cada uno tenía su propio CacheLRU: el mismo
+ranking se calculaba una vez por worker y una invalidación solo limpiaba el
+worker que atendió la escritura. Estos backends guardan las entradas fuera
+del proceso, con la misma API que CacheLRU:
+
+- CacheSQLite: un archivo SQLite en tmpfs (/dev/shm) compartido por los
+  workers de la máquina, sin servicios extra
+- CacheRedis: para varias máquinas (requiere el paquete redis)
+
+Invalidar un tag borra las entradas del almacenamiento compartido, así que
+llega a todos los workers. Además cada tag tiene un contador de
+invalidaciones compartido: un cálculo que empezó en cualquier worker antes
+de invalidar no guarda su resultado.
+
+Single-flight entre procesos: el primero que no encuentra la key toma una
+reserva con vencimiento y calcula; los demás esperan a que aparezca el valor
+(si el que calculaba falla o se cae, la reserva vence y calcula otro).
+
+Los valores se guardan con pickle: solo los workers de la app escriben en el
+almacenamiento. Las métricas por namespace son las de cada proceso.
+"""
+from abc import abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+import logging
+
+from .cache import CacheBase, MAX_ENTRADAS, _AUSENTE, _EnVuelo, namespace_de
+
+logger = logging.getLogger(__name__)
+
+# Tiempo máximo que se espera el cálculo de otro worker antes de calcular
+ESPERA_CALCULO = float(os.getenv("CACHE_ESPERA_CALCULO", "30"))
+
+# Contador de clear(): invalida todo
+TAG_GLOBAL = "*"
+
+
+def ruta_sqlite_por_defecto() -> str:
+    """/dev/shm si existe (tmpfs: no toca disco), si no el directorio temporal"""
+    directorio = "/dev/shm" if os.access("/dev/shm", os.W_OK) else tempfile.gettempdir()
+    return os.path.join(directorio, "driveplus_cache.sqlite")
+
+
+class CacheCompartido(CacheBase):
+    """
+    API de CacheLRU sobre un almacenamiento compartido. Las subclases
+    implementan el almacenamiento; acá van las métricas, el single-flight
+    entre threads y entre procesos y la tolerancia a fallas: si el
+    almacenamiento no responde se calcula sin caché.
+    """
+
+    errores_backend: Tuple[type, ...] = ()
+
+    def __init__(self, max_entradas: int = MAX_ENTRADAS, reloj: Callable[[], float] = time.time,
+                 espera_calculo: float = ESPERA_CALCULO):
+        super().__init__()
+        self.max_entradas = max_entradas
+        # Reloj de pared: los vencimientos se comparan entre procesos
+        self._reloj = reloj
+        self.espera_calculo = espera_calculo
+        self._en_vuelo: Dict[str, _EnVuelo] = {}
+        self._errores = 0
+
+    # ------------------------------------------------------------------
+    # Almacenamiento (subclases)
+    # ------------------------------------------------------------------
+
+    @abstractmethod
+    def _leer(self, key: str) -> Any:
+        """Valor vigente o _AUSENTE"""
+
+    @abstractmethod
+    def _escribir(self, key: str, datos: bytes, ttl_seconds: float, tags: Tuple[str, ...], marca=None) -> Tuple[bool, List[str]]:
+        """
+        Guarda la entrada. Con marca libera la reserva y solo guarda si no
+        hubo invalidaciones desde _marca(tags). Returns: (guardada, desalojadas)
+        """
+
+    @abstractmethod
+    def _marca(self, tags: Tuple[str, ...]) -> Tuple:
+        ...
+
+    @abstractmethod
+    def _reservar(self, key: str, segundos: float) -> bool:
+        ...
+
+    @abstractmethod
+    def _liberar(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def _borrar(self, key: str) -> List[str]:
+        ...
+
+    @abstractmethod
+    def _invalidar(self, tags: Tuple[str, ...]) -> List[str]:
+        ...
+
+    @abstractmethod
+    def _borrar_patron(self, pattern: str) -> List[str]:
+        ...
+
+    @abstractmethod
+    def _vaciar(self) -> None:
+        ...
+
+    @abstractmethod
+    def _vencer(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def _contar_keys(self) -> Tuple[int, Dict[str, int]]:
+        """(total, keys por namespace)"""
+
+    def _stats_backend(self) -> Dict:
+        return {}
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _fallo(self, operacion: str, error: Exception) -> None:
+        with self._lock:
+            self._errores += 1
+        logger.error(f"Caché {type(self).__name__}: error en {operacion}: {error}")
+
+    def _contar_keys_borradas(self, keys: Iterable[str], metrica: str) -> int:
+        cantidad = 0
+        for key in keys:
+            self._contar(namespace_de(key), metrica)
+            cantidad += 1
+        return cantidad
+
+    def _guardar(self, key: str, valor: Any, ttl_seconds: float, tags: Tuple[str, ...], marca=None) -> None:
+        guardada, desalojadas = self._escribir(key, pickle.dumps(valor, pickle.HIGHEST_PROTOCOL), ttl_seconds, tags, marca)
+        if guardada:
+            self._contar(tags[0], 'guardadas')
+        self._contar_keys_borradas(desalojadas, 'desalojadas')
+
+    def _calcular_una_vez(self, key: str, calcular: Callable[[], Any], ttl_seconds: float, tags: Tuple[str, ...]) -> Any:
+        """Entre procesos: calcula el que toma la reserva, los demás esperan el valor"""
+        try:
+            pausa = 0.005
+            while True:
+                marca = self._marca(tags)
+                if self._reservar(key, self.espera_calculo):
+                    # Puede haberse guardado entre la lectura y la reserva
+                    valor = self._leer(key)
+                    if valor is not _AUSENTE:
+                        self._liberar(key)
+                        self._contar(tags[0], 'compartidas')
+                        return valor
+                    break
+                time.sleep(pausa)
+                pausa = min(pausa * 2, 0.1)
+                valor = self._leer(key)
+                if valor is not _AUSENTE:
+                    self._contar(tags[0], 'compartidas')
+                    return valor
+        except self.errores_backend as e:
+            self._fallo('obtener', e)
+            return calcular()
+
+        self._contar(tags[0], 'fallos')
+        try:
+            valor = calcular()
+        except BaseException:
+            try:
+                self._liberar(key)
+            except self.errores_backend as e:
+                self._fallo('liberar', e)
+            raise
+        try:
+            self._guardar(key, valor, ttl_seconds, tags, marca)
+        except self.errores_backend as e:
+            self._fallo('set', e)
+        return valor
+
+    # ------------------------------------------------------------------
+    # API (la de CacheLRU)
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Any:
+        """Obtener valor del caché si no expiró"""
+        try:
+            valor = self._leer(key)
+        except self.errores_backend as e:
+            self._fallo('get', e)
+            valor = _AUSENTE
+        self._contar(namespace_de(key), 'fallos' if valor is _AUSENTE else 'aciertos')
+        return None if valor is _AUSENTE else valor
+
+    def set(self, key: str, value: Any, ttl_seconds: float = 60, tags: Iterable[str] = ()):
+        """Guardar valor en caché con TTL (y tags además del namespace)"""
+        try:
+            self._guardar(key, value, ttl_seconds, self._tags(key, tags))
+        except self.errores_backend as e:
+            self._fallo('set', e)
+
+    def obtener(
+        self,
+        key: str,
+        calcular: Callable[[], Any],
+        ttl_seconds: float = 60,
+        tags: Iterable[str] = ()
+    ) -> Any:
+        """
+        Valor en caché o, si no está, el que devuelve calcular(). Se calcula
+        una sola vez aunque la pidan a la vez varios threads o workers.
+        """
+        tags = self._tags(key, tags)
+        try:
+            valor = self._leer(key)
+        except self.errores_backend as e:
+            self._fallo('obtener', e)
+            return calcular()
+        if valor is not _AUSENTE:
+            self._contar(tags[0], 'aciertos')
+            return valor
+
+        with self._lock:
+            vuelo = self._en_vuelo.get(key)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._en_vuelo[key] = _EnVuelo()
+        if not lider:
+            self._contar(tags[0], 'compartidas')
+            vuelo.listo.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.valor
+
+        try:
+            vuelo.valor = self._calcular_una_vez(key, calcular, ttl_seconds, tags)
+        except BaseException as e:
+            vuelo.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._en_vuelo[key]
+            vuelo.listo.set()
+        return vuelo.valor
+
+    def _refrescar(self, key, calcular, ttl_seconds, tags) -> bool:
+        # La reserva evita que cada worker recalcule la misma key vieja
+        tags = self._tags(key, tags)
+        try:
+            marca = self._marca(tags)
+            if not self._reservar(key, self.espera_calculo):
+                return False
+        except self.errores_backend as e:
+            self._fallo('refrescar', e)
+            return False
+        try:
+            valor = calcular()
+        except BaseException:
+            try:
+                self._liberar(key)
+            except self.errores_backend as e:
+                self._fallo('liberar', e)
+            raise
+        try:
+            guardada, desalojadas = self._escribir(
+                key, pickle.dumps(valor, pickle.HIGHEST_PROTOCOL), ttl_seconds, tags, marca
+            )
+        except self.errores_backend as e:
+            self._fallo('refrescar', e)
+            return False
+        self._contar_keys_borradas(desalojadas, 'desalojadas')
+        return guardada
+
+    def delete(self, key: str):
+        """Eliminar una key específica (en todos los workers)"""
+        try:
+            self._contar_keys_borradas(self._borrar(key), 'invalidadas')
+        except self.errores_backend as e:
+            self._fallo('delete', e)
+
+    def invalidar_tag(self, *tags: str) -> int:
+        """Elimina las keys con alguno de los tags (o namespaces). Returns: keys eliminadas"""
+        try:
+            return self._contar_keys_borradas(self._invalidar(tuple(dict.fromkeys(tags))), 'invalidadas')
+        except self.errores_backend as e:
+            self._fallo('invalidar_tag', e)
+            return 0
+
+    def delete_pattern(self, pattern: str):
+        """Eliminar las keys del tag/namespace pattern o que lo contengan"""
+        try:
+            self._contar_keys_borradas(self._borrar_patron(pattern), 'invalidadas')
+        except self.errores_backend as e:
+            self._fallo('delete_pattern', e)
+
+    def clear(self):
+        """Limpiar todo el caché (de todos los workers)"""
+        try:
+            self._vaciar()
+        except self.errores_backend as e:
+            self._fallo('clear', e)
+
+    def cleanup_expired(self) -> int:
+        """Descarta las entradas vencidas. Returns: cantidad descartada"""
+        try:
+            vencidas = self._contar_keys_borradas(self._vencer(), 'vencidas')
+        except self.errores_backend as e:
+            self._fallo('cleanup_expired', e)
+            return 0
+        if vencidas:
+            logger.debug(f"Cache cleanup: {vencidas} keys eliminadas")
+        return vencidas
+
+    def stats(self) -> dict:
+        """Estadísticas del caché: keys compartidas y métricas de este proceso"""
+        try:
+            total, por_namespace = self._contar_keys()
+        except self.errores_backend as e:
+            self._fallo('stats', e)
+            total, por_namespace = None, {}
+        return {
+            "backend": type(self).__name__,
+            **self._stats_backend(),
+            "total_keys": total,
+            "max_keys": self.max_entradas,
+            "en_calculo": len(self._en_vuelo),
+            "errores": self._errores,
+            "namespaces": self._por_namespace(lambda namespace: por_namespace.get(namespace, 0))
+        }
+
+
+_ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS entradas (
+    key TEXT PRIMARY KEY,
+    valor BLOB NOT NULL,
+    vence REAL NOT NULL,
+    usada REAL NOT NULL,
+    namespace TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_entradas_vence ON entradas (vence);
+CREATE INDEX IF NOT EXISTS ix_entradas_usada ON entradas (usada);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (tag, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_tags_key ON tags (key);
+CREATE TRIGGER IF NOT EXISTS tr_entradas_tags AFTER DELETE ON entradas
+BEGIN
+    DELETE FROM tags WHERE key = OLD.key;
+END;
+CREATE TABLE IF NOT EXISTS invalidaciones (
+    tag TEXT PRIMARY KEY,
+    contador INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS en_calculo (
+    key TEXT PRIMARY KEY,
+    hasta REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class CacheSQLite(CacheCompartido):
+    """
+    Caché en un archivo SQLite compartido por los workers de la máquina
+    (WAL: las lecturas no se bloquean entre sí). Conviene que el archivo
+    esté en tmpfs. Cada thread de cada proceso usa su propia conexión.
+
+    LRU aproximado: el último uso se actualiza como mucho una vez por
+    `refresco_uso` segundos por key, para que leer no sea escribir siempre.
+    """
+
+    errores_backend = (sqlite3.Error,)
+
+    def __init__(self, ruta: str, timeout: float = 5.0, refresco_uso: float = 1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.ruta = ruta
+        self.timeout = timeout
+        self.refresco_uso = refresco_uso
+        self._local = threading.local()
+
+    def _conexion(self) -> sqlite3.Connection:
+        # Después de un fork la conexión heredada no sirve: una por pid
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None or self._local.pid != os.getpid():
+            conexion = sqlite3.connect(self.ruta, timeout=self.timeout, isolation_level=None)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=OFF")
+            conexion.executescript(_ESQUEMA_SQLITE)
+            self._local.conexion, self._local.pid = conexion, os.getpid()
+        return conexion
+
+    @contextmanager
+    def _transaccion(self):
+        conexion = self._conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            yield conexion
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+        conexion.execute("COMMIT")
+
+    @staticmethod
+    def _marca_en(conexion: sqlite3.Connection, tags: Tuple[str, ...]) -> Tuple[int, ...]:
+        tags = (TAG_GLOBAL,) + tags
+        contadores = dict(conexion.execute(
+            f"SELECT tag, contador FROM invalidaciones WHERE tag IN ({','.join('?' * len(tags))})", tags
+        ).fetchall())
+        return tuple(contadores.get(tag, 0) for tag in tags)
+
+    def _leer(self, key: str) -> Any:
+        conexion = self._conexion()
+        ahora = self._reloj()
+        fila = conexion.execute("SELECT valor, vence, usada FROM entradas WHERE key = ?", (key,)).fetchone()
+        if fila is None or fila[1] <= ahora:
+            return _AUSENTE
+        if ahora - fila[2] >= self.refresco_uso:
+            conexion.execute("UPDATE entradas SET usada = ? WHERE key = ?", (ahora, key))
+        return pickle.loads(fila[0])
+
+    def _escribir(self, key, datos, ttl_seconds, tags, marca=None):
+        ahora = self._reloj()
+        with self._transaccion() as conexion:
+            if marca is not None:
+                conexion.execute("DELETE FROM en_calculo WHERE key = ?", (key,))
+                if self._marca_en(conexion, tags) != marca:
+                    return False, []
+            conexion.execute("DELETE FROM entradas WHERE key = ?", (key,))
+            conexion.execute(
+                "INSERT INTO entradas (key, valor, vence, usada, namespace) VALUES (?, ?, ?, ?, ?)",
+                (key, datos, ahora + ttl_seconds, ahora, tags[0])
+            )
+            conexion.executemany("INSERT INTO tags (tag, key) VALUES (?, ?)", [(tag, key) for tag in tags])
+            # Las vencidas se descartan al escribir; si sobran entradas, las usadas hace más tiempo
+            conexion.execute("DELETE FROM entradas WHERE vence <= ?", (ahora,))
+            exceso = conexion.execute("SELECT COUNT(*) FROM entradas").fetchone()[0] - self.max_entradas
+            desalojadas = []
+            if exceso > 0:
+                desalojadas = [k for (k,) in conexion.execute(
+                    "DELETE FROM entradas WHERE key IN (SELECT key FROM entradas ORDER BY usada LIMIT ?) RETURNING key",
+                    (exceso,)
+                ).fetchall()]
+        return True, desalojadas
+
+    def _marca(self, tags):
+        return self._marca_en(self._conexion(), tags)
+
+    def _reservar(self, key, segundos):
+        ahora = self._reloj()
+        cursor = self._conexion().execute(
+            """
+            INSERT INTO en_calculo (key, hasta) VALUES (?, ?)
+            ON CONFLICT (key) DO UPDATE SET hasta = excluded.hasta WHERE en_calculo.hasta <= ?
+            """,
+            (key, ahora + segundos, ahora)
+        )
+        return cursor.rowcount == 1
+
+    def _liberar(self, key):
+        self._conexion().execute("DELETE FROM en_calculo WHERE key = ?", (key,))
+
+    def _borrar(self, key):
+        return [k for (k,) in self._conexion().execute(
+            "DELETE FROM entradas WHERE key = ? RETURNING key", (key,)
+        ).fetchall()]
+
+    def _invalidar(self, tags):
+        with self._transaccion() as conexion:
+            conexion.executemany(
+                """
+                INSERT INTO invalidaciones (tag, contador) VALUES (?, 1)
+                ON CONFLICT (tag) DO UPDATE SET contador = contador + 1
+                """,
+                [(tag,) for tag in tags]
+            )
+            return [k for (k,) in conexion.execute(
+                f"""
+                DELETE FROM entradas
+                WHERE key IN (SELECT key FROM tags WHERE tag IN ({','.join('?' * len(tags))}))
+                RETURNING key
+                """,
+                tags
+            ).fetchall()]
+
+    def _borrar_patron(self, pattern):
+        conexion = self._conexion()
+        if conexion.execute("SELECT 1 FROM tags WHERE tag = ? LIMIT 1", (pattern,)).fetchone():
+            return self._invalidar((pattern,))
+        return [k for (k,) in conexion.execute(
+            "DELETE FROM entradas WHERE instr(key, ?) > 0 RETURNING key", (pattern,)
+        ).fetchall()]
+
+    def _vaciar(self):
+        with self._transaccion() as conexion:
+            conexion.execute("DELETE FROM tags")
+            conexion.execute("DELETE FROM entradas")
+            conexion.execute("DELETE FROM en_calculo")
+            conexion.execute(
+                """
+                INSERT INTO invalidaciones (tag, contador) VALUES (?, 1)
+                ON CONFLICT (tag) DO UPDATE SET contador = contador + 1
+                """,
+                (TAG_GLOBAL,)
+            )
+
+    def _vencer(self):
+        return [k for (k,) in self._conexion().execute(
+            "DELETE FROM entradas WHERE vence <= ? RETURNING key", (self._reloj(),)
+        ).fetchall()]
+
+    def _contar_keys(self):
+        por_namespace = dict(self._conexion().execute(
+            "SELECT namespace, COUNT(*) FROM entradas GROUP BY namespace"
+        ).fetchall())
+        return sum(por_namespace.values()), por_namespace
+
+    def _stats_backend(self):
+        return {"ruta": self.ruta}
+
+
+def _escapar_glob(texto: str) -> str:
+    return ''.join(f"\\{c}" if c in "*?[]\\" else c for c in texto)
+
+
+class CacheRedis(CacheCompartido):
+    """
+    Caché en Redis, para workers en varias máquinas. Cada entrada es una key
+    con vencimiento (PX), cada tag un set con sus keys y cada contador de
+    invalidación una key con INCR. El límite de memoria lo pone Redis
+    (maxmemory + allkeys-lru); max_entradas solo se informa.
+    """
+
+    def __init__(self, url: str, prefijo: str = "driveplus:cache:", **kwargs):
+        import redis
+        super().__init__(**kwargs)
+        self.prefijo = prefijo
+        self._redis = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        self._watch_error = redis.WatchError
+        self.errores_backend = (redis.RedisError, OSError)
+
+    def _k(self, tipo: str, nombre: str) -> str:
+        return f"{self.prefijo}{tipo}:{nombre}"
+
+    @staticmethod
+    def _texto(valor) -> str:
+        return valor.decode() if isinstance(valor, bytes) else valor
+
+    def _leer(self, key):
+        datos = self._redis.get(self._k("v", key))
+        return _AUSENTE if datos is None else pickle.loads(datos)
+
+    def _escribir(self, key, datos, ttl_seconds, tags, marca=None):
+        contadores = [self._k("i", tag) for tag in (TAG_GLOBAL,) + tags]
+        with self._redis.pipeline() as pipe:
+            try:
+                if marca is not None:
+                    # Si otro worker invalida entre la comparación y el EXEC, WATCH lo aborta
+                    pipe.watch(*contadores)
+                    if tuple(int(v or 0) for v in pipe.mget(contadores)) != marca:
+                        pipe.unwatch()
+                        self._liberar(key)
+                        return False, []
+                    pipe.multi()
+                pipe.set(self._k("v", key), datos, px=max(int(ttl_seconds * 1000), 1))
+                for tag in tags:
+                    pipe.sadd(self._k("t", tag), key)
+                pipe.delete(self._k("r", key))
+                pipe.execute()
+            except self._watch_error:
+                self._liberar(key)
+                return False, []
+        return True, []
+
+    def _marca(self, tags):
+        valores = self._redis.mget([self._k("i", tag) for tag in (TAG_GLOBAL,) + tags])
+        return tuple(int(v or 0) for v in valores)
+
+    def _reservar(self, key, segundos):
+        return bool(self._redis.set(self._k("r", key), 1, nx=True, px=max(int(segundos * 1000), 1)))
+
+    def _liberar(self, key):
+        self._redis.delete(self._k("r", key))
+
+    def _borrar(self, key):
+        return [key] if self._redis.delete(self._k("v", key)) else []
+
+    def _invalidar(self, tags):
+        # Primero los contadores: los cálculos en curso ya no guardan
+        pipe = self._redis.pipeline()
+        for tag in tags:
+            pipe.incr(self._k("i", tag))
+            pipe.smembers(self._k("t", tag))
+        resultados = pipe.execute()
+        por_tag = {tag: [self._texto(k) for k in resultados[2 * i + 1]] for i, tag in enumerate(tags)}
+        keys = list(dict.fromkeys(k for keys_tag in por_tag.values() for k in keys_tag))
+        if not keys:
+            return []
+        for key in keys:
+            pipe.delete(self._k("v", key))
+        # Solo se sacan del set las keys leídas: otras pueden haberse agregado
+        for tag, keys_tag in por_tag.items():
+            if keys_tag:
+                pipe.srem(self._k("t", tag), *keys_tag)
+        borradas = pipe.execute()
+        return [key for key, borrada in zip(keys, borradas) if borrada]
+
+    def _borrar_patron(self, pattern):
+        if self._redis.exists(self._k("t", pattern)):
+            return self._invalidar((pattern,))
+        inicio = len(self._k("v", ""))
+        keys = [self._texto(k) for k in self._redis.scan_iter(match=self._k("v", f"*{_escapar_glob(pattern)}*"))]
+        if keys:
+            self._redis.delete(*keys)
+        return [k[inicio:] for k in keys]
+
+    def _vaciar(self):
+        self._redis.incr(self._k("i", TAG_GLOBAL))
+        for tipo in ("v", "t", "r"):
+            keys = list(self._redis.scan_iter(match=self._k(tipo, "*")))
+            if keys:
+                self._redis.delete(*keys)
+
+    def _vencer(self):
+        # Redis descarta solo los valores vencidos; acá se limpian los sets de tags
+        vencidas = set()
+        for set_tag in self._redis.scan_iter(match=self._k("t", "*")):
+            keys = [self._texto(k) for k in self._redis.smembers(set_tag)]
+            pipe = self._redis.pipeline()
+            for key in keys:
+                pipe.exists(self._k("v", key))
+            muertas = [key for key, existe in zip(keys, pipe.execute()) if not existe]
+            if muertas:
+                self._redis.srem(set_tag, *muertas)
+                vencidas.update(muertas)
+        return list(vencidas)
+
+    def _contar_keys(self):
+        # Aproximado: keys en el set de cada namespace conocido por este proceso
+        with self._lock:
+            namespaces = list(self._metricas)
+        pipe = self._redis.pipeline()
+        for namespace in namespaces:
+            pipe.scard(self._k("t", namespace))
+        por_namespace = dict(zip(namespaces, pipe.execute()))
+        return sum(por_namespace.values()), por_namespace
+
+    def _stats_backend(self):
+        return {"prefijo": self.prefijo}
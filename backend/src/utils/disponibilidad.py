@@ -0,0 +1,181 @@
+"""
+Disponibilidad horaria compilada de parejas.
+
+disponibilidad_horaria (JSON libre) guarda RESTRICCIONES: los horarios en que
+la pareja NO puede jugar. Se compila una sola vez a un bitmap por día con
+resolución de 5 minutos: el bit k del día es el bloque [5k, 5k+5) minutos
+desde medianoche.
+
+Un partido que empieza en hora_mins y dura `duracion` minutos choca con las
+restricciones si:
+    mapa[dia] & mascara_rango(hora_mins, hora_mins + duracion) != 0
+
+Formatos de entrada aceptados (los que hoy conviven en la base):
+- [{"dias": [...], "horaInicio": "09:00", "horaFin": "19:00"}]
+  (también hora_inicio/desde y hora_fin/hasta)
+- {"franjas": [...]}
+- {"dias": [...], "horaInicio": ..., "horaFin": ...}
+- {"restricciones_por_dia": {"viernes": [[540, 1140]]}} (ya procesado)
+Cualquier otro dict o tipo se trata como sin restricciones.
+
+Es un módulo puro (sin SQLAlchemy).
+"""
+import unicodedata
+from datetime import date, time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+RESOLUCION_MINUTOS = 5
+VERSION_COMPILADA = 1
+
+DIAS_SEMANA = ['lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo']
+
+
+def normalizar_dia(dia) -> str:
+    """'Miércoles ' -> 'miercoles'"""
+    texto = unicodedata.normalize('NFKD', str(dia).strip().lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def hora_a_minutos(hora) -> int:
+    """'HH:MM' (o 'HH:MM:SS', time, minutos) a minutos desde medianoche"""
+    if isinstance(hora, time):
+        return hora.hour * 60 + hora.minute
+    if isinstance(hora, (int, float)):
+        return int(hora)
+    partes = hora.split(':')
+    return int(partes[0]) * 60 + int(partes[1])
+
+
+def mascara_rango(inicio_mins: float, fin_mins: float) -> int:
+    """Bits de los bloques que toca el rango [inicio, fin) (vacío si fin <= inicio)"""
+    if fin_mins <= inicio_mins:
+        return 0
+    desde = int(inicio_mins // RESOLUCION_MINUTOS)
+    hasta = int(-(-fin_mins // RESOLUCION_MINUTOS))
+    return ((1 << (hasta - desde)) - 1) << desde
+
+
+def _franjas(raw) -> Optional[List]:
+    """Lista de franjas del JSON crudo, o None si no hay restricciones reconocibles"""
+    if not raw:
+        return None
+    if isinstance(raw, list):
+        return raw
+    if isinstance(raw, dict):
+        if 'franjas' in raw:
+            return raw['franjas'] or None
+        if 'dias' in raw and 'horaInicio' in raw:
+            return [raw]
+    return None
+
+
+def compilar(raw) -> Dict[str, int]:
+    """
+    Compila disponibilidad_horaria a {dia: bitmap de bloques restringidos}.
+    Franjas sin días o con horas ilegibles se ignoran.
+    """
+    mapa: Dict[str, int] = {}
+
+    if isinstance(raw, dict) and isinstance(raw.get('restricciones_por_dia'), dict):
+        for dia, rangos in raw['restricciones_por_dia'].items():
+            for inicio_mins, fin_mins in rangos:
+                dia_norm = normalizar_dia(dia)
+                mapa[dia_norm] = mapa.get(dia_norm, 0) | mascara_rango(inicio_mins, fin_mins)
+        return {dia: bits for dia, bits in mapa.items() if bits}
+
+    for franja in _franjas(raw) or ():
+        if not isinstance(franja, dict):
+            continue
+        dias = franja.get('dias', [])
+        if not dias:
+            continue
+        hora_inicio = franja.get('horaInicio') or franja.get('hora_inicio') or franja.get('desde', '00:00')
+        hora_fin = franja.get('horaFin') or franja.get('hora_fin') or franja.get('hasta', '23:59')
+        try:
+            bits = mascara_rango(hora_a_minutos(hora_inicio), hora_a_minutos(hora_fin))
+        except (ValueError, IndexError, AttributeError, TypeError):
+            continue
+        if not bits:
+            continue
+        for dia in dias:
+            dia_norm = normalizar_dia(dia)
+            mapa[dia_norm] = mapa.get(dia_norm, 0) | bits
+
+    return mapa
+
+
+def compilar_bloqueos(bloqueos: Iterable[Tuple[date, object, object]]) -> Dict[date, int]:
+    """Bloqueos puntuales (fecha, hora_desde, hora_hasta) a {fecha: bitmap}"""
+    mapa: Dict[date, int] = {}
+    for fecha, desde, hasta in bloqueos:
+        try:
+            bits = mascara_rango(hora_a_minutos(desde), hora_a_minutos(hasta))
+        except (ValueError, IndexError, AttributeError, TypeError):
+            continue
+        if bits:
+            mapa[fecha] = mapa.get(fecha, 0) | bits
+    return mapa
+
+
+def libre(mapa: Dict, clave, hora_mins: float, duracion: int) -> bool:
+    """True si un partido [hora_mins, hora_mins + duracion) no toca ningún bloque restringido"""
+    bits = mapa.get(clave) if mapa else None
+    if not bits:
+        return True
+    return not bits & mascara_rango(hora_mins, hora_mins + duracion)
+
+
+def rangos(mapa: Dict[str, int]) -> Dict[str, List[Tuple[int, int]]]:
+    """Decodifica el bitmap a rangos [inicio, fin) en minutos (para mostrar)"""
+    resultado = {}
+    for dia, bits in mapa.items():
+        lista = []
+        k = 0
+        while bits:
+            if bits & 1:
+                inicio = k
+                while bits & 1:
+                    bits >>= 1
+                    k += 1
+                lista.append((inicio * RESOLUCION_MINUTOS, k * RESOLUCION_MINUTOS))
+            else:
+                # Saltar de una todos los ceros
+                ceros = (bits & -bits).bit_length() - 1
+                bits >>= ceros
+                k += ceros
+        if lista:
+            resultado[dia] = lista
+    return resultado
+
+
+def serializar(mapa: Dict[str, int]) -> Dict:
+    """Formato persistido en TorneoPareja.disponibilidad_compilada"""
+    return {
+        "version": VERSION_COMPILADA,
+        "resolucion": RESOLUCION_MINUTOS,
+        "dias": {dia: format(bits, 'x') for dia, bits in sorted(mapa.items())}
+    }
+
+
+def deserializar(data) -> Optional[Dict[str, int]]:
+    """None si no hay versión compilada compatible (hay que compilar desde el JSON crudo)"""
+    if not isinstance(data, dict):
+        return None
+    if data.get("version") != VERSION_COMPILADA or data.get("resolucion") != RESOLUCION_MINUTOS:
+        return None
+    try:
+        return {dia: int(bits, 16) for dia, bits in (data.get("dias") or {}).items()}
+    except (TypeError, ValueError):
+        return None
+
+
+def mapa_de_pareja(pareja) -> Dict[str, int]:
+    """
+    Bitmaps de restricciones de una TorneoPareja: usa la versión compilada
+    guardada y, si no existe (filas anteriores a la columna), compila el JSON.
+    """
+    mapa = deserializar(getattr(pareja, 'disponibilidad_compilada', None))
+    if mapa is None:
+        mapa = compilar(pareja.disponibilidad_horaria)
+    return mapa
@@ -0,0 +1,70 @@
+"""
+Validadores HTTP para GETs condicionales (ETag / Last-Modified).
+
+Los endpoints de lectura de torneos se consultan en loop durante el torneo.
+Con un número de versión por torneo (se incrementa en cada commit que lo
+modifica) el ETag se arma sin consultar los datos: si el cliente ya tiene
+esa versión se responde 304 sin ejecutar las queries ni serializar.
+
+Es un módulo puro (sin SQLAlchemy ni FastAPI).
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+
+Version = Tuple[int, Optional[datetime]]
+
+
+def etag_debil(*partes) -> str:
+    """W/"torneo-5-v12" (débil: el gzip y el orden de claves no cambian el contenido)"""
+    return 'W/"' + '-'.join(str(p) for p in partes) + '"'
+
+
+def _opaco(etag: str) -> str:
+    etag = etag.strip()
+    if etag.startswith('W/'):
+        etag = etag[2:]
+    return etag
+
+
+def coincide_if_none_match(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil contra la lista de If-None-Match ('*' coincide con todo)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    buscado = _opaco(etag)
+    return any(_opaco(candidato) == buscado for candidato in if_none_match.split(','))
+
+
+def _utc(fecha: datetime) -> datetime:
+    """Los timestamps sin zona de la base se toman como UTC"""
+    if fecha.tzinfo is None:
+        return fecha.replace(tzinfo=timezone.utc)
+    return fecha.astimezone(timezone.utc)
+
+
+def formato_http(fecha: datetime) -> str:
+    """'Sun, 18 Oct 2026 21:03:00 GMT'"""
+    return format_datetime(_utc(fecha).replace(microsecond=0), usegmt=True)
+
+
+def no_modificado_desde(if_modified_since: Optional[str], modificado: Optional[datetime]) -> bool:
+    """
+    True si el recurso no cambió después de If-Modified-Since.
+
+    Las fechas HTTP tienen precisión de segundos: un cambio dentro del mismo
+    segundo que If-Modified-Since cuenta como modificado (mejor un 200 de más
+    que un 304 con datos viejos).
+    """
+    if not if_modified_since or modificado is None:
+        return False
+    try:
+        desde = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if desde is None:
+        return False
+    return _utc(modificado).replace(microsecond=0) < _utc(desde)
+
@@ -1,18 +1,39 @@
 """
 WebSocket Connection Manager para actualizaciones en tiempo real
+
+Los broadcasts pasan por un bus (ver services/bus_broadcast.py): con varios workers cada uno
+entrega a los sockets que tiene conectados.
 """
 from typing import Dict, List
 from fastapi import WebSocket
+import asyncio
 import json
 import logging
 
+from ..services.bus_broadcast import BusBroadcast, BusLocal, enviar_a_todos
+
 logger = logging.getLogger(__name__)
 
 
 class ConnectionManager:
     def __init__(self):
-        # Diccionario de salas activas: {sala_id: [websockets]}
+        # Diccionario de salas activas en este proceso: {sala_id: [websockets]}
         self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.bus: BusBroadcast = BusLocal()
+        self._bus_iniciado = False
+
+    async def iniciar_bus(self, bus: BusBroadcast):
+        """Reemplaza el bus (startup del servidor)"""
+        await self.cerrar_bus()
+        self.bus = bus
+        await self.bus.iniciar(self._entregar_local)
+        self._bus_iniciado = True
+
+    async def cerrar_bus(self):
+        if self._bus_iniciado:
+            await self.bus.cerrar()
+        self.bus = BusLocal()
+        self._bus_iniciado = False
 
     async def connect(self, websocket: WebSocket, sala_id: str):
         """Conectar un cliente a una sala específica"""
@@ -44,23 +65,30 @@ class ConnectionManager:
             logger.error(f"Error enviando mensaje personal: {e}")
 
     async def broadcast_to_sala(self, sala_id: str, message: dict):
-        """Enviar mensaje a todos los clientes de una sala"""
-        if sala_id not in self.active_connections:
-            logger.warning(f"Intento de broadcast a sala inexistente: {sala_id}")
-            return
-
-        disconnected = []
-        
-        for connection in self.active_connections[sala_id]:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error enviando mensaje a cliente: {e}")
-                disconnected.append(connection)
-        
-        # Limpiar conexiones muertas
-        for connection in disconnected:
+        """Enviar mensaje a todos los clientes de una sala (en todos los workers)"""
+        if not self._bus_iniciado:
+            await self.bus.iniciar(self._entregar_local)
+            self._bus_iniciado = True
+        await self.bus.publicar(sala_id, message)
+
+    async def _entregar_local(self, sala_id: str, message: dict):
+        """Envía a los clientes de la sala conectados a este proceso, todos a la vez"""
+        conexiones = self.active_connections.get(sala_id)
+        if not conexiones:
+            return  # Sin clientes acá (pueden estar en otro worker)
+
+        # Limpiar conexiones muertas o demasiado lentas
+        for connection in await enviar_a_todos(list(conexiones), message):
             self.disconnect(connection, sala_id)
+            asyncio.ensure_future(self._cerrar(connection))
+
+    @staticmethod
+    async def _cerrar(websocket: WebSocket):
+        """Cierra un socket que no recibe: el cliente reconecta y recarga"""
+        try:
+            await asyncio.wait_for(websocket.close(code=4008, reason="Cliente lento"), 2)
+        except Exception:
+            pass
 
     async def notify_jugador_unido(self, sala_id: str, jugador_data: dict):
         """Notificar que un jugador se unió a la sala"""
@@ -104,6 +132,29 @@ class ConnectionManager:
             "data": confirmacion_data
         })
 
+    async def notify_trabajo_actualizado(self, trabajo_data: dict):
+        """
+        Notificar estado/progreso de un trabajo en segundo plano
+        (canal trabajo:{id} y, si tiene torneo, torneo:{id})
+        """
+        mensaje = {
+            "type": "trabajo_actualizado",
+            "data": trabajo_data
+        }
+        canales = [f"trabajo:{trabajo_data['id']}"]
+        if trabajo_data.get("torneo_id") is not None:
+            canales.append(f"torneo:{trabajo_data['torneo_id']}")
+        for canal in canales:
+            # Los oyentes pueden estar en otro worker: se publica siempre
+            await self.broadcast_to_sala(canal, mensaje)
+
+    async def notify_evento_torneo(self, evento: dict):
+        """
+        Notificar un cambio en vivo del torneo (resultado, tabla, ganador
+        avanzado, reprogramación) al canal torneo:{id}
+        """
+        await self.broadcast_to_sala(f"torneo:{evento['torneo_id']}", evento)
+
 
 # Instancia global del manager
 manager = ConnectionManager()
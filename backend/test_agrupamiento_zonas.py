@@ -0,0 +1,142 @@
+"""
+Test del agrupamiento de zonas por compatibilidad (agrupamiento_zonas.py)
+- Mismas zonas y misma compatibilidad promedio que el greedy original con sets
+- refinar() nunca baja la compatibilidad y respeta tamaños y tolerancia de rating
+- Categorías grandes: la matriz + greedy es mucho más rápida que el original
+"""
+import sys
+import os
+import random
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.agrupamiento_zonas import (
+    vectorizar, matriz_compatibilidad, agrupar, compatibilidad_promedio, refinar
+)
+
+
+# ----------------------------------------------------------------------
+# Referencia: algoritmo original de TorneoZonaHorariosService (sets)
+# ----------------------------------------------------------------------
+
+def compatibilidad_original(slots1, slots2):
+    if not slots1 or not slots2:
+        return 1.0
+    interseccion = slots1 & slots2
+    union = slots1 | slots2
+    if not union:
+        return 0.0
+    return len(interseccion) / len(union)
+
+
+def agrupar_original(parejas_datos, num_zonas):
+    parejas_ordenadas = sorted(parejas_datos, key=lambda x: x['rating'], reverse=True)
+    grupos = [[] for _ in range(num_zonas)]
+    for pareja_data in parejas_ordenadas:
+        mejor_idx = 0
+        mejor_score = -1
+        for idx, grupo in enumerate(grupos):
+            if not grupo:
+                score = 100
+            else:
+                compatibilidades = [
+                    compatibilidad_original(pareja_data['slots'], otra['slots']) for otra in grupo
+                ]
+                score = sum(compatibilidades) / len(compatibilidades) - len(grupo) * 0.1
+            if score > mejor_score:
+                mejor_score = score
+                mejor_idx = idx
+        grupos[mejor_idx].append(pareja_data)
+    return grupos
+
+
+def promedio_original(grupos):
+    compatibilidades = []
+    for grupo in grupos:
+        for i in range(len(grupo)):
+            for j in range(i + 1, len(grupo)):
+                compatibilidades.append(compatibilidad_original(grupo[i]['slots'], grupo[j]['slots']))
+    return sum(compatibilidades) / len(compatibilidades) if compatibilidades else 0.0
+
+
+def generar_parejas(n, num_slots=60, seed=0):
+    rng = random.Random(seed)
+    dias = ['viernes', 'sabado', 'domingo']
+    universo = [(dias[i % 3], f"{8 + i // 3:02d}:00") for i in range(num_slots)]
+    parejas = []
+    for i in range(n):
+        if rng.random() < 0.15:
+            slots = set()
+        else:
+            # Bloques contiguos: parejas de mañana / tarde / noche
+            inicio = rng.randrange(num_slots)
+            slots = set(universo[inicio:inicio + rng.randint(5, num_slots // 2)])
+        parejas.append({'id': i, 'rating': rng.choice((1100, 1200, 1300, 1400, 1500)) + rng.randint(0, 50), 'slots': slots})
+    return parejas
+
+
+def agrupar_nuevo(parejas, num_zonas):
+    matriz = matriz_compatibilidad(vectorizar([p['slots'] for p in parejas]))
+    grupos = agrupar([p['rating'] for p in parejas], matriz, num_zonas)
+    return grupos, matriz
+
+
+def test_igual_al_original():
+    for seed in range(10):
+        for n, num_zonas in ((8, 2), (12, 4), (23, 7), (40, 13)):
+            parejas = generar_parejas(n, seed=seed)
+            esperado = agrupar_original(parejas, num_zonas)
+            grupos, matriz = agrupar_nuevo(parejas, num_zonas)
+            assert [[parejas[i]['id'] for i in g] for g in grupos] == [[p['id'] for p in g] for g in esperado]
+            assert compatibilidad_promedio(grupos, matriz) == promedio_original(esperado)
+
+
+def test_refinar():
+    for seed in range(5):
+        parejas = generar_parejas(40, seed=seed)
+        ratings = [p['rating'] for p in parejas]
+        grupos, matriz = agrupar_nuevo(parejas, 13)
+        antes = compatibilidad_promedio(grupos, matriz)
+
+        refinados, intercambios = refinar(grupos, matriz, 1.0)
+        despues = compatibilidad_promedio(refinados, matriz)
+        assert despues >= antes - 1e-12
+        assert sorted(len(g) for g in refinados) == sorted(len(g) for g in grupos)
+        assert sorted(i for g in refinados for i in g) == list(range(40))
+        if intercambios:
+            assert despues > antes
+
+        # Con tolerancia de rating solo se intercambian parejas de nivel parecido
+        limitados, _ = refinar(grupos, matriz, 1.0, ratings=ratings, max_diferencia_rating=60)
+        assert compatibilidad_promedio(limitados, matriz) >= antes - 1e-12
+        sin_cambios, ninguno = refinar(grupos, matriz, 1.0, ratings=ratings, max_diferencia_rating=-1)
+        assert ninguno == 0 and sin_cambios == grupos
+        print(f"seed {seed}: {antes:.3f} -> {despues:.3f} ({intercambios} intercambios)")
+
+
+def test_rendimiento():
+    parejas = generar_parejas(80, num_slots=120, seed=3)
+    num_zonas = 27
+
+    # Mejor de varias corridas: una sola medición varía con la carga de la máquina
+    t_original = t_nuevo = float("inf")
+    for _ in range(5):
+        inicio = time.perf_counter()
+        esperado = agrupar_original(parejas, num_zonas)
+        promedio_original(esperado)
+        t_original = min(t_original, time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        grupos, matriz = agrupar_nuevo(parejas, num_zonas)
+        compatibilidad_promedio(grupos, matriz)
+        t_nuevo = min(t_nuevo, time.perf_counter() - inicio)
+
+    print(f"80 parejas: original {t_original * 1000:.1f} ms, matriz {t_nuevo * 1000:.1f} ms")
+    assert t_nuevo < t_original
+
+
+if __name__ == "__main__":
+    test_igual_al_original()
+    test_refinar()
+    test_rendimiento()
+    print("✅ Agrupamiento de zonas igual al original y refinamiento válido")
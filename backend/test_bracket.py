@@ -0,0 +1,121 @@
+"""
+Test del motor de brackets (src/services/bracket.py)
+- Seeding estándar para todas las potencias de 2 hasta 64 (igual a las
+  tablas fijas que había para 2-16)
+- BYEs deterministas para los mejores seeds
+- Árbol completo con vínculos al partido siguiente
+- 64 parejas × varias categorías en milisegundos
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.bracket import (
+    ESTADO_BYE, FASES_ELIMINACION, TAMANO_MAXIMO, construir, construir_por_seeds,
+    emparejamientos, fases, mitades, orden_seeds, siguiente_potencia_de_dos
+)
+
+TAMANOS = [2, 4, 8, 16, 32, 64]
+
+
+def test_tablas_anteriores():
+    # Tablas fijas de TorneoPlayoffService antes del motor
+    assert emparejamientos(2) == [(1, 2)]
+    assert emparejamientos(4) == [(1, 4), (2, 3)]
+    assert emparejamientos(8) == [(1, 8), (4, 5), (2, 7), (3, 6)]
+    assert emparejamientos(16) == [
+        (1, 16), (8, 9), (4, 13), (5, 12),
+        (2, 15), (7, 10), (3, 14), (6, 11)
+    ]
+    assert mitades(8) == ([1, 4, 5, 8], [2, 3, 6, 7])
+    assert mitades(16) == ([1, 4, 5, 8, 9, 12, 13, 16], [2, 3, 6, 7, 10, 11, 14, 15])
+    assert fases(16) == ['8vos', '4tos', 'semis', 'final']
+    assert fases(64) == list(FASES_ELIMINACION)
+
+
+def test_seeding_estandar():
+    for tamano in TAMANOS:
+        orden = orden_seeds(tamano)
+        assert sorted(orden) == list(range(1, tamano + 1))
+        assert all(s1 + s2 == tamano + 1 for s1, s2 in emparejamientos(tamano))
+        # En cada subcuadro de tamaño b el mejor seed es uno de los tamano/b primeros:
+        # 1 y 2 solo se cruzan en la final, 1-4 en semis, 1-8 en 4tos...
+        bloque = 2
+        while bloque <= tamano:
+            mejores = sorted(min(orden[i:i + bloque]) for i in range(0, tamano, bloque))
+            assert mejores == list(range(1, tamano // bloque + 1)), (tamano, bloque)
+            bloque *= 2
+
+    for invalido in (3, 12, 128):
+        try:
+            fases(invalido)
+            assert False, invalido
+        except ValueError:
+            pass
+    assert siguiente_potencia_de_dos(33) == 64 and TAMANO_MAXIMO == 64
+
+
+def test_byes_y_vinculos():
+    for n in range(2, TAMANO_MAXIMO + 1):
+        tamano = siguiente_potencia_de_dos(n)
+        cruces = construir_por_seeds({seed: 100 + seed for seed in range(1, n + 1)}, tamano)
+        assert len(cruces) == tamano - 1
+
+        primera = [c for c in cruces if c.ronda == 0]
+        byes = [c for c in primera if c.estado == ESTADO_BYE]
+        # Pasan directo los mejores seeds, y nunca hay un cruce vacío
+        assert sorted(c.ganador_pareja_id - 100 for c in byes) == list(range(1, tamano - n + 1))
+        assert all(c.pareja1_id or c.pareja2_id for c in primera)
+
+        final = cruces[-1]
+        assert final.fase == 'final' and final.siguiente is None
+        for cruce in cruces[:-1]:
+            padre = cruces[cruce.siguiente]
+            assert padre.ronda == cruce.ronda + 1
+            assert padre.numero == (cruce.numero + 1) // 2
+            assert cruce.slot == (1 if cruce.numero % 2 else 2)
+            if cruce.estado == ESTADO_BYE:
+                lugar = padre.pareja1_id if cruce.slot == 1 else padre.pareja2_id
+                assert lugar == cruce.ganador_pareja_id
+        assert all(c.estado != ESTADO_BYE for c in cruces if c.ronda > 0)
+
+
+def test_primera_ronda_explicita():
+    # Como los cruces APA: BYE con la pareja en cualquiera de los dos lados
+    cruces = construir([(1, None), (2, 3), (None, 4), (5, 6)], ['4tos', 'semis', 'final'])
+    assert [(c.fase, c.numero) for c in cruces] == [
+        ('4tos', 1), ('4tos', 2), ('4tos', 3), ('4tos', 4), ('semis', 1), ('semis', 2), ('final', 1)
+    ]
+    assert (cruces[4].pareja1_id, cruces[4].pareja2_id) == (1, None)
+    assert (cruces[5].pareja1_id, cruces[5].pareja2_id) == (4, None)
+    assert [c.siguiente for c in cruces] == [4, 4, 5, 5, 6, 6, None]
+    try:
+        construir([(1, 2)], ['semis', 'final'])
+        assert False
+    except ValueError:
+        pass
+
+
+def test_rendimiento():
+    categorias = 8
+    orden_seeds.cache_clear()
+    inicio = time.perf_counter()
+    for categoria in range(categorias):
+        n = 64 - categoria * 3
+        construir_por_seeds(
+            {seed: categoria * 100 + seed for seed in range(1, n + 1)},
+            siguiente_potencia_de_dos(n)
+        )
+    duracion = (time.perf_counter() - inicio) * 1000
+    print(f"   {categorias} categorías de hasta 64 parejas: {duracion:.2f} ms")
+    assert duracion < 50, duracion
+
+
+if __name__ == "__main__":
+    test_tablas_anteriores()
+    test_seeding_estandar()
+    test_byes_y_vinculos()
+    test_primera_ronda_explicita()
+    test_rendimiento()
+    print("✅ Motor de brackets: seeding estándar, BYEs deterministas y árbol vinculado")
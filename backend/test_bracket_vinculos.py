@@ -0,0 +1,183 @@
+"""
+Test de los vínculos al partido siguiente en playoffs
+- Al insertar el bracket cada partido guarda siguiente_partido_id + slot_siguiente
+- El backfill de migrations_bracket_vinculos.sql llega a los mismos vínculos
+- asignar_en_siguiente: cada ganador de semis entra en su slot de la final
+  sin pisar al otro, y no toca un partido siguiente que ya tiene ganador
+- Intercambiar dos partidos deja los vínculos consistentes con la numeración
+
+Usa SQLite (no necesita la base de Neon).
+"""
+import sys
+import os
+import tempfile
+from datetime import date
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy import create_engine, text, BigInteger
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from src.database.config import Base
+from src.models.driveplus_models import Usuario, Partido
+from src.models.torneo_models import Torneo
+from src.services.bracket import FASES_ELIMINACION, construir_por_seeds
+from src.services.torneo_playoff_service import TorneoPlayoffService
+
+TORNEO_ID = 1
+MIGRACION = os.path.join(os.path.dirname(__file__), "migrations_bracket_vinculos.sql")
+
+
+@compiles(BigInteger, "sqlite")
+def _bigint_sqlite(type_, compiler, **kw):
+    # SQLite solo autoincrementa "INTEGER PRIMARY KEY"
+    return "INTEGER"
+
+
+def crear_sesiones():
+    """Base en un archivo: cada sesión usa su propia conexión"""
+    ruta = os.path.join(tempfile.mkdtemp(prefix="bracket_"), "test.sqlite")
+    engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(engine, tables=[Usuario.__table__, Torneo.__table__, Partido.__table__])
+    sesion = sessionmaker(bind=engine)
+    db = sesion()
+    db.add(Usuario(id_usuario=1, nombre_usuario="organizador", email="org@test.com"))
+    db.add(Torneo(
+        id=TORNEO_ID, nombre="Torneo test", categoria="libre", creado_por=1,
+        fecha_inicio=date(2026, 3, 6), fecha_fin=date(2026, 3, 8)
+    ))
+    db.commit()
+    db.close()
+    return sesion
+
+
+def crear_bracket(db, parejas, categoria_id=None):
+    """Inserta un bracket estándar con las parejas 1..parejas (id = 100 + seed)"""
+    tamano = 2
+    while tamano < parejas:
+        tamano *= 2
+    cruces = construir_por_seeds({s: 100 + s for s in range(1, parejas + 1)}, tamano)
+    partidos = TorneoPlayoffService._insertar_brackets(db, TORNEO_ID, 1, [(categoria_id, cruces)])
+    db.commit()
+    return {(p.fase, p.numero_partido): p.id_partido for p in partidos}
+
+
+def vinculos(db):
+    return {
+        p.id_partido: (p.siguiente_partido_id, p.slot_siguiente)
+        for p in db.query(Partido).order_by(Partido.id_partido)
+    }
+
+
+def vinculos_por_numeracion(db):
+    """Regla del bracket: el partido N pasa al (N+1)//2 de la fase siguiente, impar → slot 1"""
+    partidos = db.query(Partido).all()
+    por_lugar = {(p.categoria_id, p.fase, p.numero_partido): p.id_partido for p in partidos}
+    esperados = {}
+    for p in partidos:
+        if p.fase == 'final':
+            esperados[p.id_partido] = (None, None)
+            continue
+        fase_siguiente = FASES_ELIMINACION[FASES_ELIMINACION.index(p.fase) + 1]
+        esperados[p.id_partido] = (
+            por_lugar[(p.categoria_id, fase_siguiente, (p.numero_partido + 1) // 2)],
+            1 if p.numero_partido % 2 == 1 else 2
+        )
+    return esperados
+
+
+def backfill_de_la_migracion():
+    """El UPDATE de la migración (los ALTER TABLE son solo de Postgres)"""
+    with open(MIGRACION, encoding="utf-8") as f:
+        sentencias = f.read().split(";")
+    for sentencia in sentencias:
+        sql = "\n".join(l for l in sentencia.splitlines() if not l.lstrip().startswith("--")).strip()
+        if sql.upper().startswith("UPDATE"):
+            return sql
+    raise AssertionError("la migración no tiene el UPDATE de backfill")
+
+
+def test_vinculos_al_generar_y_backfill():
+    sesion = crear_sesiones()
+    db = sesion()
+    crear_bracket(db, 8)
+    crear_bracket(db, 4, categoria_id=5)
+    generados = vinculos(db)
+    assert generados == vinculos_por_numeracion(db)
+
+    # Brackets viejos sin vínculos: el backfill reconstruye los mismos
+    db.execute(text("UPDATE partidos SET siguiente_partido_id = NULL, slot_siguiente = NULL"))
+    db.execute(text(backfill_de_la_migracion()))
+    db.commit()
+    db.expire_all()
+    assert vinculos(db) == generados
+
+
+def test_ganadores_de_semis_a_la_final():
+    sesion = crear_sesiones()
+    db = sesion()
+    ids = crear_bracket(db, 4)
+    db.close()
+
+    # Dos requests con su propia sesión, cada uno con su semifinal cargada
+    db_a, db_b = sesion(), sesion()
+    semi1 = db_a.get(Partido, ids[('semis', 1)])
+    semi2 = db_b.get(Partido, ids[('semis', 2)])
+    final_b = TorneoPlayoffService.asignar_en_siguiente(db_b, semi2, 102)
+    db_b.commit()
+    final_a = TorneoPlayoffService.asignar_en_siguiente(db_a, semi1, 101)
+    db_a.commit()
+    assert final_a.id_partido == final_b.id_partido == ids[('final', 1)]
+
+    db = sesion()
+    final = db.get(Partido, ids[('final', 1)])
+    assert (final.pareja1_id, final.pareja2_id) == (101, 102)
+
+    # La final ya tiene ganador: un resultado tardío de semis no la cambia
+    final.ganador_pareja_id = 101
+    final.estado = 'confirmado'
+    db.commit()
+    semi2 = db.get(Partido, ids[('semis', 2)])
+    assert TorneoPlayoffService.asignar_en_siguiente(db, semi2, 103) is None
+    db.commit()
+    db.expire_all()
+    final = db.get(Partido, ids[('final', 1)])
+    assert (final.pareja1_id, final.pareja2_id, final.ganador_pareja_id) == (101, 102, 101)
+
+    # La final no tiene partido siguiente
+    assert TorneoPlayoffService.asignar_en_siguiente(db, final, 101) is None
+
+
+def test_intercambiar_posiciones():
+    sesion = crear_sesiones()
+    db = sesion()
+    ids = crear_bracket(db, 8)
+
+    # Cuartos de distintas semis y distinto slot
+    pa, pb = db.get(Partido, ids[('4tos', 1)]), db.get(Partido, ids[('4tos', 4)])
+    TorneoPlayoffService.intercambiar_posiciones(db, pa, pb)
+    db.commit()
+    db.expire_all()
+    assert vinculos(db) == vinculos_por_numeracion(db)
+    assert db.get(Partido, ids[('4tos', 1)]).siguiente_partido_id == ids[('semis', 2)]
+
+    # Semis: los cuartos que alimentaban cada lugar pasan al partido que lo ocupa ahora
+    pa, pb = db.get(Partido, ids[('semis', 1)]), db.get(Partido, ids[('semis', 2)])
+    TorneoPlayoffService.intercambiar_posiciones(db, pa, pb)
+    db.commit()
+    db.expire_all()
+    assert vinculos(db) == vinculos_por_numeracion(db)
+    assert db.get(Partido, ids[('4tos', 2)]).siguiente_partido_id == ids[('semis', 2)]
+
+    # El ganador del cuarto 2 (lugar 1 de semis) entra al partido que ahora es semis 1
+    cuarto = db.get(Partido, ids[('4tos', 2)])
+    semi = TorneoPlayoffService.asignar_en_siguiente(db, cuarto, 104)
+    db.commit()
+    assert semi.numero_partido == 1 and semi.pareja2_id == 104
+
+
+if __name__ == "__main__":
+    test_vinculos_al_generar_y_backfill()
+    test_ganadores_de_semis_a_la_final()
+    test_intercambiar_posiciones()
+    print("✅ Vínculos de bracket: backfill, avance por slot sin pisarse e intercambio consistente")
@@ -0,0 +1,135 @@
+"""
+Test de la persistencia en lote (src/database/bulk.py)
+- insertar_filas: un INSERT ... RETURNING por tabla, primary keys en el
+  orden de las filas, defaults de columna para las filas incompletas
+- insertar_objetos: un INSERT por modelo y la primary key asignada a cada instancia
+- actualizar_filas: UPDATE por primary key en un solo executemany, sin tocar
+  las demás filas
+
+Usa SQLite en memoria (no necesita la base de Neon).
+"""
+import sys
+import os
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy import create_engine, event, BigInteger
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.engine.default import InsertmanyvaluesSentinelOpts
+from sqlalchemy.dialects.postgresql.pg8000 import PGDialect_pg8000
+from sqlalchemy.orm import sessionmaker
+
+from src.database.bulk import actualizar_filas, insertar_filas, insertar_objetos
+from src.database.config import Base
+from src.models.driveplus_models import Usuario, Partido
+from src.models.torneo_models import Torneo, TorneoZona
+
+TABLAS = [Usuario.__table__, Torneo.__table__, TorneoZona.__table__, Partido.__table__]
+FECHA = datetime(2026, 3, 6, 18, 0)
+
+
+@compiles(BigInteger, "sqlite")
+def _bigint_sqlite(type_, compiler, **kw):
+    # SQLite solo autoincrementa "INTEGER PRIMARY KEY"
+    return "INTEGER"
+
+
+def crear_db():
+    """Sesión sobre una base vacía y la lista de (statement, executemany) que ejecuta"""
+    engine = create_engine("sqlite://")
+    # Como el dialecto de Postgres: el RETURNING de un INSERT multi-VALUES se
+    # ordena por la primary key autoincremental (sin esto SQLite va fila por fila)
+    assert PGDialect_pg8000.insertmanyvalues_implicit_sentinel & InsertmanyvaluesSentinelOpts.ANY_AUTOINCREMENT
+    engine.dialect.insertmanyvalues_implicit_sentinel = InsertmanyvaluesSentinelOpts.ANY_AUTOINCREMENT
+    Base.metadata.create_all(engine, tables=TABLAS)
+    sentencias = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _registrar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append((statement.lstrip().upper(), executemany))
+
+    db = sessionmaker(bind=engine)()
+    db.add(Usuario(id_usuario=1, nombre_usuario="organizador", email="org@test.com"))
+    db.commit()
+    sentencias.clear()
+    return db, sentencias
+
+
+def partido(numero, **extra):
+    return dict(id_torneo=1, fase='zona', numero_partido=numero, fecha=FECHA, id_creador=1, tipo='torneo', **extra)
+
+
+def test_insertar_filas():
+    db, sentencias = crear_db()
+    # Una fila con una columna que las otras no traen: se completan con el default
+    filas = [partido(n) for n in range(1, 41)]
+    filas[7]['estado'] = 'bye'
+    ids = insertar_filas(db, Partido, filas)
+
+    inserts = [s for s, _ in sentencias if s.startswith("INSERT")]
+    assert len(inserts) == 1 and "RETURNING" in inserts[0], inserts
+    assert len(sentencias) == 1
+
+    numeros = dict(db.query(Partido.id_partido, Partido.numero_partido))
+    assert [numeros[pk] for pk in ids] == list(range(1, 41))
+    estados = dict(db.query(Partido.id_partido, Partido.estado))
+    assert estados[ids[7]] == 'bye'
+    assert {estados[pk] for i, pk in enumerate(ids) if i != 7} == {'pendiente'}
+    assert insertar_filas(db, Partido, []) == []
+
+
+def test_insertar_objetos():
+    db, sentencias = crear_db()
+    torneo = Torneo(
+        id=1, nombre="Torneo test", categoria="libre", creado_por=1,
+        fecha_inicio=FECHA.date(), fecha_fin=FECHA.date()
+    )
+    db.add(torneo)
+    db.commit()
+    sentencias.clear()
+
+    zonas = [TorneoZona(torneo_id=1, nombre=f"Zona {z}", numero_orden=z) for z in range(5)]
+    partidos = [Partido(**partido(n)) for n in range(1, 21)]
+    # Intercalados: igual sale un INSERT por tabla
+    objetos = [obj for par in zip(partidos, zonas + [None] * 15) for obj in par if obj is not None]
+    assert insertar_objetos(db, objetos) == objetos
+
+    inserts = [s for s, _ in sentencias if s.startswith("INSERT")]
+    assert sorted(s.split()[2] for s in inserts) == ["PARTIDOS", "TORNEO_ZONAS"], inserts
+    assert all("RETURNING" in s for s in inserts)
+
+    # Las instancias no quedan en la sesión pero tienen su primary key
+    assert all(obj not in db for obj in objetos)
+    assert [db.get(Partido, p.id_partido).numero_partido for p in partidos] == list(range(1, 21))
+    assert [db.get(TorneoZona, z.id).nombre for z in zonas] == [f"Zona {z}" for z in range(5)]
+
+
+def test_actualizar_filas():
+    db, sentencias = crear_db()
+    ids = insertar_filas(db, Partido, [partido(n) for n in range(1, 11)])
+    db.commit()
+    sentencias.clear()
+
+    cambios = [{'id_partido': pk, 'cancha_id': 7, 'fecha_hora': FECHA} for pk in ids[::2]]
+    actualizar_filas(db, Partido, cambios)
+    db.commit()
+
+    updates = [(s, executemany) for s, executemany in sentencias if s.startswith("UPDATE")]
+    assert len(updates) == 1 and updates[0][1], updates
+    assert "WHERE PARTIDOS.ID_PARTIDO = ?" in updates[0][0]
+
+    canchas = dict(db.query(Partido.id_partido, Partido.cancha_id))
+    assert [canchas[pk] for pk in ids] == [7, None] * 5
+    numeros = dict(db.query(Partido.id_partido, Partido.numero_partido))
+    assert [numeros[pk] for pk in ids] == list(range(1, 11))
+
+    sentencias.clear()
+    actualizar_filas(db, Partido, [])
+    assert sentencias == []
+
+
+if __name__ == "__main__":
+    test_insertar_filas()
+    test_insertar_objetos()
+    test_actualizar_filas()
+    print("✅ Persistencia en lote: un INSERT ... RETURNING por tabla y UPDATE por primary key en lote")
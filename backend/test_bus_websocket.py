@@ -0,0 +1,155 @@
+"""
+Test del bus de broadcast de WebSockets (src/services/bus_broadcast.py)
+- enviar_a_todos: concurrente, timeout por envío, errores
+- BusLocal entrega directo
+- BusPostgres: entrega local + NOTIFY; descarta su propio NOTIFY y entrega
+  los de otros workers (conexión asyncpg simulada)
+- DSN de LISTEN sin el pooler de Neon
+"""
+import sys
+import os
+import asyncio
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.bus_broadcast import (
+    LIMITE_PAYLOAD, BusBroadcast, BusLocal, BusPostgres, codificar, decodificar, dsn_para_listen, enviar_a_todos
+)
+
+
+class SocketFalso:
+    def __init__(self, demora=0.0, falla=False):
+        self.demora = demora
+        self.falla = falla
+        self.recibidos = []
+
+    async def send_json(self, mensaje):
+        if self.falla:
+            raise RuntimeError("conexión cerrada")
+        await asyncio.sleep(self.demora)
+        self.recibidos.append(mensaje)
+
+
+class PostgresFalso:
+    """Canal NOTIFY en memoria compartido por varios BusPostgres"""
+
+    def __init__(self):
+        self.oyentes = []
+        self.notificados = []
+
+    def conexion(self):
+        postgres = self
+
+        class Conexion:
+            def is_closed(self):
+                return False
+
+            async def execute(self, _sql, canal, payload):
+                postgres.notificados.append(payload)
+                for oyente in postgres.oyentes:
+                    oyente(self, 1, canal, payload)
+
+        return Conexion()
+
+
+def test_enviar_a_todos():
+    async def escenario():
+        rapidos = [SocketFalso(0.01) for _ in range(50)]
+        colgado = SocketFalso(10)
+        roto = SocketFalso(falla=True)
+        inicio = time.perf_counter()
+        fallidos = await enviar_a_todos(rapidos + [colgado, roto], {"type": "x"}, timeout=0.2)
+        duracion = time.perf_counter() - inicio
+        return rapidos, colgado, roto, fallidos, duracion
+
+    rapidos, colgado, roto, fallidos, duracion = asyncio.run(escenario())
+    assert all(s.recibidos == [{"type": "x"}] for s in rapidos)
+    assert set(map(id, fallidos)) == {id(colgado), id(roto)}
+    # Concurrente: 50 envíos de 10 ms + uno colgado terminan en ~timeout, no en 0.5 s + 10 s
+    assert duracion < 0.5, duracion
+    assert asyncio.run(enviar_a_todos([], {})) == []
+
+
+def test_bus_local():
+    entregados = []
+
+    async def entregar(sala, mensaje):
+        entregados.append((sala, mensaje))
+
+    async def escenario():
+        bus = BusLocal()
+        await bus.publicar("torneo:1", {"a": 1})  # sin iniciar: no hace nada
+        await bus.iniciar(entregar)
+        await bus.publicar("torneo:1", {"a": 2})
+        await bus.cerrar()
+
+    asyncio.run(escenario())
+    assert entregados == [("torneo:1", {"a": 2})]
+
+
+def test_bus_postgres_entre_workers():
+    async def escenario():
+        postgres = PostgresFalso()
+        entregas = {0: [], 1: [], 2: []}
+        buses = []
+        for worker in entregas:
+            bus = BusPostgres("postgresql://falso/db")
+            bus._publicacion = postgres.conexion()
+
+            async def entregar(sala, mensaje, worker=worker):
+                entregas[worker].append((sala, mensaje["n"]))
+
+            bus._entregar = entregar  # sin tarea de LISTEN: el canal falso llama a _al_notificar
+            postgres.oyentes.append(bus._al_notificar)
+            buses.append(bus)
+
+        for n in range(5):
+            await buses[n % 3].publicar("torneo:7", {"n": n})
+        await asyncio.sleep(0.01)
+
+        # Mensaje demasiado grande para NOTIFY: solo se entrega localmente
+        await buses[0].publicar("torneo:7", {"n": 99, "relleno": "x" * LIMITE_PAYLOAD})
+        await asyncio.sleep(0.01)
+        return postgres, entregas, buses
+
+    postgres, entregas, buses = asyncio.run(escenario())
+    for worker, recibidos in entregas.items():
+        esperados = [("torneo:7", n) for n in range(5)] + ([("torneo:7", 99)] if worker == 0 else [])
+        assert recibidos == esperados, (worker, recibidos)
+    assert len(postgres.notificados) == 5
+    assert buses[0].stats()["descartados_por_tamano"] == 1
+    # Cada worker recibe por NOTIFY solo lo que publicaron los otros
+    assert [b.stats()["recibidos"] for b in buses] == [3, 3, 4]
+
+
+def test_codificacion_y_dsn():
+    payload = codificar("w1", "sala:3", {"type": "x", "data": {"n": 1}})
+    assert decodificar(payload) == ("w1", "sala:3", {"type": "x", "data": {"n": 1}})
+    assert dsn_para_listen(
+        "postgresql+pg8000://u:p@ep-dawn-frost-ac67h4ke-pooler.sa-east-1.aws.neon.tech/neondb"
+    ) == "postgresql://u:p@ep-dawn-frost-ac67h4ke.sa-east-1.aws.neon.tech/neondb"
+    assert dsn_para_listen("postgresql://u:p@localhost:5432/db?sslmode=disable") == \
+        "postgresql://u:p@localhost:5432/db?sslmode=disable"
+
+
+
+def test_bus_incompleto():
+    class SoloPublica(BusBroadcast):
+        async def publicar(self, sala_id, mensaje):
+            pass
+
+    try:
+        SoloPublica()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("un bus sin iniciar() no debería poder crearse")
+
+
+if __name__ == "__main__":
+    test_enviar_a_todos()
+    test_bus_local()
+    test_bus_postgres_entre_workers()
+    test_codificacion_y_dsn()
+    test_bus_incompleto()
+    print("✅ Bus WebSocket: fan-out concurrente con timeout y entrega entre workers")
@@ -0,0 +1,348 @@
+"""
+Test del caché en memoria (src/utils/cache.py)
+- Límite de entradas con desalojo LRU (una lectura renueva la entrada)
+- TTL con heap: las vencidas se descartan al escribir y con cleanup_expired
+- Invalidación por tag / namespace sin tocar el resto
+- Métricas por namespace
+- Single-flight: N threads con la misma key ausente calculan una sola vez;
+  un error llega a todos; un cálculo invalidado a mitad no se guarda
+- Stale-while-revalidate: vencido el TTL se devuelve el valor anterior y se
+  recalcula una sola vez en segundo plano (con sesión propia en el decorador)
+"""
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.utils import cache as modulo_cache
+from src.utils.cache import CacheBase, CacheLRU, cached, namespace_de
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+def test_lru():
+    cache = CacheLRU(max_entradas=3)
+    for i in range(3):
+        cache.set(f"ranking:{i}", i)
+    assert cache.get("ranking:0") == 0  # 0 pasa a ser la más reciente
+    cache.set("ranking:3", 3)
+    assert cache.get("ranking:1") is None
+    assert [cache.get(f"ranking:{i}") for i in (0, 2, 3)] == [0, 2, 3]
+    stats = cache.stats()
+    assert stats['total_keys'] == 3 and stats['namespaces']['ranking']['desalojadas'] == 1
+
+
+def test_ttl():
+    reloj = Reloj()
+    cache = CacheLRU(reloj=reloj)
+    cache.set("a:1", 1, ttl_seconds=10)
+    cache.set("a:2", 2, ttl_seconds=30)
+    cache.set("a:1", 11, ttl_seconds=50)  # reescrita: el vencimiento viejo queda huérfano en el heap
+    reloj.ahora += 20
+    assert cache.cleanup_expired() == 0
+    assert cache.get("a:1") == 11
+    reloj.ahora += 15
+    cache.set("b:1", 1)  # escribir descarta las vencidas
+    assert cache.stats()['total_keys'] == 2
+    assert cache.get("a:2") is None
+    reloj.ahora += 100
+    assert cache.cleanup_expired() == 2
+    assert cache.stats()['namespaces']['a']['vencidas'] == 2
+
+    # Muchas reescrituras de la misma key: el heap se compacta
+    for i in range(5000):
+        cache.set("c:1", i, ttl_seconds=1000)
+    assert len(cache._vencimientos) < 2100
+
+
+def test_tags():
+    cache = CacheLRU()
+    cache.set("ranking:100:0:all", [1])
+    cache.set("ranking:100:0:M", [2])
+    cache.set("top_weekly:5", [3], tags=("ranking",))
+    cache.set("torneo:7:fixture", [4], tags=("torneo:7",))
+    cache.set("torneo:8:fixture", [5], tags=("torneo:8",))
+
+    assert cache.invalidar_tag("ranking") == 3
+    assert cache.get("top_weekly:5") is None and cache.get("torneo:7:fixture") == [4]
+    cache.invalidar_tag("torneo:7")
+    assert cache.get("torneo:7:fixture") is None and cache.get("torneo:8:fixture") == [5]
+
+    # delete_pattern: por índice si es un tag, si no por substring (compatibilidad)
+    cache.set("user:3:perfil", 1)
+    cache.delete_pattern("user")
+    assert cache.get("user:3:perfil") is None
+    cache.set("x:abc", 1)
+    cache.delete_pattern("ab")
+    assert cache.get("x:abc") is None
+    assert namespace_de("ranking:1:2") == "ranking" and namespace_de("sin_dos_puntos") == "sin_dos_puntos"
+
+
+def test_metricas():
+    cache = CacheLRU()
+    cache.get("ranking:1")
+    cache.set("ranking:1", 1)
+    cache.get("ranking:1")
+    cache.get("ranking:1")
+    cache.obtener("top_weekly:5", lambda: None)  # None también se cachea con obtener
+    assert cache.obtener("top_weekly:5", lambda: 1 / 0) is None
+    stats = cache.stats()['namespaces']
+    assert (stats['ranking']['aciertos'], stats['ranking']['fallos'], stats['ranking']['keys']) == (2, 1, 1)
+    assert stats['ranking']['hit_rate'] == round(2 / 3, 3)
+    assert (stats['top_weekly']['fallos'], stats['top_weekly']['aciertos']) == (1, 1)
+
+
+def test_single_flight():
+    cache = CacheLRU()
+    llamadas = []
+    empezar = threading.Barrier(16)
+
+    def calcular():
+        llamadas.append(1)
+        time.sleep(0.05)
+        return "valor"
+
+    resultados = []
+
+    def pedir():
+        empezar.wait()
+        resultados.append(cache.obtener("ranking:1", calcular))
+
+    threads = [threading.Thread(target=pedir) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(llamadas) == 1 and resultados == ["valor"] * 16
+    stats = cache.stats()['namespaces']['ranking']
+    assert stats['fallos'] == 1 and stats['compartidas'] == 15
+
+    # Un error llega a todos los que esperaban y no se cachea
+    errores = []
+
+    def fallar():
+        time.sleep(0.05)
+        raise RuntimeError("base caída")
+
+    def pedir_con_error():
+        try:
+            cache.obtener("ranking:2", fallar)
+        except RuntimeError as e:
+            errores.append(str(e))
+
+    threads = [threading.Thread(target=pedir_con_error) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errores == ["base caída"] * 5
+    assert cache.obtener("ranking:2", lambda: "ok") == "ok"
+
+
+def test_invalidacion_durante_el_calculo():
+    cache = CacheLRU()
+
+    def calcular_viejo():
+        # Se guarda un resultado mientras se calcula: el ranking se invalida
+        cache.invalidar_tag("ranking")
+        return "viejo"
+
+    assert cache.obtener("top_weekly:5", calcular_viejo, tags=("ranking",)) == "viejo"
+    assert cache.get("top_weekly:5") is None
+    assert cache.obtener("top_weekly:5", lambda: "nuevo", tags=("ranking",)) == "nuevo"
+    assert cache.get("top_weekly:5") == "nuevo"
+
+
+def test_decorador():
+    llamadas = []
+
+    @cached("estadisticas", ttl_seconds=60)
+    def contar(db, categoria, sexo=None):
+        llamadas.append((categoria, sexo))
+        return len(llamadas)
+
+    class Session:
+        pass
+
+    assert contar(Session(), 3, sexo="M") == 1
+    assert contar(Session(), 3, sexo="M") == 1
+    assert contar(Session(), 4) == 2
+
+
+def esperar_refrescos(cache):
+    limite = time.monotonic() + 5
+    while cache._refrescando and time.monotonic() < limite:
+        time.sleep(0.005)
+    assert not cache._refrescando
+
+
+def test_stale_while_revalidate():
+    reloj = Reloj()
+    cache = CacheLRU(reloj=reloj)
+    version = [1]
+    llamadas = []
+
+    def calcular():
+        llamadas.append(version[0])
+        return f"ranking v{version[0]}"
+
+    assert cache.obtener_swr("ranking:1", calcular, 60, 300) == "ranking v1"
+    version[0] = 2
+    reloj.ahora += 30
+    assert cache.obtener_swr("ranking:1", calcular, 60, 300) == "ranking v1"  # fresco
+    assert llamadas == [1]
+
+    # Vencido el TTL: se sirve el anterior y se recalcula en segundo plano una vez
+    reloj.ahora += 60
+    assert cache.obtener_swr("ranking:1", calcular, 60, 300) == "ranking v1"
+    esperar_refrescos(cache)
+    assert cache.obtener_swr("ranking:1", calcular, 60, 300) == "ranking v2"
+    assert llamadas == [1, 2]
+    stats = cache.stats()['namespaces']['ranking']
+    assert (stats['viejas'], stats['refrescadas']) == (1, 1)
+
+    # Pasada también la ventana stale: se calcula en el momento
+    version[0] = 3
+    reloj.ahora += 400
+    assert cache.obtener_swr("ranking:1", calcular, 60, 300) == "ranking v3"
+
+    # Invalidado: no se sirve el viejo
+    version[0] = 4
+    cache.invalidar_tag("ranking")
+    assert cache.obtener_swr("ranking:1", calcular, 60, 300) == "ranking v4"
+
+    # Un recálculo invalidado a mitad no se guarda
+    reloj.ahora += 100
+
+    def recalcular_invalidado():
+        cache.invalidar_tag("ranking")
+        return "viejo"
+
+    assert cache.obtener_swr("ranking:1", calcular, 60, 300, recalcular=recalcular_invalidado) == "ranking v4"
+    esperar_refrescos(cache)
+    assert cache.get("ranking:1") is None
+
+    # Un error en segundo plano no rompe nada: sigue sirviendo el anterior
+    assert cache.obtener_swr("ranking:2", lambda: "ok", 60, 300) == "ok"
+    reloj.ahora += 100
+    assert cache.obtener_swr("ranking:2", lambda: 1 / 0, 60, 300) == "ok"
+    esperar_refrescos(cache)
+    assert cache.obtener_swr("ranking:2", lambda: 1 / 0, 60, 300) == "ok"
+
+
+def test_stale_while_revalidate_concurrente():
+    """Muchos requests con el valor vencido: todos responden sin esperar, un solo recálculo"""
+    reloj = Reloj()
+    cache = CacheLRU(reloj=reloj)
+    llamadas = []
+
+    def calcular():
+        llamadas.append(1)
+        time.sleep(0.1)
+        return len(llamadas)
+
+    assert cache.obtener_swr("top_weekly:5", calcular, 120, 600) == 1
+    reloj.ahora += 200
+    empezar = threading.Barrier(16)
+    tiempos = []
+
+    def pedir():
+        empezar.wait()
+        inicio = time.perf_counter()
+        assert cache.obtener_swr("top_weekly:5", calcular, 120, 600) == 1
+        tiempos.append(time.perf_counter() - inicio)
+
+    threads = [threading.Thread(target=pedir) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    esperar_refrescos(cache)
+    assert len(llamadas) == 2 and max(tiempos) < 0.05
+    assert cache.obtener_swr("top_weekly:5", calcular, 120, 600) == 2
+
+
+def test_decorador_stale_while_revalidate():
+    class Session:
+        def __init__(self, nombre):
+            self.nombre = nombre
+            self.cerrada = False
+
+        def close(self):
+            self.cerrada = True
+
+    sesiones = []
+
+    def abrir_sesion():
+        sesiones.append(Session("propia"))
+        return sesiones[-1]
+
+    usadas = []
+
+    @cached("circuito_ranking", ttl_seconds=60, stale_seconds=600, abrir_sesion=abrir_sesion)
+    def ranking(db, circuito_id, limit=100):
+        usadas.append(db.nombre)
+        return [circuito_id, limit, len(usadas)]
+
+    anterior, modulo_cache.cache = modulo_cache.cache, CacheLRU(reloj=Reloj())
+    try:
+        assert ranking(Session("request"), 7, limit=10) == [7, 10, 1]
+        modulo_cache.cache._reloj.ahora += 100
+        assert ranking(Session("request"), 7, limit=10) == [7, 10, 1]
+        esperar_refrescos(modulo_cache.cache)
+        # El recálculo usó una sesión propia y la cerró
+        assert usadas == ["request", "propia"] and sesiones[0].cerrada
+        assert ranking(Session("request"), 7, limit=10) == [7, 10, 2]
+    finally:
+        modulo_cache.cache = anterior
+
+
+def test_rendimiento_invalidacion():
+    cache = CacheLRU(max_entradas=200_000)
+    for i in range(100_000):
+        cache.set(f"otro:{i}", i)
+    for i in range(50):
+        cache.set(f"ranking:{i}", i)
+    inicio = time.perf_counter()
+    for _ in range(1000):
+        cache.invalidar_tag("ranking")
+        cache.set("ranking:0", 0)
+    duracion = (time.perf_counter() - inicio) / 1000
+    print(f"   Invalidar 'ranking' con 100k keys de otros namespaces: {duracion * 1e6:.1f} µs")
+    assert duracion < 1e-3
+
+
+def test_backend_incompleto():
+    class SinRefrescar(CacheBase):
+        def obtener(self, key, calcular, ttl_seconds=60, tags=()):
+            return calcular()
+
+    try:
+        SinRefrescar()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("un backend sin _refrescar() no debería poder crearse")
+
+
+if __name__ == "__main__":
+    test_lru()
+    test_ttl()
+    test_tags()
+    test_metricas()
+    test_single_flight()
+    test_invalidacion_durante_el_calculo()
+    test_decorador()
+    test_stale_while_revalidate()
+    test_stale_while_revalidate_concurrente()
+    test_decorador_stale_while_revalidate()
+    test_rendimiento_invalidacion()
+    test_backend_incompleto()
+    print("✅ Caché LRU + TTL: acotado, invalidación por tag, métricas, single-flight y stale-while-revalidate")
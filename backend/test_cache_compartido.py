@@ -0,0 +1,308 @@
+"""
+Test del caché compartido entre workers (src/utils/cache_compartido.py)
+- CacheSQLite con la misma API que CacheLRU: LRU, TTL, tags, métricas
+- Varios procesos contra el mismo archivo:
+  - la misma key ausente se calcula una sola vez entre todos los workers
+  - invalidar en un worker borra la entrada para todos
+  - un cálculo invalidado (desde otro proceso) a mitad no se guarda
+  - carga mixta: ningún worker lee un valor anterior a la última
+    invalidación confirmada
+- Stale-while-revalidate: con el valor vencido los workers responden con el
+  anterior y uno solo lo recalcula
+- Si el archivo no se puede usar se calcula sin caché
+(CacheRedis requiere un servidor Redis y el paquete redis: no se prueba acá)
+"""
+import sys
+import os
+import multiprocessing
+import random
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.utils.cache import CacheLRU, crear_cache
+from src.utils.cache_compartido import CacheCompartido, CacheSQLite
+
+WORKERS = 4
+
+# spawn: cada worker arranca un intérprete nuevo, como los de uvicorn
+contexto = multiprocessing.get_context("spawn")
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1_000_000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+def ruta_temporal():
+    return os.path.join(tempfile.mkdtemp(prefix="cache_compartido_"), "cache.sqlite")
+
+
+def test_api_en_un_proceso():
+    reloj = Reloj()
+    cache = CacheSQLite(ruta_temporal(), max_entradas=3, reloj=reloj)
+    for i in range(3):
+        cache.set(f"ranking:{i}", {"pos": i})
+        reloj.ahora += 2
+    assert cache.get("ranking:0") == {"pos": 0}  # 0 pasa a ser la más reciente
+    reloj.ahora += 2
+    cache.set("ranking:3", 3)
+    assert cache.get("ranking:1") is None
+    assert [cache.get(f"ranking:{i}") for i in (0, 2)] == [{"pos": 0}, {"pos": 2}]
+    assert cache.stats()['namespaces']['ranking']['desalojadas'] == 1
+
+    cache = CacheSQLite(ruta_temporal(), reloj=reloj)
+    cache.set("a:1", 1, ttl_seconds=10)
+    cache.set("a:2", 2, ttl_seconds=30)
+    reloj.ahora += 20
+    assert cache.get("a:1") is None and cache.get("a:2") == 2
+    assert cache.cleanup_expired() == 1
+
+    cache.set("ranking:100:0:all", [1])
+    cache.set("top_weekly:5", [3], tags=("ranking",))
+    cache.set("torneo:7:fixture", [4], tags=("torneo:7",))
+    assert cache.invalidar_tag("ranking") == 2
+    assert cache.get("top_weekly:5") is None and cache.get("torneo:7:fixture") == [4]
+    cache.set("x:abc", 1)
+    cache.delete_pattern("ab")
+    assert cache.get("x:abc") is None
+    cache.delete("torneo:7:fixture")
+    assert cache.get("torneo:7:fixture") is None
+
+    assert cache.obtener("top_weekly:5", lambda: None, tags=("ranking",)) is None  # None también se cachea
+    assert cache.obtener("top_weekly:5", lambda: 1 / 0) is None
+
+    def calcular_viejo():
+        cache.invalidar_tag("ranking")
+        return "viejo"
+
+    assert cache.obtener("top_weekly:9", calcular_viejo, tags=("ranking",)) == "viejo"
+    assert cache.get("top_weekly:9") is None
+    cache.clear()
+    stats = cache.stats()
+    assert stats['backend'] == "CacheSQLite" and stats['total_keys'] == 0
+    assert stats['namespaces']['top_weekly']['aciertos'] == 1
+
+
+def _worker_single_flight(ruta, empezar, calculos, resultados):
+    cache = CacheSQLite(ruta)
+
+    def calcular():
+        with calculos.get_lock():
+            calculos.value += 1
+        time.sleep(0.3)
+        return [{"id_usuario": 1, "rating": 1500}]
+
+    empezar.wait()
+    resultados.put(cache.obtener("ranking:100:0:all", calcular, 60))
+
+
+def _worker_invalidar(ruta, tag):
+    CacheSQLite(ruta).invalidar_tag(tag)
+
+
+def correr(objetivo, *args):
+    proceso = contexto.Process(target=objetivo, args=args)
+    proceso.start()
+    proceso.join(30)
+    assert proceso.exitcode == 0
+
+
+def test_single_flight_entre_workers():
+    ruta = ruta_temporal()
+    empezar = contexto.Barrier(WORKERS)
+    calculos = contexto.Value('i', 0)
+    resultados = contexto.Queue()
+    procesos = [
+        contexto.Process(target=_worker_single_flight, args=(ruta, empezar, calculos, resultados))
+        for _ in range(WORKERS)
+    ]
+    for proceso in procesos:
+        proceso.start()
+    valores = [resultados.get(timeout=30) for _ in procesos]
+    for proceso in procesos:
+        proceso.join(30)
+    assert calculos.value == 1, calculos.value
+    assert valores == [[{"id_usuario": 1, "rating": 1500}]] * WORKERS
+    print(f"   {WORKERS} workers piden el mismo ranking a la vez: {calculos.value} cálculo")
+
+
+def test_invalidacion_entre_workers():
+    ruta = ruta_temporal()
+    cache = CacheSQLite(ruta)
+    cache.set("torneo:7:fixture", "fixture", tags=("torneo:7",))
+    cache.set("torneo:8:fixture", "otro", tags=("torneo:8",))
+    correr(_worker_invalidar, ruta, "torneo:7")
+    assert cache.get("torneo:7:fixture") is None and cache.get("torneo:8:fixture") == "otro"
+
+    # Otro worker invalida mientras este calcula: el resultado no se guarda
+    def calcular():
+        correr(_worker_invalidar, ruta, "ranking")
+        return "viejo"
+
+    assert cache.obtener("top_weekly:5", calcular, tags=("ranking",)) == "viejo"
+    assert cache.get("top_weekly:5") is None
+    assert cache.obtener("top_weekly:5", lambda: "nuevo", tags=("ranking",)) == "nuevo"
+    assert cache.get("top_weekly:5") == "nuevo"
+
+
+def _worker_lector(ruta, version, confirmada, parar, errores, semilla):
+    cache = CacheSQLite(ruta)
+    rnd = random.Random(semilla)
+
+    def calcular():
+        valor = version.value
+        time.sleep(rnd.random() * 0.005)  # la query tarda
+        return valor
+
+    while not parar.is_set():
+        minimo = confirmada.value
+        leido = cache.obtener("ranking:100:0:all", calcular, 60)
+        if leido < minimo:
+            with errores.get_lock():
+                errores.value += 1
+
+
+def _worker_escritor(ruta, version, confirmada, cambios):
+    cache = CacheSQLite(ruta)
+    for _ in range(cambios):
+        with version.get_lock():
+            version.value += 1
+            actual = version.value
+        cache.invalidar_tag("ranking")
+        confirmada.value = actual
+        time.sleep(0.002)
+
+
+def test_carga_mixta():
+    """Ningún lector ve un ranking anterior a la última invalidación confirmada"""
+    ruta = ruta_temporal()
+    version = contexto.Value('i', 0)
+    confirmada = contexto.Value('i', 0)
+    errores = contexto.Value('i', 0)
+    parar = contexto.Event()
+    lectores = [
+        contexto.Process(target=_worker_lector, args=(ruta, version, confirmada, parar, errores, i))
+        for i in range(WORKERS - 1)
+    ]
+    for proceso in lectores:
+        proceso.start()
+    correr(_worker_escritor, ruta, version, confirmada, 300)
+    parar.set()
+    for proceso in lectores:
+        proceso.join(30)
+        assert proceso.exitcode == 0
+    assert errores.value == 0, errores.value
+    print(f"   {WORKERS - 1} lectores + 1 escritor, {version.value} invalidaciones: ninguna lectura vieja")
+
+
+def _worker_swr(ruta, empezar, calculos, resultados):
+    cache = CacheSQLite(ruta)
+
+    def calcular():
+        with calculos.get_lock():
+            calculos.value += 1
+        time.sleep(0.3)
+        return "nuevo"
+
+    empezar.wait()
+    inicio = time.perf_counter()
+    valor = cache.obtener_swr("top_weekly:5", calcular, 0.5, 600, tags=("ranking",))
+    resultados.put((valor, time.perf_counter() - inicio))
+    while cache._refrescando:
+        time.sleep(0.01)
+
+
+def test_stale_while_revalidate_entre_workers():
+    ruta = ruta_temporal()
+    cache = CacheSQLite(ruta)
+    assert cache.obtener_swr("top_weekly:5", lambda: "viejo", 0.5, 600, tags=("ranking",)) == "viejo"
+    time.sleep(0.6)
+    empezar = contexto.Barrier(WORKERS)
+    calculos = contexto.Value('i', 0)
+    resultados = contexto.Queue()
+    procesos = [
+        contexto.Process(target=_worker_swr, args=(ruta, empezar, calculos, resultados))
+        for _ in range(WORKERS)
+    ]
+    for proceso in procesos:
+        proceso.start()
+    valores = [resultados.get(timeout=30) for _ in procesos]
+    for proceso in procesos:
+        proceso.join(30)
+    assert [v for v, _ in valores] == ["viejo"] * WORKERS
+    assert max(t for _, t in valores) < 0.2
+    assert calculos.value == 1, calculos.value
+    assert cache.obtener_swr("top_weekly:5", lambda: "otro", 0.5, 600, tags=("ranking",)) == "nuevo"
+
+
+def test_sin_almacenamiento():
+    cache = CacheSQLite(os.path.join(tempfile.mkdtemp(), "no_existe", "cache.sqlite"))
+    assert cache.obtener("ranking:1", lambda: "calculado") == "calculado"
+    assert cache.get("ranking:1") is None and cache.invalidar_tag("ranking") == 0
+    stats = cache.stats()
+    assert stats['total_keys'] is None and stats['errores'] == 4
+
+
+def test_backend_incompleto():
+    class Derivada(CacheSQLite):
+        pass
+
+    Derivada(ruta_temporal())  # CacheSQLite implementa todo el almacenamiento
+
+    class SoloLectura(CacheCompartido):
+        def _leer(self, key):
+            return None
+
+    try:
+        SoloLectura()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("un backend sin el resto del almacenamiento no debería poder crearse")
+
+
+def test_crear_cache():
+    ruta = ruta_temporal()
+    os.environ.update(CACHE_BACKEND="sqlite", CACHE_SQLITE_RUTA=ruta)
+    try:
+        cache = crear_cache()
+        assert isinstance(cache, CacheSQLite) and cache.ruta == ruta
+        os.environ["CACHE_BACKEND"] = "otro"
+        assert isinstance(crear_cache(), CacheLRU)
+    finally:
+        del os.environ["CACHE_BACKEND"], os.environ["CACHE_SQLITE_RUTA"]
+    assert isinstance(crear_cache(), CacheLRU)
+
+
+def test_rendimiento():
+    cache = CacheSQLite(ruta_temporal())
+    datos = [{"id_usuario": i, "rating": 1000 + i, "nombre": f"Jugador {i}"} for i in range(100)]
+    cache.set("ranking:100:0:all", datos)
+    inicio = time.perf_counter()
+    for _ in range(2000):
+        cache.obtener("ranking:100:0:all", lambda: datos)
+    t_lectura = (time.perf_counter() - inicio) / 2000
+    inicio = time.perf_counter()
+    for i in range(200):
+        cache.set(f"ranking:{i}", datos)
+        cache.invalidar_tag("ranking")
+    t_escritura = (time.perf_counter() - inicio) / 200
+    print(f"   SQLite: acierto con 100 jugadores {t_lectura * 1e6:.0f} µs, set + invalidar {t_escritura * 1e6:.0f} µs")
+    assert t_lectura < 5e-3
+
+
+if __name__ == "__main__":
+    test_api_en_un_proceso()
+    test_single_flight_entre_workers()
+    test_invalidacion_entre_workers()
+    test_carga_mixta()
+    test_stale_while_revalidate_entre_workers()
+    test_sin_almacenamiento()
+    test_backend_incompleto()
+    test_crear_cache()
+    test_rendimiento()
+    print("✅ Caché compartido: un cálculo entre workers e invalidación para todos")
@@ -0,0 +1,133 @@
+"""
+Test de la disponibilidad compilada (utils/disponibilidad.py)
+- Todos los formatos de disponibilidad_horaria compilan al mismo bitmap
+- El chequeo por bitmap da lo mismo que recorrer los rangos
+- El FixtureScheduler arma la misma máscara con bitmaps que con rangos
+- Serializar / deserializar / decodificar rangos es estable
+"""
+import sys
+import os
+import random
+import time
+from datetime import date
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.utils.disponibilidad import (
+    compilar, compilar_bloqueos, serializar, deserializar, rangos, libre,
+    mascara_rango, normalizar_dia, mapa_de_pareja, DIAS_SEMANA
+)
+from src.services.fixture_scheduler import FixtureScheduler, pareja_disponible
+from test_fixture_scheduler import generar_slots
+
+
+class Pareja:
+    def __init__(self, disponibilidad_horaria, disponibilidad_compilada=None):
+        self.disponibilidad_horaria = disponibilidad_horaria
+        self.disponibilidad_compilada = disponibilidad_compilada
+
+
+def rangos_aleatorios(rng):
+    """restricciones_por_dia como las armaba el parser viejo (múltiplos de 5 minutos)"""
+    restricciones = {}
+    for dia in rng.sample(DIAS_SEMANA, rng.randint(0, 4)):
+        lista = []
+        for _ in range(rng.randint(1, 3)):
+            inicio = 5 * rng.randint(0, 280)
+            lista.append((inicio, min(1440, inicio + 5 * rng.randint(1, 100))))
+        restricciones[dia] = lista
+    return restricciones
+
+
+def test_formatos():
+    franja = {"dias": ["Viernes", "sábado"], "horaInicio": "09:00", "horaFin": "19:00"}
+    esperado = {"viernes": mascara_rango(540, 1140), "sabado": mascara_rango(540, 1140)}
+    assert compilar([franja]) == esperado
+    assert compilar({"franjas": [franja]}) == esperado
+    assert compilar(franja) == esperado
+    assert compilar([{"dias": ["viernes", "sabado"], "desde": "09:00", "hasta": "19:00"}]) == esperado
+    assert compilar({"restricciones_por_dia": {"viernes": [[540, 1140]], "sabado": [[540, 1140]]}}) == esperado
+    # Sin restricciones reconocibles
+    assert compilar(None) == {}
+    assert compilar({"lunes": ["08:00-10:00"]}) == {}
+    assert compilar([{"dias": [], "horaInicio": "09:00"}, {"dias": ["lunes"], "horaInicio": "xx"}, "basura"]) == {}
+    # Defaults del parser: todo el día
+    assert compilar([{"dias": ["lunes"]}]) == {"lunes": mascara_rango(0, 1439)}
+    assert normalizar_dia(" Miércoles") == "miercoles"
+
+
+def test_bitmap_igual_a_rangos():
+    rng = random.Random(0)
+    for _ in range(300):
+        por_rangos = rangos_aleatorios(rng)
+        mapa = compilar({"restricciones_por_dia": por_rangos})
+        for _ in range(50):
+            dia = rng.choice(DIAS_SEMANA)
+            hora = 5 * rng.randint(0, 287)
+            duracion = rng.choice((50, 70, 90))
+            esperado = pareja_disponible(dia, hora, por_rangos, duracion)
+            assert pareja_disponible(dia, hora, mapa, duracion) == esperado
+            assert libre(mapa, dia, hora, duracion) == esperado
+
+
+def test_scheduler_misma_mascara():
+    rng = random.Random(1)
+    slots = generar_slots(date(2026, 3, 5), 4)
+    scheduler = FixtureScheduler(slots, [1, 2])
+    for _ in range(100):
+        por_rangos = rangos_aleatorios(rng)
+        mapa = compilar({"restricciones_por_dia": por_rangos})
+        assert scheduler.mascara_restricciones(mapa) == scheduler.mascara_restricciones(por_rangos)
+
+
+def test_serializacion_y_rangos():
+    rng = random.Random(2)
+    for _ in range(100):
+        mapa = compilar({"restricciones_por_dia": rangos_aleatorios(rng)})
+        guardado = serializar(mapa)
+        assert deserializar(guardado) == mapa
+        assert compilar({"restricciones_por_dia": rangos(mapa)}) == mapa
+    assert deserializar({"version": 0, "resolucion": 5, "dias": {}}) is None
+    assert deserializar(None) is None
+
+    assert rangos({"lunes": mascara_rango(540, 600) | mascara_rango(700, 720)}) == {"lunes": [(540, 600), (700, 720)]}
+
+    # La pareja usa la versión guardada; si falta, compila el JSON
+    crudo = [{"dias": ["lunes"], "horaInicio": "09:00", "horaFin": "10:00"}]
+    assert mapa_de_pareja(Pareja(crudo)) == {"lunes": mascara_rango(540, 600)}
+    assert mapa_de_pareja(Pareja(crudo, serializar({"martes": 1}))) == {"martes": 1}
+
+
+def test_bloqueos_por_fecha():
+    d = date(2026, 3, 7)
+    mapa = compilar_bloqueos([(d, "10:00", "12:00"), (d, "11:00:00", "13:00:00"), (d, "x", "y")])
+    assert mapa == {d: mascara_rango(600, 780)}
+    assert not libre(mapa, d, 12 * 60 + 50, 70)
+    assert libre(mapa, d, 13 * 60, 70)
+
+
+def test_rendimiento():
+    """Chequeo por bitmap vs recorrer rangos (muchas franjas por día)"""
+    rng = random.Random(3)
+    por_rangos = {dia: [(5 * i * 6, 5 * i * 6 + 10) for i in range(40)] for dia in DIAS_SEMANA}
+    mapa = compilar({"restricciones_por_dia": por_rangos})
+    consultas = [(rng.choice(DIAS_SEMANA), 5 * rng.randint(0, 287)) for _ in range(50000)]
+
+    inicio = time.perf_counter()
+    a = [pareja_disponible(dia, hora, por_rangos, 70) for dia, hora in consultas]
+    t_rangos = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    b = [libre(mapa, dia, hora, 70) for dia, hora in consultas]
+    t_bitmap = time.perf_counter() - inicio
+
+    print(f"{len(consultas)} consultas: rangos {t_rangos * 1000:.1f} ms, bitmap {t_bitmap * 1000:.1f} ms")
+    assert a == b
+
+
+if __name__ == "__main__":
+    test_formatos()
+    test_bitmap_igual_a_rangos()
+    test_scheduler_misma_mascara()
+    test_serializacion_y_rangos()
+    test_bloqueos_por_fecha()
+    test_rendimiento()
+    print("✅ Disponibilidad compilada equivalente a los rangos")
@@ -0,0 +1,168 @@
+"""
+Test del cálculo de ELO en lote (src/services/elo_lote.py)
+- Mismo resultado que EloService.calculate_match_ratings, campo por campo,
+  en partidos al azar y en los casos borde (W.O., retiros, empates,
+  tie-breaks, super tie-break, volatilidad fuera de rango)
+- Hooks check_k_lock / check_daily_matches_limit redefinidos y anti-abuso
+- Encadenar ratings con calculadora() igual que llamar de a uno
+"""
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.elo_service import EloService
+from src.services.elo_config import Desenlace
+from src.services.elo_lote import LoteElo, calcular_lote, calculadora, resumen_sets
+
+TIPOS = ["torneo", "amistoso", "final", "zona", "cuartos", "semi", "otro"]
+SETS_POSIBLES = [(6, 0), (6, 1), (6, 2), (6, 3), (6, 4), (7, 5), (7, 6), (10, 8), (4, 6), (6, 7), (1, 6), (0, 6), (5, 7)]
+
+
+def partido_al_azar(rnd: random.Random, jugador_id: int = 1):
+    def jugador(i):
+        datos = {
+            "id": jugador_id + i,
+            "rating": rnd.choice([rnd.randint(300, 2200), rnd.uniform(300, 2200)]),
+            "partidos": rnd.randint(0, 120)
+        }
+        if rnd.random() < 0.5:
+            datos["volatilidad"] = rnd.choice([rnd.uniform(0.5, 1.5), 1.0, float("nan")])
+        return datos
+
+    sets = [rnd.choice(SETS_POSIBLES) for _ in range(rnd.choice([0, 1, 2, 2, 3]))]
+    sets_a = sum(1 for a, b in sets if a > b)
+    sets_b = len(sets) - sets_a
+    return dict(
+        team_a_players=[jugador(0), jugador(1)],
+        team_b_players=[jugador(2), jugador(3)],
+        sets_a=sets_a,
+        sets_b=sets_b,
+        games_a=sum(a for a, _ in sets),
+        games_b=sum(b for _, b in sets),
+        sets_detail=[{"games_a": a, "games_b": b} for a, b in sets] if rnd.random() < 0.9 else None,
+        desenlace=rnd.choice([Desenlace.NORMAL.value] * 6 + [d.value for d in Desenlace]),
+        match_type=rnd.choice(TIPOS),
+        match_date=datetime(2026, 1, 1) + timedelta(hours=rnd.randint(0, 5000))
+    )
+
+
+def _iguales(a, b, ruta="resultado"):
+    if isinstance(a, float) and isinstance(b, float) and a != a and b != b:
+        return  # NaN
+    if isinstance(a, dict):
+        assert a.keys() == b.keys(), ruta
+        for clave in a:
+            _iguales(a[clave], b[clave], f"{ruta}.{clave}")
+    elif isinstance(a, (list, tuple)):
+        assert len(a) == len(b), ruta
+        for i, (x, y) in enumerate(zip(a, b)):
+            _iguales(x, y, f"{ruta}[{i}]")
+    else:
+        assert a == b and type(a) == type(b), f"{ruta}: {a!r} != {b!r}"
+
+
+def comparar(partidos, service=None):
+    service = service or EloService()
+    lote = LoteElo()
+    for partido in partidos:
+        lote.agregar(**partido)
+    resultado = calcular_lote(lote, service)
+    assert len(resultado) == len(partidos)
+    for i, partido in enumerate(partidos):
+        _iguales(service.calculate_match_ratings(**partido), resultado.como_dict(lote, i))
+
+
+def test_igual_al_escalar():
+    rnd = random.Random(2026)
+    comparar([partido_al_azar(rnd) for _ in range(20000)])
+
+
+def test_casos_borde():
+    base = partido_al_azar(random.Random(1))
+    casos = []
+    for desenlace in [d.value for d in Desenlace]:
+        for sets_a, sets_b in [(2, 0), (0, 2), (2, 1), (1, 1), (0, 0)]:
+            casos.append(dict(base, desenlace=desenlace, sets_a=sets_a, sets_b=sets_b))
+    # Super tie-break y sets de 7-6 en los dos sentidos
+    casos.append(dict(base, sets_a=2, sets_b=1, sets_detail=[
+        {"games_a": 7, "games_b": 6}, {"games_a": 6, "games_b": 7}, {"games_a": 10, "games_b": 8}
+    ]))
+    casos.append(dict(base, sets_detail=[]))
+    casos.append(dict(base, match_date=None))
+    comparar(casos)
+
+    try:
+        LoteElo().agregar(base["team_a_players"][:1], base["team_b_players"], 2, 0)
+        assert False
+    except ValueError:
+        pass
+
+
+class EloConBloqueos(EloService):
+    def check_k_lock(self, user_id, match_time):
+        return user_id % 3 == 0
+
+    def check_daily_matches_limit(self, user_id, match_date):
+        return user_id % 7 == 0
+
+
+def test_hooks_y_abuso():
+    rnd = random.Random(7)
+    comparar([partido_al_azar(rnd, jugador_id=i * 4) for i in range(3000)], EloConBloqueos())
+
+    partido = partido_al_azar(rnd, jugador_id=100)
+    fecha = partido["match_date"]
+    jugadores = [{"id": j["id"]} for j in partido["team_a_players"] + partido["team_b_players"]]
+    recientes = [{"fecha": fecha - timedelta(hours=h), "jugadores": jugadores} for h in (1, 2, 3)]
+    comparar([
+        dict(partido, recent_matches=recientes),
+        dict(partido, recent_matches=recientes[:2]),
+        dict(partido, recent_matches=recientes, match_date=None),
+    ])
+
+
+def test_encadenado():
+    rnd = random.Random(11)
+    service = EloService()
+    calcular = calculadora(service)
+    rating = {j: rnd.randint(800, 1800) for j in range(1, 41)}
+    jugados = {j: rnd.randint(0, 80) for j in range(1, 41)}
+    escalar_rating, escalar_jugados = dict(rating), dict(jugados)
+
+    for _ in range(2000):
+        ids = rnd.sample(range(1, 41), 4)
+        sets = [rnd.choice(SETS_POSIBLES[:8]), rnd.choice(SETS_POSIBLES[8:])]
+        if rnd.random() < 0.5:
+            sets = [(b, a) for a, b in sets]
+        sets_a = sum(1 for a, b in sets if a > b)
+        detalle = [{"games_a": a, "games_b": b} for a, b in sets]
+        args = (sets_a, 2 - sets_a, sum(a for a, _ in sets), sum(b for _, b in sets))
+
+        nuevos, *_ = calcular(
+            tuple(rating[j] for j in ids), tuple(jugados[j] for j in ids), (1.0,) * 4, tuple(ids),
+            *args, *resumen_sets(detalle), "normal", "torneo"
+        )
+        for j, nuevo in zip(ids, nuevos):
+            rating[j] = nuevo
+            jugados[j] += 1
+
+        escalar = service.calculate_match_ratings(
+            team_a_players=[{"id": j, "rating": escalar_rating[j], "partidos": escalar_jugados[j]} for j in ids[:2]],
+            team_b_players=[{"id": j, "rating": escalar_rating[j], "partidos": escalar_jugados[j]} for j in ids[2:]],
+            sets_a=args[0], sets_b=args[1], games_a=args[2], games_b=args[3], sets_detail=detalle
+        )
+        for j, jugador in zip(ids, escalar["team_a"]["players"] + escalar["team_b"]["players"]):
+            escalar_rating[j] = jugador["new_rating"]
+            escalar_jugados[j] += 1
+
+    assert rating == escalar_rating and jugados == escalar_jugados
+
+
+if __name__ == "__main__":
+    test_igual_al_escalar()
+    test_casos_borde()
+    test_hooks_y_abuso()
+    test_encadenado()
+    print("✅ ELO en lote: idéntico a calculate_match_ratings (al azar, bordes, hooks, anti-abuso, encadenado)")
@@ -0,0 +1,189 @@
+"""
+Test del replay de ELO (src/services/elo_replay.py)
+- Partidos desde las filas de la consulta (amistosos con equipos invertidos,
+  sets como dict o '6-3', torneo con resultado_padel)
+- Determinista: mismo resultado en cada corrida y por el camino rápido
+  (elo_lote) o por calculate_match_ratings; EloServiceV2 como motor
+- Merge con el historial y diff (iguales, distintas, faltantes, duplicadas,
+  sobrantes) con las escrituras para corregir
+- 100k partidos recalculados y comparados en segundos
+"""
+import sys
+import os
+import random
+import time
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.elo_service import EloService
+from src.services.elo_service_v2 import EloServiceV2
+from src.services.elo_replay import (
+    AMISTOSO, TORNEO, Comparacion, Replay, emparejar, partido_desde_fila, usuarios_distintos
+)
+
+INICIO = datetime(2025, 1, 1, 10, 0)
+SETS = [(6, 3), (6, 4), (3, 6), (7, 6), (6, 1), (4, 6), (7, 5), (2, 6)]
+
+
+def test_partido_desde_fila():
+    amistoso = partido_desde_fila(
+        10, INICIO, AMISTOSO, [[1, 1], [2, 1], [3, 2], [4, 2]],
+        2, 1, [{'juegos_eq1': 6, 'juegos_eq2': 3}, '4-6', {'juegos_eq1': 6, 'juegos_eq2': 1}], None, None
+    )
+    assert (amistoso.equipo_a, amistoso.equipo_b) == ((1, 2), (3, 4))
+    assert (amistoso.sets_a, amistoso.sets_b, amistoso.games_a, amistoso.games_b) == (2, 1, 16, 10)
+    assert amistoso.desenlace == 'normal' and amistoso.clave == (INICIO, 10)
+
+    # resultado_padel con equipo 1 como equipoB: se invierte (como confirmacion_service)
+    invertido = partido_desde_fila(
+        11, INICIO, AMISTOSO, '[[1, 1], [2, 1], [3, 2], [4, 2]]',
+        2, 0, '[{"juegos_eq1": 6, "juegos_eq2": 0}, {"juegos_eq1": 6, "juegos_eq2": 2}]', 'normal',
+        {'jugadores': {'equipoA': [{'id': 3}, {'id': 4}]}}
+    )
+    assert (invertido.sets_a, invertido.sets_b, invertido.games_a, invertido.games_b) == (0, 2, 2, 12)
+    assert invertido.sets_detail == [{'games_a': 0, 'games_b': 6}, {'games_a': 2, 'games_b': 6}]
+
+    torneo = partido_desde_fila(
+        12, INICIO, TORNEO, [[7, 1], [5, 1], [8, 2], [6, 2]], None, None, None, None,
+        {'sets': [
+            {'gamesEquipoA': 6, 'gamesEquipoB': 4, 'ganador': 'equipoA'},
+            {'gamesEquipoA': 7, 'gamesEquipoB': 6, 'ganador': 'equipoA'}
+        ]}
+    )
+    assert (torneo.equipo_a, torneo.equipo_b) == ((7, 5), (8, 6))
+    assert (torneo.sets_a, torneo.sets_b, torneo.games_a, torneo.games_b) == (2, 0, 13, 10)
+
+    for jugadores, resultado in [
+        ([[1, 1], [2, 1], [3, 2]], {'sets': [{}]}),
+        ([[1, 1], [1, 1], [3, 2], [4, 2]], {'sets': [{}]}),
+        ([[1, 1], [2, 1], [3, 2], [4, 2]], {}),
+    ]:
+        try:
+            partido_desde_fila(13, INICIO, TORNEO, jugadores, None, None, None, None, resultado)
+            assert False
+        except ValueError:
+            pass
+
+
+def generar(cantidad, jugadores=400, semilla=5):
+    rnd = random.Random(semilla)
+    partidos = []
+    for i in range(cantidad):
+        ids = rnd.sample(range(1, jugadores + 1), 4)
+        sets = [rnd.choice(SETS) for _ in range(2)]
+        if (sets[0][0] > sets[0][1]) != (sets[1][0] > sets[1][1]):
+            sets.append(rnd.choice(SETS))
+        orden = INICIO + timedelta(minutes=i // 3)  # varios partidos a la misma hora
+        if rnd.random() < 0.5:
+            fila = partido_desde_fila(
+                i + 1, orden, AMISTOSO, [[ids[0], 1], [ids[1], 1], [ids[2], 2], [ids[3], 2]],
+                sum(1 for a, b in sets if a > b), sum(1 for a, b in sets if b > a),
+                [f"{a}-{b}" for a, b in sets], 'normal', None
+            )
+        else:
+            fila = partido_desde_fila(
+                i + 1, orden, TORNEO, [[ids[0], 1], [ids[1], 1], [ids[2], 2], [ids[3], 2]],
+                None, None, None, None,
+                {'sets': [{'gamesEquipoA': a, 'gamesEquipoB': b, 'ganador': 'equipoA' if a > b else 'equipoB'}
+                          for a, b in sets]}
+            )
+        partidos.append(fila)
+    ratings = {j: 700 + (j * 53) % 1100 for j in range(1, jugadores + 1)}
+    return partidos, ratings
+
+
+class EloSinCaminoRapido(EloService):
+    def calculate_match_ratings(self, *args, **kwargs):
+        return super().calculate_match_ratings(*args, **kwargs)
+
+
+def test_determinista():
+    partidos, ratings = generar(3000)
+    corridas = []
+    for servicio in (EloService(), EloService(), EloSinCaminoRapido()):
+        replay = Replay(servicio, ratings)
+        filas = [replay.aplicar(p) for p in partidos]
+        corridas.append((filas, replay.rating, replay.partidos))
+    assert corridas[0] == corridas[1] == corridas[2]
+    assert all(delta == despues - antes for filas in corridas[0][0] for _, antes, delta, despues in filas)
+
+    v2 = Replay(EloServiceV2(), ratings)
+    for partido in partidos[:500]:
+        v2.aplicar(partido)
+    assert v2.rating != corridas[0][1]
+
+
+def test_emparejar_y_comparar():
+    partidos, ratings = generar(6)
+    replay = Replay(EloService(), ratings)
+    calculadas = {p.id_partido: replay.aplicar(p) for p in partidos}
+
+    def guardadas(id_partido, id_historial_base=0):
+        return [(id_historial_base + k, *fila) for k, fila in enumerate(calculadas[id_partido])]
+
+    antes = (INICIO - timedelta(days=1), 999)
+    historial = [
+        (antes, [(900, 1, 1200, 5, 1205)]),              # partido no recalculado
+        (partidos[0].clave, guardadas(1, 100)),           # igual
+        (partidos[1].clave, guardadas(2, 200)[:3]),       # falta un jugador
+        (partidos[2].clave, [(300, *calculadas[3][0][:2], 0, calculadas[3][0][1])] + guardadas(3, 301)[1:]),
+        (partidos[3].clave, guardadas(4, 400) + [(404, calculadas[4][0][0], 1, 1, 2), (405, 77, 1, 1, 2)]),
+        # partidos[4] sin historial
+        (partidos[5].clave, guardadas(6, 600)),
+        ((INICIO + timedelta(days=9), 1), [(901, 1, 1200, 5, 1205)]),
+    ]
+    pares = list(emparejar(partidos, historial))
+    assert [(p.id_partido if p else None) for p, _, _ in pares] == [None, 1, 2, 3, 4, 5, 6, None]
+
+    comparacion = Comparacion(guardar_cambios=True)
+    for partido, _, filas in pares:
+        if partido is None:
+            comparacion.sin_partido(filas)
+        else:
+            comparacion.partido(partido.id_partido, calculadas[partido.id_partido], filas)
+    reporte = comparacion.reporte()
+    assert (reporte['iguales'], reporte['distintas'], reporte['faltantes']) == (4 + 3 + 3 + 4 + 4, 1, 1 + 4)
+    assert (reporte['duplicadas'], reporte['sobrantes'], reporte['sin_recalcular']) == (1, 1, 2)
+    assert [f['id_historial'] for f in comparacion.actualizar] == [300]
+    assert len(comparacion.insertar) == 5 and sorted(comparacion.borrar) == [404, 405]
+
+    actuales = {j: (replay.rating[j], replay.partidos[j]) for j in replay.partidos}
+    jugador = next(iter(replay.partidos))
+    actuales[jugador] = (actuales[jugador][0] + 10, actuales[jugador][1])
+    assert [d['id_usuario'] for d in usuarios_distintos(replay, actuales)] == [jugador]
+
+
+def test_rendimiento():
+    cantidad = 100_000
+    partidos, ratings = generar(cantidad, jugadores=5000, semilla=9)
+
+    # Historial "guardado" = una corrida anterior con el 1% de filas alteradas
+    base = Replay(EloService(), ratings)
+    historial = []
+    rnd = random.Random(1)
+    for partido in partidos:
+        filas = [(partido.id_partido * 10 + k, *f) for k, f in enumerate(base.aplicar(partido))]
+        if rnd.random() < 0.01:
+            filas[0] = (*filas[0][:4], filas[0][4] + 1)
+        historial.append((partido.clave, filas))
+
+    inicio = time.perf_counter()
+    replay = Replay(EloService(), ratings)
+    comparacion = Comparacion(guardar_cambios=True)
+    for partido, _, guardadas in emparejar(partidos, historial):
+        comparacion.partido(partido.id_partido, replay.aplicar(partido), guardadas)
+    duracion = time.perf_counter() - inicio
+
+    reporte = comparacion.reporte()
+    assert reporte['distintas'] == len(comparacion.actualizar) > 0
+    assert reporte['iguales'] + reporte['distintas'] == cantidad * 4
+    print(f"   Replay + diff de {cantidad} partidos: {duracion:.2f} s ({reporte['distintas']} filas distintas)")
+    assert duracion < 10, duracion
+
+
+if __name__ == "__main__":
+    test_partido_desde_fila()
+    test_determinista()
+    test_emparejar_y_comparar()
+    test_rendimiento()
+    print("✅ Replay de ELO: determinista, diff contra historial y 100k partidos en segundos")
@@ -0,0 +1,47 @@
+"""
+Test de GET condicional (utils/etag.py)
+- If-None-Match: comparación débil, listas y '*'
+- If-Modified-Since: precisión de segundos, cambios en el mismo segundo no dan 304
+"""
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.utils.etag import coincide_if_none_match, etag_debil, formato_http, no_modificado_desde
+
+
+def test_if_none_match():
+    etag = etag_debil("torneo", 5, "v12")
+    assert etag == 'W/"torneo-5-v12"'
+    assert coincide_if_none_match(etag, etag)
+    assert coincide_if_none_match('"torneo-5-v12"', etag)  # débil: ignora W/
+    assert coincide_if_none_match('W/"otro", W/"torneo-5-v12"', etag)
+    assert coincide_if_none_match('*', etag)
+    assert not coincide_if_none_match('W/"torneo-5-v11"', etag)
+    assert not coincide_if_none_match(None, etag)
+    assert not coincide_if_none_match('', etag)
+
+
+def test_if_modified_since():
+    modificado = datetime(2026, 10, 18, 21, 3, 0, 400000)  # naive = UTC
+    assert formato_http(modificado) == 'Sun, 18 Oct 2026 21:03:00 GMT'
+
+    posterior = formato_http(modificado + timedelta(seconds=5))
+    assert no_modificado_desde(posterior, modificado)
+    # Mismo segundo: puede haber otro cambio en ese segundo, no es 304
+    assert not no_modificado_desde(formato_http(modificado), modificado)
+    assert not no_modificado_desde(formato_http(modificado - timedelta(seconds=1)), modificado)
+    # Con zona horaria
+    con_zona = modificado.replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(hours=-3)))
+    assert no_modificado_desde(posterior, con_zona)
+    # Cabeceras inválidas o sin fecha
+    assert not no_modificado_desde('no es una fecha', modificado)
+    assert not no_modificado_desde(None, modificado)
+    assert not no_modificado_desde(posterior, None)
+
+
+if __name__ == "__main__":
+    test_if_none_match()
+    test_if_modified_since()
+    print("✅ ETag / If-Modified-Since OK")
@@ -0,0 +1,115 @@
+"""
+Test de eventos en vivo de torneos (eventos_torneo.py)
+- Datos compactos de cada tipo de evento
+- Publicación en orden con la versión del commit de cada torneo
+- Un error al notificar no se propaga (el commit ya pasó)
+- notificador_websocket entrega al event loop desde otros hilos
+"""
+import sys
+import os
+import asyncio
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.eventos_torneo import (
+    GANADOR_AVANZADO, PARTIDO_REPROGRAMADO, RESULTADO_CARGADO, TABLA_ACTUALIZADA,
+    PublicadorEventos, datos_ganador, datos_reprogramado, datos_resultado, datos_tabla,
+    notificador_websocket
+)
+
+
+def partido(**campos):
+    base = dict(
+        id_partido=10, zona_id=None, categoria_id=3, fase='4tos', estado='pendiente',
+        resultado_padel=None, ganador_pareja_id=None, numero_partido=1,
+        pareja1_id=None, pareja2_id=None, fecha_hora=None, cancha_id=None
+    )
+    base.update(campos)
+    return SimpleNamespace(**base)
+
+
+def test_datos():
+    resultado = {'sets': [{'gamesEquipoA': 6, 'gamesEquipoB': 2, 'ganador': 'equipoA', 'completado': True}]}
+    p = partido(zona_id=4, fase='zona', estado='confirmado', resultado_padel=resultado, ganador_pareja_id=7)
+    assert datos_resultado(p) == {
+        "partido_id": 10, "zona_id": 4, "categoria_id": 3, "fase": 'zona', "estado": 'confirmado',
+        "resultado_padel": resultado, "ganador_pareja_id": 7
+    }
+
+    filas = datos_tabla(4, [{'pareja_id': 9, 'puntos': 0}, {'pareja_id': 7, 'puntos': 3}])
+    assert filas == {"zona_id": 4, "filas": [{'pareja_id': 7, 'puntos': 3}, {'pareja_id': 9, 'puntos': 0}]}
+
+    siguiente = partido(id_partido=20, fase='semis', pareja1_id=7)
+    assert datos_ganador(partido(), siguiente, 7) == {
+        "partido_id": 10, "fase": '4tos', "categoria_id": 3, "ganador_pareja_id": 7,
+        "siguiente_partido_id": 20, "siguiente_fase": 'semis', "pareja1_id": 7, "pareja2_id": None
+    }
+    assert datos_ganador(partido(fase='final'), None, 7)["siguiente_partido_id"] is None
+
+    movido = partido(fecha_hora=datetime(2026, 10, 18, 19, 30), cancha_id=2)
+    assert datos_reprogramado(movido) == {"partido_id": 10, "fecha_hora": '2026-10-18T19:30:00', "cancha_id": 2}
+    assert datos_reprogramado(partido())["fecha_hora"] is None
+
+
+def test_publicar_en_orden_con_version():
+    recibidos = []
+    publicador = PublicadorEventos(notificar=recibidos.append)
+    pendientes = [
+        (1, RESULTADO_CARGADO, {"partido_id": 10}),
+        (1, TABLA_ACTUALIZADA, {"zona_id": 4, "filas": []}),
+        (2, PARTIDO_REPROGRAMADO, {"partido_id": 30}),
+    ]
+    publicador.publicar_todos(pendientes, {1: 8, 2: 3})
+    assert [(e["torneo_id"], e["version"], e["type"]) for e in recibidos] == [
+        (1, 8, RESULTADO_CARGADO), (1, 8, TABLA_ACTUALIZADA), (2, 3, PARTIDO_REPROGRAMADO)
+    ]
+    assert publicador.stats() == {"publicados": 3, "errores": 0}
+
+    # Sin notificar configurado (scripts / tests): no hace nada
+    assert PublicadorEventos().publicar(1, 1, GANADOR_AVANZADO, {})["type"] == GANADOR_AVANZADO
+
+
+def test_error_al_notificar_no_se_propaga():
+    def falla(evento):
+        raise RuntimeError("socket cerrado")
+    publicador = PublicadorEventos(notificar=falla)
+    publicador.publicar(1, 2, RESULTADO_CARGADO, {})
+    assert publicador.stats() == {"publicados": 0, "errores": 1}
+
+
+def test_notificador_websocket_desde_hilos():
+    class ManagerFalso:
+        def __init__(self):
+            self.recibidos = []
+
+        async def notify_evento_torneo(self, evento):
+            self.recibidos.append((threading.current_thread().name, evento["data"]["i"]))
+
+    async def escenario():
+        manager = ManagerFalso()
+        publicador = PublicadorEventos(notificar=notificador_websocket(asyncio.get_running_loop(), manager))
+        hilos = [
+            threading.Thread(target=publicador.publicar, args=(1, i, RESULTADO_CARGADO, {"i": i}))
+            for i in range(20)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            await asyncio.get_running_loop().run_in_executor(None, hilo.join)
+        await asyncio.sleep(0.05)
+        return manager.recibidos
+
+    recibidos = asyncio.run(escenario())
+    assert sorted(i for _, i in recibidos) == list(range(20))
+    # Todos los broadcasts corren en el hilo del event loop
+    assert {nombre for nombre, _ in recibidos} == {threading.main_thread().name}
+
+
+if __name__ == "__main__":
+    test_datos()
+    test_publicar_en_orden_con_version()
+    test_error_al_notificar_no_se_propaga()
+    test_notificador_websocket_desde_hilos()
+    print("✅ Eventos en vivo de torneos: datos, orden, versiones y entrega al event loop")
@@ -0,0 +1,135 @@
+"""
+Test de cantidad de queries del fixture global
+Verifica que generar_fixture_completo use un número fijo de SELECTs
+(independiente de la cantidad de partidos) gracias a ContextoFixture.
+
+Usa SQLite en memoria, no necesita la base de Neon.
+"""
+import sys
+import os
+from datetime import date
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy import create_engine, event, BigInteger
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from src.database.config import Base
+from src.models.driveplus_models import Usuario, Partido
+from src.models.torneo_models import (
+    Torneo, TorneoCategoria, TorneoZona, TorneoZonaPareja, TorneoPareja, TorneoCancha,
+    TorneoTablaPosiciones
+)
+from src.services.torneo_fixture_global_service import TorneoFixtureGlobalService
+
+
+@compiles(BigInteger, "sqlite")
+def _bigint_sqlite(type_, compiler, **kw):
+    # SQLite solo autoincrementa "INTEGER PRIMARY KEY"
+    return "INTEGER"
+
+
+TABLAS = [
+    Usuario.__table__, Torneo.__table__, TorneoCategoria.__table__, TorneoZona.__table__,
+    TorneoPareja.__table__, TorneoZonaPareja.__table__, TorneoCancha.__table__, Partido.__table__,
+    TorneoTablaPosiciones.__table__,
+]
+
+
+def crear_torneo(db, num_categorias, zonas_por_categoria, parejas_por_zona, restringidas=0):
+    """Crea un torneo sintético y devuelve su id"""
+    organizador = Usuario(id_usuario=1, nombre_usuario="organizador", email="org@test.com")
+    db.add(organizador)
+    torneo = Torneo(
+        nombre="Torneo test", categoria="libre", creado_por=1,
+        fecha_inicio=date(2026, 3, 6), fecha_fin=date(2026, 3, 8),
+        horarios_disponibles={"viernes": {"inicio": "15:00", "fin": "23:00"},
+                              "sabado": {"inicio": "09:00", "fin": "23:00"},
+                              "domingo": {"inicio": "09:00", "fin": "20:00"}}
+    )
+    db.add(torneo)
+    db.flush()
+
+    for c in range(2):
+        db.add(TorneoCancha(torneo_id=torneo.id, nombre=f"Cancha {c + 1}", activa=True))
+
+    usuario_id = 2
+    for c in range(num_categorias):
+        categoria = TorneoCategoria(torneo_id=torneo.id, nombre=f"Cat {c}", genero="masculino")
+        db.add(categoria)
+        db.flush()
+        for z in range(zonas_por_categoria):
+            zona = TorneoZona(torneo_id=torneo.id, categoria_id=categoria.id, nombre=f"Zona {z}", numero_orden=z)
+            db.add(zona)
+            db.flush()
+            for _ in range(parejas_por_zona):
+                for uid in (usuario_id, usuario_id + 1):
+                    db.add(Usuario(id_usuario=uid, nombre_usuario=f"jugador{uid}", email=f"j{uid}@test.com"))
+                # Algunas parejas solo pueden jugar el domingo → partidos sin lugar
+                restricciones = None
+                if restringidas:
+                    restringidas -= 1
+                    restricciones = [{"dias": ["viernes", "sabado", "domingo"], "horaInicio": "00:00", "horaFin": "23:59"}]
+                pareja = TorneoPareja(
+                    torneo_id=torneo.id, categoria_id=categoria.id,
+                    jugador1_id=usuario_id, jugador2_id=usuario_id + 1,
+                    estado="confirmada", disponibilidad_horaria=restricciones
+                )
+                db.add(pareja)
+                db.flush()
+                db.add(TorneoZonaPareja(zona_id=zona.id, pareja_id=pareja.id))
+                usuario_id += 2
+    db.commit()
+    return torneo.id
+
+
+def contar_selects(num_categorias, zonas_por_categoria, parejas_por_zona, restringidas=0):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=TABLAS)
+    db = sessionmaker(bind=engine)()
+    torneo_id = crear_torneo(db, num_categorias, zonas_por_categoria, parejas_por_zona, restringidas)
+    db.close()
+
+    db = sessionmaker(bind=engine)()
+    selects = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _contar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    resultado = TorneoFixtureGlobalService.generar_fixture_completo(db, torneo_id, 1)
+    db.close()
+    return len(selects), resultado
+
+
+def test_queries_constantes_por_torneo():
+    """La cantidad de SELECTs no crece con la cantidad de partidos"""
+    chico, r_chico = contar_selects(num_categorias=2, zonas_por_categoria=1, parejas_por_zona=3)
+    grande, r_grande = contar_selects(num_categorias=2, zonas_por_categoria=4, parejas_por_zona=4)
+
+    print(f"SELECTs torneo chico:  {chico} ({r_chico['partidos_generados']} partidos)")
+    print(f"SELECTs torneo grande: {grande} ({r_grande['partidos_generados']} partidos)")
+
+    assert r_grande['partidos_generados'] > r_chico['partidos_generados']
+    assert grande == chico
+    # torneo + categorías + zonas + canchas + parejas por zona + partidos programados
+    assert grande <= 6
+
+
+def test_queries_con_partidos_sin_programar():
+    """Los partidos sin lugar cargan los usuarios en una query por categoría, no por partido"""
+    selects, resultado = contar_selects(
+        num_categorias=2, zonas_por_categoria=2, parejas_por_zona=4, restringidas=4
+    )
+    print(f"SELECTs: {selects}, sin programar: {resultado['partidos_no_programados']}")
+
+    assert resultado['partidos_no_programados'] > 0
+    assert all(p['pareja1_nombre'] != "Pareja desconocida" for p in resultado['partidos_sin_programar'])
+    assert selects <= 6 + 2
+
+
+if __name__ == "__main__":
+    test_queries_constantes_por_torneo()
+    test_queries_con_partidos_sin_programar()
+    print("✅ Cantidad de queries acotada")
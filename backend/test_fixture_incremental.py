@@ -0,0 +1,120 @@
+"""
+Test de la reprogramación incremental (fixture_incremental.planificar)
+- Solo se mueven los partidos en conflicto, el resto queda igual
+- Partidos de parejas dadas de baja se eliminan
+- Partidos jugados nunca se mueven
+- Un cambio de una pareja sobre un torneo grande tarda bastante menos de 1s
+"""
+import sys
+import os
+import time
+from datetime import date, datetime
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.fixture_incremental import (
+    PartidoActual, planificar,
+    MOTIVO_SIN_HORARIO, MOTIVO_RESTRICCION, MOTIVO_CANCHA_OCUPADA
+)
+from test_fixture_scheduler import generar_torneo, generar_slots, generar_torneo_completo, asignar_indexado
+
+
+SLOTS = generar_slots(date(2026, 3, 7), 1)  # sábado 09:00, 10:10, 11:20...
+JUGADORES = {1: (1, 2), 2: (3, 4), 3: (5, 6), 4: (7, 8)}
+
+
+def partido(id, p1, p2, hora=None, cancha=1, jugado=False):
+    fecha_hora = datetime.strptime(f"2026-03-07 {hora}", '%Y-%m-%d %H:%M') if hora else None
+    return PartidoActual(id, 1, p1, p2, fecha_hora, cancha if hora else None, jugado)
+
+
+def test_sin_cambios_no_mueve_nada():
+    partidos = [partido(1, 1, 2, "09:00"), partido(2, 3, 4, "09:00", cancha=2)]
+    plan = planificar(partidos, JUGADORES, {}, SLOTS, [1, 2])
+    assert plan['movidos'] == []
+    assert plan['sin_cambios'] == 2
+
+
+def test_restriccion_nueva_mueve_solo_ese_partido():
+    partidos = [partido(1, 1, 2, "09:00"), partido(2, 3, 4, "09:00", cancha=2)]
+    # La pareja 3 ya no puede a la mañana
+    restricciones = {3: {'sabado': [(0, 12 * 60)]}}
+    plan = planificar(partidos, JUGADORES, restricciones, SLOTS, [1, 2], parejas_afectadas=[3])
+
+    assert plan['sin_cambios'] == 1
+    [(movido, motivo, nuevo)] = plan['movidos']
+    assert movido.id == 2 and motivo == MOTIVO_RESTRICCION
+    assert nuevo == (datetime(2026, 3, 7, 12, 30), 1)
+
+
+def test_choque_mueve_partido_de_pareja_afectada():
+    # Dos partidos en la misma cancha y horario: se mueve el de la pareja afectada
+    partidos = [partido(1, 3, 4, "09:00"), partido(2, 1, 2, "09:00")]
+    plan = planificar(partidos, JUGADORES, {}, SLOTS, [1], parejas_afectadas=[3])
+
+    [(movido, motivo, nuevo)] = plan['movidos']
+    assert movido.id == 1 and motivo == MOTIVO_CANCHA_OCUPADA
+    assert nuevo[0].strftime('%H:%M') == "10:10"
+
+
+def test_baja_de_pareja_elimina_sus_partidos():
+    partidos = [partido(1, 1, 2, "09:00"), partido(2, 3, 9, "10:10"), partido(3, 9, 4, "11:20", jugado=True)]
+    plan = planificar(partidos, JUGADORES, {}, SLOTS, [1])
+    assert [p.id for p in plan['eliminados']] == [2]
+    assert plan['movidos'] == []
+    assert plan['sin_cambios'] == 2  # el jugado queda aunque la pareja no exista
+
+
+def test_zona_nueva_ocupa_huecos():
+    partidos = [partido(1, 1, 2, "09:00"), partido(2, 3, 4)]
+    plan = planificar(partidos, JUGADORES, {}, SLOTS, [1])
+    [(movido, motivo, nuevo)] = plan['movidos']
+    assert movido.id == 2 and motivo == MOTIVO_SIN_HORARIO
+    assert nuevo == (datetime(2026, 3, 7, 10, 10), 1)
+
+
+def test_jugados_no_se_mueven():
+    partidos = [partido(1, 1, 2, "09:00", jugado=True), partido(2, 3, 4, "09:00")]
+    plan = planificar(partidos, JUGADORES, {}, SLOTS, [1])
+    [(movido, _, _)] = plan['movidos']
+    assert movido.id == 2
+
+
+def test_cambio_de_una_pareja_en_torneo_grande():
+    """200 parejas: cambia una restricción, se mueven pocos partidos y en < 1s"""
+    categorias, jugadores, disponibilidad = generar_torneo(num_parejas=200, num_categorias=8, seed=5)
+    slots = generar_slots(date(2026, 3, 5), 4)
+    cancha_ids = list(range(1, 13))
+    resultado = generar_torneo_completo(asignar_indexado, categorias, jugadores, disponibilidad, slots, cancha_ids)
+
+    partidos = []
+    for i, (p1, p2, asignado) in enumerate(resultado):
+        fecha_hora = cancha = None
+        if asignado:
+            fecha, hora, cancha = asignado
+            fecha_hora = datetime.strptime(f"{fecha} {hora}", '%Y-%m-%d %H:%M')
+        partidos.append(PartidoActual(i + 1, 1, p1, p2, fecha_hora, cancha, False))
+
+    restricciones = {pid: d['restricciones_por_dia'] for pid, d in disponibilidad.items()}
+    # La pareja 1 ya no puede el primer día
+    pareja = 1
+    restricciones[pareja] = dict(restricciones[pareja], jueves=[(0, 24 * 60)])
+
+    inicio = time.perf_counter()
+    plan = planificar(partidos, jugadores, restricciones, slots, cancha_ids, parejas_afectadas=[pareja])
+    duracion = time.perf_counter() - inicio
+
+    movidos = [m for m, motivo, _ in plan['movidos'] if motivo != MOTIVO_SIN_HORARIO]
+    print(f"{len(partidos)} partidos, {len(movidos)} movidos, {duracion * 1000:.1f} ms")
+    assert all(pareja in (m.pareja1_id, m.pareja2_id) for m in movidos)
+    assert duracion < 0.5
+
+
+if __name__ == "__main__":
+    test_sin_cambios_no_mueve_nada()
+    test_restriccion_nueva_mueve_solo_ese_partido()
+    test_choque_mueve_partido_de_pareja_afectada()
+    test_baja_de_pareja_elimina_sus_partidos()
+    test_zona_nueva_ocupa_huecos()
+    test_jugados_no_se_mueven()
+    test_cambio_de_una_pareja_en_torneo_grande()
+    print("✅ Reprogramación incremental mueve solo lo necesario")
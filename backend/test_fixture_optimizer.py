@@ -0,0 +1,167 @@
+"""
+Test del modo óptimo del fixture (FixtureOptimizer)
+- Nunca programa menos partidos que el greedy
+- Toda asignación respeta canchas, restricciones, descanso y partidos fijos
+- Encuentra el fixture completo en casos donde el greedy deja partidos afuera
+"""
+import sys
+import os
+import random
+from collections import defaultdict
+from datetime import date, datetime
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.fixture_scheduler import FixtureScheduler, pareja_disponible, hora_a_minutos
+from src.services.fixture_optimizer import FixtureOptimizer
+from test_fixture_scheduler import generar_torneo, generar_slots
+
+
+def asignar_categoria(partidos, disponibilidad, slots, cancha_ids, jugadores_por_pareja,
+                      existentes=(), optimo=False, max_iteraciones=2000, tiempo_limite=30):
+    """Greedy (y opcionalmente búsqueda local) de una categoría, sin DB"""
+    scheduler = FixtureScheduler(slots, cancha_ids)
+    for fecha_hora, cancha_id, p1, p2 in existentes:
+        scheduler.registrar_existente(fecha_hora, cancha_id, jugadores_por_pareja[p1] + jugadores_por_pareja[p2])
+
+    ordenados = sorted(partidos, key=lambda p: p['zona_id'])
+    jugadores, mascaras, asignaciones = [], [], []
+    for partido in ordenados:
+        p1, p2 = partido['pareja1_id'], partido['pareja2_id']
+        r1 = disponibilidad.get(p1, {}).get('restricciones_por_dia', {})
+        r2 = disponibilidad.get(p2, {}).get('restricciones_por_dia', {})
+        jugadores.append(jugadores_por_pareja[p1] + jugadores_por_pareja[p2])
+        mascaras.append(scheduler.mascara_restricciones(r1, p1) | scheduler.mascara_restricciones(r2, p2))
+        asignaciones.append(scheduler.asignar(jugadores[-1], r1, r2, p1, p2))
+
+    if optimo:
+        optimizer = FixtureOptimizer(scheduler, jugadores, mascaras, asignaciones)
+        asignaciones = optimizer.optimizar(tiempo_limite, max_iteraciones)
+
+    return [
+        (p['pareja1_id'], p['pareja2_id'],
+         (slots[a[0]][0], slots[a[0]][2], cancha_ids[a[1]]) if a else None)
+        for p, a in zip(ordenados, asignaciones)
+    ]
+
+
+def asignar_torneo(categorias, jugadores_por_pareja, disponibilidad, slots, cancha_ids, optimo=False, **opciones):
+    """Categoría por categoría, como generar_fixture_completo"""
+    existentes = []
+    total = []
+    for categoria_id in sorted(categorias):
+        resultado = asignar_categoria(
+            categorias[categoria_id], disponibilidad, slots, cancha_ids, jugadores_por_pareja,
+            existentes, optimo, **opciones
+        )
+        for p1, p2, asignado in resultado:
+            if asignado:
+                fecha, hora, cancha_id = asignado
+                existentes.append((datetime.strptime(f"{fecha} {hora}", '%Y-%m-%d %H:%M'), cancha_id, p1, p2))
+        total.extend(resultado)
+    return total
+
+
+def verificar(resultado, jugadores_por_pareja, disponibilidad, slots, descanso=180):
+    """Chequeo independiente de todas las reglas del fixture"""
+    dia_por_fecha = {fecha: dia for fecha, dia, _ in slots}
+    canchas_usadas = set()
+    agenda = defaultdict(list)
+    for p1, p2, asignado in resultado:
+        if not asignado:
+            continue
+        fecha, hora, cancha_id = asignado
+        assert (fecha, hora, cancha_id) not in canchas_usadas, f"Cancha repetida {asignado}"
+        canchas_usadas.add((fecha, hora, cancha_id))
+
+        for pareja_id in (p1, p2):
+            restricciones = disponibilidad.get(pareja_id, {}).get('restricciones_por_dia', {})
+            assert pareja_disponible(dia_por_fecha[fecha], hora_a_minutos(hora), restricciones), \
+                f"Pareja {pareja_id} restringida en {fecha} {hora}"
+
+        inicio = datetime.strptime(f"{fecha} {hora}", '%Y-%m-%d %H:%M')
+        # set: el generador puede repetir un jugador en ambas parejas
+        for jugador_id in set(jugadores_por_pareja[p1] + jugadores_por_pareja[p2]):
+            for otro in agenda[jugador_id]:
+                assert abs((inicio - otro).total_seconds()) / 60 >= descanso, \
+                    f"Jugador {jugador_id} sin descanso en {inicio}"
+            agenda[jugador_id].append(inicio)
+
+
+def programados(resultado):
+    return sum(1 for _, _, a in resultado if a)
+
+
+def test_caso_donde_greedy_falla():
+    """Un partido sin restricciones ocupa el único horario posible de otro"""
+    slots = [("2026-03-07", "sabado", "09:00"), ("2026-03-07", "sabado", "13:00")]
+    jugadores = {1: (1, 2), 2: (3, 4), 3: (5, 6), 4: (7, 8)}
+    disponibilidad = {
+        3: {'restricciones_por_dia': {'sabado': [(12 * 60, 23 * 60)]}},  # solo puede 09:00
+    }
+    partidos = [
+        {"zona_id": 1, "categoria_id": 1, "pareja1_id": 1, "pareja2_id": 2},
+        {"zona_id": 2, "categoria_id": 1, "pareja1_id": 3, "pareja2_id": 4},
+    ]
+
+    greedy = asignar_categoria(partidos, disponibilidad, slots, [1], jugadores)
+    optimo = asignar_categoria(partidos, disponibilidad, slots, [1], jugadores, optimo=True)
+
+    assert programados(greedy) == 1
+    assert programados(optimo) == 2
+    verificar(optimo, jugadores, disponibilidad, slots)
+
+
+def test_respeta_partidos_fijos():
+    """Los partidos de otras categorías nunca se mueven ni se pisan"""
+    slots = [("2026-03-07", "sabado", "09:00"), ("2026-03-07", "sabado", "13:00")]
+    jugadores = {1: (1, 2), 2: (3, 4), 3: (5, 6), 4: (7, 8)}
+    existentes = [(datetime(2026, 3, 7, 13, 0), 1, 3, 4)]  # pareja 3 ya juega 13:00
+    partidos = [
+        {"zona_id": 1, "categoria_id": 2, "pareja1_id": 1, "pareja2_id": 2},
+        {"zona_id": 2, "categoria_id": 2, "pareja1_id": 3, "pareja2_id": 4},
+    ]
+    resultado = asignar_categoria(partidos, {}, slots, [1], jugadores, existentes, optimo=True)
+
+    # Solo queda 09:00 con cancha libre y la pareja 3 no tiene descanso → un solo partido
+    assert programados(resultado) == 1
+    assert resultado[0][2] == ("2026-03-07", "09:00", 1)
+
+
+def test_nunca_peor_que_greedy():
+    """En torneos aleatorios el óptimo programa >= partidos y todos válidos"""
+    mejoras = 0
+    for seed in range(8):
+        rnd = random.Random(seed)
+        categorias, jugadores, disponibilidad = generar_torneo(
+            num_parejas=rnd.choice([40, 64]), num_categorias=4, tam_zona=4,
+            seed=seed, prob_restriccion=0.9
+        )
+        slots = generar_slots(date(2026, 3, 5), 2)
+        cancha_ids = list(range(1, rnd.choice([2, 3, 4]) + 1))
+
+        greedy = asignar_torneo(categorias, jugadores, disponibilidad, slots, cancha_ids)
+        optimo = asignar_torneo(categorias, jugadores, disponibilidad, slots, cancha_ids, optimo=True)
+
+        verificar(optimo, jugadores, disponibilidad, slots)
+        assert programados(optimo) >= programados(greedy), f"Empeora con seed {seed}"
+        mejoras += programados(optimo) > programados(greedy)
+
+    assert mejoras > 0
+
+
+def test_sin_iteraciones_devuelve_greedy():
+    """Con presupuesto cero la asignación es exactamente la del greedy"""
+    categorias, jugadores, disponibilidad = generar_torneo(num_parejas=40, num_categorias=2, seed=3)
+    slots = generar_slots(date(2026, 3, 5), 1)
+    partidos = categorias[1]
+    greedy = asignar_categoria(partidos, disponibilidad, slots, [1, 2], jugadores)
+    optimo = asignar_categoria(partidos, disponibilidad, slots, [1, 2], jugadores, optimo=True, max_iteraciones=0)
+    assert optimo == greedy
+
+
+if __name__ == "__main__":
+    test_caso_donde_greedy_falla()
+    test_respeta_partidos_fijos()
+    test_nunca_peor_que_greedy()
+    test_sin_iteraciones_devuelve_greedy()
+    print("✅ Modo óptimo válido y nunca peor que el greedy")
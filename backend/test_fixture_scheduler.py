@@ -0,0 +1,250 @@
+"""
+Test del motor indexado de asignación de fixture (FixtureScheduler)
+Compara contra el greedy original partido × slot sobre torneos sintéticos:
+la asignación debe ser idéntica (mismo slot y misma cancha para cada partido).
+"""
+import sys
+import os
+import random
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.fixture_scheduler import FixtureScheduler
+
+
+DIAS = ['lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo']
+
+
+# ============================================================
+# Generador de torneos sintéticos
+# ============================================================
+
+def generar_slots(fecha_inicio: date, dias: int, desde="09:00", hasta="23:00", paso=70):
+    """Misma grilla que TorneoFixtureGlobalService._generar_slots_torneo"""
+    slots = []
+    for d in range(dias):
+        fecha = fecha_inicio + timedelta(days=d)
+        hora = datetime.strptime(desde, '%H:%M')
+        limite = datetime.strptime(hasta, '%H:%M') - timedelta(minutes=paso)
+        while hora <= limite:
+            slots.append((fecha.strftime('%Y-%m-%d'), DIAS[fecha.weekday()], hora.strftime('%H:%M')))
+            hora += timedelta(minutes=paso)
+    return slots
+
+
+def generar_torneo(num_parejas=200, num_categorias=8, tam_zona=4, seed=1, prob_restriccion=0.6):
+    """
+    Devuelve (categorias, jugadores_por_pareja, disponibilidad)
+    categorias = {categoria_id: [partido_dict, ...]}
+    """
+    rnd = random.Random(seed)
+    jugadores_por_pareja = {}
+    disponibilidad = {}
+    categorias = defaultdict(list)
+    jugador_id = 1
+
+    parejas = list(range(1, num_parejas + 1))
+    for pareja_id in parejas:
+        # Algunos jugadores se repiten entre categorías (juegan dos categorías)
+        if jugador_id > 20 and rnd.random() < 0.1:
+            j1 = rnd.randint(1, jugador_id - 1)
+        else:
+            j1 = jugador_id
+            jugador_id += 1
+        jugadores_por_pareja[pareja_id] = (j1, jugador_id)
+        jugador_id += 1
+
+        restricciones = {}
+        if rnd.random() < prob_restriccion:
+            for dia in rnd.sample(['jueves', 'viernes', 'sabado', 'domingo'], rnd.randint(1, 3)):
+                inicio = rnd.choice([0, 8 * 60, 9 * 60, 12 * 60])
+                fin = inicio + rnd.choice([180, 360, 600, 720])
+                restricciones[dia] = [(inicio, min(fin, 23 * 60 + 59))]
+        disponibilidad[pareja_id] = {'restricciones_por_dia': restricciones}
+
+    por_categoria = num_parejas // num_categorias
+    zona_id = 1
+    for c in range(num_categorias):
+        parejas_cat = parejas[c * por_categoria:(c + 1) * por_categoria]
+        for z in range(0, len(parejas_cat), tam_zona):
+            zona = parejas_cat[z:z + tam_zona]
+            for i in range(len(zona)):
+                for j in range(i + 1, len(zona)):
+                    categorias[c + 1].append({
+                        "zona_id": zona_id,
+                        "zona_nombre": f"Zona {zona_id}",
+                        "categoria_id": c + 1,
+                        "pareja1_id": zona[i],
+                        "pareja2_id": zona[j],
+                    })
+            zona_id += 1
+
+    return dict(categorias), jugadores_por_pareja, disponibilidad
+
+
+# ============================================================
+# Implementación de referencia (greedy original)
+# ============================================================
+
+def _disponible_legacy(dia, hora_mins, datos):
+    restricciones_por_dia = datos.get('restricciones_por_dia', {})
+    if not restricciones_por_dia or dia not in restricciones_por_dia:
+        return True
+    for inicio_mins, fin_mins in restricciones_por_dia[dia]:
+        if hora_mins < fin_mins and hora_mins + 70 > inicio_mins:
+            return False
+    return True
+
+
+def asignar_legacy(partidos, disponibilidad, slots, cancha_ids, jugadores_por_pareja, existentes=()):
+    """Copia del loop original de _asignar_horarios_y_canchas sin DB"""
+    ocupacion_canchas = defaultdict(list)
+    partidos_por_jugador = defaultdict(list)
+
+    for fecha_hora, cancha_id, p1, p2 in existentes:
+        ocupacion_canchas[(fecha_hora.strftime('%Y-%m-%d'), fecha_hora.strftime('%H:%M'))].append(cancha_id)
+        for jugador_id in jugadores_por_pareja[p1] + jugadores_por_pareja[p2]:
+            partidos_por_jugador[jugador_id].append(fecha_hora)
+
+    resultado = []
+    for partido in sorted(partidos, key=lambda p: p['zona_id']):
+        jugadores = jugadores_por_pareja[partido['pareja1_id']] + jugadores_por_pareja[partido['pareja2_id']]
+        datos1 = disponibilidad.get(partido['pareja1_id'], {'restricciones_por_dia': {}})
+        datos2 = disponibilidad.get(partido['pareja2_id'], {'restricciones_por_dia': {}})
+
+        asignado = None
+        for fecha, dia, hora in slots:
+            hora_mins = int(hora.split(':')[0]) * 60 + int(hora.split(':')[1])
+            if not (_disponible_legacy(dia, hora_mins, datos1) and _disponible_legacy(dia, hora_mins, datos2)):
+                continue
+
+            fecha_hora_slot = datetime.strptime(f"{fecha} {hora}", '%Y-%m-%d %H:%M')
+            conflicto = False
+            for jugador_id in jugadores:
+                for existente in partidos_por_jugador[jugador_id]:
+                    if abs((fecha_hora_slot - existente).total_seconds() / 60) < 180:
+                        conflicto = True
+                        break
+                if conflicto:
+                    break
+            if conflicto:
+                continue
+
+            ocupadas = ocupacion_canchas[(fecha, hora)]
+            libre = next((c for c in cancha_ids if c not in ocupadas), None)
+            if libre is None:
+                continue
+
+            asignado = (fecha, hora, libre)
+            ocupacion_canchas[(fecha, hora)].append(libre)
+            for jugador_id in jugadores:
+                partidos_por_jugador[jugador_id].append(fecha_hora_slot)
+            break
+
+        resultado.append((partido['pareja1_id'], partido['pareja2_id'], asignado))
+    return resultado
+
+
+def asignar_indexado(partidos, disponibilidad, slots, cancha_ids, jugadores_por_pareja, existentes=()):
+    """Mismo contrato que asignar_legacy usando FixtureScheduler"""
+    scheduler = FixtureScheduler(slots, cancha_ids)
+    for fecha_hora, cancha_id, p1, p2 in existentes:
+        scheduler.registrar_existente(
+            fecha_hora, cancha_id, jugadores_por_pareja[p1] + jugadores_por_pareja[p2]
+        )
+
+    resultado = []
+    for partido in sorted(partidos, key=lambda p: p['zona_id']):
+        p1, p2 = partido['pareja1_id'], partido['pareja2_id']
+        asignacion = scheduler.asignar(
+            jugadores_por_pareja[p1] + jugadores_por_pareja[p2],
+            disponibilidad.get(p1, {}).get('restricciones_por_dia', {}),
+            disponibilidad.get(p2, {}).get('restricciones_por_dia', {}),
+            p1,
+            p2
+        )
+        asignado = None
+        if asignacion is not None:
+            fecha, _, hora = slots[asignacion[0]]
+            asignado = (fecha, hora, cancha_ids[asignacion[1]])
+        resultado.append((p1, p2, asignado))
+    return resultado
+
+
+def generar_torneo_completo(asignar, categorias, jugadores_por_pareja, disponibilidad, slots, cancha_ids):
+    """Simula generar_fixture_completo: categoría por categoría con partidos existentes"""
+    existentes = []
+    total = []
+    for categoria_id in sorted(categorias):
+        resultado = asignar(
+            categorias[categoria_id], disponibilidad, slots, cancha_ids, jugadores_por_pareja, existentes
+        )
+        for p1, p2, asignado in resultado:
+            if asignado:
+                fecha, hora, cancha_id = asignado
+                existentes.append((datetime.strptime(f"{fecha} {hora}", '%Y-%m-%d %H:%M'), cancha_id, p1, p2))
+        total.extend(resultado)
+    return total
+
+
+# ============================================================
+# Tests
+# ============================================================
+
+def test_equivalencia_torneos_aleatorios():
+    """La asignación indexada coincide con la original en torneos aleatorios"""
+    for seed in range(15):
+        rnd = random.Random(seed)
+        categorias, jugadores, disponibilidad = generar_torneo(
+            num_parejas=rnd.choice([24, 40, 64]),
+            num_categorias=rnd.choice([2, 4]),
+            tam_zona=rnd.choice([3, 4]),
+            seed=seed
+        )
+        slots = generar_slots(date(2026, 3, 5), rnd.choice([2, 3, 4]))
+        cancha_ids = list(range(10, 10 + rnd.choice([1, 2, 3, 6])))
+
+        esperado = generar_torneo_completo(asignar_legacy, categorias, jugadores, disponibilidad, slots, cancha_ids)
+        obtenido = generar_torneo_completo(asignar_indexado, categorias, jugadores, disponibilidad, slots, cancha_ids)
+        assert obtenido == esperado, f"Diferencia con seed {seed}"
+
+
+def test_existente_fuera_de_grilla_no_bloquea_cancha():
+    """Un partido existente fuera de la grilla solo cuenta para el descanso"""
+    slots = generar_slots(date(2026, 3, 6), 1)
+    scheduler = FixtureScheduler(slots, [1])
+    scheduler.registrar_existente(datetime(2026, 3, 6, 9, 5), 1, [100])
+
+    # Otro jugador puede usar la cancha 1 a las 09:00 (el existente empieza 09:05)
+    assert scheduler.asignar([200]) == (0, 0)
+    # El jugador 100 debe esperar 3 horas desde 09:05 → primer slot 12:30
+    indice_slot, _ = scheduler.asignar([100])
+    assert slots[indice_slot][2] == "12:30"
+
+
+def test_horario_repetido_comparte_ocupacion():
+    """Si la grilla repite un horario, ambas entradas comparten canchas"""
+    slots = [("2026-03-07", "sabado", "10:00"), ("2026-03-07", "sabado", "10:00"), ("2026-03-07", "sabado", "11:10")]
+    scheduler = FixtureScheduler(slots, [1])
+    assert scheduler.asignar([1]) == (0, 0)
+    assert scheduler.asignar([2]) == (2, 0)
+    assert scheduler.asignar([3]) is None
+
+
+def test_restricciones_bitset():
+    """El bitset de restricciones respeta el borde exacto de fin de restricción"""
+    slots = generar_slots(date(2026, 3, 6), 1)  # viernes 09:00, 10:10, 11:20...
+    scheduler = FixtureScheduler(slots, [1, 2])
+    restricciones = {'viernes': [(9 * 60, 10 * 60 + 10)]}
+    mascara = scheduler.mascara_restricciones(restricciones, clave=1)
+    assert mascara & 1  # 09:00 prohibido
+    assert not mascara & 2  # 10:10 empieza justo al terminar la restricción
+
+
+if __name__ == "__main__":
+    test_equivalencia_torneos_aleatorios()
+    test_existente_fuera_de_grilla_no_bloquea_cancha()
+    test_horario_repetido_comparte_ocupacion()
+    test_restricciones_bitset()
+    print("✅ FixtureScheduler equivalente al greedy original")
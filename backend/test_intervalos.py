@@ -0,0 +1,222 @@
+"""
+Test del índice de intervalos (intervalos.py)
+- detectar_solapamientos coincide con la comparación O(n²) contra todos
+- El descanso se controla por jugador aunque juegue en otra categoría
+- La duración del partido sale del torneo (reglas_json)
+- OcupacionTorneo responde lo mismo que el barrido completo
+- RegistroOcupacion construye una vez por torneo y aplica los cambios en el lugar
+"""
+import sys
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.intervalos import (
+    OcupacionTorneo, RegistroOcupacion, partido_intervalo, detectar_solapamientos,
+    duracion_partido_torneo, descanso_minimo_torneo,
+    CONFLICTO_CANCHA, CONFLICTO_PAREJA, CONFLICTO_DESCANSO
+)
+
+
+BASE = datetime(2026, 3, 7, 9, 0)
+
+
+def generar_partidos(n, num_parejas, num_canchas, seed=0):
+    rng = random.Random(seed)
+    # Algunos jugadores anotados en dos parejas (dos categorías)
+    jugadores = {pid: (2 * pid, 2 * pid + 1) for pid in range(1, num_parejas + 1)}
+    for pid in rng.sample(range(1, num_parejas + 1), num_parejas // 5):
+        otra = rng.randint(1, num_parejas)
+        jugadores[pid] = (jugadores[pid][0], jugadores[otra][1])
+    partidos = []
+    for i in range(n):
+        p1, p2 = rng.sample(range(1, num_parejas + 1), 2)
+        fecha_hora = BASE + timedelta(minutes=10 * rng.randint(0, 300))
+        partidos.append(partido_intervalo(i + 1, fecha_hora, rng.randint(1, num_canchas), p1, p2))
+    return partidos, jugadores
+
+
+def fuerza_bruta(partidos, jugadores, duracion, descanso):
+    """Referencia O(n²): compara cada par de partidos"""
+    resultado = set()
+    for i, x in enumerate(partidos):
+        for y in partidos[i + 1:]:
+            a, b = sorted((x, y), key=lambda p: (p.inicio, p.id))
+            diff = b.inicio - a.inicio
+            if a.cancha_id == b.cancha_id and diff < duracion:
+                resultado.add((CONFLICTO_CANCHA, a.id, b.id))
+            parejas = {a.pareja1_id, a.pareja2_id} & {b.pareja1_id, b.pareja2_id}
+            if parejas and diff < duracion:
+                resultado.add((CONFLICTO_PAREJA, a.id, b.id))
+            elif diff < descanso:
+                ja = set(jugadores[a.pareja1_id]) | set(jugadores[a.pareja2_id])
+                jb = set(jugadores[b.pareja1_id]) | set(jugadores[b.pareja2_id])
+                if ja & jb:
+                    resultado.add((CONFLICTO_DESCANSO, a.id, b.id))
+    return resultado
+
+
+def test_equivalente_a_fuerza_bruta():
+    for seed in range(5):
+        partidos, jugadores = generar_partidos(300, 60, 6, seed)
+        for duracion, descanso in ((70, 180), (90, 120), (50, 0)):
+            conflictos = detectar_solapamientos(partidos, jugadores, duracion, descanso)
+            obtenidos = {(c["tipo"], c["partido1"].id, c["partido2"].id) for c in conflictos}
+            assert obtenidos == fuerza_bruta(partidos, jugadores, duracion, descanso)
+            assert len(obtenidos) == len(conflictos)
+
+
+def test_descanso_entre_categorias():
+    # El jugador 7 juega en la pareja 1 (categoría A) y en la pareja 3 (categoría B)
+    jugadores = {1: (7, 8), 2: (9, 10), 3: (7, 11), 4: (12, 13)}
+    partidos = [
+        partido_intervalo(1, BASE, 1, 1, 2),
+        partido_intervalo(2, BASE + timedelta(minutes=120), 2, 3, 4),
+        partido_intervalo(3, BASE + timedelta(minutes=300), 2, 3, 4),
+    ]
+    [conflicto] = detectar_solapamientos(partidos, jugadores, 70, 180)
+    assert conflicto["tipo"] == CONFLICTO_DESCANSO
+    assert (conflicto["partido1"].id, conflicto["partido2"].id) == (1, 2)
+    assert conflicto["claves"] == [7]
+
+
+def test_duracion_del_torneo():
+    torneo = SimpleNamespace(reglas_json={"duracion_partido_minutos": 90})
+    assert duracion_partido_torneo(torneo) == 90
+    assert descanso_minimo_torneo(torneo) == 180
+    assert duracion_partido_torneo(SimpleNamespace(reglas_json=None)) == 70
+    assert duracion_partido_torneo(SimpleNamespace(reglas_json={"duracion_partido_minutos": "x"})) == 70
+
+    # Misma cancha con 80 minutos de diferencia: solapa solo si el partido dura 90
+    jugadores = {1: (1, 2), 2: (3, 4), 3: (5, 6), 4: (7, 8)}
+    partidos = [
+        partido_intervalo(1, BASE, 1, 1, 2),
+        partido_intervalo(2, BASE + timedelta(minutes=80), 1, 3, 4),
+    ]
+    assert detectar_solapamientos(partidos, jugadores, 70, 180) == []
+    [conflicto] = detectar_solapamientos(partidos, jugadores, 90, 180)
+    assert conflicto["tipo"] == CONFLICTO_CANCHA
+
+
+def test_ocupacion_igual_al_barrido():
+    partidos, jugadores = generar_partidos(400, 80, 8, seed=3)
+
+    def jugadores_de(p):
+        return jugadores[p.pareja1_id] + jugadores[p.pareja2_id]
+
+    ocupacion = OcupacionTorneo(70, 180)
+    for p in partidos:
+        ocupacion.agregar(p, jugadores_de(p))
+
+    completos = detectar_solapamientos(partidos, jugadores, 70, 180)
+    for p in partidos[:100]:
+        esperados = set()
+        for c in completos:
+            if p.id in (c["partido1"].id, c["partido2"].id):
+                otro = c["partido2"].id if c["partido1"].id == p.id else c["partido1"].id
+                tipo = CONFLICTO_CANCHA if c["tipo"] == CONFLICTO_CANCHA else CONFLICTO_DESCANSO
+                esperados.add((tipo, otro))
+        fecha_hora = datetime.fromordinal(int(p.inicio // 1440)) + timedelta(minutes=p.inicio % 1440)
+        obtenidos = ocupacion.conflictos(p.id, fecha_hora, p.cancha_id)
+        obtenidos = {(tipo, otro) for tipo, otro, _, _ in obtenidos}
+        # Un choque de cancha entre partidos con jugadores en común se informa una sola vez
+        assert {otro for _, otro in obtenidos} == {otro for _, otro in esperados}
+        assert {x for x in obtenidos if x[0] == CONFLICTO_CANCHA} == \
+            {x for x in esperados if x[0] == CONFLICTO_CANCHA}
+
+
+def test_ocupacion_mover_partido():
+    jugadores = {1: (1, 2), 2: (3, 4), 3: (5, 6), 4: (7, 8)}
+    ocupacion = OcupacionTorneo(70, 180)
+    p1 = partido_intervalo(1, BASE, 1, 1, 2)
+    p2 = partido_intervalo(2, BASE + timedelta(hours=2), 1, 3, 4)
+    ocupacion.agregar(p1, jugadores[1] + jugadores[2])
+    ocupacion.agregar(p2, jugadores[3] + jugadores[4])
+
+    # Mover el 2 a la misma hora y cancha que el 1
+    [(tipo, otro, _, diff)] = ocupacion.conflictos(2, BASE, 1)
+    assert (tipo, otro, diff) == (CONFLICTO_CANCHA, 1, 0)
+    assert ocupacion.conflictos(2, BASE, 2) == []
+
+    # Aplicar el cambio y volver a consultar
+    ocupacion.agregar(partido_intervalo(2, BASE, 2, 3, 4), jugadores[3] + jugadores[4])
+    assert ocupacion.conflictos(1, BASE, 2) != []
+    ocupacion.quitar(2)
+    assert ocupacion.conflictos(1, BASE, 2) == []
+    assert 2 not in ocupacion.partidos
+
+
+def test_registro_construye_una_vez():
+    partidos, jugadores = generar_partidos(2000, 300, 12, seed=7)
+    cargas = []
+
+    def construir():
+        cargas.append(1)
+        ocupacion = OcupacionTorneo(70, 180, jugadores)
+        for p in partidos:
+            ocupacion.agregar(p, ocupacion.jugadores_de(p.pareja1_id, p.pareja2_id))
+        return ocupacion
+
+    registro = RegistroOcupacion()
+    p = partidos[0]
+    destino = BASE + timedelta(days=30)
+
+    # Muchos arrastres seguidos: una sola carga y cada consulta es un bisect
+    inicio = time.perf_counter()
+    for i in range(1000):
+        _, conflictos = registro.conflictos(1, construir, p.id, destino + timedelta(minutes=10 * (i % 50)), 1)
+    por_consulta = (time.perf_counter() - inicio) / 1000
+    print(f"Consulta con índice cacheado: {por_consulta * 1e6:.1f} µs")
+    assert len(cargas) == 1
+    assert conflictos == []
+
+    # Mover el partido y que el siguiente vea el cambio sin recargar
+    registro.mover(1, p.id, destino, 1)
+    q = partidos[1]
+    _, conflictos = registro.conflictos(1, construir, q.id, destino, 1, q.pareja1_id, q.pareja2_id)
+    assert [(t, otro) for t, otro, _, _ in conflictos] == [(CONFLICTO_CANCHA, p.id)]
+    registro.mover(1, p.id, None, None)
+    _, conflictos = registro.conflictos(1, construir, q.id, destino, 1)
+    assert conflictos == []
+    assert len(cargas) == 1
+
+    # Partido sin horario previo: se pasan sus parejas
+    registro.mover(1, 99999, destino, 2, p.pareja1_id, p.pareja2_id)
+    _, conflictos = registro.conflictos(1, construir, q.id, destino, 2)
+    assert (CONFLICTO_CANCHA, 99999) in [(t, otro) for t, otro, _, _ in conflictos]
+
+    # Invalidar fuerza una nueva carga; mover sin torneo cacheado no hace nada
+    registro.invalidar(1)
+    registro.mover(1, p.id, destino, 1)
+    registro.conflictos(1, construir, q.id, destino, 1)
+    assert len(cargas) == 2
+
+    # Vencido el TTL se reconstruye
+    registro.ttl_segundos = 0
+    registro.invalidar()
+    registro.conflictos(1, construir, q.id, destino, 1)
+    registro.conflictos(1, construir, q.id, destino, 1)
+    assert len(cargas) == 4
+
+
+def test_rendimiento():
+    partidos, jugadores = generar_partidos(5000, 800, 16, seed=1)
+    inicio = time.perf_counter()
+    detectar_solapamientos(partidos, jugadores, 70, 180)
+    duracion = time.perf_counter() - inicio
+    print(f"{len(partidos)} partidos verificados en {duracion * 1000:.1f} ms")
+    assert duracion < 2.0
+
+
+if __name__ == "__main__":
+    test_equivalente_a_fuerza_bruta()
+    test_descanso_entre_categorias()
+    test_duracion_del_torneo()
+    test_ocupacion_igual_al_barrido()
+    test_ocupacion_mover_partido()
+    test_registro_construye_una_vez()
+    test_rendimiento()
+    print("✅ Índice de intervalos equivalente a la comparación contra todos")
@@ -0,0 +1,96 @@
+"""
+Test de las estadísticas agregadas por jugador (src/services/jugador_estadisticas.py)
+- Acumulado por escritura: partidos distintos, ganados, últimos deltas (más
+  reciente primero) y fecha del último partido
+- Sumar escritura por escritura con la regla del UPSERT (ON CONFLICT) da lo
+  mismo que reconstruir desde el historial completo
+- Tendencia según los últimos deltas
+"""
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.jugador_estadisticas import ULTIMOS, acumular, filas_upsert, tendencia
+
+INICIO = datetime(2025, 3, 1, 18, 0)
+
+
+def combinar(guardada, nueva):
+    """Misma regla que el ON CONFLICT DO UPDATE de JugadorEstadisticasService.registrar"""
+    if guardada is None:
+        return dict(nueva)
+    fechas = [f for f in (guardada['ultimo_partido'], nueva['ultimo_partido']) if f is not None]
+    return {
+        'partidos_jugados': guardada['partidos_jugados'] + nueva['partidos_jugados'],
+        'partidos_ganados': guardada['partidos_ganados'] + nueva['partidos_ganados'],
+        'ultimos_deltas': (nueva['ultimos_deltas'] + guardada['ultimos_deltas'])[:ULTIMOS],
+        'ultimo_partido': max(fechas) if fechas else None
+    }
+
+
+def test_acumular():
+    historial = [
+        {'id_usuario': 1, 'id_partido': 10, 'delta': 12},
+        {'id_usuario': 2, 'id_partido': 10, 'delta': -12},
+        {'id_usuario': 1, 'id_partido': 11, 'delta': -3},
+        {'id_usuario': 1, 'id_partido': 11, 'delta': -3},  # fila duplicada: un solo partido
+        {'id_usuario': 1, 'id_partido': 12, 'delta': 0},
+    ]
+    fechas = {10: INICIO, 11: INICIO + timedelta(days=2), 12: INICIO + timedelta(days=1)}
+    acumulado = acumular(historial, fechas)
+    assert acumulado[1] == {
+        'partidos_jugados': 3,
+        'partidos_ganados': 1,
+        'ultimos_deltas': [0, -3, -3, 12],
+        'ultimo_partido': INICIO + timedelta(days=2)
+    }
+    assert acumulado[2]['ultimos_deltas'] == [-12] and acumulado[2]['partidos_ganados'] == 0
+    assert acumular(historial)[1]['ultimo_partido'] is None
+    assert [f['id_usuario'] for f in filas_upsert({5: acumulado[1], 2: acumulado[2]})] == [2, 5]
+    assert acumular([]) == {}
+
+    largo = [{'id_usuario': 1, 'id_partido': p, 'delta': p} for p in range(1, 9)]
+    assert acumular(largo)[1]['ultimos_deltas'] == [8, 7, 6, 5, 4][:ULTIMOS]
+
+
+def test_incremental_igual_a_reconstruir():
+    rnd = random.Random(3)
+    historial, fechas, escrituras = [], {}, []
+    id_partido = 0
+    for _ in range(300):
+        # Escrituras de 1 partido (amistoso) o de un lote (carga de planilla)
+        escritura = []
+        for _ in range(rnd.choice([1, 1, 1, 6])):
+            id_partido += 1
+            fechas[id_partido] = INICIO + timedelta(hours=id_partido)
+            for jugador in rnd.sample(range(1, 30), 4):
+                escritura.append({'id_usuario': jugador, 'id_partido': id_partido, 'delta': rnd.randint(-25, 25)})
+        escrituras.append(escritura)
+        historial.extend(escritura)
+
+    tabla = {}
+    for escritura in escrituras:
+        for fila in filas_upsert(acumular(escritura, fechas)):
+            id_usuario = fila.pop('id_usuario')
+            tabla[id_usuario] = combinar(tabla.get(id_usuario), fila)
+
+    assert tabla == acumular(historial, fechas)
+
+
+def test_tendencia():
+    assert tendencia(None) == "neutral"
+    assert tendencia([]) == "neutral"
+    assert tendencia([0, 0]) == "neutral"
+    assert tendencia([6, 5]) == "up"
+    assert tendencia([-20, 9]) == "down"
+    assert tendencia([10]) == "stable"
+    assert tendencia([-4, 2]) == "stable"
+
+
+if __name__ == "__main__":
+    test_acumular()
+    test_incremental_igual_a_reconstruir()
+    test_tendencia()
+    print("✅ Estadísticas de jugadores: incremental igual a reconstruir desde el historial")
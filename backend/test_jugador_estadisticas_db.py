@@ -0,0 +1,185 @@
+"""
+Test de jugador_estadisticas contra la base
+- Si falla el ELO de un resultado de torneo (ej. sin la migración de
+  jugador_estadisticas) se deshace solo el ELO: el resultado queda guardado,
+  sin historial ni ratings a medio aplicar (SQLite, no necesita Neon)
+- registrar escritura por escritura deja las mismas filas que reconstruir
+  desde el historial, con partidos en cualquier estado (Postgres: las
+  consultas usan INTEGER[] y ARRAY_AGG; se saltea sin DATABASE_URL)
+"""
+import sys
+import os
+import random
+import tempfile
+from datetime import date, datetime, timedelta
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+from sqlalchemy import create_engine, text, BigInteger
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from src.database.config import Base
+from src.models.driveplus_models import Categoria, HistorialRating, Partido, Usuario
+from src.models.torneo_models import (
+    Torneo, TorneoCategoria, TorneoZona, TorneoZonaPareja, TorneoPareja, TorneoCancha,
+    TorneoTablaPosiciones
+)
+from src.services.jugador_estadisticas_service import JugadorEstadisticasService
+from src.services.torneo_fixture_global_service import TorneoFixtureGlobalService
+from src.services.torneo_resultado_service import TorneoResultadoService
+
+# Sin jugador_estadisticas: como antes de correr la migración
+TABLAS = [
+    Usuario.__table__, Categoria.__table__, Torneo.__table__, TorneoCategoria.__table__,
+    TorneoZona.__table__, TorneoPareja.__table__, TorneoZonaPareja.__table__, TorneoCancha.__table__,
+    Partido.__table__, HistorialRating.__table__, TorneoTablaPosiciones.__table__,
+]
+RATING = 1200
+INICIO = datetime(2025, 3, 1, 18, 0)
+
+
+@compiles(BigInteger, "sqlite")
+def _bigint_sqlite(type_, compiler, **kw):
+    # SQLite solo autoincrementa "INTEGER PRIMARY KEY"
+    return "INTEGER"
+
+
+def crear_torneo_sqlite():
+    """Torneo en fase de grupos con una zona de 3 parejas y su fixture. Devuelve (sesion, torneo_id)"""
+    ruta = os.path.join(tempfile.mkdtemp(prefix="estadisticas_"), "test.sqlite")
+    engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(engine, tables=TABLAS)
+    sesion = sessionmaker(bind=engine)
+    db = sesion()
+
+    db.add(Usuario(id_usuario=1, nombre_usuario="organizador", email="org@test.com"))
+    torneo = Torneo(
+        nombre="Torneo test", categoria="libre", creado_por=1, estado="fase_grupos",
+        fecha_inicio=date(2026, 3, 6), fecha_fin=date(2026, 3, 8),
+        horarios_disponibles={"sabado": {"inicio": "09:00", "fin": "23:00"}}
+    )
+    db.add(torneo)
+    db.flush()
+    db.add(TorneoCancha(torneo_id=torneo.id, nombre="Cancha 1", activa=True))
+    categoria = TorneoCategoria(torneo_id=torneo.id, nombre="Libre", genero="masculino")
+    db.add(categoria)
+    db.flush()
+    zona = TorneoZona(torneo_id=torneo.id, categoria_id=categoria.id, nombre="Zona A", numero_orden=0)
+    db.add(zona)
+    db.flush()
+    for i in range(3):
+        jugadores = (2 + 2 * i, 3 + 2 * i)
+        for uid in jugadores:
+            db.add(Usuario(id_usuario=uid, nombre_usuario=f"jugador{uid}", email=f"j{uid}@test.com", rating=RATING))
+        pareja = TorneoPareja(
+            torneo_id=torneo.id, categoria_id=categoria.id,
+            jugador1_id=jugadores[0], jugador2_id=jugadores[1], estado="confirmada"
+        )
+        db.add(pareja)
+        db.flush()
+        db.add(TorneoZonaPareja(zona_id=zona.id, pareja_id=pareja.id))
+    db.commit()
+    torneo_id = torneo.id
+    TorneoFixtureGlobalService.generar_fixture_completo(db, torneo_id, 1)
+    db.close()
+    return sesion, torneo_id
+
+
+def test_elo_fallido_guarda_el_resultado():
+    sesion, torneo_id = crear_torneo_sqlite()
+    db = sesion()
+    partido_id = db.query(Partido.id_partido).filter(Partido.id_torneo == torneo_id).first()[0]
+    resultado = {"sets": [
+        {"gamesEquipoA": 6, "gamesEquipoB": 3, "ganador": "equipoA", "completado": True},
+        {"gamesEquipoA": 6, "gamesEquipoB": 4, "ganador": "equipoA", "completado": True},
+    ]}
+    TorneoResultadoService.cargar_resultado(db, partido_id, resultado, 1)
+    db.close()
+
+    db = sesion()
+    partido = db.get(Partido, partido_id)
+    assert partido.estado == 'confirmado' and partido.ganador_pareja_id == partido.pareja1_id
+    assert partido.elo_aplicado is False
+    # Lo anterior al SAVEPOINT queda; el ELO se deshace entero
+    assert db.query(TorneoTablaPosiciones).filter(TorneoTablaPosiciones.zona_id == partido.zona_id).count() == 3
+    assert db.query(HistorialRating).count() == 0
+    assert {rating for (rating,) in db.query(Usuario.rating).filter(Usuario.id_usuario > 1)} == {RATING}
+
+
+def sesion_postgres():
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        pytest.skip("Sin DATABASE_URL: registrar/reconstruir usan SQL de Postgres")
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    try:
+        db = sessionmaker(bind=create_engine(url))()
+        db.execute(text("SELECT 1"))
+    except DBAPIError as e:
+        pytest.skip(f"Base Postgres no disponible: {e}")
+    return db
+
+
+def test_registrar_igual_a_reconstruir():
+    db = sesion_postgres()
+    try:
+        # Tablas temporales con los mismos nombres: tapan a las reales en esta
+        # conexión y se descartan con el rollback
+        db.execute(text("CREATE TEMP TABLE partidos (id_partido BIGINT PRIMARY KEY, fecha TIMESTAMPTZ, estado TEXT)"))
+        db.execute(text(
+            "CREATE TEMP TABLE historial_rating "
+            "(id_historial BIGSERIAL PRIMARY KEY, id_usuario BIGINT, id_partido BIGINT, delta INTEGER)"
+        ))
+        db.execute(text("""
+            CREATE TEMP TABLE jugador_estadisticas (
+                id_usuario BIGINT PRIMARY KEY,
+                partidos_jugados INTEGER NOT NULL DEFAULT 0,
+                partidos_ganados INTEGER NOT NULL DEFAULT 0,
+                ultimos_deltas INTEGER[] NOT NULL DEFAULT '{}',
+                ultimo_partido TIMESTAMPTZ,
+                actualizado_en TIMESTAMPTZ DEFAULT NOW()
+            )
+        """))
+
+        rnd = random.Random(7)
+        id_partido = 0
+        for _ in range(60):
+            # Escrituras de 1 partido (amistoso) o de un lote (planilla de torneo)
+            escritura, fechas = [], {}
+            for _ in range(rnd.choice([1, 1, 4])):
+                id_partido += 1
+                fechas[id_partido] = INICIO + timedelta(hours=id_partido)
+                db.execute(text("INSERT INTO partidos VALUES (:id, :fecha, :estado)"), {
+                    'id': id_partido, 'fecha': fechas[id_partido],
+                    'estado': rnd.choice(['confirmado', 'finalizado', 'pendiente'])
+                })
+                for jugador in rnd.sample(range(1, 12), 4):
+                    escritura.append({'id_usuario': jugador, 'id_partido': id_partido, 'delta': rnd.randint(-25, 25)})
+            db.execute(text(
+                "INSERT INTO historial_rating (id_usuario, id_partido, delta) VALUES (:id_usuario, :id_partido, :delta)"
+            ), escritura)
+            JugadorEstadisticasService.registrar(db, escritura, fechas)
+
+        consulta = text(
+            "SELECT id_usuario, partidos_jugados, partidos_ganados, ultimos_deltas, ultimo_partido "
+            "FROM jugador_estadisticas ORDER BY id_usuario"
+        )
+        registradas = [tuple(fila) for fila in db.execute(consulta)]
+        JugadorEstadisticasService.reconstruir(db)
+        reconstruidas = [tuple(fila) for fila in db.execute(consulta)]
+        assert registradas == reconstruidas
+        assert JugadorEstadisticasService.reconciliar(db, aplicar=False)['filas_corregidas'] == 0
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    test_elo_fallido_guarda_el_resultado()
+    if os.getenv("DATABASE_URL"):
+        test_registrar_igual_a_reconstruir()
+    else:
+        print("   Sin DATABASE_URL: se saltea registrar vs reconstruir (Postgres)")
+    print("✅ Estadísticas de jugadores: el ELO fallido no pierde el resultado")
@@ -0,0 +1,233 @@
+"""
+Test de los contadores de partidos de zona pendientes
+(src/services/torneo_pendientes_service.py) y de la generación diferida
+de playoffs (TorneoResultadoService._verificar_auto_playoffs)
+- descontar sobre un contador NULL lo cuenta desde los partidos; después descuenta
+- Regenerar el fixture o mover una pareja de zona vuelve los contadores a NULL
+- por_categoria suma las zonas de cada categoría
+- Con todo en 0 se encola un solo trabajo de playoffs (misma clave activa),
+  aun con dos llamadas a la vez, y no se genera nada en la request
+
+Usa SQLite (no necesita la base de Neon).
+"""
+import sys
+import os
+import tempfile
+import threading
+from datetime import date
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy import create_engine, BigInteger
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from src.database.config import Base
+from src.models.driveplus_models import Usuario, Partido
+from src.models.torneo_models import (
+    Torneo, TorneoCategoria, TorneoZona, TorneoZonaPareja, TorneoPareja, TorneoCancha,
+    TorneoTablaPosiciones
+)
+from src.services import trabajos as modulo_trabajos
+from src.services.bracket import FASES_PLAYOFF
+from src.services.torneo_fixture_global_service import TorneoFixtureGlobalService
+from src.services.torneo_pendientes_service import TorneoPendientesService
+from src.services.torneo_resultado_service import TorneoResultadoService
+from src.services.torneo_zona_service import TorneoZonaService
+from src.services.trabajos import ESTADO_PENDIENTE, GestorTrabajos
+
+TABLAS = [
+    Usuario.__table__, Torneo.__table__, TorneoCategoria.__table__, TorneoZona.__table__,
+    TorneoPareja.__table__, TorneoZonaPareja.__table__, TorneoCancha.__table__, Partido.__table__,
+    TorneoTablaPosiciones.__table__,
+]
+
+
+@compiles(BigInteger, "sqlite")
+def _bigint_sqlite(type_, compiler, **kw):
+    # SQLite solo autoincrementa "INTEGER PRIMARY KEY"
+    return "INTEGER"
+
+
+def crear_torneo():
+    """
+    Torneo en fase de grupos con fixture generado: categoría A con dos zonas
+    de 3 parejas y categoría B con una. Devuelve (sesion, torneo_id, {categoria: [zona_id]})
+    """
+    ruta = os.path.join(tempfile.mkdtemp(prefix="pendientes_"), "test.sqlite")
+    engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(engine, tables=TABLAS)
+    sesion = sessionmaker(bind=engine)
+    db = sesion()
+
+    db.add(Usuario(id_usuario=1, nombre_usuario="organizador", email="org@test.com"))
+    torneo = Torneo(
+        nombre="Torneo test", categoria="libre", creado_por=1, estado="fase_grupos",
+        fecha_inicio=date(2026, 3, 6), fecha_fin=date(2026, 3, 8),
+        horarios_disponibles={"viernes": {"inicio": "15:00", "fin": "23:00"},
+                              "sabado": {"inicio": "09:00", "fin": "23:00"},
+                              "domingo": {"inicio": "09:00", "fin": "20:00"}}
+    )
+    db.add(torneo)
+    db.flush()
+    for c in range(2):
+        db.add(TorneoCancha(torneo_id=torneo.id, nombre=f"Cancha {c + 1}", activa=True))
+
+    zonas = {}
+    usuario_id = 2
+    for nombre, num_zonas in (("A", 2), ("B", 1)):
+        categoria = TorneoCategoria(torneo_id=torneo.id, nombre=nombre, genero="masculino")
+        db.add(categoria)
+        db.flush()
+        zonas[nombre] = []
+        for z in range(num_zonas):
+            zona = TorneoZona(torneo_id=torneo.id, categoria_id=categoria.id, nombre=f"Zona {z}", numero_orden=z)
+            db.add(zona)
+            db.flush()
+            zonas[nombre].append(zona.id)
+            for _ in range(3):
+                for uid in (usuario_id, usuario_id + 1):
+                    db.add(Usuario(id_usuario=uid, nombre_usuario=f"jugador{uid}", email=f"j{uid}@test.com"))
+                pareja = TorneoPareja(
+                    torneo_id=torneo.id, categoria_id=categoria.id,
+                    jugador1_id=usuario_id, jugador2_id=usuario_id + 1, estado="confirmada"
+                )
+                db.add(pareja)
+                db.flush()
+                db.add(TorneoZonaPareja(zona_id=zona.id, pareja_id=pareja.id))
+                usuario_id += 2
+    db.commit()
+    torneo_id = torneo.id
+    TorneoFixtureGlobalService.generar_fixture_completo(db, torneo_id, 1)
+    db.close()
+    return sesion, torneo_id, zonas
+
+
+def contadores(db, zona_ids):
+    db.expire_all()
+    return [db.get(TorneoZona, zona_id).partidos_pendientes for zona_id in zona_ids]
+
+
+def confirmar(db, partido):
+    partido.estado = 'confirmado'
+    partido.ganador_pareja_id = partido.pareja1_id
+    return TorneoPendientesService.descontar(db, partido)
+
+
+def test_descontar():
+    sesion, _, zonas = crear_torneo()
+    db = sesion()
+    zona_id = zonas["A"][0]
+    assert contadores(db, [zona_id]) == [None]
+    partidos = db.query(Partido).filter(Partido.zona_id == zona_id).order_by(Partido.id_partido).all()
+    assert len(partidos) == 3
+
+    # Sin contador: se cuenta desde los partidos, con el recién confirmado incluido
+    assert confirmar(db, partidos[0]) == 2
+    db.commit()
+    assert contadores(db, [zona_id]) == [2]
+
+    # Con contador: UPDATE ... - 1
+    partido = db.get(Partido, partidos[1].id_partido)
+    assert confirmar(db, partido) == 1
+    db.commit()
+    assert contadores(db, [zona_id]) == [1]
+    assert contadores(db, [zonas["A"][1]]) == [None]  # las otras zonas no se tocan
+
+
+def test_invalidar_al_regenerar_y_mover():
+    sesion, torneo_id, zonas = crear_torneo()
+    db = sesion()
+    todas = zonas["A"] + zonas["B"]
+    TorneoPendientesService.por_categoria(db, torneo_id)
+    db.commit()
+    assert contadores(db, todas) == [3, 3, 3]
+
+    TorneoFixtureGlobalService.generar_fixture_completo(db, torneo_id, 1)
+    assert contadores(db, todas) == [None, None, None]
+
+    TorneoPendientesService.por_categoria(db, torneo_id)
+    db.commit()
+    pareja_id = db.query(TorneoZonaPareja.pareja_id).filter(TorneoZonaPareja.zona_id == zonas["A"][0]).first()[0]
+    TorneoZonaService.mover_pareja_entre_zonas(db, pareja_id, zonas["A"][1], 1)
+    assert contadores(db, todas) == [None, None, 3]
+
+
+def test_por_categoria():
+    sesion, torneo_id, zonas = crear_torneo()
+    db = sesion()
+    categoria_a = db.get(TorneoZona, zonas["A"][0]).categoria_id
+    categoria_b = db.get(TorneoZona, zonas["B"][0]).categoria_id
+
+    # Zona A0 con contador, A1 y B sin calcular
+    partido = db.query(Partido).filter(Partido.zona_id == zonas["A"][0]).first()
+    confirmar(db, partido)
+    db.commit()
+    assert TorneoPendientesService.por_categoria(db, torneo_id) == {categoria_a: 2 + 3, categoria_b: 3}
+    db.commit()
+    assert contadores(db, zonas["A"] + zonas["B"]) == [2, 3, 3]
+
+
+def test_auto_playoffs_encolados_una_vez():
+    sesion, torneo_id, _ = crear_torneo()
+    db = sesion()
+    partidos = db.query(Partido).filter(Partido.id_torneo == torneo_id, Partido.fase == 'zona').all()
+
+    # Un trabajo ocupa el único worker: el de playoffs queda pendiente sin correr
+    gestor = GestorTrabajos(max_workers=1)
+    liberar = threading.Event()
+    gestor.encolar('otro', lambda db_trabajo, progreso: liberar.wait(5))
+    encolados = []
+    encolar = gestor.encolar
+
+    def registrar(tipo, funcion, **kwargs):
+        encolados.append((tipo, kwargs['clave_activa']))
+        return encolar(tipo, funcion, **kwargs)
+
+    gestor.encolar = registrar
+
+    anterior = modulo_trabajos.trabajos
+    modulo_trabajos.trabajos = gestor
+    try:
+        # Falta un partido: no se encola nada
+        for partido in partidos[:-1]:
+            confirmar(db, partido)
+        db.commit()
+        assert not TorneoResultadoService._verificar_auto_playoffs(db, torneo_id)
+        assert encolados == []
+
+        confirmar(db, partidos[-1])
+        db.commit()
+        empezar = threading.Barrier(2)
+        resultados = []
+
+        def verificar():
+            db_request = sesion()
+            empezar.wait()
+            resultados.append(TorneoResultadoService._verificar_auto_playoffs(db_request, torneo_id))
+            db_request.close()
+
+        hilos = [threading.Thread(target=verificar) for _ in range(2)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join(30)
+    finally:
+        modulo_trabajos.trabajos = anterior
+        gestor.apagar()
+        liberar.set()
+
+    assert resultados == [True, True]
+    assert len(encolados) == 2 and len(set(encolados)) == 1
+    assert encolados[0] == ('playoffs', f"playoffs:{torneo_id}:categoria_id=None:clasificados_por_zona=2")
+    playoffs = [t for t in gestor.listar(torneo_id=torneo_id) if t.tipo == 'playoffs']
+    assert len(playoffs) == 1 and playoffs[0].estado == ESTADO_PENDIENTE
+    # Nada se generó dentro de la request
+    assert db.query(Partido).filter(Partido.id_torneo == torneo_id, Partido.fase.in_(FASES_PLAYOFF)).count() == 0
+
+
+if __name__ == "__main__":
+    test_descontar()
+    test_invalidar_al_regenerar_y_mover()
+    test_por_categoria()
+    test_auto_playoffs_encolados_una_vez()
+    print("✅ Pendientes de zona: contadores por zona y playoffs encolados una sola vez")
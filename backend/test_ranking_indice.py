@@ -0,0 +1,146 @@
+"""
+Test del índice de ranking en memoria (src/services/ranking_indice.py)
+- Posición, páginas y vecinos iguales a ordenar la lista completa
+  (rating desc, id asc) después de miles de cambios al azar
+- Ratings fuera del rango inicial (el árbol crece)
+- Vistas por sexo y categoría; cambios de categoría mueven al jugador
+- Cambios que llegan mientras se carga el índice no se pierden
+- 100k jugadores: posición y página en microsegundos
+"""
+import sys
+import os
+import random
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.ranking_indice import TODOS, OrdenRating, RankingIndice, vista
+
+
+def ordenados(ratings):
+    return sorted(ratings.items(), key=lambda item: (-item[1], item[0]))
+
+
+def verificar(orden, ratings, rnd):
+    esperado = ordenados(ratings)
+    assert len(orden) == len(esperado)
+    for i, (id_usuario, _) in enumerate(esperado):
+        assert orden.posicion(id_usuario) == i + 1, (id_usuario, orden.posicion(id_usuario), i + 1)
+    for _ in range(20):
+        offset, limit = rnd.randint(0, len(esperado) + 3), rnd.randint(1, 40)
+        assert orden.pagina(offset, limit) == [
+            (offset + i + 1, id_usuario, rating) for i, (id_usuario, rating) in enumerate(esperado[offset:offset + limit])
+        ]
+    if esperado:
+        id_usuario = rnd.choice(esperado)[0]
+        posicion = orden.posicion(id_usuario)
+        vecinos = orden.vecinos(id_usuario, 3)
+        assert [fila[0] for fila in vecinos] == list(range(max(posicion - 3, 1), min(posicion + 3, len(esperado)) + 1))
+
+
+def test_orden_contra_fuerza_bruta():
+    rnd = random.Random(11)
+    orden = OrdenRating(tamano=64)  # chico a propósito: obliga a crecer
+    ratings = {}
+    for paso in range(4000):
+        id_usuario = rnd.randint(1, 300)
+        if rnd.random() < 0.15:
+            orden.quitar(id_usuario)
+            ratings.pop(id_usuario, None)
+        else:
+            rating = rnd.choice([rnd.randint(900, 1100), rnd.randint(-50, 5000), 1000])
+            orden.agregar(id_usuario, rating)
+            ratings[id_usuario] = rating
+        if paso % 400 == 0:
+            verificar(orden, ratings, rnd)
+    verificar(orden, ratings, rnd)
+    assert orden.posicion(10_000) is None and orden.vecinos(10_000, 2) == []
+    assert orden.pagina(0, 0) == []
+
+
+def test_vistas():
+    indice = RankingIndice()
+    indice.cargar(lambda: [
+        (1, 1500, 'M', 3), (2, 1400, 'masculino', 3), (3, 1450, 'F', 7),
+        (4, 1450, 'femenino', None), (5, None, 'M', 3), (6, 1000, None, None)
+    ])
+    assert indice.total(TODOS) == 5
+    assert indice.pagina(vista(), 0, 10) == [(1, 1, 1500), (2, 3, 1450), (3, 4, 1450), (4, 2, 1400), (5, 6, 1000)]
+    assert [f[1] for f in indice.pagina(vista('masculino'), 0, 10)] == [1, 2]
+    assert [f[1] for f in indice.pagina(vista('F'), 0, 10)] == [3, 4]
+    assert indice.posicion(2, vista(categoria=3)) == 2
+    assert vista('M', 3) == vista(categoria=3)
+
+    # Sube de rating y cambia de categoría (como lo aplica el after_commit)
+    indice.actualizar_parcial(2, rating=1600, id_categoria=4)
+    assert indice.posicion(2) == 1 and indice.posicion(2, vista('M')) == 1
+    assert indice.posicion(2, vista(categoria=3)) is None
+    assert indice.pagina(vista(categoria=4), 0, 5) == [(1, 2, 1600)]
+    assert indice.jugador(2) == (1600, 'masculino', 4)
+
+    # Usuario nuevo y usuario borrado
+    indice.actualizar_parcial(9, rating=1000, sexo='F', id_categoria=None)
+    assert indice.posicion(9, vista('F')) == 3
+    indice.actualizar_parcial(1, rating=None)
+    assert indice.posicion(1) is None and indice.total() == 5
+    assert indice.stats()['jugadores'] == 5
+
+
+def test_cambios_durante_la_carga():
+    indice = RankingIndice()
+    indice.cargar(lambda: [(1, 1000, 'M', None), (2, 1100, 'M', None)])
+
+    def leer():
+        # Commit de otra sesión mientras se lee la base (la lectura ya no lo ve)
+        indice.actualizar_parcial(1, rating=1300)
+        indice.actualizar(3, 1200, 'F', None)
+        return [(1, 1000, 'M', None), (2, 1100, 'M', None), (4, 900, 'F', None)]
+
+    assert indice.cargar(leer) == 4
+    assert indice.pagina(TODOS, 0, 10) == [(1, 1, 1300), (2, 3, 1200), (3, 2, 1100), (4, 4, 900)]
+    assert indice.vigente(60)
+    indice.vencer()
+    assert not indice.vigente(60) and indice.cargado
+
+
+def test_rendimiento():
+    rnd = random.Random(5)
+    cantidad = 100_000
+    filas = [(i, int(rnd.gauss(1200, 250)), rnd.choice('MF'), rnd.randint(1, 16)) for i in range(1, cantidad + 1)]
+    indice = RankingIndice()
+
+    inicio = time.perf_counter()
+    indice.cargar(lambda: filas)
+    t_carga = time.perf_counter() - inicio
+
+    consultas = 20_000
+    ids = [rnd.randint(1, cantidad) for _ in range(consultas)]
+    inicio = time.perf_counter()
+    for id_usuario in ids:
+        indice.posicion(id_usuario, vista('M'))
+    t_posicion = (time.perf_counter() - inicio) / consultas
+
+    inicio = time.perf_counter()
+    for id_usuario in ids[:2000]:
+        indice.pagina(TODOS, id_usuario % (cantidad - 50), 50)
+    t_pagina = (time.perf_counter() - inicio) / 2000
+
+    inicio = time.perf_counter()
+    for id_usuario in ids[:5000]:
+        indice.actualizar_parcial(id_usuario, rating=rnd.randint(600, 2200))
+    t_cambio = (time.perf_counter() - inicio) / 5000
+
+    verificar_en = ordenados({i: indice.jugador(i)[0] for i in range(1, cantidad + 1)})
+    assert indice.pagina(TODOS, 50_000, 3) == [
+        (50_001 + i, id_usuario, rating) for i, (id_usuario, rating) in enumerate(verificar_en[50_000:50_003])
+    ]
+    print(f"   {cantidad} jugadores: carga {t_carga:.2f} s, posición {t_posicion * 1e6:.1f} µs, "
+          f"página de 50 {t_pagina * 1e6:.0f} µs, cambio de rating {t_cambio * 1e6:.1f} µs")
+    assert t_posicion < 1e-3 and t_pagina < 5e-3
+
+
+if __name__ == "__main__":
+    test_orden_contra_fuerza_bruta()
+    test_vistas()
+    test_cambios_durante_la_carga()
+    test_rendimiento()
+    print("✅ Índice de ranking: posición, páginas y vecinos en O(log n), iguales al orden completo")
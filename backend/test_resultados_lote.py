@@ -0,0 +1,157 @@
+"""
+Test de la carga de resultados en lote (src/services/resultados_lote.py)
+- Lectura de JSON y CSV (encabezado, separador ';', sets en varios formatos)
+- Validación con PadelValidator y errores por fila sin frenar el lote
+- Orden cronológico y ELO en memoria: igual a cargar los partidos de a uno
+- Rendimiento del cálculo en memoria para una planilla de 500 partidos
+"""
+import sys
+import os
+import time
+from datetime import datetime, timedelta, timezone
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.elo_service import EloService
+from src.services.resultados_lote import (
+    MAX_FILAS, EstadoElo, entrada_elo, leer_csv, leer_json, orden_cronologico, resultado_padel
+)
+
+
+def test_leer_json():
+    filas = leer_json({"resultados": [
+        {"partido_id": 10, "sets": ["6-3", "4-6", "6-2"]},
+        {"partido_id": "11", "sets": [[6, 1], {"gamesEquipoA": 6, "gamesEquipoB": 2}]},
+        {"partido_id": 12, "sets": "7-5 7-6"},
+        {"partido_id": 13, "sets": ["6-3", "6-8"]},
+        {"partido_id": 10, "sets": ["6-0", "6-0"]},
+        {"partido_id": "x", "sets": ["6-0", "6-0"]},
+        "basura",
+    ]})
+    assert [f.fila for f in filas] == [1, 2, 3, 4, 5, 6, 7]
+    assert [f.valida for f in filas] == [True, True, True, False, False, False, False]
+    assert filas[0].resultado['sets'][1] == {
+        'gamesEquipoA': 4, 'gamesEquipoB': 6, 'ganador': 'equipoB', 'completado': True
+    }
+    assert filas[1].partido_id == 11 and len(filas[1].resultado['sets']) == 2
+    assert filas[4].errores == ["Partido repetido en el lote"]
+    assert filas[5].partido_id is None
+
+    try:
+        leer_json({"otra": 1})
+        assert False
+    except ValueError:
+        pass
+
+
+def test_leer_csv():
+    filas = leer_csv("partido_id;set1;set2;set3\n20;6-3;6-4;\n\n21;3-6;6-4;7-5\n22;6-3;6-4;6-1\n")
+    assert [(f.fila, f.partido_id, f.valida) for f in filas] == [(1, 20, True), (2, 21, True), (3, 22, False)]
+    assert filas[1].resultado['sets'][2]['ganador'] == 'equipoA'
+    assert filas[2].errores == ["El partido se definió en 2 sets: sobra el tercero"]
+
+    sin_encabezado = leer_csv("30,6-0,6-0\n31,6-0,0-6,6-4")
+    assert [f.partido_id for f in sin_encabezado] == [30, 31]
+
+    try:
+        leer_csv("\n".join(f"{i},6-0,6-0" for i in range(MAX_FILAS + 1)))
+        assert False
+    except ValueError:
+        pass
+
+
+def test_entrada_elo():
+    resultado, _ = resultado_padel([(6, 3), (4, 6), (6, 2)])
+    assert entrada_elo(resultado, [1, 2]) == {
+        'sets_a': 2, 'sets_b': 1, 'games_a': 16, 'games_b': 11,
+        'sets_detail': [{'games_a': 6, 'games_b': 3}, {'games_a': 4, 'games_b': 6}, {'games_a': 6, 'games_b': 2}]
+    }
+    # Con 'jugadores' que ponen a pareja1 en equipoB se invierte
+    invertido = dict(resultado, jugadores={'equipoA': [{'id': 3}, {'id': 4}]})
+    assert entrada_elo(invertido, [1, 2])['sets_a'] == 1
+    assert entrada_elo(invertido, [1, 2])['games_a'] == 11
+
+
+def test_orden_cronologico():
+    base = datetime(2026, 3, 7, 10, 0)
+    claves = [
+        orden_cronologico(None, base + timedelta(hours=5), 1),
+        orden_cronologico(base.replace(tzinfo=timezone.utc), base, 2),
+        orden_cronologico(None, None, 3),
+        orden_cronologico(base + timedelta(hours=1), base, 4),
+        orden_cronologico(base, base, 0),
+    ]
+    assert [c[2] for c in sorted(claves)] == [0, 2, 4, 1, 3]
+
+
+def _jugadores(cantidad):
+    return {jid: (1000 + (jid * 37) % 600, jid % 15) for jid in range(1, cantidad + 1)}
+
+
+def _partidos(cantidad, jugadores):
+    partidos = []
+    sets = [[(6, 3), (6, 4)], [(3, 6), (6, 4), (7, 5)], [(4, 6), (2, 6)], [(7, 6), (3, 6), (2, 6)]]
+    for i in range(cantidad):
+        ids = [(i * 7 + k * 11) % jugadores + 1 for k in range(4)]
+        if len(set(ids)) < 4:
+            ids = [1, 2, 3, 4]
+        resultado, errores = resultado_padel(sets[i % len(sets)])
+        assert not errores
+        partidos.append((ids[:2], ids[2:], resultado, datetime(2026, 3, 7) + timedelta(minutes=i)))
+    return partidos
+
+
+def test_elo_igual_a_carga_individual():
+    jugadores = _jugadores(40)
+    partidos = _partidos(120, jugadores=40)
+    service = EloService()
+
+    lote = EstadoElo(service, jugadores)
+    cambios_lote = [lote.aplicar(p1, p2, resultado, fecha) for p1, p2, resultado, fecha in partidos]
+
+    # De a uno, como hacía _aplicar_elo_torneo: releer rating/partidos antes de cada partido
+    rating = {jid: r for jid, (r, _) in jugadores.items()}
+    jugados = {jid: n for jid, (_, n) in jugadores.items()}
+    for (p1, p2, resultado, fecha), esperado in zip(partidos, cambios_lote):
+        def equipo(pareja):
+            return [{'id': j, 'id_usuario': j, 'rating': rating[j], 'partidos': jugados[j]} for j in pareja]
+        calculo = service.calculate_match_ratings(
+            team_a_players=equipo(p1), team_b_players=equipo(p2),
+            match_type='torneo', match_date=fecha, **entrada_elo(resultado, p1)
+        )
+        for pareja, clave in ((p1, 'team_a'), (p2, 'team_b')):
+            for jid, jugador in zip(pareja, calculo[clave]['players']):
+                nuevo = int(round(jugador['new_rating']))
+                assert esperado[jid]['anterior'] == rating[jid]
+                assert esperado[jid]['nuevo'] == nuevo
+                rating[jid] = nuevo
+                jugados[jid] += 1
+
+    assert lote.rating == rating and lote.partidos == jugados
+
+    try:
+        lote.aplicar([1, 2], [3, 999], partidos[0][2])
+        assert False
+    except ValueError:
+        pass
+
+
+def test_rendimiento():
+    jugadores = _jugadores(200)
+    partidos = _partidos(MAX_FILAS, jugadores=200)
+    inicio = time.perf_counter()
+    lote = EstadoElo(EloService(), jugadores)
+    for p1, p2, resultado, fecha in partidos:
+        lote.aplicar(p1, p2, resultado, fecha)
+    duracion = (time.perf_counter() - inicio) * 1000
+    print(f"   ELO en memoria para {MAX_FILAS} partidos: {duracion:.1f} ms")
+    assert duracion < 2000, duracion
+
+
+if __name__ == "__main__":
+    test_leer_json()
+    test_leer_csv()
+    test_entrada_elo()
+    test_orden_cronologico()
+    test_elo_igual_a_carga_individual()
+    test_rendimiento()
+    print("✅ Carga en lote: lectura JSON/CSV, errores por fila y ELO cronológico igual al individual")
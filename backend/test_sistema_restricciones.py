@@ -53,10 +53,15 @@ def test_sistema_restricciones():
                     return self
                 def first(self):
                     return ParejaTest(restricciones_test)
+                def all(self):
+                    # Las parejas se cargan todas en una query (ContextoFixture)
+                    return [ParejaTest(restricciones_test)]
             return MockQuery()
         return original_query(model)
     
     db.query = mock_query
+    original_expunge = db.expunge
+    db.expunge = lambda obj: None if isinstance(obj, ParejaTest) else original_expunge(obj)
     
     try:
         # Probar la función de obtener disponibilidad
@@ -99,6 +104,7 @@ def test_sistema_restricciones():
         
     finally:
         db.query = original_query
+        db.expunge = original_expunge
         db.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,167 @@
+"""
+Test de tablas de posiciones por aportes (tabla_posiciones.py)
+- calcular() + ordenar() da la misma tabla que obtener_tabla_posiciones original
+- Aplicar diferencias resultado por resultado (carga y corrección) termina
+  igual que recalcular la zona desde cero
+"""
+import sys
+import os
+import random
+import time
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.tabla_posiciones import (
+    CAMPOS, aporte_de_partido, calcular, diferencia, fila_vacia, ordenar
+)
+
+
+# ----------------------------------------------------------------------
+# Referencia: cálculo original de TorneoZonaService.obtener_tabla_posiciones
+# ----------------------------------------------------------------------
+
+def tabla_original(pareja_ids, partidos):
+    tabla = [dict(fila_vacia(), pareja_id=pid) for pid in pareja_ids]
+    for partido in partidos:
+        if partido.estado not in ('confirmado', 'finalizado'):
+            continue
+        pareja_a_id, pareja_b_id = partido.pareja1_id, partido.pareja2_id
+        if not pareja_a_id or not pareja_b_id:
+            continue
+        idx_a = next((i for i, p in enumerate(tabla) if p['pareja_id'] == pareja_a_id), None)
+        idx_b = next((i for i, p in enumerate(tabla) if p['pareja_id'] == pareja_b_id), None)
+        if idx_a is None or idx_b is None:
+            continue
+        tabla[idx_a]['partidos_jugados'] += 1
+        tabla[idx_b]['partidos_jugados'] += 1
+        if partido.resultado_padel:
+            sets_a = sets_b = games_a = games_b = 0
+            for set_data in partido.resultado_padel.get('sets', []):
+                if set_data.get('completado'):
+                    games_a += set_data.get('gamesEquipoA', 0)
+                    games_b += set_data.get('gamesEquipoB', 0)
+                    if set_data.get('ganador') == 'equipoA':
+                        sets_a += 1
+                    elif set_data.get('ganador') == 'equipoB':
+                        sets_b += 1
+            tabla[idx_a]['sets_ganados'] += sets_a
+            tabla[idx_a]['sets_perdidos'] += sets_b
+            tabla[idx_a]['games_ganados'] += games_a
+            tabla[idx_a]['games_perdidos'] += games_b
+            tabla[idx_b]['sets_ganados'] += sets_b
+            tabla[idx_b]['sets_perdidos'] += sets_a
+            tabla[idx_b]['games_ganados'] += games_b
+            tabla[idx_b]['games_perdidos'] += games_a
+            if partido.ganador_pareja_id == pareja_a_id:
+                tabla[idx_a]['partidos_ganados'] += 1
+                tabla[idx_a]['puntos'] += 3
+                tabla[idx_b]['partidos_perdidos'] += 1
+            elif partido.ganador_pareja_id == pareja_b_id:
+                tabla[idx_b]['partidos_ganados'] += 1
+                tabla[idx_b]['puntos'] += 3
+                tabla[idx_a]['partidos_perdidos'] += 1
+    tabla.sort(key=lambda x: (
+        -x['puntos'],
+        -(x['sets_ganados'] - x['sets_perdidos']),
+        -(x['games_ganados'] - x['games_perdidos'])
+    ))
+    for i, item in enumerate(tabla):
+        item['posicion'] = i + 1
+    return tabla
+
+
+def resultado_aleatorio(rng):
+    sets = []
+    for _ in range(rng.choice((2, 2, 3))):
+        a, b = rng.choice([(6, rng.randint(0, 4)), (rng.randint(0, 4), 6), (7, 5), (5, 7), (7, 6), (6, 7)])
+        sets.append({
+            'gamesEquipoA': a, 'gamesEquipoB': b,
+            'ganador': 'equipoA' if a > b else 'equipoB',
+            'completado': rng.random() < 0.95
+        })
+    return {'sets': sets}
+
+
+def nuevo_estado(rng, partido):
+    """Simula cargar/corregir: cambia estado, resultado y ganador"""
+    partido.estado = rng.choice(('confirmado', 'confirmado', 'finalizado', 'pendiente'))
+    partido.resultado_padel = resultado_aleatorio(rng) if rng.random() < 0.9 else None
+    partido.ganador_pareja_id = rng.choice((partido.pareja1_id, partido.pareja2_id, None))
+
+
+def generar_zona(rng, n):
+    parejas = list(range(100, 100 + n))
+    partidos = []
+    for i in range(n):
+        for j in range(i + 1, n):
+            partidos.append(SimpleNamespace(
+                pareja1_id=parejas[i], pareja2_id=parejas[j], estado='pendiente',
+                resultado_padel=None, ganador_pareja_id=None
+            ))
+    # Partido contra una pareja que ya no está en la zona: no cuenta
+    partidos.append(SimpleNamespace(
+        pareja1_id=parejas[0], pareja2_id=999, estado='confirmado',
+        resultado_padel=resultado_aleatorio(rng), ganador_pareja_id=999
+    ))
+    return parejas, partidos
+
+
+def sin_pareja_id(tabla):
+    return [{c: f[c] for c in CAMPOS + ('pareja_id', 'posicion')} for f in tabla]
+
+
+def tabla_nueva(parejas, partidos):
+    stats = calcular(parejas, partidos)
+    return ordenar([{'pareja_id': pid, **stats[pid]} for pid in parejas])
+
+
+def test_igual_al_original():
+    rng = random.Random(0)
+    for _ in range(200):
+        parejas, partidos = generar_zona(rng, rng.randint(2, 6))
+        for partido in partidos[:-1]:
+            if rng.random() < 0.7:
+                nuevo_estado(rng, partido)
+        assert sin_pareja_id(tabla_nueva(parejas, partidos)) == sin_pareja_id(tabla_original(parejas, partidos))
+
+
+def test_diferencias_igual_a_recalcular():
+    rng = random.Random(1)
+    for _ in range(100):
+        parejas, partidos = generar_zona(rng, rng.randint(3, 6))
+        en_zona = set(parejas)
+        materializada = calcular(parejas, partidos)
+        for _ in range(30):
+            partido = rng.choice(partidos[:-1])
+            antes = aporte_de_partido(partido)
+            nuevo_estado(rng, partido)
+            if partido.pareja1_id in en_zona and partido.pareja2_id in en_zona:
+                for pareja_id, deltas in diferencia(antes, aporte_de_partido(partido)).items():
+                    for campo, delta in deltas.items():
+                        materializada[pareja_id][campo] += delta
+            assert materializada == calcular(parejas, partidos)
+
+
+def test_rendimiento():
+    """Zona grande (tabla general de liga): recálculo original vs por aportes"""
+    rng = random.Random(2)
+    parejas, partidos = generar_zona(rng, 60)
+    for partido in partidos:
+        nuevo_estado(rng, partido)
+
+    inicio = time.perf_counter()
+    esperado = tabla_original(parejas, partidos)
+    t_original = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    obtenido = tabla_nueva(parejas, partidos)
+    t_nuevo = time.perf_counter() - inicio
+
+    print(f"{len(partidos)} partidos: original {t_original * 1000:.1f} ms, aportes {t_nuevo * 1000:.1f} ms")
+    assert sin_pareja_id(obtenido) == sin_pareja_id(esperado)
+
+
+if __name__ == "__main__":
+    test_igual_al_original()
+    test_diferencias_igual_a_recalcular()
+    test_rendimiento()
+    print("✅ Tablas de posiciones por aportes iguales al recálculo completo")
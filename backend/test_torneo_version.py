@@ -0,0 +1,103 @@
+"""
+Test del GET condicional por versión del torneo (services/torneo_version.py)
+- Cada commit que toca el torneo sube torneos.version
+- Un cambio commiteado por otro worker (otro engine, otro proceso) se ve
+  en la request siguiente: el ETag viejo ya no da 304
+
+Usa SQLite en un archivo (no necesita la base de Neon).
+"""
+import sys
+import os
+import tempfile
+from datetime import date
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi import Request, Response
+from sqlalchemy import create_engine, BigInteger
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from src.controllers.torneo_controller import _get_condicional
+from src.database.config import Base
+from src.models.driveplus_models import Usuario
+from src.models.torneo_models import Torneo, TorneoCancha
+from src.services.torneo_version import version_torneo
+
+TABLAS = [Usuario.__table__, Torneo.__table__, TorneoCancha.__table__]
+
+
+@compiles(BigInteger, "sqlite")
+def _bigint_sqlite(type_, compiler, **kw):
+    # SQLite solo autoincrementa "INTEGER PRIMARY KEY"
+    return "INTEGER"
+
+
+def crear_workers():
+    """Dos engines sobre la misma base, como dos workers. Devuelve (sesion_a, sesion_b, torneo_id)"""
+    ruta = os.path.join(tempfile.mkdtemp(prefix="version_"), "test.sqlite")
+    engine_a = create_engine(f"sqlite:///{ruta}")
+    engine_b = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(engine_a, tables=TABLAS)
+    sesion_a = sessionmaker(bind=engine_a)
+    db = sesion_a()
+    db.add(Usuario(id_usuario=1, nombre_usuario="organizador", email="org@test.com"))
+    torneo = Torneo(
+        nombre="Torneo test", categoria="libre", creado_por=1,
+        fecha_inicio=date(2026, 3, 6), fecha_fin=date(2026, 3, 8)
+    )
+    db.add(torneo)
+    db.commit()
+    torneo_id = torneo.id
+    db.close()
+    return sesion_a, sessionmaker(bind=engine_b), torneo_id
+
+
+def get(db, torneo_id, if_none_match=None):
+    """_get_condicional como en un endpoint: (304 o None, ETag)"""
+    cabeceras = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    response = Response()
+    resultado = _get_condicional(Request({"type": "http", "headers": cabeceras}), response, db, torneo_id)
+    if resultado is not None:
+        return resultado.status_code, resultado.headers["etag"]
+    return None, response.headers["etag"]
+
+
+def test_commit_sube_la_version():
+    sesion_a, _, torneo_id = crear_workers()
+    db = sesion_a()
+    version = version_torneo(db, torneo_id)[0]
+    db.add(TorneoCancha(torneo_id=torneo_id, nombre="Cancha 1", activa=True))
+    db.commit()
+    assert version_torneo(db, torneo_id)[0] == version + 1
+    db.commit()  # sin cambios: no sube
+    assert version_torneo(db, torneo_id)[0] == version + 1
+    assert version_torneo(db, torneo_id + 1) is None
+
+
+def test_cambio_de_otro_worker():
+    sesion_a, sesion_b, torneo_id = crear_workers()
+
+    db_a = sesion_a()
+    estado, etag = get(db_a, torneo_id)
+    assert estado is None
+    assert get(db_a, torneo_id, etag) == (304, etag)
+    db_a.close()
+
+    # Otro worker commitea un cambio del torneo
+    db_b = sesion_b()
+    db_b.add(TorneoCancha(torneo_id=torneo_id, nombre="Cancha 1", activa=True))
+    db_b.commit()
+    db_b.close()
+
+    # La request siguiente en este worker ya no responde 304 con el ETag viejo
+    db_a = sesion_a()
+    estado, etag_nuevo = get(db_a, torneo_id, etag)
+    assert estado is None and etag_nuevo != etag
+    assert get(db_a, torneo_id, etag_nuevo) == (304, etag_nuevo)
+    db_a.close()
+
+
+if __name__ == "__main__":
+    test_commit_sube_la_version()
+    test_cambio_de_otro_worker()
+    print("✅ Versión de torneo: el GET condicional ve enseguida los commits de otros workers")
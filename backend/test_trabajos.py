@@ -0,0 +1,139 @@
+"""
+Test del gestor de trabajos en segundo plano (services/trabajos.py)
+- Estados, progreso y resultado; ValueError => error 400
+- Idempotency-Key y clave activa devuelven el mismo trabajo (no se genera dos veces)
+- Sesión propia por trabajo: rollback si falla, siempre se cierra
+- Notificaciones desde el hilo worker y expiración por TTL
+"""
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.trabajos import (
+    GestorTrabajos, ESTADO_COMPLETADO, ESTADO_ERROR, ESTADO_EN_CURSO
+)
+
+
+class Sesion:
+    abiertas = 0
+
+    def __init__(self):
+        Sesion.abiertas += 1
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        Sesion.abiertas -= 1
+
+
+def test_ciclo_completo():
+    eventos = []
+    gestor = GestorTrabajos(max_workers=2, fabrica_sesion=Sesion, notificar=eventos.append)
+
+    def generar(db, progreso):
+        assert isinstance(db, Sesion)
+        for i in range(4):
+            progreso(25 * i, f"Categoría {i}")
+        return {"partidos_generados": 12}
+
+    trabajo, creado = gestor.encolar("fixture", generar, torneo_id=5, usuario_id=1)
+    assert creado
+    final = gestor.esperar(trabajo.id, timeout=5)
+    assert final.estado == ESTADO_COMPLETADO
+    assert final.resultado == {"partidos_generados": 12}
+    assert final.progreso == 100.0 and final.error is None
+    assert Sesion.abiertas == 0
+
+    estados = [e["estado"] for e in eventos]
+    assert estados[0] == "pendiente" and estados[-1] == ESTADO_COMPLETADO
+    assert [e["progreso"] for e in eventos if e["mensaje"]][:4] == [0, 25, 50, 75]
+    assert all("resultado" not in e for e in eventos)
+    gestor.apagar(esperar=True)
+
+
+def test_errores():
+    sesiones = []
+
+    def fabrica():
+        sesiones.append(Sesion())
+        return sesiones[-1]
+
+    gestor = GestorTrabajos(fabrica_sesion=fabrica)
+
+    def sin_permisos(db, progreso):
+        raise ValueError("No tienes permisos")
+
+    def rompe(db, progreso):
+        raise RuntimeError("boom")
+
+    a, _ = gestor.encolar("fixture", sin_permisos, torneo_id=1)
+    b, _ = gestor.encolar("playoffs", rompe, torneo_id=1)
+    a, b = gestor.esperar(a.id, 5), gestor.esperar(b.id, 5)
+    assert (a.estado, a.codigo_error, a.error) == (ESTADO_ERROR, 400, "No tienes permisos")
+    assert (b.estado, b.codigo_error) == (ESTADO_ERROR, 500)
+    assert all(s.rollbacks == 1 for s in sesiones) and Sesion.abiertas == 0
+    gestor.apagar(esperar=True)
+
+
+def test_idempotencia_y_clave_activa():
+    gestor = GestorTrabajos(max_workers=4)
+    liberar = threading.Event()
+    ejecuciones = []
+
+    def lento(db, progreso):
+        ejecuciones.append(1)
+        liberar.wait(5)
+        return "ok"
+
+    # Reintentos del cliente con el mismo Idempotency-Key
+    t1, creado1 = gestor.encolar("fixture", lento, torneo_id=7, clave_idempotencia="u1:fixture:abc")
+    t2, creado2 = gestor.encolar("fixture", lento, torneo_id=7, clave_idempotencia="u1:fixture:abc")
+    assert creado1 and not creado2 and t1 is t2
+
+    # Sin clave, pero mismo trabajo en curso
+    t3, _ = gestor.encolar("zonas", lento, torneo_id=7, clave_activa="zonas:7")
+    t4, creado4 = gestor.encolar("zonas", lento, torneo_id=7, clave_activa="zonas:7", clave_idempotencia="otra")
+    assert t3 is t4 and not creado4
+    assert gestor.obtener(t3.id).estado in ("pendiente", ESTADO_EN_CURSO)
+
+    liberar.set()
+    gestor.esperar(t1.id, 5)
+    gestor.esperar(t3.id, 5)
+    assert len(ejecuciones) == 2
+
+    # Terminado: la clave de idempotencia sigue devolviendo el mismo resultado...
+    t5, creado5 = gestor.encolar("fixture", lento, torneo_id=7, clave_idempotencia="u1:fixture:abc")
+    assert t5 is t1 and not creado5 and t5.resultado == "ok"
+    # ...pero la clave activa se libera y se puede volver a lanzar
+    t6, creado6 = gestor.encolar("zonas", lento, torneo_id=7, clave_activa="zonas:7")
+    assert creado6 and t6 is not t3
+    gestor.esperar(t6.id, 5)
+
+    assert [t.id for t in gestor.listar(torneo_id=7)][0] == t6.id
+    assert gestor.stats()["por_estado"][ESTADO_COMPLETADO] == 3
+    gestor.apagar(esperar=True)
+
+
+def test_expiracion():
+    gestor = GestorTrabajos(ttl_segundos=0)
+    trabajo, _ = gestor.encolar("fixture", lambda db, progreso: 1, clave_idempotencia="k")
+    # Hasta terminar no expira
+    while gestor._trabajos[trabajo.id].activo:
+        time.sleep(0.01)
+    assert gestor.obtener(trabajo.id) is None
+    assert gestor.stats()["claves_idempotencia"] == 0
+    nuevo, creado = gestor.encolar("fixture", lambda db, progreso: 2, clave_idempotencia="k")
+    assert creado and nuevo.id != trabajo.id
+    gestor.apagar(esperar=True)
+
+
+if __name__ == "__main__":
+    test_ciclo_completo()
+    test_errores()
+    test_idempotencia_y_clave_activa()
+    test_expiracion()
+    print("✅ Trabajos en segundo plano: estados, idempotencia y notificaciones")